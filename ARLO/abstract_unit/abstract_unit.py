@@ -160,6 +160,10 @@ class AbstractUnit:
         trying to be saved, plus the current time and date.
         
         Note that if checkpoint_log_path is not specified then no file will be saved.
+        
+        Returns
+        -------
+        This method returns the path of the pickle file, or None if no file was saved.
         """
         
         if(self.checkpoint_log_path is not None):              
@@ -172,8 +176,11 @@ class AbstractUnit:
                 #cf.https://docs.python.org/2/library/stdtypes.html#file.flush
                 pickle_file.flush()
                 os.fsync(pickle_file)
+                
+            return os.path.join(self.checkpoint_log_path, name_file_obj_to_save)
         else:
             self.logger.warning(msg='You cannot save the object since \'checkpoint_log_path\' is not specified!')
+            return None
             
     def update_verbosity(self, new_verbosity):
         """
@@ -81,6 +81,19 @@ class Block(AbstractUnit, ABC):
                     This parameter is also filled by the analyse method of the block.
                     
                     The default is None.  
+        
+        block_eps_eval: This is the evaluation of each episode of the block. It is filled by the metrics that can compare two 
+                        blocks episode by episode (i.e: the metric DiscountedReward with common random numbers) and it is passed
+                        by the Class Tuner to the method which_one_is_better of the metric.
+                        
+                        The default is None.
+        
+        epoch_callback: This is either None or a callable taking as parameters the current epoch and the current evaluation of 
+                        the block. It is called by the blocks that evaluate themselves during the learning (i.e: the online 
+                        model generation blocks) after each epoch: if it returns True the learning is stopped. This is used by 
+                        the Class TunerOptuna for pruning the unpromising trials.
+                        
+                        The default is None.
             
         The other parameters and non-parameters members are described in the Class AbstractUnit.
         """
@@ -106,6 +119,8 @@ class Block(AbstractUnit, ABC):
         self.is_learn_successful = False               
         self.is_parametrised = True
         self.block_eval = None
+        self.block_eps_eval = None
+        self.epoch_callback = None
     
     def __repr__(self):
         return 'Block'+'('+'eval_metric='+str(self.eval_metric)+', obj_name='+str(self.obj_name)\
@@ -29,6 +29,7 @@ from ARLO.block.block_output import BlockOutput
 from ARLO.block.block import Block
 from ARLO.dataset.dataset import TabularDataSet
 from ARLO.environment.environment import BaseWrapper
+from ARLO.environment.vector_env import VectorEnv
 from ARLO.hyperparameter.hyperparameter import Integer, Real, Categorical
 
 
@@ -138,6 +139,136 @@ class DataGeneration(Block):
                         
         return new_dataset
     
+    def _generate_a_dataset_batched(self, batched_env, n_samples, discrete_actions):
+        """
+        Parameters
+        ----------
+        batched_env: This must be an environment returned by the method get_batched_env of an object of a Class inheriting from 
+                     the Class BaseEnvironment: every row of its states is a different episode. Its horizon must be finite.
+     
+        n_samples: This is an integer greater than or equal to 1 and it represents the number of samples to extract from the 
+                   environment.
+                   
+        discrete_actions: This is True if the environment action space is Discrete, and False otherwise.
+                   
+        Returns
+        -------
+        The columns of a dataset with a number of samples equal to n_samples extracted with a random uniform policy: the states,
+        the actions, the rewards, the next states, the absorbing flags and the episode terminal flags. The samples are ordered 
+        episode by episode.
+        """
+        
+        #the rows are reset all together, after all their episodes are over: this only ends if the horizon is finite.
+        if(not np.isfinite(batched_env.info.horizon)):
+            exc_msg = 'The horizon of the \'batched_env\' must be finite!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        columns = [[], [], [], [], [], []]
+        tot_samples = 0
+        
+        while tot_samples < n_samples:
+            #each round runs batched_env.n_envs episodes at once:
+            steps_columns = [[], [], [], [], [], []]
+            active_masks = []
+            state = batched_env.reset()
+            last = np.zeros(batched_env.n_envs, dtype=bool)
+            episode_steps = 0
+            
+            while not last.all():
+                #If the action_space is Discrete I sample from a discrete uniform distribution, else if the action_space is Box 
+                #I sample from a continuous uniform distribution.
+                if(discrete_actions):
+                    action = self.local_prng.integers(batched_env.info.action_space.n, size=(batched_env.n_envs, 1))
+                else:
+                    action = batched_env.sample_from_box_action_space()
+                next_state, reward, done, _ = batched_env.step(action)
+                
+                #the samples of the episodes that were already over are discarded:
+                active_masks.append(~last)
+                
+                last = last | (not (episode_steps < batched_env.info.horizon)) | done
+                
+                for tmp_list, tmp_value in zip(steps_columns, [state, action, reward, next_state, done, last]):
+                    tmp_list.append(tmp_value)
+                
+                state = next_state
+                episode_steps += 1
+            
+            #the arrays have shape (n_steps, n_envs, ...): i move the episodes on the first axis so that the samples are ordered
+            #episode by episode. Each column keeps its own data type (e.g: the flags are booleans):
+            active_masks = np.swapaxes(np.array(active_masks), 0, 1)
+            for n in range(len(columns)):
+                tmp_col = np.swapaxes(np.array(steps_columns[n]), 0, 1)
+                columns[n].append(tmp_col[active_masks])
+                
+            tot_samples += int(np.sum(active_masks))
+            
+        columns = tuple(np.concatenate(tmp_col)[:n_samples] for tmp_col in columns)
+        
+        return columns
+    
+    def _generate_a_dataset_vectorized(self, vector_env, n_samples, discrete_actions):
+        """
+        Parameters
+        ----------
+        vector_env: This must be an object of Class VectorEnv with auto_reset equal to True.
+     
+        n_samples: This is an integer greater than or equal to 1 and it represents the number of samples to extract from the 
+                   environment.
+                   
+        discrete_actions: This is True if the environment action space is Discrete, and False otherwise.
+                   
+        Returns
+        -------
+        The columns of a dataset with a number of samples equal to n_samples extracted with a random uniform policy: the states,
+        the actions, the rewards, the next states, the absorbing flags and the episode terminal flags. The samples are ordered 
+        episode by episode.
+        
+        The copies of the environment are stepped until n_samples samples are collected: the copies whose episode is over are
+        reset by the VectorEnv and start a new episode. The episodes that are still running at the end are truncated, and their
+        last sample is flagged as episode terminal.
+        """
+        
+        episodes = []
+        running_episodes = [[] for i in range(vector_env.n_envs)]
+        tot_samples = 0
+        
+        state = vector_env.reset()
+        
+        while tot_samples < n_samples:
+            #If the action_space is Discrete I sample from a discrete uniform distribution, else if the action_space is Box I 
+            #sample from a continuous uniform distribution.
+            if(discrete_actions):
+                action = self.local_prng.integers(vector_env.info.action_space.n, size=(vector_env.n_envs, 1))
+            else:
+                action = vector_env.sample_from_box_action_space()
+            next_state, reward, last, infos = vector_env.step(action)
+            
+            for i in range(vector_env.n_envs):
+                #if the copy was reset then next_state contains the first state of its new episode:
+                tmp_next_state = infos[i].get('terminal_observation', next_state[i])
+                running_episodes[i].append([state[i], action[i], reward[i], tmp_next_state, infos[i]['absorbing'], last[i]])
+                
+                if(last[i]):
+                    episodes.append(running_episodes[i])
+                    running_episodes[i] = []
+                    
+            tot_samples += vector_env.n_envs
+            state = next_state
+        
+        for tmp_episode in running_episodes:
+            if(len(tmp_episode) > 0):
+                tmp_episode[-1][5] = True
+                episodes.append(tmp_episode)
+        
+        samples = [tmp_sample for tmp_episode in episodes for tmp_sample in tmp_episode][:n_samples]
+        
+        #each column keeps its own data type (e.g: the flags are booleans):
+        columns = tuple(np.array([tmp_sample[n] for tmp_sample in samples]) for n in range(6))
+        
+        return columns
+    
     def pre_learn_check(self, train_data=None, env=None):
         """
         Parameters
@@ -355,40 +486,65 @@ class DataGenerationRandomUniformPolicy(DataGeneration):
                                            seeder=self.seeder, log_mode=self.log_mode, 
                                            checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
         
-        if(self.n_jobs > self.algo_params['n_samples'].current_actual_value):
+        n_samples = self.algo_params['n_samples'].current_actual_value
+        
+        if(self.n_jobs > n_samples):
             self.logger.warning(msg='\'n_jobs\' cannot be higher than \'n_samples\', setting \'n_jobs\' equal to \'n_samples\'!')
-            self.n_jobs = self.algo_params['n_samples'].current_actual_value
-            
-        if(self.n_jobs == 1):
-            #in the call of the parallel function i am setting: samples[agent_index], thus even if i use a single process i need
-            #to have a list otherwise i cannot index an integer:
-            samples = [self.algo_params['n_samples'].current_actual_value]
-            envs = [starting_env]
-        else: 
-            samples = []
-            envs = []
-            for i in range(self.n_jobs):
-                samples.append(int(self.algo_params['n_samples'].current_actual_value/self.n_jobs))
-                envs.append(copy.deepcopy(starting_env))
-                envs[i].set_local_prng(new_seeder=starting_env.seeder+i)
+            self.n_jobs = n_samples
+        
+        #if the env can be batched all the episodes are run at once:
+        batched_env = None
+        if((not discrete_actions) and np.isfinite(starting_env.info.horizon)):
+            n_episodes = int(np.ceil(n_samples/starting_env.info.horizon))
+            batched_env = starting_env.get_batched_env(n_envs=n_episodes, seeder=starting_env.seeder)
+        
+        if(batched_env is not None):
+            generated_columns = self._generate_a_dataset_batched(batched_env=batched_env, n_samples=n_samples, 
+                                                                 discrete_actions=discrete_actions)
+            generated_dataset.set_columns(*generated_columns)
+        elif(np.isfinite(starting_env.info.horizon)):
+            #else the episodes are run on a VectorEnv with n_jobs copies of the env, where the i-th copy is seeded with 
+            #starting_env.seeder+i. If n_jobs is greater than 1 the copies are stepped by persistent worker processes:
+            vector_env_mode = 'sync'
+            if(self.n_jobs > 1):
+                vector_env_mode = 'subprocess'
                 
-            samples[-1] = self.algo_params['n_samples'].current_actual_value - sum(samples[:-1])
-
-        parallel_generated_datasets = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
-        parallel_generated_datasets = parallel_generated_datasets(delayed(self._generate_a_dataset)(envs[agent_index], 
-                                                                                                    samples[agent_index],
-                                                                                                    discrete_actions,
-                                                                                                    None) 
-                                                                  for agent_index in range(self.n_jobs))
-        stacked_dataset = []
-        for n in range(len(parallel_generated_datasets)):
-            #concatenates the two lists:
-            stacked_dataset += parallel_generated_datasets[n]
-        
-        generated_dataset.dataset = stacked_dataset
-        
-        #transforms tuples to lists. This is needed since tuples are immutable:
-        generated_dataset.tuples_to_lists()
+            with VectorEnv(obj_name=str(self.obj_name)+'_vector_env', env=starting_env, n_envs=self.n_jobs, 
+                           mode=vector_env_mode, n_workers=self.n_jobs, auto_reset=True, seeder=starting_env.seeder, 
+                           log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                           verbosity=self.verbosity) as vector_env:
+                generated_columns = self._generate_a_dataset_vectorized(vector_env=vector_env, n_samples=n_samples, 
+                                                                        discrete_actions=discrete_actions)
+            generated_dataset.set_columns(*generated_columns)
+        else:
+            #with an infinite horizon each of the n_jobs copies of the env extracts its share of the samples one step at a time:
+            if(self.n_jobs == 1):
+                #in the call of the parallel function i am setting: samples[agent_index], thus even if i use a single process i 
+                #need to have a list otherwise i cannot index an integer:
+                samples = [n_samples]
+                envs = [starting_env]
+            else: 
+                samples = []
+                envs = []
+                for i in range(self.n_jobs):
+                    samples.append(int(n_samples/self.n_jobs))
+                    envs.append(starting_env.make_copy(seeder=starting_env.seeder+i))
+                    
+                samples[-1] = n_samples - sum(samples[:-1])
+    
+            parallel_generated_datasets = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
+            parallel_generated_datasets = parallel_generated_datasets(delayed(self._generate_a_dataset)(envs[agent_index], 
+                                                                                                        samples[agent_index],
+                                                                                                        discrete_actions,
+                                                                                                        None) 
+                                                                      for agent_index in range(self.n_jobs))
+            stacked_dataset = []
+            for n in range(len(parallel_generated_datasets)):
+                #concatenates the two lists:
+                stacked_dataset += parallel_generated_datasets[n]
+            
+            #the list of samples is parsed into the columns of the dataset:
+            generated_dataset.dataset = stacked_dataset
         
         res = BlockOutput(obj_name=str(self.obj_name)+'_result', log_mode=self.log_mode, 
                           checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity, train_data=generated_dataset)
@@ -996,8 +1152,7 @@ class DataGenerationMEPOL(DataGeneration):
             envs = []
             for i in range(self.n_jobs):
                 samples.append(int(self.algo_params['n_samples'].current_actual_value/self.n_jobs))
-                envs.append(copy.deepcopy(env))
-                envs[i].set_local_prng(new_seeder=env.seeder+i)
+                envs.append(env.make_copy(seeder=env.seeder+i))
                 
             samples[-1] = self.algo_params['n_samples'].current_actual_value - sum(samples[:-1])
 
@@ -1123,9 +1278,7 @@ class DataGenerationMEPOL(DataGeneration):
                                            horizon=env.info.horizon, obj_name=self.obj_name+str('_generated_dataset'),
                                            seeder=self.seeder, log_mode=self.log_mode, 
                                            checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
-        
-        #transforms tuples to lists. This is needed since tuples are immutable:
-        generated_dataset.tuples_to_lists()
+
         
         res = BlockOutput(obj_name=str(self.obj_name)+'_result', log_mode=self.log_mode, 
                           checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity, train_data=generated_dataset)
@@ -240,18 +240,14 @@ class DataPreparationImputation(DataPreparation):
                          current state, the action, the reward and the next state.    
         """
         
-        stacked_dataset = []
-        
         #I assume to have a vector of data that is of the proper length, and some of its members are numpy.nan
-        for i in range(len(train_data.dataset)):
-            current_sample = train_data.dataset[i]
-            
-            new_sample = np.hstack((current_sample[0].ravel(), 
-                                    current_sample[1].ravel(),
-                                    current_sample[2],
-                                    current_sample[3].ravel())).tolist()
-            
-            stacked_dataset.append(new_sample)
+        n_samples = len(train_data)
+        
+        #the columns are stacked directly, one row per sample:
+        stacked_dataset = np.hstack((train_data.get_states().reshape(n_samples, -1), 
+                                     train_data.get_actions().reshape(n_samples, -1),
+                                     train_data.get_rewards().reshape(n_samples, -1),
+                                     train_data.get_next_states().reshape(n_samples, -1)))
         
         return stacked_dataset
     
@@ -345,18 +341,14 @@ class DataPreparation1NNImputation(DataPreparationImputation):
         else:
             size_act_space = 1
         
-        parsed_data = train_data.parse_data() 
-        imputed_dataset = train_data.arrays_as_data(imputed_res[:,:size_obs_space], 
-                                                    imputed_res[:,size_obs_space:size_obs_space+size_act_space],
-                                                    imputed_res[:,size_obs_space+size_act_space],
-                                                    imputed_res[:,size_obs_space+size_act_space+1:
-                                                                  2*size_obs_space+size_act_space+1],
-                                                    parsed_data[4],
-                                                    parsed_data[5]
-                                                    )
-        
         new_tabular_dataset = copy.deepcopy(train_data)
-        new_tabular_dataset.dataset = imputed_dataset
+        new_tabular_dataset.set_columns(states=imputed_res[:,:size_obs_space], 
+                                        actions=imputed_res[:,size_obs_space:size_obs_space+size_act_space],
+                                        rewards=imputed_res[:,size_obs_space+size_act_space],
+                                        next_states=imputed_res[:,size_obs_space+size_act_space+1:
+                                                         2*size_obs_space+size_act_space+1],
+                                        absorbing=train_data.get_absorbing(), 
+                                        episode_terminals=train_data.get_episode_terminals())
         
         return new_tabular_dataset
     
@@ -451,18 +443,14 @@ class DataPreparationMeanImputation(DataPreparationImputation):
         for i in range(2*size_obs_space+size_act_space+1):
             formatted_data[np.isnan(formatted_data[:,i]),i] = mean_value[i]
         
-        parsed_data = train_data.parse_data() 
-        imputed_dataset = train_data.arrays_as_data(formatted_data[:,:size_obs_space], 
-                                                    formatted_data[:,size_obs_space:size_obs_space+size_act_space],
-                                                    formatted_data[:,size_obs_space+size_act_space],
-                                                    formatted_data[:,size_obs_space+size_act_space+1:
-                                                                     2*size_obs_space+size_act_space+1],
-                                                    parsed_data[4],
-                                                    parsed_data[5]
-                                                    )
-        
         new_tabular_dataset = copy.deepcopy(train_data)
-        new_tabular_dataset.dataset = imputed_dataset
+        new_tabular_dataset.set_columns(states=formatted_data[:,:size_obs_space], 
+                                        actions=formatted_data[:,size_obs_space:size_obs_space+size_act_space],
+                                        rewards=formatted_data[:,size_obs_space+size_act_space],
+                                        next_states=formatted_data[:,size_obs_space+size_act_space+1:
+                                                         2*size_obs_space+size_act_space+1],
+                                        absorbing=train_data.get_absorbing(), 
+                                        episode_terminals=train_data.get_episode_terminals())
         
         return new_tabular_dataset
     
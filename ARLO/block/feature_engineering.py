@@ -837,11 +837,9 @@ class FeatureEngineeringRFS(FeatureEngineering):
             new_data.observation_space = new_obs_space
             new_data.action_space = new_act_space
             
-            new_data.dataset = new_data.arrays_as_data(states=new_current_states, actions=new_actions, 
-                                                       rewards=old_data.get_rewards(), next_states=new_next_states, 
-                                                       absorbings=old_data.get_absorbing(), 
-                                                       lasts=old_data.get_episode_terminals())
-            new_data.tuples_to_lists()
+            new_data.set_columns(states=new_current_states, actions=new_actions, rewards=old_data.get_rewards(), 
+                                 next_states=new_next_states, absorbing=old_data.get_absorbing(), 
+                                 episode_terminals=old_data.get_episode_terminals())
             
             return new_data
         else:
@@ -1250,11 +1248,9 @@ class FeatureEngineeringFSCMI(FeatureEngineering):
             new_data.observation_space = new_obs_space
             new_data.action_space = new_act_space
             
-            new_data.dataset = new_data.arrays_as_data(states=new_current_states, actions=new_actions, 
-                                                        rewards=old_data.get_rewards(), next_states=new_next_states, 
-                                                        absorbings=old_data.get_absorbing(), 
-                                                        lasts=old_data.get_episode_terminals())
-            new_data.tuples_to_lists()
+            new_data.set_columns(states=new_current_states, actions=new_actions, rewards=old_data.get_rewards(), 
+                                 next_states=new_next_states, absorbing=old_data.get_absorbing(), 
+                                 episode_terminals=old_data.get_episode_terminals())
             
             return new_data
         else:
@@ -1577,11 +1573,9 @@ class FeatureEngineeringNystroemMap(FeatureEngineering):
         old_next_states = old_data.get_next_states()
         new_next_states = self.algo_object.transform(old_next_states)
        
-        new_data.dataset = new_data.arrays_as_data(states=new_states, actions=old_data.get_actions(), 
-                                                   rewards=old_data.get_rewards(), 
-                                                   next_states=new_next_states, absorbings=old_data.get_absorbing(), 
-                                                   lasts=old_data.get_episode_terminals())
-        new_data.tuples_to_lists()
+        new_data.set_columns(states=new_states, actions=old_data.get_actions(), rewards=old_data.get_rewards(), 
+                             next_states=new_next_states, absorbing=old_data.get_absorbing(), 
+                             episode_terminals=old_data.get_episode_terminals())
 
         return new_data
     
@@ -12,6 +12,7 @@ import copy
 from ARLO.block.block_output import BlockOutput
 from ARLO.block.model_generation import ModelGeneration
 from ARLO.block.model_generation_default import automatic_model_generation_default
+from ARLO.tuner.tuner_scheduler import TunerScheduler
 
                 
 class AutoModelGeneration(ModelGeneration):
@@ -21,13 +22,25 @@ class AutoModelGeneration(ModelGeneration):
     """
 
     def __init__(self, eval_metric, obj_name, seeder=2, tuner_blocks_dict=None, log_mode='console', 
-                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process', budget_allocator=None):
         """
         Parameters
         ----------
         tuner_blocks_dict: This is a dictionary where the key is a string name while the value is an object of a Class inheriting 
                            from the Class Tuner.
         
+        n_jobs: This is the number of workers shared by the tuners in tuner_blocks_dict: if it is greater than 1 then the tuners
+                are run concurrently by a TunerScheduler, and each of them uses at most its share of the n_jobs workers.
+                
+                The default is 1.
+        
+        budget_allocator: This is either None or an object of Class TunerBudgetAllocator. If it is not None then the tuners in
+                          tuner_blocks_dict are not tuned with their whole budget: the budget_allocator gives their tuning
+                          rounds to the most performing ones, up to its total_budget. The tuners that never got a round are not
+                          considered.
+                          
+                          The default is None.
+        
         Non-Parameters Members
         ----------------------
         tuner_blocks_dict_upon_instantiation: This a copy of the original value of tuner_blocks_dict, namely the value of 
@@ -69,6 +82,8 @@ class AutoModelGeneration(ModelGeneration):
             self.logger.exception(msg=exc_msg)
             raise ValueError(exc_msg)
         
+        self.budget_allocator = budget_allocator
+        
         self.fully_instantiated = False
         self.info_MDP = None 
         self.tuner_blocks_dict_upon_instantiation = copy.deepcopy(self.tuner_blocks_dict)
@@ -79,6 +94,7 @@ class AutoModelGeneration(ModelGeneration):
                +', tuner_blocks_dict='+str(self.tuner_blocks_dict)+', log_mode='+str(self.log_mode)\
                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+               +', budget_allocator='+str(self.budget_allocator)\
                +', works_on_online_rl='+str(self.works_on_online_rl)+', works_on_offline_rl='+str(self.works_on_offline_rl)\
                +', works_on_box_action_space='+str(self.works_on_box_action_space)\
                +', works_on_discrete_action_space='+str(self.works_on_discrete_action_space)\
@@ -177,8 +193,9 @@ class AutoModelGeneration(ModelGeneration):
         #count how many blocks i actually tuned:
         count_tuned_blocks = 0
         
-        best_agent = None
-        best_agent_eval = None
+        #the tuners that can be tuned are first selected, and then they are all tuned concurrently. Note that all the tuners are
+        #run before their results are checked: if a tuner fails the other ones are still tuned, and only then this block fails:
+        keys_to_tune = []
         for tmp_key in list(self.tuner_blocks_dict.keys()):
             #pick a Tuner
             tmp_tuner = self.tuner_blocks_dict[tmp_key]
@@ -221,9 +238,37 @@ class AutoModelGeneration(ModelGeneration):
                 #we need to skip an iteration of the loop
                 continue
             
-            #call tune method on Tuner. Returns the tuned agent and its evaluation:
-            #its evaluation, according to the provided evaluation metric
-            tmp_tuned_agent, tmp_tuned_agent_eval = tmp_tuner.tune(train_data=starting_train_data, env=starting_env)
+            keys_to_tune.append(tmp_key)
+        
+        #call tune method on each Tuner. Returns the tuned agent and its evaluation: its evaluation, according to the provided 
+        #evaluation metric. The tuners share the n_jobs of this block, or the budget of the budget_allocator:
+        if(self.budget_allocator is not None):
+            tuners_results = self.budget_allocator.run(tuners=[self.tuner_blocks_dict[tmp_key] for tmp_key in keys_to_tune], 
+                                                       tuners_names=keys_to_tune, eval_metric=self.eval_metric,
+                                                       train_datas=[starting_train_data]*len(keys_to_tune),
+                                                       envs=[starting_env]*len(keys_to_tune))
+        else:
+            tuner_scheduler = TunerScheduler(obj_name=str(self.obj_name)+'_tuner_scheduler', seeder=self.seeder, 
+                                             log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                             verbosity=self.verbosity, n_jobs=self.n_jobs, job_type=self.job_type)
+            
+            tuners_results = tuner_scheduler.run(tuners=[self.tuner_blocks_dict[tmp_key] for tmp_key in keys_to_tune], 
+                                                 tuners_names=keys_to_tune, 
+                                                 train_datas=[starting_train_data]*len(keys_to_tune),
+                                                 envs=[starting_env]*len(keys_to_tune))
+        
+        best_agent = None
+        best_agent_eval = None
+        for tmp_key, tmp_tuner_results in zip(keys_to_tune, tuners_results):
+            #with a budget_allocator a tuner may never get a tuning round:
+            if(tmp_tuner_results is None):
+                self.logger.info(msg='The tuner \''+str(tmp_key)+'\' did not get any tuning round from the budget allocator!')
+                continue
+            
+            tmp_tuned_agent, tmp_tuned_agent_eval, tmp_tuner = tmp_tuner_results
+            
+            #with process jobs the tuner was tuned in another process:
+            self.tuner_blocks_dict[tmp_key] = tmp_tuner
             
             #skip over the tuners that have input loader and metric not consistent:
             if(not tmp_tuner.is_metric_consistent_with_input_loader()):
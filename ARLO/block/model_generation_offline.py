@@ -206,7 +206,7 @@ class ModelGenerationMushroomOffline(ModelGeneration):
         copy_to_save.algo_object = None
                 
         #calls method save() implemented in base Class ModelGeneration of the instance copy_to_save
-        super(ModelGenerationMushroomOffline, copy_to_save).save()
+        return super(ModelGenerationMushroomOffline, copy_to_save).save()
     
     
 class ModelGenerationMushroomOfflineFQI(ModelGenerationMushroomOffline):
@@ -165,6 +165,8 @@ class ModelGenerationMushroomOnline(ModelGeneration):
 
         self.logger.info(msg='Starting evaluation: ' + str(starting_eval))
 
+        # the run is reported as pruned if the epoch callback stops the learning:
+        run_status = "finished"
         for n_epoch in range(self.algo_params['n_epochs'].current_actual_value):
             self.logger.info(msg='Epoch: ' + str(n_epoch))
 
@@ -213,7 +215,13 @@ class ModelGenerationMushroomOnline(ModelGeneration):
             logs = logs[-1:]
             requests.post(os.getenv("AUTORL_API_URL", "http://localhost:8000") + "/api/logs", json=logs)
 
-        model_payload["status"] = "finished"
+            # the epoch callback may ask to stop the learning, for example when a trial of the Class TunerOptuna is pruned:
+            if ((self.epoch_callback is not None) and self.epoch_callback(n_epoch + 1, tmp_eval)):
+                self.logger.info(msg='Learning stopped by the epoch callback after epoch: ' + str(n_epoch))
+                run_status = "pruned"
+                break
+
+        model_payload["status"] = run_status
         requests.post(os.getenv("AUTORL_API_URL", "http://localhost:8000") + "/api/models", json=model_payload)
 
         self.is_learn_successful = True
@@ -309,7 +317,7 @@ class ModelGenerationMushroomOnline(ModelGeneration):
         copy_to_save.algo_object = None
 
         # calls method save() implemented in base Class ModelGeneration of the instance copy_to_save
-        super(ModelGenerationMushroomOnline, copy_to_save).save()
+        return super(ModelGenerationMushroomOnline, copy_to_save).save()
 
 
 class ModelGenerationMushroomOnlineDQN(ModelGenerationMushroomOnline):
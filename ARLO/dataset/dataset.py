@@ -1,16 +1,28 @@
 """
-This module contains the implementation of the Class BaseDataSet and of the Class TabularDataSet. 
+This module contains the implementation of the Classes: BaseDataSet, TabularDataSet and TabularDataSetView. 
 
 The Class BaseDataSet inherits from the Class AbstractUnit and from ABC, while the Class TabularDataSet inherits from the 
-Class BaseDataSet.
+Class BaseDataSet. The Class TabularDataSetView inherits from the Class TabularDataSet.
 
 The Class BaseDataSet is an abstract Class used as base class for all types of data one can have: tabular data, image data, 
 text data.
 
-The Class TabularDataSet contains tabular data in its dataset member.
+The Class TabularDataSet contains tabular data stored column-wise: the dataset member is a list view built from the columns.
+
+The Class TabularDataSetView is a view over the rows of an object of Class TabularDataSet.
+
+This module also contains the function load_tabular_dataset which opens a TabularDataSet that was saved to disk with the method
+save_columns of the Class TabularDataSet.
 """
 
 from abc import ABC
+import os
+import copy
+import shutil
+import datetime
+import numpy as np
+
+import cloudpickle
 
 from mushroom_rl.core.environment import MDPInfo
 from mushroom_rl.utils.dataset import parse_dataset, arrays_as_dataset
@@ -18,6 +30,49 @@ from mushroom_rl.utils.dataset import parse_dataset, arrays_as_dataset
 from ARLO.abstract_unit.abstract_unit import AbstractUnit
 
 
+#these are the names of the columns of a TabularDataSet: each column is saved to disk in a .npy file with this name:
+TABULAR_DATASET_COLUMNS = ['states', 'actions', 'rewards', 'next_states', 'absorbing', 'episode_terminals']
+
+
+def load_tabular_dataset(columns_path, mmap_mode='r', log_mode='console', checkpoint_log_path=None, verbosity=3):
+    """
+    Parameters
+    ----------
+    columns_path: This must be an absolute path to a directory created with the method save_columns of the Class 
+                  TabularDataSet.
+                  
+    mmap_mode: This is the mode used to memory-map the .npy files containing the columns. It can be: 'r', 'r+', 'c' or None.
+               If None the columns are fully read into memory.
+               
+               cf. https://numpy.org/doc/stable/reference/generated/numpy.memmap.html
+               
+               The default is 'r'.
+               
+    The other parameters are described in the Class AbstractUnit.
+    
+    Returns
+    -------
+    loaded_data: This is an object of Class TabularDataSet whose columns are memory-mapped to the .npy files contained in the 
+                 directory columns_path. 
+                 
+    Since the columns are memory-mapped, the data is read from disk only when it is accessed and different processes opening 
+    the same directory share the same pages of memory.
+    """
+    
+    with open(os.path.join(columns_path, 'metadata.pkl'), 'rb') as metadata_file:
+        metadata = cloudpickle.load(metadata_file)
+    
+    loaded_data = TabularDataSet(dataset=None, observation_space=metadata['observation_space'], 
+                                 action_space=metadata['action_space'], discrete_actions=metadata['discrete_actions'], 
+                                 discrete_observations=metadata['discrete_observations'], gamma=metadata['gamma'],
+                                 horizon=metadata['horizon'], obj_name=metadata['obj_name'], seeder=metadata['seeder'], 
+                                 log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, verbosity=verbosity)
+    
+    loaded_data.open_columns(columns_path=columns_path, mmap_mode=mmap_mode)
+    
+    return loaded_data
+
+
 class BaseDataSet(AbstractUnit, ABC):
     """
     This is the base abstract Class for all the datasets. The idea is that the data can be any: text, image, tabular. 
@@ -76,6 +131,10 @@ class BaseDataSet(AbstractUnit, ABC):
 class TabularDataSet(BaseDataSet):
     """
     This Class is the generic base Class for tabular data. This Class inherits from the Class BaseDataSet.
+    
+    The data is stored column-wise: there is one contiguous numpy.ndarray for each of the fields of a sample (states, actions,
+    rewards, next states, absorbing state flags, episode terminal flags). The list form of the dataset (the one used by 
+    MushroomRL) is only built when the member dataset is accessed and it is then kept as a compatibility view.
     """
     
     def __init__(self, dataset, observation_space, action_space, discrete_actions, discrete_observations, gamma, horizon, 
@@ -84,8 +143,29 @@ class TabularDataSet(BaseDataSet):
         Parameters
         ----------
         dataset: This must be a list where each entry of the list is: current state, drawn action, reward, next state, 
-                 absorbing state flag, episode terminal flag.
-                                       
+                 absorbing state flag, episode terminal flag. It can be None: in this case the columns of the dataset can be 
+                 filled afterwards with the method set_columns.
+                 
+        Non-Parameters Members
+        ----------------------
+        states: This is a numpy.ndarray containing the current states. Each row refers to a single time step.
+        
+        actions: This is a numpy.ndarray containing the actions. Each row refers to a single time step.
+        
+        rewards: This is a numpy.ndarray containing the rewards. Each entry refers to a single time step.
+        
+        next_states: This is a numpy.ndarray containing the next states. Each row refers to a single time step.
+        
+        absorbing: This is a numpy.ndarray containing the absorbing state flags. Each entry refers to a single time step.
+        
+        episode_terminals: This is a numpy.ndarray containing the episode terminal flags. Each entry refers to a single time 
+                           step.
+                           
+        columns_path: This is the path to the directory containing the .npy files the columns are memory-mapped to. It is None 
+                      if the columns are in memory.
+                      
+        mmap_mode: This is the mode used to memory-map the columns. It is None if the columns are in memory.
+        
         The other parameters and non-parameters members are described in the Class BaseDataSet.
         """
         
@@ -94,16 +174,30 @@ class TabularDataSet(BaseDataSet):
                          seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, verbosity=verbosity,
                          n_jobs=n_jobs, job_type=job_type)
         
-        self.dataset = dataset
-                
-        #transform tuple into list. This is needed since tuples are immutable:
-        if(isinstance(self.dataset, list)):
-            self.tuples_to_lists()
-        else:
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.absorbing = None
+        self.episode_terminals = None
+        
+        #this is the list of lists view of the columns. It is built only when the member dataset is accessed:
+        self._dataset_list_view = None
+        
+        #this is the index of the episodes contained in the dataset. It is built only when it is requested:
+        self._episodes_index = None
+        
+        #these are set only when the columns are memory-mapped to the files created with the method save_columns:
+        self.columns_path = None
+        self.mmap_mode = None
+        
+        #if dataset is None the columns are expected to be filled afterwards with the method set_columns:
+        if((dataset is not None) and (not isinstance(dataset, list))):
             wrn_msg = 'You created an object of Class \'TabularDataSet\' but the member \'dataset\' is not a \'list\'!'\
-                      +' This means that the tuples in the dataset will not be transformed into lists! Transform it to \'list\''\
-                      +' to call the method \'tuples_to_lists\'!'
+                      +' Transform it to \'list\' or use the method \'set_columns\' to fill the columns of the dataset!'
             self.logger.warning(msg=wrn_msg)
+            
+        self.dataset = dataset
 
     def __repr__(self):
          #no dataset in this return since it is too long
@@ -112,22 +206,324 @@ class TabularDataSet(BaseDataSet):
                  +', gamma='+str(self.gamma)+', horizon='+str(self.horizon)+', obj_name='+str(self.obj_name)\
                  +', seeder='+str(self.seeder)+', local_prng='+ str(self.local_prng)+', log_mode='+str(self.log_mode)\
                  +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
-                 +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+                 +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', columns_path='+str(self.columns_path)\
+                 +', mmap_mode='+str(self.mmap_mode)+', logger='+str(self.logger)+')'
     
-    def tuples_to_lists(self):
+    def __len__(self):
+        """
+        Returns
+        -------
+        The number of samples contained in the dataset.
+        """
+        
+        if(self.rewards is None):
+            return 0
+        
+        return len(self.rewards)
+    
+    def __getstate__(self):
+        """
+        Returns
+        -------
+        state: This is the dictionary used for pickling and deep copying the object. 
+        
+        The list view of the dataset is not saved since it can always be rebuilt from the columns: in this way pickling and deep 
+        copying do not duplicate the data.
         """
-        This method transforms a list of tuples into a list of lists. This is needed since tuples are immutable. This method is
-        called in the __init__ only when the dataset parameter is not None. 
+        
+        state = self.__dict__.copy()
+        
+        if(state['states'] is not None):
+            state['_dataset_list_view'] = None
+        
+        #if the columns are memory-mapped only the path to the directory containing them is saved: in this way the data is 
+        #not copied when the object is sent to other processes:
+        if(state['columns_path'] is not None):
+            for tmp_column in TABULAR_DATASET_COLUMNS:
+                state[tmp_column] = None
+            
+        return state
+    
+    def __setstate__(self, state):
         """
+        Parameters
+        ----------
+        state: This is the dictionary created by the method __getstate__.
         
-        if(isinstance(self.dataset, list)):
-            for i in range(len(self.dataset)):
-                if(isinstance(self.dataset[i], tuple)):
-                    self.dataset[i] = list(self.dataset[i])
+        If the columns were memory-mapped they are memory-mapped again to the same files.
+        """
+        
+        self.__dict__.update(state)
+        
+        if(self.columns_path is not None):
+            self.open_columns(columns_path=self.columns_path, mmap_mode=self.mmap_mode)
+    
+    @property
+    def dataset(self):
+        """
+        This is a property method and it returns a list where each entry of the list is: current state, drawn action, reward, 
+        next state, absorbing state flag, episode terminal flag.
+        
+        The list is built from the columns the first time it is requested and then it is cached. The states, actions, next 
+        states of each entry are views over the rows of the columns.
+        """
+        
+        if((self._dataset_list_view is None) and (self.states is not None)):
+            self._dataset_list_view = [list(x) for x in self.arrays_as_data(states=self.states, actions=self.actions, 
+                                                                              rewards=self.rewards, 
+                                                                              next_states=self.next_states,
+                                                                              absorbings=self.absorbing, 
+                                                                              lasts=self.episode_terminals)]
+            
+        return self._dataset_list_view
+    
+    @dataset.setter
+    def dataset(self, new_dataset):
+        """
+        Parameters
+        ----------
+        new_dataset: This must be a list where each entry of the list is: current state, drawn action, reward, next state, 
+                     absorbing state flag, episode terminal flag. It can also be None.
+                     
+        The new_dataset is parsed into the columns and the cached list view is discarded.
+        """
+        
+        if((new_dataset is None) or (len(new_dataset) == 0)):
+            self.states = None
+            self.actions = None
+            self.rewards = None
+            self.next_states = None
+            self.absorbing = None
+            self.episode_terminals = None
+            
+            self._dataset_list_view = new_dataset
         else:
+            self.set_columns(*parse_dataset(dataset=new_dataset))
+            
+    def set_columns(self, states, actions, rewards, next_states, absorbing, episode_terminals):
+        """
+        Parameters
+        ----------
+        states: This must be an array containing the states. Each state refers to a single time step.
+        
+        actions: This must be an array containing the actions. Each action refers to a single time step.
+            
+        rewards: This must be an array containing the rewards. Each reward refers to a single time step.
+            
+        next_states: This must be an array containing the next state the agent reaches by taking the sampled action in the 
+                     current state.
+            
+        absorbing: This must be an array containing the flags indicating absorbing states.
+            
+        episode_terminals: This must be an array containing the flags indicating end of episodes states.
+        
+        This method sets the columns of the dataset and discards the cached list view of the dataset.
+        """
+        
+        n_samples = len(rewards)
+        if((len(states) != n_samples) or (len(actions) != n_samples) or (len(next_states) != n_samples) 
+           or (len(absorbing) != n_samples) or (len(episode_terminals) != n_samples)):
+            exc_msg = 'All the columns of an object of Class \'TabularDataSet\' must have the same length!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+            
+        self.states = np.ascontiguousarray(states)
+        self.actions = np.ascontiguousarray(actions)
+        self.rewards = np.ascontiguousarray(rewards)
+        self.next_states = np.ascontiguousarray(next_states)
+        self.absorbing = np.ascontiguousarray(absorbing)
+        self.episode_terminals = np.ascontiguousarray(episode_terminals)
+        
+        self._dataset_list_view = None
+        self._episodes_index = None
+        
+        #the new columns are not backed by the files in columns_path:
+        self.columns_path = None
+        self.mmap_mode = None
+        
+    def save_columns(self, columns_path=None):
+        """
+        Parameters
+        ----------
+        columns_path: This is the path of the directory where the dataset will be saved to. If None the directory is created
+                      inside checkpoint_log_path and its name is equal to the name given to the object plus the current time 
+                      and date.
+                      
+                      The default is None.
+                      
+        Returns
+        -------
+        columns_path: This is the path of the directory where the dataset was saved to. It is None if nothing was saved.
+        
+        This method saves each column of the dataset in a .npy file and the observation space, action space, gamma and horizon 
+        in a small metadata file. The directory can then be opened with the function load_tabular_dataset: the columns are 
+        memory-mapped and thus the data is neither copied nor fully read.
+        
+        If columns_path already exists its content is replaced: the columns are first written to a temporary directory which 
+        then takes the place of columns_path, so that no file of a previous dataset is left in it.
+        
+        Note that if columns_path and checkpoint_log_path are both not specified then nothing will be saved.
+        """
+        
+        if(columns_path is None):
+            if(self.checkpoint_log_path is None):
+                self.logger.warning(msg='You cannot save the columns since \'checkpoint_log_path\' is not specified!')
+                return None
+            
+            columns_path = os.path.join(self.checkpoint_log_path, 
+                                        str(self.obj_name)+datetime.datetime.now().strftime('_%H_%M_%S__%d_%m_%Y')+'_columns')
+        
+        if(self.states is None):
+            exc_msg = 'Cannot save the columns: the dataset is empty!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+            
+        columns_path = os.path.normpath(columns_path)
+        tmp_columns_path = columns_path+'.'+str(os.getpid())+'.tmp'
+        if(os.path.isdir(tmp_columns_path)):
+            shutil.rmtree(tmp_columns_path)
+        os.makedirs(tmp_columns_path)
+        
+        for tmp_column in TABULAR_DATASET_COLUMNS:
+            with open(os.path.join(tmp_columns_path, tmp_column+'.npy'), 'wb') as column_file:
+                np.save(column_file, getattr(self, tmp_column), allow_pickle=False)
+                column_file.flush()
+                os.fsync(column_file)
+                
+        metadata = {'obj_name': self.obj_name, 'observation_space': self.observation_space, 
+                    'action_space': self.action_space, 'discrete_actions': self.discrete_actions, 
+                    'discrete_observations': self.discrete_observations, 'gamma': self.gamma, 'horizon': self.horizon,
+                    'seeder': self.seeder, 'n_samples': len(self)}
+        
+        #the metadata file is written last: if it exists then all the columns were written to disk:
+        with open(os.path.join(tmp_columns_path, 'metadata.pkl'), 'wb') as metadata_file:
+            #protocol 4 is to ensure backward compatibility between python3.8 and python3.7
+            cloudpickle.dump(metadata, metadata_file, protocol=4)
+            metadata_file.flush()
+            os.fsync(metadata_file)
+        
+        #the previous content of columns_path is moved away before the new directory takes its place:
+        if(os.path.exists(columns_path)):
+            old_columns_path = columns_path+'.'+str(os.getpid())+'.old'
+            os.rename(columns_path, old_columns_path)
+            os.rename(tmp_columns_path, columns_path)
+            shutil.rmtree(old_columns_path, ignore_errors=True)
+        else:
+            os.rename(tmp_columns_path, columns_path)
+            
+        self.logger.info(msg='The columns of the dataset were saved to: '+str(columns_path))
+        
+        return columns_path
+        
+    def open_columns(self, columns_path, mmap_mode='r'):
+        """
+        Parameters
+        ----------
+        columns_path: This must be the path to a directory created with the method save_columns.
+        
+        mmap_mode: This is the mode used to memory-map the .npy files containing the columns. It can be: 'r', 'r+', 'c' or None.
+                   If None the columns are fully read into memory.
+                   
+                   The default is 'r'.
+                   
+        This method sets the columns of the dataset to the numpy.memmap of the .npy files contained in columns_path.
+        """
+        
+        if(not os.path.isfile(os.path.join(columns_path, 'metadata.pkl'))):
+            exc_msg = 'The directory \'columns_path\' does not contain a complete dataset saved with \'save_columns\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+            
+        columns = {}
+        for tmp_column in TABULAR_DATASET_COLUMNS:
+            columns[tmp_column] = np.load(os.path.join(columns_path, tmp_column+'.npy'), mmap_mode=mmap_mode, 
+                                          allow_pickle=False)
+        
+        self.set_columns(**columns)
+        
+        #if mmap_mode is None the columns were read in memory and so they are not backed by the files:
+        if(mmap_mode is not None):
+            self.columns_path = columns_path
+            self.mmap_mode = mmap_mode
+        
+    def get_episodes_index(self):
+        """
+        Returns
+        -------
+        episodes_starts: This is a numpy.ndarray containing, for each episode, the index of its first row.
+        
+        episodes_ends: This is a numpy.ndarray containing, for each episode, the index of the row after its last row.
+        
+        The i-th episode is made of the rows going from episodes_starts[i] to episodes_ends[i]-1. The episodes are found by 
+        looking at the episode terminal flags: if the last row of the dataset is not an episode terminal then the last episode 
+        ends with the last row of the dataset. 
+        
+        The index is computed only the first time this method is called and then it is cached.
+        """
+        
+        if(self._episodes_index is None):
+            n_samples = len(self)
+            
+            if(n_samples == 0):
+                exc_msg = 'Cannot compute the index of the episodes: the dataset is empty!'
+                self.logger.exception(msg=exc_msg)
+                raise ValueError(exc_msg)
+            
+            episodes_ends = np.flatnonzero(self.get_episode_terminals()) + 1
+            if((len(episodes_ends) == 0) or (episodes_ends[-1] != n_samples)):
+                episodes_ends = np.append(episodes_ends, n_samples)
+                
+            episodes_starts = np.concatenate(([0], episodes_ends[:-1]))
+            
+            self._episodes_index = (episodes_starts, episodes_ends)
+            
+        return self._episodes_index
+    
+    def select_rows(self, rows, obj_name):
+        """
+        Parameters
+        ----------
+        rows: This is an array of integers containing the indices of the samples to select. The same index can appear more than
+              once.
+              
+        obj_name: This is a string and it is the name of the new object.
+
+        Returns
+        -------
+        new_data: This is a new object of Class TabularDataSet whose columns are obtained by indexing the columns of this object
+                  with rows.
+        """
+        
+        new_data = TabularDataSet(dataset=None, observation_space=self.observation_space, action_space=self.action_space, 
+                                  discrete_actions=self.discrete_actions, discrete_observations=self.discrete_observations, 
+                                  gamma=self.gamma, horizon=self.horizon, obj_name=obj_name, seeder=self.seeder, 
+                                  log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                  verbosity=self.verbosity)
+        
+        rows = np.asarray(rows, dtype=int)
+        new_data.set_columns(states=self.states[rows], actions=self.actions[rows], rewards=self.rewards[rows], 
+                             next_states=self.next_states[rows], absorbing=self.absorbing[rows], 
+                             episode_terminals=self.episode_terminals[rows])
+        
+        return new_data
+        
+    def tuples_to_lists(self):
+        """
+        This method transforms a list of tuples into a list of lists. This is needed since tuples are immutable. 
+        
+        Since the list view of the dataset is always built as a list of lists this method only needs to act on a list view that
+        was already built.
+        """
+        
+        if((self.states is None) and (self._dataset_list_view is None)):
             exc_msg = '\'tuples_to_lists \' can be called only if \'dataset\' is a \'list\'!'
             self.logger.exception(msg=exc_msg)
             raise TypeError(exc_msg)
+            
+        if(self._dataset_list_view is not None):
+            for i in range(len(self._dataset_list_view)):
+                if(isinstance(self._dataset_list_view[i], tuple)):
+                    self._dataset_list_view[i] = list(self._dataset_list_view[i])
     
     @staticmethod
     def arrays_as_data(states, actions, rewards, next_states, absorbings, lasts):
@@ -162,13 +558,13 @@ class TabularDataSet(BaseDataSet):
         """
         Returns
         -------
-        The six arrays that are obtained by parsing the dataset: states, actions, rewards, next_states, absorbing state flags, 
+        The six arrays making up the columns of the dataset: states, actions, rewards, next_states, absorbing state flags, 
         episode terminals flags.
+        
+        Note that these are the arrays stored in the object and not copies.
         """
         
-        #from the dataset we build the arrays of attributes using the mushroom_rl.utils.dataset parse_dataset function it
-        #returns: states,actions,rewards,next_states,absorbing,episode_terminals
-        return parse_dataset(dataset=self.dataset)
+        return self.states, self.actions, self.rewards, self.next_states, self.absorbing, self.episode_terminals
  
     def get_states(self):
         """
@@ -177,8 +573,7 @@ class TabularDataSet(BaseDataSet):
         states: the current states array.
         """
         
-        states = self.parse_data()[0]
-        return states
+        return self.states
     
     def get_actions(self):
         """
@@ -187,8 +582,7 @@ class TabularDataSet(BaseDataSet):
         actions: the current actions array.
         """
         
-        actions = self.parse_data()[1]
-        return actions
+        return self.actions
 
     def get_rewards(self):
         """
@@ -197,8 +591,7 @@ class TabularDataSet(BaseDataSet):
         rewards: the current rewards array.
         """
         
-        rewards = self.parse_data()[2]
-        return rewards
+        return self.rewards
     
     def get_next_states(self):
         """
@@ -207,9 +600,7 @@ class TabularDataSet(BaseDataSet):
         next_states: the next states array.
         """
         
-        
-        next_states = self.parse_data()[3]
-        return next_states
+        return self.next_states
     
     def get_absorbing(self):
         """
@@ -218,8 +609,7 @@ class TabularDataSet(BaseDataSet):
         absorbing: the absorbing state flags array.
         """
         
-        absorbing = self.parse_data()[4]
-        return absorbing
+        return self.absorbing
  
     def get_episode_terminals(self):
         """
@@ -228,5 +618,269 @@ class TabularDataSet(BaseDataSet):
         episode_terminals: the episode terminals flags array.
         """
         
-        episode_terminals = self.parse_data()[5]
-        return episode_terminals
\ No newline at end of file
+        return self.episode_terminals
+
+
+class TabularDataSetView(TabularDataSet):
+    """
+    This Class is a lightweight view over the columns of an object of Class TabularDataSet. This Class inherits from the Class 
+    TabularDataSet.
+    
+    A TabularDataSetView only holds a reference to the parent dataset and an array of row indices: the columns are obtained by 
+    fancy indexing the columns of the parent dataset each time they are requested. In this way sub-sampling a dataset many times 
+    does not copy the data.
+    
+    If new columns are set, the view stops referencing the parent dataset and it stores the new columns.
+    """
+    
+    def __init__(self, parent_data, rows, obj_name):
+        """
+        Parameters
+        ----------
+        parent_data: This must be an object of Class TabularDataSet. If it is an object of Class TabularDataSetView then the 
+                     new view is created directly over the parent dataset of parent_data.
+        
+        rows: This is an array of integers containing the indices of the rows of parent_data that make up this view. The same 
+              index can appear more than once. If None then all the rows of parent_data make up this view.
+              
+        obj_name: This is a string and it is the name of the view.
+        
+        Note that the __init__ of the Class TabularDataSet is not called: the members are taken from parent_data, except the 
+        logger, which is a shallow copy of the logger of parent_data with the name of the view (so that it writes to the same log
+        file), and the local_prng, which is created from the seeder: a view never draws from the local_prng of parent_data.
+        """
+        
+        if(rows is not None):
+            rows = np.asarray(rows, dtype=int)
+        
+        #a view of a view is a view over the same parent dataset:
+        if(isinstance(parent_data, TabularDataSetView)):
+            if(rows is None):
+                rows = parent_data.rows
+            elif(parent_data.rows is not None):
+                rows = parent_data.rows[rows]
+            parent_data = parent_data.parent_data
+        
+        self.parent_data = parent_data
+        self.rows = rows
+        
+        self.obj_name = obj_name
+        self.log_mode = parent_data.log_mode
+        self.checkpoint_log_path = parent_data.checkpoint_log_path
+        self.verbosity = parent_data.verbosity
+        self.logger = copy.copy(parent_data.logger)
+        self.logger.name_obj_logging = self.obj_name
+        self.n_jobs = parent_data.n_jobs
+        self.job_type = parent_data.job_type
+        self.backend = parent_data.backend
+        self.prefer = parent_data.prefer
+        self.seeder = parent_data.seeder
+        self.local_prng = np.random.default_rng(self.seeder)
+        
+        self.observation_space = parent_data.observation_space
+        self.action_space = parent_data.action_space
+        self.discrete_actions = parent_data.discrete_actions
+        self.discrete_observations = parent_data.discrete_observations
+        self.gamma = parent_data.gamma
+        self.horizon = parent_data.horizon
+        
+        self._dataset_list_view = None
+        self._episodes_index = None
+        self.columns_path = None
+        self.mmap_mode = None
+        
+    def __repr__(self):
+         #no dataset in this return since it is too long
+         return 'TabularDataSetView('+'parent_data='+str(self.parent_data.obj_name)+', n_rows='+str(len(self))\
+                 +', observation_space='+str(self.observation_space)+', action_space='+str(self.action_space)\
+                 +', discrete_actions='+str(self.discrete_actions)+', discrete_observations='+str(self.discrete_observations)\
+                 +', gamma='+str(self.gamma)+', horizon='+str(self.horizon)+', obj_name='+str(self.obj_name)\
+                 +', seeder='+str(self.seeder)+', local_prng='+ str(self.local_prng)+', log_mode='+str(self.log_mode)\
+                 +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+                 +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+        
+    def __len__(self):
+        """
+        Returns
+        -------
+        The number of rows contained in the view.
+        """
+        
+        if(self.rows is None):
+            return len(self.parent_data)
+        
+        return len(self.rows)
+    
+    def __getstate__(self):
+        """
+        Returns
+        -------
+        state: This is the dictionary used for pickling and deep copying the object. The list view of the dataset is not saved.
+        
+        If the columns of the parent dataset are memory-mapped only the path to their directory and the rows of the view are 
+        saved. Otherwise only the rows of the parent dataset selected by the view are saved: the saved view refers to a new 
+        parent dataset containing just these rows.
+        """
+        
+        state = self.__dict__.copy()
+        state['_dataset_list_view'] = None
+        
+        if((self.rows is not None) and (self.parent_data.columns_path is None) and (self.parent_data.states is not None)):
+            #a shallow copy shares the columns of the parent dataset and these are then replaced by the indexed ones:
+            materialized_parent_data = copy.copy(self.parent_data)
+            materialized_parent_data.set_columns(*self.parse_data())
+            
+            state['parent_data'] = materialized_parent_data
+            state['rows'] = None
+        
+        return state
+    
+    def __setstate__(self, state):
+        """
+        Parameters
+        ----------
+        state: This is the dictionary created by the method __getstate__.
+        """
+        
+        self.__dict__.update(state)
+    
+    def _get_column(self, column_name):
+        """
+        Parameters
+        ----------
+        column_name: This is a string and it is one of the names in TABULAR_DATASET_COLUMNS.
+        
+        Returns
+        -------
+        The column of the parent dataset indexed with the rows of the view. 
+        """
+        
+        parent_column = getattr(self.parent_data, column_name)
+        
+        if((self.rows is None) or (parent_column is None)):
+            return parent_column
+        
+        return parent_column[self.rows]
+        
+    @property
+    def states(self):
+        return self._get_column(column_name='states')
+    
+    @property
+    def actions(self):
+        return self._get_column(column_name='actions')
+    
+    @property
+    def rewards(self):
+        return self._get_column(column_name='rewards')
+    
+    @property
+    def next_states(self):
+        return self._get_column(column_name='next_states')
+    
+    @property
+    def absorbing(self):
+        return self._get_column(column_name='absorbing')
+    
+    @property
+    def episode_terminals(self):
+        return self._get_column(column_name='episode_terminals')
+    
+    def parse_data(self):
+        """
+        Returns
+        -------
+        The six arrays making up the columns of the view: states, actions, rewards, next_states, absorbing state flags, episode
+        terminals flags. 
+        
+        Note that unlike the method parse_data of the Class TabularDataSet these are new arrays, obtained by fancy indexing the
+        columns of the parent dataset.
+        """
+        
+        return self.states, self.actions, self.rewards, self.next_states, self.absorbing, self.episode_terminals
+    
+    @TabularDataSet.dataset.setter
+    def dataset(self, new_dataset):
+        """
+        Parameters
+        ----------
+        new_dataset: This must be a list where each entry of the list is: current state, drawn action, reward, next state, 
+                     absorbing state flag, episode terminal flag. It can also be None.
+                     
+        The view stops referencing the parent dataset: from now on it refers to a new object of Class TabularDataSet containing
+        new_dataset.
+        """
+        
+        self._detach_from_parent(new_parent_data=TabularDataSet(dataset=new_dataset, 
+                                                                observation_space=self.observation_space,
+                                                                action_space=self.action_space, 
+                                                                discrete_actions=self.discrete_actions, 
+                                                                discrete_observations=self.discrete_observations, 
+                                                                gamma=self.gamma, horizon=self.horizon, 
+                                                                obj_name=self.obj_name, seeder=self.seeder, 
+                                                                log_mode=self.log_mode, 
+                                                                checkpoint_log_path=self.checkpoint_log_path, 
+                                                                verbosity=self.verbosity))
+        
+    def set_columns(self, states, actions, rewards, next_states, absorbing, episode_terminals):
+        """
+        Parameters
+        ----------
+        The parameters are described in the method set_columns of the Class TabularDataSet.
+        
+        The view stops referencing the parent dataset: from now on it refers to a new object of Class TabularDataSet containing
+        the new columns.
+        """
+        
+        new_parent_data = TabularDataSet(dataset=None, observation_space=self.observation_space, 
+                                         action_space=self.action_space, discrete_actions=self.discrete_actions, 
+                                         discrete_observations=self.discrete_observations, gamma=self.gamma, 
+                                         horizon=self.horizon, obj_name=self.obj_name, seeder=self.seeder, 
+                                         log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                         verbosity=self.verbosity)
+        
+        new_parent_data.set_columns(states=states, actions=actions, rewards=rewards, next_states=next_states, 
+                                    absorbing=absorbing, episode_terminals=episode_terminals)
+        
+        self._detach_from_parent(new_parent_data=new_parent_data)
+        
+    def _detach_from_parent(self, new_parent_data):
+        """
+        Parameters
+        ----------
+        new_parent_data: This is an object of Class TabularDataSet that will be the new parent dataset of the view. 
+        
+        The view will contain all the rows of new_parent_data.
+        """
+        
+        self.parent_data = new_parent_data
+        self.rows = None
+        self._dataset_list_view = None
+        self._episodes_index = None
+        
+    def open_columns(self, columns_path, mmap_mode='r'):
+        """
+        Parameters
+        ----------
+        The parameters are described in the method open_columns of the Class TabularDataSet.
+        
+        The view stops referencing the parent dataset: from now on it refers to the dataset contained in columns_path.
+        """
+        
+        self._detach_from_parent(new_parent_data=load_tabular_dataset(columns_path=columns_path, mmap_mode=mmap_mode, 
+                                                                      log_mode=self.log_mode, 
+                                                                      checkpoint_log_path=self.checkpoint_log_path,
+                                                                      verbosity=self.verbosity))
+        
+    def select_rows(self, rows, obj_name):
+        """
+        Parameters
+        ----------
+        The parameters are described in the method select_rows of the Class TabularDataSet.
+            
+        Returns
+        -------
+        An object of Class TabularDataSetView over the same parent dataset of this view.
+        """
+        
+        return TabularDataSetView(parent_data=self, rows=rows, obj_name=obj_name)
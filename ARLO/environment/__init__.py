@@ -1 +1,2 @@
-from ARLO.environment.environment import *
\ No newline at end of file
+from ARLO.environment.environment import *
+from ARLO.environment.vector_env import *
\ No newline at end of file
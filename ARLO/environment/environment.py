@@ -1,6 +1,6 @@
 """
-This module contains the implementation of the Classes: BaseEnvironment, BaseWrapper, BaseObservationWrapper, BaseActionWrapper,
-BaseRewardWrapper, BaseGridWorld, BaseCarOnHill, BaseCartPole, BaseInvertedPendulum and LQG.
+This module contains the implementation of the Classes: BaseEnvironment, EnvironmentFactory, BaseWrapper, BaseObservationWrapper,
+BaseActionWrapper, BaseRewardWrapper, BaseGridWorld, BaseCarOnHill, BaseCartPole, BaseInvertedPendulum, LQG and BatchedLQG.
 
 Then there are the Mujoco Environments Wrappers: BaseMujoco, BaseHalfCheetah, BaseAnt, BaseHopper, BaseHumanoid, BaseSwimmer, 
 BaseWalker2d
@@ -9,6 +9,9 @@ The Class BaseEnvironment inherits from the Class AbstractUnit and from ABC.
 
 The Class BaseEnvironment is an abstract Class used as base class for all types of environments.
 
+The Class EnvironmentFactory inherits from the Class AbstractUnit and it is used to build new, independently seeded, instances of
+an environment without deep copying it.
+
 The Class BaseWrapper is used as generic wrapper Class. The Classes BaseObservationWrapper, BaseActionWrapper and 
 BaseRewardWrapper are abstract Classes, that when sub-classed can be used to wrap something specific of an environment.
 
@@ -17,15 +20,24 @@ but they are changed so to inherit from the Class BaseEnvironment so that they c
 
 The Class LQG is a re-adaptation of code copied from: https://github.com/T3p/potion/blob/master/potion/envs/lq.py
 
+The Class BatchedLQG inherits from the Class LQG and it steps several independent LQG systems at once.
+
 The Classes BaseHalfCheetah, BaseAnt, BaseHopper, BaseHumanoid, BaseSwimmer and BaseWalker2d inherit from the Class BaseMujoco
 and are simply wrappers of the corresponding OpenAI gym Classes.
 """
 
-from abc import ABC, abstractmethod
+from abc import ABC, ABCMeta, abstractmethod
+import os
+import copy
+import hashlib
+import inspect
+import threading
 import numpy as np
 import scipy
 import math
 
+import cloudpickle
+
 from gym.envs.mujoco.half_cheetah_v3 import HalfCheetahEnv
 from gym.envs.mujoco.ant_v3 import AntEnv
 from gym.envs.mujoco.hopper_v3 import HopperEnv
@@ -40,7 +52,29 @@ from mushroom_rl.environments import GridWorld, CarOnHill, CartPole, InvertedPen
 from ARLO.abstract_unit.abstract_unit import AbstractUnit
 
 
-class BaseEnvironment(AbstractUnit, ABC):
+#this is the cache of the environments built by the objects of Class EnvironmentFactory. Since it is a module level variable each
+#worker process has its own cache:
+_ENVIRONMENTS_CACHE = {}
+
+#this is the maximum number of environments kept in the cache of each process:
+_ENVIRONMENTS_CACHE_MAX_SIZE = 256
+
+
+class _EnvironmentMeta(ABCMeta):
+    """
+    This is the metaclass of the Class BaseEnvironment: right after the construction of an environment it saves a fingerprint
+    of its members, so that the Class EnvironmentFactory can detect the members that were modified directly afterwards.
+    """
+    
+    def __call__(cls, *args, **kwargs):
+        new_env = super().__call__(*args, **kwargs)
+        
+        new_env._constructed_members = new_env._get_members_fingerprint()
+        
+        return new_env
+    
+    
+class BaseEnvironment(AbstractUnit, ABC, metaclass=_EnvironmentMeta):
     """
     This is the base environment Class based on the OpenAI Gym class. Part of this class is a re-adaptation of code copied from: 
     -OpenAI gym: 
@@ -56,6 +90,27 @@ class BaseEnvironment(AbstractUnit, ABC):
     This Class is an abstract Class and it inherits from the Class AbstractUnit.
     """
     
+    #these members change while the environment is used and they are not compared with the ones set by the constructor:
+    _RUNTIME_MEMBERS = ('obj_name', 'seeder', 'local_prng', 'logger', 'log_mode', 'checkpoint_log_path', 'verbosity', 'n_jobs', 
+                        'job_type', 'state', 'n_steps', 'timestep', 'viewer', 'is_eval_phase')
+    
+    def __new__(cls, *args, **kwargs):
+        """
+        The arguments passed to the constructor are saved in the member _constructor_args: these are needed to build new 
+        instances of the environment with the Class EnvironmentFactory.
+        
+        This is done here and not in the __init__ since some environments do not call the __init__ of this Class.
+        """
+        
+        new_env = super().__new__(cls)
+        
+        new_env._constructor_args = (args, kwargs)
+        
+        #these are the parameters set with the method set_params after the creation of the environment:
+        new_env._set_params_history = {}
+        
+        return new_env
+    
     def __init__(self, obj_name, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, 
                  job_type='process'):        
         """
@@ -235,6 +290,10 @@ class BaseEnvironment(AbstractUnit, ABC):
             for tmp_key in list(params_dict.keys()):
                 if(hasattr(self, tmp_key)):
                     setattr(self, tmp_key, params_dict[tmp_key])
+                    
+                    #i keep track of the parameters that were set so that the Class EnvironmentFactory can set them again:
+                    if(hasattr(self, '_set_params_history')):
+                        self._set_params_history.update({tmp_key: params_dict[tmp_key]})
                 else:
                     exc_msg = 'The environment does not have the member \''+str(tmp_key)+'\'!'
                     self.logger.exception(msg=exc_msg)
@@ -267,8 +326,359 @@ class BaseEnvironment(AbstractUnit, ABC):
                 raise AttributeError(exc_msg)
                 
         return params_dict
+    
+    def get_factory(self):
+        """
+        Returns
+        -------
+        env_factory: This is an object of Class EnvironmentFactory that can be used to build new instances of this environment.
+        
+        If the arguments passed to the constructor of this environment are known then the new instances are built by calling 
+        the constructor, and then by setting again all the parameters that were set with the method set_params. 
+        
+        Otherwise (for example for objects that were pickled before the arguments passed to the constructor were saved, or if a
+        member of the environment named as a parameter of its constructor was modified directly, and not with the method 
+        set_params, after its construction) the new instances are deep copies of this environment.
+        """
+        
+        factory_params = dict(obj_name=str(self.obj_name)+'_factory', seeder=self.seeder, log_mode=self.log_mode, 
+                              checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
+        
+        constructor_args = getattr(self, '_constructor_args', None)
+        
+        if((constructor_args is not None) and (not self._is_modified_after_construction())):
+            args, kwargs = constructor_args
+            
+            #the environments that were passed to the constructor (e.g: the env wrapped by a wrapper) are replaced by their
+            #factories:
+            nested_factories_args = [tmp_arg.get_factory() if isinstance(tmp_arg, BaseEnvironment) else tmp_arg 
+                                     for tmp_arg in args]
+            nested_factories_kwargs = {}
+            for tmp_key in list(kwargs.keys()):
+                if(isinstance(kwargs[tmp_key], BaseEnvironment)):
+                    nested_factories_kwargs[tmp_key] = kwargs[tmp_key].get_factory()
+                else:
+                    nested_factories_kwargs[tmp_key] = kwargs[tmp_key]
+            
+            env_factory = EnvironmentFactory(env_class=self.__class__, env_args=nested_factories_args, 
+                                             env_kwargs=nested_factories_kwargs, 
+                                             env_set_params=copy.deepcopy(self._set_params_history), **factory_params)
+        else:
+            env_factory = EnvironmentFactory(env_template=self, **factory_params)
+            
+        return env_factory
+            
+    def _get_constructor_params_names(self):
+        """
+        Returns
+        -------
+        params_names: This is a set with the names of the parameters of the constructor of the environment, and with the names
+                      of the keyword arguments that were passed to it.
+        """
+        
+        params_names = set(inspect.signature(self.__class__.__init__).parameters.keys())
+        
+        constructor_args = getattr(self, '_constructor_args', None)
+        if(constructor_args is not None):
+            params_names.update(constructor_args[1].keys())
+        
+        return params_names
+    
+    def _get_members_fingerprint(self):
+        """
+        Returns
+        -------
+        fingerprint: This is a dictionary with as keys the names of the members of the environment and as values either the 
+                     value of the member, for plain values, or a digest of it. Only the members named as a parameter of the
+                     constructor are included, except the private members and the members in _RUNTIME_MEMBERS: the other 
+                     members (e.g: the simulators built by the constructor) can be big and pickling them for each copy of the 
+                     environment would be too slow.
+        """
+        
+        fingerprint = {}
+        
+        constructor_params_names = self._get_constructor_params_names()
+        
+        for tmp_key, tmp_value in self.__dict__.items():
+            if(tmp_key.startswith('_') or (tmp_key in self._RUNTIME_MEMBERS) or (tmp_key not in constructor_params_names)):
+                continue
+            
+            if((tmp_value is None) or isinstance(tmp_value, (bool, int, float, str))):
+                fingerprint[tmp_key] = tmp_value
+            elif(isinstance(tmp_value, np.ndarray)):
+                fingerprint[tmp_key] = (tmp_value.shape, str(tmp_value.dtype), 
+                                        hashlib.sha1(np.ascontiguousarray(tmp_value).tobytes()).hexdigest())
+            elif(isinstance(tmp_value, BaseEnvironment)):
+                fingerprint[tmp_key] = tmp_value._get_members_fingerprint()
+            else:
+                try:
+                    fingerprint[tmp_key] = hashlib.sha1(cloudpickle.dumps(tmp_value, protocol=4)).hexdigest()
+                except Exception:
+                    #if the member cannot be pickled i can only check that it is still the same object:
+                    fingerprint[tmp_key] = id(tmp_value)
+        
+        return fingerprint
+    
+    def _is_modified_after_construction(self):
+        """
+        Returns
+        -------
+        True if a member of the environment named as a parameter of its constructor was modified directly, and not with the 
+        method set_params, after its construction, False otherwise. If the fingerprint of the members at construction time is 
+        not known it returns False.
+        """
+        
+        constructed_members = getattr(self, '_constructed_members', None)
+        if(constructed_members is None):
+            return False
+        
+        current_members = self._get_members_fingerprint()
+        
+        for tmp_key in set(constructed_members.keys()) | set(current_members.keys()):
+            #the parameters set with the method set_params are set again by the Class EnvironmentFactory:
+            if(tmp_key in getattr(self, '_set_params_history', {})):
+                continue
+            
+            if((tmp_key not in constructed_members) or (tmp_key not in current_members) 
+               or (constructed_members[tmp_key] != current_members[tmp_key])):
+                return True
+            
+        return False
+    
+    def make_copy(self, seeder=None, obj_name=None):
+        """
+        Parameters
+        ----------
+        seeder: This is the seeder used to set the local_prng of the new instance. If None the seeder of this environment is 
+                used.
+                
+                The default is None.
+                
+        obj_name: This is the name of the new instance. If None the name of this environment is used.
+        
+                  The default is None.
+                  
+        Returns
+        -------
+        A new instance of this environment built with the object of Class EnvironmentFactory returned by the method get_factory.
+        """
+        
+        if(seeder is None):
+            seeder = self.seeder
+            
+        new_env = self.get_factory().make(seeder=seeder, obj_name=obj_name)
+        
+        if(obj_name is None):
+            new_env.obj_name = self.obj_name
+        
+        return new_env
+    
+    def get_batched_env(self, n_envs, seeder=None):
+        """
+        Parameters
+        ----------
+        n_envs: This is an integer greater than or equal to 1 and it is the number of independent copies of this environment to
+                step at once.
+                
+        seeder: This is the seeder of the batched environment. If None the seeder of this environment is used.
+                
+                The default is None.
+        
+        Returns
+        -------
+        None: by default an environment cannot be batched. The environments that can be batched override this method and return
+        an environment whose methods reset and step work on n_envs states at once: the states are numpy arrays of shape 
+        (n_envs, state dimension), the rewards and the done flags are numpy arrays of shape (n_envs,).
+        """
+        
+        return None
                 
         
+class EnvironmentFactory(AbstractUnit):
+    """
+    This Class contains everything that is needed to build a new instance of an environment: the Class of the environment, the
+    arguments passed to its constructor and the parameters that were set afterwards with the method set_params. The new 
+    instance is then seeded with the seeder passed to the method make.
+    
+    This is cheaper and more robust than deep copying an environment, and it can also be used in the worker processes: since
+    an object of this Class is small it can be sent to the worker processes where the environments are built and cached.
+    
+    If the arguments passed to the constructor of the environment are not known then this Class falls back to deep copying a
+    template environment.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, env_class=None, env_args=None, env_kwargs=None, env_set_params=None, env_template=None, 
+                 seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        env_class: This is the Class of the environment. It must be a Class inheriting from the Class BaseEnvironment.
+        
+                   The default is None.
+                   
+        env_args: This is a list containing the positional arguments to pass to the constructor of env_class. Any object of 
+                  Class EnvironmentFactory in it is replaced by the environment it builds.
+                  
+                  The default is None.
+                  
+        env_kwargs: This is a dictionary containing the keyword arguments to pass to the constructor of env_class. Any object of 
+                    Class EnvironmentFactory in it is replaced by the environment it builds.
+                    
+                    The default is None.
+                    
+        env_set_params: This is a dictionary containing the parameters to set, with the method set_params, on the environment 
+                        after its creation.
+                        
+                        The default is None.
+                        
+        env_template: This is an object of a Class inheriting from the Class BaseEnvironment. If env_class is None then the new
+                      instances are deep copies of env_template.
+                      
+                      The default is None.
+                      
+        Non-Parameters Members
+        ----------------------
+        factory_id: This is a string identifying the environment built by this factory: two objects of this Class with the same 
+                    factory_id build the same environment. This is used as key for the cache of the environments. It is None
+                    if the environment cannot be identified, in which case the environments are not cached.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, 
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.env_class = env_class
+        self.env_args = env_args
+        if(self.env_args is None):
+            self.env_args = []
+        self.env_kwargs = env_kwargs
+        if(self.env_kwargs is None):
+            self.env_kwargs = {}
+        self.env_set_params = env_set_params
+        if(self.env_set_params is None):
+            self.env_set_params = {}
+        self.env_template = env_template
+        
+        if((self.env_class is None) and (self.env_template is None)):
+            exc_msg = 'In the \'EnvironmentFactory\' either \'env_class\' or \'env_template\' must not be \'None\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.factory_id = None
+        if(self.env_class is not None):
+            try:
+                #the nested factories are identified by their factory_id:
+                spec_args = [tmp_arg.factory_id if isinstance(tmp_arg, EnvironmentFactory) else tmp_arg 
+                             for tmp_arg in self.env_args]
+                spec_kwargs = {}
+                for tmp_key in list(self.env_kwargs.keys()):
+                    if(isinstance(self.env_kwargs[tmp_key], EnvironmentFactory)):
+                        spec_kwargs[tmp_key] = self.env_kwargs[tmp_key].factory_id
+                    else:
+                        spec_kwargs[tmp_key] = self.env_kwargs[tmp_key]
+                    
+                spec = (self.env_class, spec_args, spec_kwargs, self.env_set_params)
+                self.factory_id = hashlib.sha1(cloudpickle.dumps(spec, protocol=4)).hexdigest()
+            except Exception:
+                #if the spec cannot be pickled the environment cannot be identified and so it is not cached: a random id would 
+                #add a new entry to the cache for each new factory.
+                self.factory_id = None
+                
+    def __repr__(self):
+        return 'EnvironmentFactory('+'env_class='+str(self.env_class)+', env_args='+str(self.env_args)\
+               +', env_kwargs='+str(self.env_kwargs)+', env_set_params='+str(self.env_set_params)\
+               +', env_template='+str(self.env_template)+', factory_id='+str(self.factory_id)\
+               +', obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)+', local_prng='+str(self.local_prng)\
+               +', log_mode='+str(self.log_mode)+', checkpoint_log_path='+str(self.checkpoint_log_path)\
+               +', verbosity='+str(self.verbosity)+', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+               +', logger='+str(self.logger)+')'
+    
+    def _build(self):
+        """
+        Returns
+        -------
+        new_env: This is a new instance of the environment.
+        """
+        
+        if(self.env_class is None):
+            return copy.deepcopy(self.env_template)
+        
+        #the arguments are copied so that the new instances do not share mutable objects (e.g: arrays) among them:
+        args = [tmp_arg.make() if isinstance(tmp_arg, EnvironmentFactory) else copy.deepcopy(tmp_arg) 
+                for tmp_arg in self.env_args]
+        kwargs = {}
+        for tmp_key in list(self.env_kwargs.keys()):
+            if(isinstance(self.env_kwargs[tmp_key], EnvironmentFactory)):
+                kwargs[tmp_key] = self.env_kwargs[tmp_key].make()
+            else:
+                kwargs[tmp_key] = copy.deepcopy(self.env_kwargs[tmp_key])
+        
+        new_env = self.env_class(*args, **kwargs)
+        
+        return new_env
+        
+    def make(self, seeder=None, obj_name=None, use_cache=False, cache_slot=0):
+        """
+        Parameters
+        ----------
+        seeder: This is the seeder used to set the local_prng of the new instance. If None the seeder of this object is used.
+        
+                The default is None.
+                
+        obj_name: This is the name of the new instance. If None the name is the one the environment gets from its constructor.
+        
+                  The default is None.
+                  
+        use_cache: This is either True or False. If True the environment is taken from the cache of the current process, if it 
+                   is there, otherwise it is built and put in the cache. This avoids building the same environment over and over
+                   in the same worker process.
+                   
+                   The default is False.
+                   
+        cache_slot: This is an integer and it is needed when more instances of the same environment have to be used at the same
+                    time in the same process: different cache_slot correspond to different instances.
+                    
+                    The default is 0.
+        
+        Returns
+        -------
+        new_env: This is a new instance of the environment seeded with seeder.
+        """
+        
+        if(seeder is None):
+            seeder = self.seeder
+        
+        if(use_cache and (self.factory_id is not None)):
+            #each thread of each process has its own environments:
+            cache_key = (os.getpid(), threading.get_ident(), self.factory_id, cache_slot)
+            
+            new_env = _ENVIRONMENTS_CACHE.get(cache_key, None)
+            if(new_env is None):
+                new_env = self._build()
+                
+                if(len(_ENVIRONMENTS_CACHE) >= _ENVIRONMENTS_CACHE_MAX_SIZE):
+                    #dictionaries keep the insertion order: i remove the oldest environment
+                    _ENVIRONMENTS_CACHE.pop(next(iter(_ENVIRONMENTS_CACHE)))
+                    
+                _ENVIRONMENTS_CACHE[cache_key] = new_env
+        else:
+            new_env = self._build()
+        
+        #a cached environment may have been modified: i set again the parameters every time:
+        if(len(self.env_set_params) > 0):
+            new_env.set_params(params_dict=copy.deepcopy(self.env_set_params))
+            
+        new_env.set_local_prng(new_seeder=seeder)
+        
+        if(obj_name is not None):
+            new_env.obj_name = obj_name
+            
+        return new_env
+        
+        
 class BaseWrapper(BaseEnvironment):
     """
     This is the base wrapper Class based on the OpenAI Wrapper Class. Part of this class is a re-adaptation of code copied from 
@@ -764,7 +1174,7 @@ class LQG(BaseEnvironment):
         
         self.timestep += 1
                 
-        return np.array(self.state), -np.asscalar(cost), self.timestep >= self.horizon, {'danger':0} 
+        return np.array(self.state), -float(cost), self.timestep >= self.horizon, {'danger':0} 
 
     def reset(self, state=None):
         """
@@ -860,6 +1270,292 @@ class LQG(BaseEnvironment):
                 
         return -K
     
+    def evaluate_linear_policy(self, K, k=None, check_bounds=True, n_std=3):
+        """
+        Parameters
+        ----------
+        K: This is the gain matrix, of shape (da, ds), of the linear policy: a_t = K s_t + k.
+        
+        k: This is the offset, of shape (da,), of the policy. If None the policy is linear and the offset is zero.
+        
+           The default is None.
+           
+        check_bounds: This is either True or False. If True the method checks that the states and the actions do not reach 
+                      max_pos and max_action, and if they may reach them it returns None.
+                      
+                      The default is True.
+        
+        n_std: This is the number of standard deviations of the Gaussian noise that are considered when checking the bounds.
+        
+               The default is 3.
+           
+        Returns
+        -------
+        expected_return: This is the expected discounted return, over horizon steps, obtained by the policy a_t = K s_t + k on 
+                         this environment. It is a float, or None if check_bounds is True and the states or the actions may be 
+                         clipped.
+                         
+        The expected return is computed exactly, without rolling out the policy, by propagating the mean and the second moment 
+        of the state: 
+        m_{t+1} = (A+BK) m_t + B k 
+        P_{t+1} = (A+BK) P_t (A+BK)^T + (A+BK) m_t (Bk)^T + Bk m_t^T (A+BK)^T + Bk (Bk)^T + B C B^T + E E^T
+        
+        where C is the controller_noise (only if is_eval_phase is True) and E is the env_noise. The initial state is uniform in 
+        [-max_pos, max_pos] and so m_0 = 0 and P_0 = diag(max_pos^2/3).
+        
+        The expected reward at step t is: -tr(Q P_t) - tr(R (K P_t K^T + K m_t k^T + k m_t^T K^T + k k^T + C)).
+        
+        Note that this does not take into account the clipping of the states and of the actions: the result is exact only if 
+        the states and the actions do not reach max_pos and max_action. The state is s_t = M^t s_0 + m_t + w_t, where w_t is the 
+        zero mean Gaussian noise accumulated so far, and so if check_bounds is True at each step it is checked that:
+        |M^t| max_pos + |m_t| + n_std*std(w_t) <= max_pos 
+        |K M^t| max_pos + |K m_t + k| + n_std*std(K w_t + controller noise) <= max_action
+        
+        In particular for t=0 the second condition is: |K| max_pos + |k| + n_std*std(controller noise) <= max_action.
+        """
+        
+        K = np.array(K, dtype=float).reshape(self.da, self.ds)
+        
+        if(k is None):
+            k = np.zeros(self.da)
+        k = np.array(k, dtype=float).reshape(self.da)
+        
+        if(not np.isfinite(self.horizon)):
+            exc_msg = 'The method \'evaluate_linear_policy\' needs a finite \'horizon\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        A = np.array(self.A, dtype=float)
+        B = np.array(self.B, dtype=float)
+        Q = np.array(self.Q, dtype=float)
+        R = np.array(self.R, dtype=float)
+        
+        if(self.is_eval_phase):
+            C = np.array(self.controller_noise, dtype=float)
+        else:
+            C = np.zeros((self.da, self.da))
+            
+        E = np.array(self.env_noise, dtype=float)
+        
+        M = A + np.dot(B, K)
+        Bk = np.dot(B, k)
+        noise_cov = np.dot(B, np.dot(C, B.T)) + np.dot(E, E.T)
+        
+        m = np.zeros(self.ds)
+        P = np.diag(np.array(self.max_pos, dtype=float)**2/3)
+        
+        max_pos = np.array(self.max_pos, dtype=float)*np.ones(self.ds)
+        max_action = np.array(self.max_action, dtype=float)*np.ones(self.da)
+        
+        #M^t and the covariance of the noise accumulated up to step t:
+        M_t = np.eye(self.ds)
+        noise_cov_t = np.zeros((self.ds, self.ds))
+        
+        expected_return = 0
+        for t in range(int(self.horizon)):
+            if(check_bounds):
+                #the initial state is always inside the bounds:
+                if(t > 0):
+                    state_reach = np.dot(np.abs(M_t), max_pos) + np.abs(m) + n_std*np.sqrt(np.diag(noise_cov_t))
+                    if(np.any(state_reach > max_pos*(1+1e-8))):
+                        self.logger.warning(msg='The states may reach \'max_pos\': the discounted reward cannot be computed in'
+                                                +' closed form!')
+                        return None
+                
+                action_noise_cov = np.dot(K, np.dot(noise_cov_t, K.T)) + C
+                action_reach = np.dot(np.abs(np.dot(K, M_t)), max_pos) + np.abs(np.dot(K, m) + k)\
+                               + n_std*np.sqrt(np.diag(action_noise_cov))
+                if(np.any(action_reach > max_action*(1+1e-8))):
+                    self.logger.warning(msg='The actions may reach \'max_action\': the discounted reward cannot be computed in'
+                                            +' closed form!')
+                    return None
+                
+                M_t = np.dot(M, M_t)
+                noise_cov_t = np.dot(M, np.dot(noise_cov_t, M.T)) + noise_cov
+                
+            Km = np.dot(K, m)
+            action_second_moment = np.dot(K, np.dot(P, K.T)) + np.outer(Km, k) + np.outer(k, Km) + np.outer(k, k) + C
+            expected_cost = np.trace(np.dot(Q, P)) + np.trace(np.dot(R, action_second_moment))
+            
+            expected_return -= (self.gamma**t)*expected_cost
+            
+            Mm = np.dot(M, m)
+            P = np.dot(M, np.dot(P, M.T)) + np.outer(Mm, Bk) + np.outer(Bk, Mm) + np.outer(Bk, Bk) + noise_cov
+            m = Mm + Bk
+            
+        return float(expected_return)
+    
+    def get_batched_env(self, n_envs, seeder=None):
+        """
+        Parameters
+        ----------
+        n_envs: This is an integer greater than or equal to 1 and it is the number of independent copies of this environment to
+                step at once.
+                
+        seeder: This is the seeder of the batched environment. If None the seeder of this environment is used.
+                
+                The default is None.
+        
+        Returns
+        -------
+        batched_env: This is an object of Class BatchedLQG with the same matrices, bounds, horizon, discount factor and 
+                     is_eval_phase of this environment.
+        """
+        
+        if(seeder is None):
+            seeder = self.seeder
+        
+        #the bounds are stored as vectors: the constructor wants scalars
+        batched_env = BatchedLQG(obj_name=str(self.obj_name)+'_batched', n_envs=n_envs, A=self.A, B=self.B, Q=self.Q, R=self.R,
+                                 max_pos=1.0, max_action=1.0, env_noise=self.env_noise, 
+                                 controller_noise=self.controller_noise, horizon=self.horizon, gamma=self.gamma, 
+                                 seeder=seeder, log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                 verbosity=self.verbosity)
+        
+        batched_env.max_pos = np.array(self.max_pos)
+        batched_env.max_action = np.array(self.max_action)
+        batched_env.observation_space = self.observation_space
+        batched_env.action_space = self.action_space
+        batched_env.is_eval_phase = self.is_eval_phase
+        
+        return batched_env
+    
+    
+class BatchedLQG(LQG):
+    """
+    This Class steps n_envs independent LQG systems at once: the states are stored in a numpy array of shape (n_envs, ds) and the
+    dynamics, the costs and the noises are computed with matrix operations over all the systems.
+    
+    The initial states and the noises of all the systems are drawn at once from the local_prng: the trajectories are 
+    reproducible given the seeder of this environment, but the i-th row does not follow the same trajectory of an object of
+    Class LQG.
+    
+    The methods reset and step return and take numpy arrays with one row per system.
+    """
+    
+    def __init__(self, obj_name, n_envs=1, A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=1.0, max_action=1.0, 
+                 env_noise=np.eye(1), controller_noise=np.eye(1), horizon=10, gamma=0.9, seeder=2, log_mode='console', 
+                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        n_envs: This is an integer greater than or equal to 1 and it is the number of independent LQG systems.
+        
+                The default is 1.
+                
+        Non-Parameters Members
+        ----------------------
+        controller_noise_factor: This is the matrix used to sample the controller noise from standard normal samples. It is the
+                                 same factorisation used by numpy in the method multivariate_normal.
+        
+        The other parameters and non-parameters members are described in the Class LQG.
+        """
+        
+        super().__init__(obj_name=obj_name, A=A, B=B, Q=Q, R=R, max_pos=max_pos, max_action=max_action, env_noise=env_noise, 
+                         controller_noise=controller_noise, horizon=horizon, gamma=gamma, seeder=seeder, log_mode=log_mode, 
+                         checkpoint_log_path=checkpoint_log_path, verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.n_envs = n_envs
+        if((not isinstance(self.n_envs, (int, np.integer))) or (self.n_envs < 1)):
+            exc_msg = '\'n_envs\' must be an integer greater than or equal to 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        u, s, vh = np.linalg.svd(self.controller_noise)
+        self.controller_noise_factor = np.sqrt(s)[:, None]*vh
+        
+    def __repr__(self):
+        return 'BatchedLQG('+'n_envs='+str(self.n_envs)+', observation_space='+str(self.observation_space)\
+                +', action_space='+str(self.action_space)+', gamma='+str(self.gamma)+', horizon='+str(self.horizon)\
+                +', A='+str(self.A)+', B='+str(self.B)+', Q='+str(self.Q)+', R='+str(self.R)\
+                +', env_noise='+str(self.env_noise)+', controller_noise='+str(self.controller_noise)\
+                +', is_eval_phase='+str(self.is_eval_phase)+', obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)\
+                +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'   
+                
+    def seed(self, seed=None):
+        """
+        Method used to seed the environment.
+        """
+        
+        if(seed is not None):
+            self.set_local_prng(new_seeder=seed)
+            
+    def sample_from_box_action_space(self):
+        """
+        This method samples one action for each system from the Box Action Space.
+        """
+        
+        samples = self.local_prng.uniform(low=self.action_space.low, high=self.action_space.high, 
+                                          size=(self.n_envs,)+tuple(self.action_space.shape))
+        
+        return samples
+    
+    def step(self, action):
+        """
+        Parameters
+        ----------
+        action: This is a numpy array of shape (n_envs, da) containing one action for each system. If da is 1 then also an 
+                array of shape (n_envs,) is accepted.
+                
+        Returns
+        -------
+        The next states, a numpy array of shape (n_envs, ds), the rewards, a numpy array of shape (n_envs,), the done flags, a
+        numpy array of shape (n_envs,), and a dictionary.
+        """
+        
+        u = np.reshape(np.asarray(action, dtype=float), (self.n_envs, self.da))
+        
+        if(self.is_eval_phase):
+            std_normal_samples = self.local_prng.standard_normal((self.n_envs, self.da))
+            u = u + np.dot(std_normal_samples, self.controller_noise_factor)
+        
+        u = np.clip(u, -self.max_action, self.max_action)
+        
+        #makes the noise different at each step and for each system:
+        std_normal_samples = self.local_prng.standard_normal((self.n_envs, self.ds))
+        env_noise = np.dot(std_normal_samples, self.env_noise.T)
+        
+        xn = np.clip(np.dot(self.state, self.A.T) + np.dot(u, self.B.T) + env_noise, -self.max_pos, self.max_pos)
+        
+        #row-wise quadratic forms:
+        cost = np.einsum('ij,jk,ik->i', self.state, self.Q, self.state) + np.einsum('ij,jk,ik->i', u, self.R, u)
+        
+        self.state = xn
+        
+        self.timestep += 1
+        
+        done = np.full(self.n_envs, self.timestep >= self.horizon)
+        
+        return np.array(self.state), -cost, done, {'danger':0}
+    
+    def reset(self, state=None):
+        """
+        Parameters
+        ----------
+        state: This is either None or a numpy array of shape (n_envs, ds) with the initial state of each system.
+        
+               The default is None.
+               
+        By default, random uniform initialization of each system.
+        """
+        
+        self.timestep = 0
+        if state is None:
+            self.state = self.local_prng.uniform(low=-self.max_pos, high=self.max_pos, size=(self.n_envs, self.ds))
+        else:
+            self.state = np.reshape(np.array(state, dtype=float), (self.n_envs, self.ds))
+            
+        return np.array(self.state)
+    
+    def render(self, mode='human', close=False):
+        """
+        A batch of systems cannot be rendered.
+        """
+        
+        self.logger.warning(msg='The \'BatchedLQG\' cannot be rendered!')
+    
     
 class BaseMujoco(BaseEnvironment):
     """
@@ -0,0 +1,619 @@
+"""
+This module contains the implementation of the Class VectorEnv.
+
+The Class VectorEnv inherits from the Class AbstractUnit.
+
+The Class VectorEnv steps several independent copies of an environment at once: either sequentially in the current process
+(mode 'sync') or in persistent worker processes (mode 'subprocess') that write the observations, the rewards and the flags in
+shared memory buffers.
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import traceback
+import numpy as np
+
+import cloudpickle
+
+from mushroom_rl.core.environment import MDPInfo
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+from ARLO.environment.environment import BaseEnvironment
+from ARLO.logger.logger import flush_all_loggers
+
+
+def _step_envs(envs, actions, active, n_steps, horizon, auto_reset, obs_buf, rew_buf, done_buf, absorbing_buf):
+    """
+    Parameters
+    ----------
+    envs: This is a list of environments.
+    
+    actions: This is a list (or an array) with one action for each environment.
+    
+    active: This is an array of booleans: the environments that are not active are not stepped.
+    
+    n_steps: This is an array of integers with the number of steps done in the current episode by each environment. It is
+             modified in place.
+    
+    horizon: This is the horizon of the environments.
+    
+    auto_reset: This is either True or False. If True the environments whose episode is over are reset.
+    
+    obs_buf: This is an array in which the observations are written. The i-th row refers to the i-th environment.
+    
+    rew_buf: This is an array in which the rewards are written.
+    
+    done_buf: This is an array in which the episode terminal flags are written.
+    
+    absorbing_buf: This is an array in which the absorbing flags are written.
+    
+    Returns
+    -------
+    infos: This is a list with one dictionary for each environment. If an environment was reset then its dictionary contains
+           the last observation of the episode with the key 'terminal_observation'.
+    
+    This function is used both by the Class VectorEnv in mode 'sync' and by the worker processes in mode 'subprocess'.
+    """
+    
+    infos = []
+    for i in range(len(envs)):
+        if(not active[i]):
+            rew_buf[i] = 0
+            done_buf[i] = True
+            infos.append({})
+            continue
+        
+        next_obs, reward, absorbing, info = envs[i].step(actions[i])
+        
+        #same rule of the method _get_sample of the Class DataGeneration: n_steps[i] is the number of steps done before this one
+        last = not(n_steps[i] < horizon and not absorbing)
+        n_steps[i] += 1
+        
+        if(not isinstance(info, dict)):
+            info = {}
+        else:
+            info = dict(info)
+        
+        if(last and auto_reset):
+            info['terminal_observation'] = np.array(next_obs)
+            next_obs = envs[i].reset()
+            n_steps[i] = 0
+        
+        obs_buf[i] = np.reshape(next_obs, obs_buf[i].shape)
+        rew_buf[i] = reward
+        done_buf[i] = last
+        absorbing_buf[i] = absorbing
+        infos.append(info)
+    
+    return infos
+
+
+def _vector_env_worker(remote, parent_remote, pickled_env_factory, seeders, shm_names, obs_shape, obs_dtype, n_envs,
+                       start_idx, horizon, auto_reset):
+    """
+    Parameters
+    ----------
+    remote: This is the end of the pipe used by the worker.
+    
+    parent_remote: This is the end of the pipe used by the main process: it is closed in the worker.
+    
+    pickled_env_factory: This is the object of Class EnvironmentFactory, pickled with cloudpickle, used to build the
+                         environments of this worker.
+    
+    seeders: This is a list with the seeders of the environments of this worker.
+    
+    shm_names: This is a list with the names of the shared memory blocks of the observations, the rewards, the episode terminal
+               flags and the absorbing flags.
+    
+    obs_shape: This is the shape of a single observation.
+    
+    obs_dtype: This is the data type of the observations.
+    
+    n_envs: This is the total number of environments of the VectorEnv.
+    
+    start_idx: This is the index of the first environment of this worker.
+    
+    horizon: This is the horizon of the environments.
+    
+    auto_reset: This is either True or False. If True the environments whose episode is over are reset.
+    
+    This function is the loop run by each worker process of a VectorEnv in mode 'subprocess'.
+    """
+    
+    parent_remote.close()
+    
+    shms = [shared_memory.SharedMemory(name=tmp_name) for tmp_name in shm_names]
+    try:
+        end_idx = start_idx + len(seeders)
+        obs_buf = np.ndarray((n_envs,)+tuple(obs_shape), dtype=obs_dtype, buffer=shms[0].buf)[start_idx:end_idx]
+        rew_buf = np.ndarray((n_envs,), dtype=np.float64, buffer=shms[1].buf)[start_idx:end_idx]
+        done_buf = np.ndarray((n_envs,), dtype=np.bool_, buffer=shms[2].buf)[start_idx:end_idx]
+        absorbing_buf = np.ndarray((n_envs,), dtype=np.bool_, buffer=shms[3].buf)[start_idx:end_idx]
+        
+        env_factory = cloudpickle.loads(pickled_env_factory)
+        envs = [env_factory.make(seeder=tmp_seeder) for tmp_seeder in seeders]
+        n_steps = np.zeros(len(envs), dtype=int)
+        
+        while True:
+            cmd, data = remote.recv()
+            
+            try:
+                if(cmd == 'step'):
+                    actions, active = data
+                    infos = _step_envs(envs=envs, actions=actions, active=active, n_steps=n_steps, horizon=horizon,
+                                       auto_reset=auto_reset, obs_buf=obs_buf, rew_buf=rew_buf, done_buf=done_buf,
+                                       absorbing_buf=absorbing_buf)
+                    remote.send(('ok', infos))
+                elif(cmd == 'reset'):
+                    for i in range(len(envs)):
+                        obs_buf[i] = np.reshape(envs[i].reset(), obs_buf[i].shape)
+                    n_steps[:] = 0
+                    rew_buf[:] = 0
+                    done_buf[:] = False
+                    absorbing_buf[:] = False
+                    remote.send(('ok', None))
+                elif(cmd == 'set_params'):
+                    for tmp_env in envs:
+                        tmp_env.set_params(params_dict=data)
+                    remote.send(('ok', None))
+                elif(cmd == 'seed'):
+                    for tmp_env, tmp_seeder in zip(envs, data):
+                        tmp_env.set_local_prng(new_seeder=tmp_seeder)
+                    remote.send(('ok', None))
+                elif(cmd == 'close'):
+                    remote.send(('ok', None))
+                    break
+            except Exception:
+                remote.send(('error', traceback.format_exc()))
+    finally:
+        for tmp_shm in shms:
+            tmp_shm.close()
+        
+        #the worker process exits with os._exit and so the functions registered with atexit are not called:
+        flush_all_loggers()
+        remote.close()
+
+
+class VectorEnv(AbstractUnit):
+    """
+    This Class steps n_envs independent copies of an environment at once. The copies are built with the object of Class
+    EnvironmentFactory returned by the method get_factory of the environment, and the i-th copy is seeded with seeder+i.
+    
+    In mode 'sync' the copies live in the current process and are stepped one after the other. In mode 'subprocess' the copies
+    are split among n_workers persistent worker processes: the actions are sent through pipes while the observations, the
+    rewards and the flags are written by the workers in shared memory buffers. The worker processes are started once and are
+    reused for every call to the methods reset and step, until the method close is called.
+    
+    The methods reset and step work on all the copies at once: the observations are numpy arrays of shape (n_envs,)+obs_shape,
+    the rewards and the flags are numpy arrays of shape (n_envs,).
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, env, n_envs, mode='sync', n_workers=None, auto_reset=True, start_method=None, seeder=None,
+                 log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment. This is the environment of which
+             n_envs copies are made.
+        
+        n_envs: This is an integer greater than or equal to 1 and it is the number of copies of env.
+        
+        mode: This is a string and it is either 'sync' or 'subprocess'. A daemonic process (e.g: a worker of a TunerWorkerPool)
+              cannot start worker processes: in such a process the mode 'subprocess' falls back to the mode 'sync'.
+              
+              The default is 'sync'.
+        
+        n_workers: This is the number of worker processes used in mode 'subprocess'. If None it is equal to the number of cpus,
+                   and it is never higher than n_envs.
+                   
+                   The default is None.
+        
+        auto_reset: This is either True or False. If True the copies whose episode is over are reset within the method step:
+                    the last observation of the episode is then stored in the info dictionary with the key
+                    'terminal_observation'.
+                    
+                    If False the copies whose episode is over are no longer stepped, until the method reset is called: for
+                    these the method step returns the last observation, a reward equal to zero and an episode terminal flag
+                    equal to True.
+                    
+                    The default is True.
+        
+        start_method: This is the start method of the worker processes used in mode 'subprocess'. If None the default start
+                      method of the module multiprocessing is used.
+                      
+                      The default is None.
+        
+        seeder: This is the seeder of the VectorEnv: the i-th copy is seeded with seeder+i. If None the seeder of env is used.
+                
+                The default is None.
+        
+        Non-Parameters Members
+        ----------------------
+        observation_space: This is the observation space of env.
+        
+        action_space: This is the action space of env.
+        
+        gamma: This is the discount factor of env.
+        
+        horizon: This is the horizon of env.
+        
+        closed: This is True if the method close was called, and False otherwise.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        if(seeder is None):
+            seeder = getattr(env, 'seeder', 2)
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        if(not isinstance(env, BaseEnvironment)):
+            exc_msg = '\'env\' must be an object of a Class inheriting from the Class \'BaseEnvironment\'!'
+            self.logger.exception(msg=exc_msg)
+            raise TypeError(exc_msg)
+        
+        self.n_envs = n_envs
+        if((not isinstance(self.n_envs, (int, np.integer))) or (self.n_envs < 1)):
+            exc_msg = '\'n_envs\' must be an integer greater than or equal to 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.mode = mode
+        if(self.mode not in ['sync', 'subprocess']):
+            exc_msg = '\'mode\' can either be: \'sync\' or \'subprocess\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        if((self.mode == 'subprocess') and mp.current_process().daemon):
+            self.logger.warning(msg='A daemonic process cannot start worker processes: setting \'mode\' equal to \'sync\'!')
+            self.mode = 'sync'
+        
+        self.n_workers = n_workers
+        if(self.n_workers is None):
+            self.n_workers = mp.cpu_count()
+        self.n_workers = max(1, min(self.n_workers, self.n_envs))
+        
+        self.auto_reset = auto_reset
+        self.start_method = start_method
+        
+        self.observation_space = env.info.observation_space
+        self.action_space = env.info.action_space
+        self.gamma = env.info.gamma
+        self.horizon = env.info.horizon
+        
+        obs_shape = self.observation_space.shape
+        if((obs_shape is None) or (len(obs_shape) == 0)):
+            obs_shape = (1,)
+        self._obs_shape = tuple(obs_shape)
+        
+        #the observations of a Box space are stored with its floating point data type, the ones of a Discrete space as integers:
+        obs_low = getattr(self.observation_space, 'low', None)
+        if(obs_low is None):
+            self._obs_dtype = np.dtype(np.int64)
+        elif(np.issubdtype(np.asarray(obs_low).dtype, np.floating)):
+            self._obs_dtype = np.asarray(obs_low).dtype
+        else:
+            self._obs_dtype = np.dtype(np.float64)
+        
+        self._active = np.ones(self.n_envs, dtype=bool)
+        
+        self._envs = None
+        self._processes = None
+        self._remotes = None
+        self._shms = None
+        self.closed = False
+        
+        env_factory = env.get_factory()
+        seeders = [self._get_env_seeder(env_idx=i) for i in range(self.n_envs)]
+        
+        if(self.mode == 'sync'):
+            self._envs = [env_factory.make(seeder=tmp_seeder) for tmp_seeder in seeders]
+            self._n_steps = np.zeros(self.n_envs, dtype=int)
+            self._obs_buf = np.zeros((self.n_envs,)+self._obs_shape, dtype=self._obs_dtype)
+            self._rew_buf = np.zeros(self.n_envs, dtype=np.float64)
+            self._done_buf = np.zeros(self.n_envs, dtype=np.bool_)
+            self._absorbing_buf = np.zeros(self.n_envs, dtype=np.bool_)
+        else:
+            self._start_workers(env_factory=env_factory, seeders=seeders)
+    
+    def __repr__(self):
+        return 'VectorEnv('+'n_envs='+str(self.n_envs)+', mode='+str(self.mode)+', n_workers='+str(self.n_workers)\
+               +', auto_reset='+str(self.auto_reset)+', start_method='+str(self.start_method)\
+               +', observation_space='+str(self.observation_space)+', action_space='+str(self.action_space)\
+               +', gamma='+str(self.gamma)+', horizon='+str(self.horizon)+', closed='+str(self.closed)\
+               +', obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)+', local_prng='+str(self.local_prng)\
+               +', log_mode='+str(self.log_mode)+', checkpoint_log_path='+str(self.checkpoint_log_path)\
+               +', verbosity='+str(self.verbosity)+', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+               +', logger='+str(self.logger)+')'
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def __getstate__(self):
+        if(self.mode == 'subprocess'):
+            exc_msg = 'An object of Class \'VectorEnv\' in mode \'subprocess\' cannot be pickled!'
+            self.logger.exception(msg=exc_msg)
+            raise TypeError(exc_msg)
+        
+        return self.__dict__
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+    
+    @property
+    def info(self):
+        """
+        Property method that returns the MDPInfo of the copies of the environment.
+        """
+        
+        return MDPInfo(observation_space=self.observation_space, action_space=self.action_space, gamma=self.gamma, 
+                       horizon=self.horizon)
+    
+    def _get_env_seeder(self, env_idx):
+        """
+        Parameters
+        ----------
+        env_idx: This is the index of a copy of the environment.
+        
+        Returns
+        -------
+        The seeder of the copy of the environment with index env_idx.
+        """
+        
+        if(isinstance(self.seeder, (int, np.integer))):
+            return self.seeder + env_idx
+        
+        return np.random.SeedSequence(self.seeder).spawn(self.n_envs)[env_idx]
+    
+    def _start_workers(self, env_factory, seeders):
+        """
+        Parameters
+        ----------
+        env_factory: This is the object of Class EnvironmentFactory used to build the copies of the environment.
+        
+        seeders: This is a list with the seeders of the copies of the environment.
+        
+        This method allocates the shared memory buffers and starts the worker processes: each worker process gets a contiguous
+        chunk of the copies of the environment.
+        """
+        
+        ctx = mp.get_context(self.start_method)
+        
+        n_obs_bytes = int(np.prod((self.n_envs,)+self._obs_shape))*self._obs_dtype.itemsize
+        n_rew_bytes = self.n_envs*np.dtype(np.float64).itemsize
+        n_flags_bytes = self.n_envs*np.dtype(np.bool_).itemsize
+        
+        self._shms = [shared_memory.SharedMemory(create=True, size=max(1, tmp_size))
+                      for tmp_size in [n_obs_bytes, n_rew_bytes, n_flags_bytes, n_flags_bytes]]
+        
+        self._obs_buf = np.ndarray((self.n_envs,)+self._obs_shape, dtype=self._obs_dtype, buffer=self._shms[0].buf)
+        self._rew_buf = np.ndarray((self.n_envs,), dtype=np.float64, buffer=self._shms[1].buf)
+        self._done_buf = np.ndarray((self.n_envs,), dtype=np.bool_, buffer=self._shms[2].buf)
+        self._absorbing_buf = np.ndarray((self.n_envs,), dtype=np.bool_, buffer=self._shms[3].buf)
+        
+        pickled_env_factory = cloudpickle.dumps(env_factory, protocol=4)
+        
+        #contiguous chunks of (almost) the same size:
+        self._chunks = np.array_split(np.arange(self.n_envs), self.n_workers)
+        
+        self._remotes = []
+        self._processes = []
+        for tmp_chunk in self._chunks:
+            remote, work_remote = ctx.Pipe()
+            
+            process = ctx.Process(target=_vector_env_worker,
+                                  args=(work_remote, remote, pickled_env_factory, [seeders[i] for i in tmp_chunk],
+                                        [tmp_shm.name for tmp_shm in self._shms], self._obs_shape, self._obs_dtype.str,
+                                        self.n_envs, int(tmp_chunk[0]), self.horizon, self.auto_reset),
+                                  daemon=True)
+            process.start()
+            work_remote.close()
+            
+            self._remotes.append(remote)
+            self._processes.append(process)
+    
+    def _collect_from_workers(self):
+        """
+        Returns
+        -------
+        results: This is a list with what each worker process sent back.
+        
+        If a worker process sent back an error then an exception is raised.
+        """
+        
+        results = []
+        errors = []
+        for remote in self._remotes:
+            status, data = remote.recv()
+            if(status == 'error'):
+                errors.append(data)
+            results.append(data)
+        
+        if(len(errors) > 0):
+            exc_msg = 'A worker process of the \'VectorEnv\' raised an exception:\n'+str(errors[0])
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+        
+        return results
+    
+    def _check_not_closed(self):
+        """
+        This method raises an exception if the method close was already called.
+        """
+        
+        if(self.closed):
+            exc_msg = 'The \'VectorEnv\' was closed!'
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+    
+    def reset(self):
+        """
+        Returns
+        -------
+        A numpy array of shape (n_envs,)+obs_shape with the initial observations of all the copies of the environment.
+        """
+        
+        self._check_not_closed()
+        
+        if(self.mode == 'sync'):
+            for i in range(self.n_envs):
+                self._obs_buf[i] = np.reshape(self._envs[i].reset(), self._obs_shape)
+            self._n_steps[:] = 0
+            self._rew_buf[:] = 0
+            self._done_buf[:] = False
+            self._absorbing_buf[:] = False
+        else:
+            for remote in self._remotes:
+                remote.send(('reset', None))
+            self._collect_from_workers()
+        
+        self._active[:] = True
+        
+        return np.array(self._obs_buf)
+    
+    def step(self, actions):
+        """
+        Parameters
+        ----------
+        actions: This is a list or an array with one action for each copy of the environment.
+        
+        Returns
+        -------
+        obs: This is a numpy array of shape (n_envs,)+obs_shape with the new observations.
+        
+        rewards: This is a numpy array of shape (n_envs,) with the rewards.
+        
+        dones: This is a numpy array of shape (n_envs,) with the episode terminal flags: these are True if the episode is over,
+               either because an absorbing state was reached or because the horizon was reached.
+        
+        infos: This is a list with one dictionary for each copy of the environment. Each dictionary also contains the absorbing
+               flag with the key 'absorbing'.
+        """
+        
+        self._check_not_closed()
+        
+        if(len(actions) != self.n_envs):
+            exc_msg = 'The number of \'actions\' must be equal to \'n_envs\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        if(self.mode == 'sync'):
+            infos = _step_envs(envs=self._envs, actions=actions, active=self._active, n_steps=self._n_steps,
+                               horizon=self.horizon, auto_reset=self.auto_reset, obs_buf=self._obs_buf,
+                               rew_buf=self._rew_buf, done_buf=self._done_buf, absorbing_buf=self._absorbing_buf)
+        else:
+            for remote, tmp_chunk in zip(self._remotes, self._chunks):
+                remote.send(('step', ([actions[i] for i in tmp_chunk], self._active[tmp_chunk])))
+            
+            infos = []
+            for tmp_infos in self._collect_from_workers():
+                infos += tmp_infos
+        
+        for i in range(self.n_envs):
+            infos[i]['absorbing'] = bool(self._absorbing_buf[i])
+        
+        dones = np.array(self._done_buf)
+        
+        if(not self.auto_reset):
+            #the copies whose episode is over are no longer stepped:
+            self._active &= ~dones
+        
+        return np.array(self._obs_buf), np.array(self._rew_buf), dones, infos
+    
+    def set_params(self, params_dict):
+        """
+        Parameters
+        ----------
+        params_dict: This is a dictionary containing the parameters to set in all the copies of the environment.
+        """
+        
+        self._check_not_closed()
+        
+        if(self.mode == 'sync'):
+            for tmp_env in self._envs:
+                tmp_env.set_params(params_dict=params_dict)
+        else:
+            for remote in self._remotes:
+                remote.send(('set_params', params_dict))
+            self._collect_from_workers()
+    
+    def seed(self, seeder):
+        """
+        Parameters
+        ----------
+        seeder: This is the new seeder of the VectorEnv: the i-th copy is seeded with seeder+i.
+        
+        This method seeds again all the copies of the environment, so that the same VectorEnv can be reused for running new,
+        independently seeded, episodes without starting new worker processes. The copies must then be reset.
+        """
+        
+        self._check_not_closed()
+        
+        self.set_local_prng(new_seeder=seeder)
+        seeders = [self._get_env_seeder(env_idx=i) for i in range(self.n_envs)]
+        
+        if(self.mode == 'sync'):
+            for tmp_env, tmp_seeder in zip(self._envs, seeders):
+                tmp_env.set_local_prng(new_seeder=tmp_seeder)
+        else:
+            for remote, tmp_chunk in zip(self._remotes, self._chunks):
+                remote.send(('seed', [seeders[i] for i in tmp_chunk]))
+            self._collect_from_workers()
+    
+    def sample_from_box_action_space(self):
+        """
+        This method samples one action for each copy of the environment from the Box Action Space using the local_prng.
+        """
+        
+        return self.local_prng.uniform(low=self.action_space.low, high=self.action_space.high,
+                                       size=(self.n_envs,)+tuple(self.action_space.shape))
+    
+    def close(self):
+        """
+        This method stops the worker processes and releases the shared memory buffers. It does nothing in mode 'sync' besides
+        marking the object as closed.
+        """
+        
+        if(self.closed):
+            return
+        
+        self.closed = True
+        
+        if(self._remotes is not None):
+            for remote in self._remotes:
+                try:
+                    remote.send(('close', None))
+                    remote.recv()
+                except (EOFError, BrokenPipeError, OSError):
+                    pass
+                remote.close()
+        
+        if(self._processes is not None):
+            for process in self._processes:
+                process.join(timeout=10)
+                if(process.is_alive()):
+                    process.terminate()
+        
+        if(self._shms is not None):
+            #the numpy arrays need to be released before closing the shared memory:
+            self._obs_buf = np.array(self._obs_buf)
+            self._rew_buf = np.array(self._rew_buf)
+            self._done_buf = np.array(self._done_buf)
+            self._absorbing_buf = np.array(self._absorbing_buf)
+            
+            for tmp_shm in self._shms:
+                tmp_shm.close()
+                tmp_shm.unlink()
+            self._shms = None
@@ -1,7 +1,7 @@
 """
 This module contains the implementation of the Classes: InputLoader, LoadSameEnv, LoadSameTrainData, 
-LoadUniformSubSampleWithReplacement, LoadUniformSubSampleWithReplacementAndEnv, LoadDifferentSizeForEachBlock and 
-LoadDifferentSizeForEachBlockAndEnv.
+LoadUniformSubSampleWithReplacement, LoadUniformSubSampleWithReplacementAndEnv, LoadDifferentSizeForEachBlock, 
+LoadDifferentSizeForEachBlockAndEnv, LoadEpisodesSubSampleWithReplacement and LoadEpisodesSubSampleWithReplacementAndEnv.
 
 The Class InputLoader inherits from the Class AbstractUnit and from ABC.
 
@@ -11,8 +11,9 @@ the some specific input for some specific block for some specific tuner.
 
 from abc import ABC, abstractmethod
 import copy
+import numpy as np
 
-from ARLO.dataset.dataset import TabularDataSet
+from ARLO.dataset.dataset import TabularDataSet, TabularDataSetView
 from ARLO.environment.environment import BaseEnvironment
 from ARLO.abstract_unit.abstract_unit import AbstractUnit
 
@@ -98,7 +99,7 @@ class LoadSameEnv(InputLoader):
                 
         Returns
         -------
-        copied_envs: This is just a list with deep copies of the original environment        
+        copied_envs: This is just a list with new instances of the original environment        
         """
         
         if((env is None) or (not isinstance(env, BaseEnvironment))):
@@ -108,10 +109,9 @@ class LoadSameEnv(InputLoader):
         
         copied_envs = []        
         for n in range(n_inputs_to_load):
-            #A simple assignment would only yield a shallow copy so i need to deepcopy the env. Indeed in the line afterwards i 
-            #change the member obj_name:
-            new_tmp_env = copy.deepcopy(env)
-            new_tmp_env.obj_name = str(self.obj_name)+'_'+str(new_tmp_env.obj_name)+'_split_'+str(n)
+            #A simple assignment would only yield a shallow copy so i need a new instance of the env. Indeed in the line 
+            #afterwards i change the member obj_name:
+            new_tmp_env = env.make_copy(obj_name=str(self.obj_name)+'_'+str(env.obj_name)+'_split_'+str(n))
             copied_envs.append(new_tmp_env)
             
         return None, copied_envs        
@@ -176,11 +176,18 @@ class LoadUniformSubSampleWithReplacement(InputLoader):
     """
     
     def __init__(self, obj_name, single_split_length, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, 
-                 n_jobs=1, job_type='process'):
+                 n_jobs=1, job_type='process', vectorized_draw=False):
         """
         Parameters
         ----------    
         single_split_length: This is the length of each new sub-sampled dataset.
+        
+        vectorized_draw: This is either True or False. If True the indices of all the sub-sampled datasets are drawn at once,
+                         with a single call to the local_prng. If False the indices are drawn one sub-sampled dataset at a time.
+                         
+                         Note that the two options draw different indices for the same seeder.
+                         
+                         The default is False.
                 
         The other parameters and non-parameters members are described in the Class InputLoader.
         """
@@ -188,6 +195,7 @@ class LoadUniformSubSampleWithReplacement(InputLoader):
         super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, 
                          verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
         self.single_split_length = single_split_length
+        self.vectorized_draw = vectorized_draw
         
         #these two are needed for checking the consistency of the metric with an input_loader:
         self.returns_dataset = True
@@ -198,6 +206,7 @@ class LoadUniformSubSampleWithReplacement(InputLoader):
                 +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
                 +', single_split_length='+str(self.single_split_length)+', checkpoint_log_path='+str(self.checkpoint_log_path)\
                 +', verbosity='+str(self.verbosity)+', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+                +', vectorized_draw='+str(self.vectorized_draw)\
                 +', returns_dataset='+str(self.returns_dataset)+', returns_env='+str(self.returns_env)\
                 +', logger='+str(self.logger)+')'
                 
@@ -217,29 +226,30 @@ class LoadUniformSubSampleWithReplacement(InputLoader):
         Returns
         -------
         splitted_datasets: This method subsamples with replacement the given dataset by using a uniform distribution. In the end
-                           a list of objects of Class TabularDataSet is created where each object has in its member dataset the 
-                           new sub-sampled dataset.
+                           a list of objects of Class TabularDataSetView is created where each object contains the indices of 
+                           the rows of the new sub-sampled dataset.
         """
         
         if((train_data is None) or (not isinstance(train_data, TabularDataSet))):
             exc_msg = '\'train_data\' is \'None\' or is an object of a Class not inheriting from the Class \'TabularDataSet\'!'    
             self.logger.exception(msg=exc_msg)
             raise TypeError(exc_msg)      
-                        
-        original_data = train_data.dataset
         
+        if(self.vectorized_draw):
+            #one row of indices for each sub-sampled dataset:
+            all_rows = self.local_prng.integers(low=0, high=len(train_data), size=(n_inputs_to_load, 
+                                                                                   self.single_split_length))
+                        
         splitted_datasets = []        
         for n in range(n_inputs_to_load):
-            tmp_rows = self.local_prng.choice(range(len(original_data)), size=self.single_split_length, replace=True)
+            if(self.vectorized_draw):
+                tmp_rows = all_rows[n]
+            else:
+                tmp_rows = self.local_prng.choice(len(train_data), size=self.single_split_length, replace=True)
 
-            tmp_split = [original_data[x] for x in tmp_rows]
-            new_tmp_dataset = TabularDataSet(dataset=tmp_split, observation_space=train_data.observation_space, 
-                                             action_space=train_data.action_space, discrete_actions=train_data.discrete_actions, 
-                                             discrete_observations=train_data.discrete_observations, gamma=train_data.gamma, 
-                                             horizon=train_data.horizon, 
-                                             obj_name=str(self.obj_name)+'_'+str(train_data.obj_name)+'_split_'+str(n),
-                                             seeder=train_data.seeder, log_mode=train_data.log_mode, 
-                                             checkpoint_log_path=train_data.checkpoint_log_path, verbosity=train_data.verbosity)
+            #the view only stores the indices: the columns of train_data are indexed only when they are needed:
+            new_tmp_dataset = TabularDataSetView(parent_data=train_data, rows=tmp_rows,
+                                                 obj_name=str(self.obj_name)+'_'+str(train_data.obj_name)+'_split_'+str(n))
 
             splitted_datasets.append(new_tmp_dataset)
                     
@@ -255,11 +265,15 @@ class LoadUniformSubSampleWithReplacementAndEnv(InputLoader):
     """
     
     def __init__(self, obj_name, single_split_length, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3,
-                 n_jobs=1, job_type='process'):
+                 n_jobs=1, job_type='process', vectorized_draw=False):
         """
         Parameters
         ----------    
         single_split_length: This is the length of each new sub-sampled dataset.
+        
+        vectorized_draw: This is either True or False. It is described in the Class LoadUniformSubSampleWithReplacement.
+                         
+                         The default is False.
                 
         The other parameters and non-parameters members are described in the Class InputLoader.
         """
@@ -267,6 +281,7 @@ class LoadUniformSubSampleWithReplacementAndEnv(InputLoader):
         super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, 
                          verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
         self.single_split_length = single_split_length
+        self.vectorized_draw = vectorized_draw
         
         #these two are needed for checking the consistency of the metric with an input_loader:
         self.returns_dataset = True
@@ -277,6 +292,7 @@ class LoadUniformSubSampleWithReplacementAndEnv(InputLoader):
                 +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
                 +', single_split_length='+str(self.single_split_length)+', checkpoint_log_path='+str(self.checkpoint_log_path)\
                 +', verbosity='+str(self.verbosity)+', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+                +', vectorized_draw='+str(self.vectorized_draw)\
                 +', returns_dataset='+str(self.returns_dataset)+', returns_env='+str(self.returns_env)\
                 +', logger='+str(self.logger)+')'
                 
@@ -300,12 +316,12 @@ class LoadUniformSubSampleWithReplacementAndEnv(InputLoader):
                            a list of objects of Class TabularDataSet is created where each object has in its member dataset the 
                            new sub-sampled dataset.
                            
-        copied_envs: This is just a list with deep copies of the original environment        
+        copied_envs: This is just a list with new instances of the original environment        
         """
         
         data_loader_params = dict(obj_name=str(self.obj_name)+'_data_loader', single_split_length=self.single_split_length,
                                   seeder=self.seeder, log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path,
-                                  verbosity=self.verbosity)
+                                  verbosity=self.verbosity, vectorized_draw=self.vectorized_draw)
         data_loader = LoadUniformSubSampleWithReplacement(**data_loader_params)
         
         env_loader_params = dict(obj_name=str(self.obj_name)+'_env_loader', seeder=self.seeder, log_mode=self.log_mode, 
@@ -362,7 +378,8 @@ class LoadDifferentSizeForEachBlock(InputLoader):
         -------
         splitted_datasets: This method subsamples with replacement the given dataset by using a uniform distribution, but it 
                            extracts for each block a different number of samples. In the end a list of objects of Class 
-                           TabularDataSet is created where each object has in its member dataset the new sub-sampled dataset.
+                           TabularDataSetView is created where each object contains the indices of the rows of the new 
+                           sub-sampled dataset.
         """
         
         if((train_data is None) or (not isinstance(train_data, TabularDataSet))):
@@ -375,20 +392,13 @@ class LoadDifferentSizeForEachBlock(InputLoader):
             n_th_block_params = blocks[n].get_params()
             block_sizes.append(n_th_block_params['n_train_samples'].current_actual_value)
                         
-        original_data = train_data.dataset
-        
         splitted_datasets = []        
         for n in range(n_inputs_to_load):
-            tmp_rows = self.local_prng.choice(range(len(original_data)), size=block_sizes[n], replace=True)
+            tmp_rows = self.local_prng.choice(len(train_data), size=block_sizes[n], replace=True)
 
-            tmp_split = [original_data[x] for x in tmp_rows]
-            new_tmp_dataset = TabularDataSet(dataset=tmp_split, observation_space=train_data.observation_space, 
-                                             action_space=train_data.action_space, discrete_actions=train_data.discrete_actions, 
-                                             discrete_observations=train_data.discrete_observations, gamma=train_data.gamma, 
-                                             horizon=train_data.horizon, 
-                                             obj_name=str(self.obj_name)+'_'+str(train_data.obj_name)+'_split_'+str(n),
-                                             seeder=train_data.seeder, log_mode=train_data.log_mode, 
-                                             checkpoint_log_path=train_data.checkpoint_log_path, verbosity=train_data.verbosity)
+            #the view only stores the indices: the columns of train_data are indexed only when they are needed:
+            new_tmp_dataset = TabularDataSetView(parent_data=train_data, rows=tmp_rows,
+                                                 obj_name=str(self.obj_name)+'_'+str(train_data.obj_name)+'_split_'+str(n))
             splitted_datasets.append(new_tmp_dataset)
                     
         return splitted_datasets, None  
@@ -442,7 +452,7 @@ class LoadDifferentSizeForEachBlockAndEnv(InputLoader):
                            a list of objects of Class TabularDataSet is created where each object has in its member dataset the 
                            new sub-sampled dataset.
                            
-        copied_envs: This is just a list with deep copies of the original environment        
+        copied_envs: This is just a list with new instances of the original environment        
         """
         
         data_loader_params = dict(obj_name=str(self.obj_name)+'_data_loader', seeder=self.seeder, log_mode=self.log_mode, 
@@ -456,4 +466,183 @@ class LoadDifferentSizeForEachBlockAndEnv(InputLoader):
         splitted_datasets = data_loader.get_input(blocks=blocks, n_inputs_to_load=n_inputs_to_load, train_data=train_data)[0]
         copied_envs = env_loader.get_input(blocks=blocks, n_inputs_to_load=n_inputs_to_load, env=env)[1]
         
-        return splitted_datasets, copied_envs    
\ No newline at end of file
+        return splitted_datasets, copied_envs
+
+
+class LoadEpisodesSubSampleWithReplacement(InputLoader):
+    """    
+    This particular Class sub-samples with replacement whole episodes of the given dataset by using a uniform distribution over 
+    the episodes. In the end a list of objects of Class TabularDataSetView is created where each object contains the indices of 
+    the rows of the sampled episodes, one episode after the other. 
+    
+    Unlike the Class LoadUniformSubSampleWithReplacement the structure of the episodes is preserved.
+    """
+    
+    def __init__(self, obj_name, n_episodes_per_split, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, 
+                 n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------    
+        n_episodes_per_split: This is the number of episodes contained in each new sub-sampled dataset.
+                
+        The other parameters and non-parameters members are described in the Class InputLoader.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, 
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        self.n_episodes_per_split = n_episodes_per_split
+        
+        #these two are needed for checking the consistency of the metric with an input_loader:
+        self.returns_dataset = True
+        self.returns_env = False               
+    
+    def __repr__(self):
+         return 'LoadEpisodesSubSampleWithReplacement('+'obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)\
+                +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+                +', n_episodes_per_split='+str(self.n_episodes_per_split)\
+                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', returns_dataset='+str(self.returns_dataset)\
+                +', returns_env='+str(self.returns_env)+', logger='+str(self.logger)+')'
+                
+    def _episodes_to_rows(self, episodes_starts, episodes_ends, selected_episodes):
+        """
+        Parameters
+        ----------
+        episodes_starts: This is a numpy.ndarray containing, for each episode, the index of its first row.
+        
+        episodes_ends: This is a numpy.ndarray containing, for each episode, the index of the row after its last row.
+        
+        selected_episodes: This is a numpy.ndarray containing the indices of the selected episodes.
+        
+        Returns
+        -------
+        rows: This is a numpy.ndarray containing the indices of the rows of all the selected episodes, one episode after the 
+              other.
+        """
+        
+        selected_starts = episodes_starts[selected_episodes]
+        selected_lengths = episodes_ends[selected_episodes] - selected_starts
+        
+        #each row is its position in the concatenation plus the offset between the start of its episode in the dataset and the
+        #start of its episode in the concatenation:
+        concatenated_starts = np.cumsum(selected_lengths) - selected_lengths
+        offsets = np.repeat(selected_starts - concatenated_starts, selected_lengths)
+        
+        rows = np.arange(np.sum(selected_lengths)) + offsets
+        
+        return rows
+    
+    def get_input(self, blocks, n_inputs_to_load, train_data=None, env=None):
+        """   
+        Parameters
+        ----------               
+        blocks: This is a list containing the blocks for which we need to load the input. This is used only in some InputLoaders.
+                In this InputLoader it is not used.
+            
+        n_inputs_to_load: This is the number of datasets that will be sub-sampled.
+
+        train_data: This must be an object of a Class inheriting from the Class TabularDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+            
+        Returns
+        -------
+        splitted_datasets: This method subsamples with replacement the episodes of the given dataset by using a uniform 
+                           distribution. In the end a list of objects of Class TabularDataSetView is created where each object 
+                           contains the indices of the rows of the sampled episodes.
+        """
+        
+        if((train_data is None) or (not isinstance(train_data, TabularDataSet))):
+            exc_msg = '\'train_data\' is \'None\' or is an object of a Class not inheriting from the Class \'TabularDataSet\'!'    
+            self.logger.exception(msg=exc_msg)
+            raise TypeError(exc_msg)      
+        
+        #the index of the episodes is computed only once and then it is cached in train_data:
+        episodes_starts, episodes_ends = train_data.get_episodes_index()
+        
+        all_selected_episodes = self.local_prng.integers(low=0, high=len(episodes_starts), 
+                                                         size=(n_inputs_to_load, self.n_episodes_per_split))
+        
+        splitted_datasets = []        
+        for n in range(n_inputs_to_load):
+            tmp_rows = self._episodes_to_rows(episodes_starts=episodes_starts, episodes_ends=episodes_ends, 
+                                              selected_episodes=all_selected_episodes[n])
+
+            new_tmp_dataset = TabularDataSetView(parent_data=train_data, rows=tmp_rows,
+                                                 obj_name=str(self.obj_name)+'_'+str(train_data.obj_name)+'_split_'+str(n))
+
+            splitted_datasets.append(new_tmp_dataset)
+                    
+        return splitted_datasets, None
+    
+    
+class LoadEpisodesSubSampleWithReplacementAndEnv(InputLoader):
+    """    
+    This particular Class sub-samples with replacement whole episodes of the given dataset by using a uniform distribution over 
+    the episodes. In the end a list of objects of Class TabularDataSetView is created where each object contains the indices of 
+    the rows of the sampled episodes. Moreover also a list of environments is returned so that this input loader can be used with
+    metrics that use the environment, such as the DiscountedReward.
+    """
+    
+    def __init__(self, obj_name, n_episodes_per_split, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3,
+                 n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------    
+        n_episodes_per_split: This is the number of episodes contained in each new sub-sampled dataset.
+                
+        The other parameters and non-parameters members are described in the Class InputLoader.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, 
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        self.n_episodes_per_split = n_episodes_per_split
+        
+        #these two are needed for checking the consistency of the metric with an input_loader:
+        self.returns_dataset = True
+        self.returns_env = True               
+    
+    def __repr__(self):
+         return 'LoadEpisodesSubSampleWithReplacementAndEnv('+'obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)\
+                +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+                +', n_episodes_per_split='+str(self.n_episodes_per_split)\
+                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', returns_dataset='+str(self.returns_dataset)\
+                +', returns_env='+str(self.returns_env)+', logger='+str(self.logger)+')'
+                
+    def get_input(self, blocks, n_inputs_to_load, train_data=None, env=None):
+        """   
+        Parameters
+        ----------       
+        blocks: This is a list containing the blocks for which we need to load the input. This is used only in some InputLoaders.
+                In this InputLoader it is not used.
+                
+        n_inputs_to_load: This is the number of datasets that will be sub-sampled, which also equals the number of deep copied 
+                          environments.
+
+        train_data: This must be an object of a Class inheriting from the Class TabularDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+            
+        Returns
+        -------
+        splitted_datasets: This method subsamples with replacement the episodes of the given dataset by using a uniform 
+                           distribution. In the end a list of objects of Class TabularDataSetView is created where each object 
+                           contains the indices of the rows of the sampled episodes.
+                           
+        copied_envs: This is just a list with new instances of the original environment        
+        """
+        
+        data_loader_params = dict(obj_name=str(self.obj_name)+'_data_loader', n_episodes_per_split=self.n_episodes_per_split,
+                                  seeder=self.seeder, log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path,
+                                  verbosity=self.verbosity)
+        data_loader = LoadEpisodesSubSampleWithReplacement(**data_loader_params)
+        
+        env_loader_params = dict(obj_name=str(self.obj_name)+'_env_loader', seeder=self.seeder, log_mode=self.log_mode, 
+                                 checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
+        env_loader = LoadSameEnv(**env_loader_params)
+        
+        splitted_datasets = data_loader.get_input(blocks=blocks, n_inputs_to_load=n_inputs_to_load, train_data=train_data)[0]
+        copied_envs = env_loader.get_input(blocks=blocks, n_inputs_to_load=n_inputs_to_load, env=env)[1]
+        
+        return splitted_datasets, copied_envs
@@ -5,8 +5,190 @@ The Class Logger is the only one in the library that does not inherit from the C
 """
 
 import os
+import time
+import queue
+import atexit
 import requests
 import datetime
+import threading
+
+
+# the buffered file writers are shared by all the loggers writing to the same file in the same process. They are not members of
+# the loggers since the loggers are pickled and copied together with the objects that own them:
+_file_writers = {}
+_file_writers_lock = threading.Lock()
+
+
+class _BufferedFileWriter:
+    """
+    This class writes the lines of a log file from a background thread. The lines are put in a bounded queue and written to the
+    file in batches, either every flush_interval seconds or as soon as a flush is requested.
+    """
+
+    def __init__(self, log_path, flush_interval=1.0, durability='flush', max_queue_size=10000):
+        """
+        Parameters
+        ----------
+        log_path: This is the path of the log file.
+        
+        flush_interval: This is the maximum number of seconds that a line waits in the queue before being written.
+                        
+                        The default is 1.0.
+        
+        durability: This is a string and can be: 'flush' or 'fsync'.
+                    -If 'flush' then each batch is written to the operating system: once written it is not lost if the 
+                     process crashes.
+                    -If 'fsync' then each batch is also forced to disk: once written it is not lost if the machine crashes.
+                    
+                    In both cases the lines that are still in the queue are lost if the process crashes.
+                    
+                    The default is 'flush'.
+        
+        max_queue_size: This is the maximum number of lines in the queue: if the queue is full then the logging waits for the
+                        background thread.
+                        
+                        The default is 10000.
+        """
+
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.durability = durability
+
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+        self.thread = threading.Thread(target=self._run, name='ARLO_log_writer', daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def tighten(self, flush_interval, durability):
+        """
+        Parameters
+        ----------
+        flush_interval: This is the flush interval requested by a logger writing to the same file.
+        
+        durability: This is the durability requested by a logger writing to the same file.
+        
+        The writer is shared by all the loggers writing to the same file: it keeps the strictest of the requested settings.
+        """
+
+        self.flush_interval = min(self.flush_interval, flush_interval)
+
+        if durability == 'fsync':
+            self.durability = 'fsync'
+
+    def flush(self, fsync=False):
+        """
+        Parameters
+        ----------
+        fsync: If True then the lines are also forced to disk, regardless of the durability.
+               
+               The default is False.
+        
+        Waits until all the lines put in the queue so far are written to the file.
+        """
+
+        if not self.thread.is_alive():
+            return
+
+        flush_request = (threading.Event(), fsync)
+        self.queue.put(flush_request)
+        flush_request[0].wait()
+
+    def _write_batch(self, lines, fsync=False):
+        if len(lines) == 0 and not fsync:
+            return
+
+        try:
+            with open(self.log_path, 'a') as file:
+                # a single write for the whole batch:
+                file.write(''.join(lines))
+
+                if fsync or (self.durability == 'fsync'):
+                    file.flush()
+                    os.fsync(file)
+        except Exception as e:
+            print('Exception while writing the log to file: ' + str(e) + '\n')
+
+    def _run(self):
+        while True:
+            lines = []
+            flush_requests = []
+
+            # the first line waits for as long as needed, the following ones at most until the end of the flush interval:
+            item = self.queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, tuple):
+                    flush_requests.append(item)
+                    break
+
+                lines.append(item)
+
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+
+            self._write_batch(lines=lines, fsync=any([x[1] for x in flush_requests]))
+
+            for tmp_request in flush_requests:
+                tmp_request[0].set()
+
+
+def _get_file_writer(log_path, flush_interval, durability, max_queue_size):
+    """
+    Returns the buffered file writer of log_path in the current process, creating it if needed. If the writer already exists
+    it is made as strict as the requested flush_interval and durability.
+    """
+
+    with _file_writers_lock:
+        if log_path not in _file_writers:
+            _file_writers[log_path] = _BufferedFileWriter(log_path=log_path, flush_interval=flush_interval,
+                                                          durability=durability, max_queue_size=max_queue_size)
+        else:
+            _file_writers[log_path].tighten(flush_interval=flush_interval, durability=durability)
+
+        return _file_writers[log_path]
+
+
+def _reset_file_writers_after_fork():
+    """
+    After a fork the child process does not have the background threads of the parent process, and the lock may have been
+    held by another thread of the parent process: the child process starts with no writers and with a new lock.
+    """
+
+    global _file_writers, _file_writers_lock
+
+    _file_writers = {}
+    _file_writers_lock = threading.Lock()
+
+
+def flush_all_loggers(fsync=True):
+    """
+    Parameters
+    ----------
+    fsync: If True then the lines are also forced to disk.
+           
+           The default is True.
+    
+    Writes to file all the lines still in the queues of the buffered file writers of the current process. This is called at
+    exit, and it must be called explicitly at the end of the worker processes that exit with os._exit (e.g: the processes 
+    started by the module multiprocessing), since these do not run the functions registered with atexit.
+    """
+
+    with _file_writers_lock:
+        writers = list(_file_writers.values())
+
+    for tmp_writer in writers:
+        tmp_writer.flush(fsync=fsync)
+
+
+atexit.register(flush_all_loggers)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_file_writers_after_fork)
 
 
 class Logger:
@@ -20,7 +202,8 @@ class Logger:
     -If verbosity == 4 then also debug comments are logged.
     """
 
-    def __init__(self, name_obj_logging, verbosity=3, mode='console', log_path=None, api_endpoint=None):
+    def __init__(self, name_obj_logging, verbosity=3, mode='console', log_path=None, api_endpoint=None, buffered=True,
+                 flush_interval=1.0, durability='flush', max_queue_size=10000):
         """
         Parameters
         ----------
@@ -41,6 +224,37 @@ class Logger:
                   be saved.
                   
                   The default value is None.
+        
+        buffered: If True then the lines of the log file are written in batches by a background thread, shared by all the
+                  loggers writing to the same file. If False then each line is written, flushed and forced to disk as soon as it
+                  is logged.
+                  
+                  The lines logged with level 'EXCEPTION' are always written and forced to disk before the method exception
+                  returns, and all the lines are written at exit. The loggers writing to the same file share the same 
+                  background thread, which uses the smallest flush_interval and the strictest durability among them.
+                  
+                  The default is True.
+        
+        flush_interval: This is the maximum number of seconds that a line waits before being written to the log file. It is
+                        only used if buffered is True.
+                        
+                        The default is 1.0.
+        
+        durability: This is a string and can be: 'flush' or 'fsync'. It is only used if buffered is True.
+                    -If 'flush' then each batch of lines is written to the operating system: once written it is not lost if
+                     the process crashes.
+                    -If 'fsync' then each batch of lines is also forced to disk: once written it is not lost if the machine 
+                     crashes.
+                    
+                    In both cases the lines that are still waiting to be written, at most flush_interval seconds of logging, 
+                    are lost if the process crashes.
+                    
+                    The default is 'flush'.
+        
+        max_queue_size: This is the maximum number of lines waiting to be written to the log file: when it is reached the
+                        logging waits for the background thread. It is only used if buffered is True.
+                        
+                        The default is 10000.
         """
 
         self.name_obj_logging = name_obj_logging
@@ -48,6 +262,10 @@ class Logger:
         self.mode = mode
         self.log_path = log_path
         self.api_endpoint = api_endpoint
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.max_queue_size = max_queue_size
 
         if self.log_path is not None:
             self.file_name = 'ARLO' + datetime.datetime.now().strftime('_%H_%M_%S__%d_%m_%Y')
@@ -63,9 +281,14 @@ class Logger:
         if (mode == 'api' or mode == 'both') and (api_endpoint is None):
             raise ValueError('You specified \'mode\' equal to \'api\' but you did not provide \'api_endpoint\'!')
 
+        if (durability != 'flush') and (durability != 'fsync'):
+            raise ValueError('In the \'Logger\' Class \'durability\' can only be: \'flush\' or \'fsync\'!')
+
     def __repr__(self):
         return 'Logger(' + 'name_obj_logging=' + str(self.name_obj_logging) + ', verbosity=' + str(self.verbosity) \
-               + ', mode=' + str(self.mode) + ', log_path=' + str(self.log_path) + ')'
+               + ', mode=' + str(self.mode) + ', log_path=' + str(self.log_path) + ', buffered=' + str(self.buffered) \
+               + ', flush_interval=' + str(self.flush_interval) + ', durability=' + str(self.durability) \
+               + ', max_queue_size=' + str(self.max_queue_size) + ')'
 
     def _to_console(self, msg, log_level):
         """
@@ -95,9 +318,20 @@ class Logger:
         """
 
         if self.log_path is not None:
+            str_to_write = datetime.datetime.now().strftime('[%d-%m-%Y, %H:%M:%S]') + '[' + str(log_level) + ', ' \
+                           + str(self.name_obj_logging) + ']: ' + str(msg) + '\n'
+
+            if self.buffered:
+                _get_file_writer(log_path=self.log_path, flush_interval=self.flush_interval, durability=self.durability,
+                                 max_queue_size=self.max_queue_size).write(str_to_write)
+
+                # an exception is raised just after it is logged: the log must be on disk before that.
+                if log_level == 'EXCEPTION':
+                    self.flush(fsync=True)
+
+                return
+
             with open(self.log_path, 'a') as file:
-                str_to_write = datetime.datetime.now().strftime('[%d-%m-%Y, %H:%M:%S]') + '[' + str(log_level) + ', ' \
-                               + str(self.name_obj_logging) + ']: ' + str(msg) + '\n'
                 file.write(str_to_write)
 
                 # i want to write to disk as soon as i call the _to_file() method. both of the following lines are needed.
@@ -107,6 +341,22 @@ class Logger:
         else:
             print('You cannot write the log to file since \'log_path\' is not specified!\n')
 
+    def flush(self, fsync=False):
+        """
+        Parameters
+        ----------
+        fsync: If True then the log file is also forced to disk.
+               
+               The default is False.
+        
+        Waits until all the lines logged so far to the log file are written. Nothing is done if buffered is False, since then
+        each line is written as soon as it is logged.
+        """
+
+        if self.buffered and (self.log_path is not None) and ((self.mode == 'file') or (self.mode == 'both')):
+            _get_file_writer(log_path=self.log_path, flush_interval=self.flush_interval, durability=self.durability,
+                             max_queue_size=self.max_queue_size).flush(fsync=fsync)
+
     def _to_api(self, msg, log_level):
         if self.api_endpoint:
             payload = {
@@ -13,11 +13,14 @@ evalaute a single block.
 from abc import ABC, abstractmethod
 import numpy as np
 import copy
+import threading
+from scipy import stats
 from joblib import Parallel, delayed
 
 from ARLO.abstract_unit.abstract_unit import AbstractUnit
 from ARLO.dataset.dataset import TabularDataSet
 from ARLO.environment.environment import BaseEnvironment
+from ARLO.environment.vector_env import VectorEnv
 
 
 class Metric(AbstractUnit, ABC):
@@ -39,6 +42,12 @@ class Metric(AbstractUnit, ABC):
         requires_dataset: This is true if the metric requires a dataset to work.
         
         requires_env: This is true if the metric requires an environment to work.
+        
+        eval_threshold: This is the evaluation of the best block found so far, as set with the method set_eval_threshold. It
+                        is None by default.
+                        
+        eval_threshold_eps_eval: This is the evaluation of each episode of the best block found so far, as set with the method
+                                 set_eval_threshold. It is None by default.
             
         The other parameters and non-parameters members are described in the Class AbstractUnit.
         """
@@ -51,6 +60,10 @@ class Metric(AbstractUnit, ABC):
         self.requires_dataset = None
         self.requires_env = None
 
+        # these are set by the tuners before each evaluation:
+        self.eval_threshold = None
+        self.eval_threshold_eps_eval = None
+
     def __repr__(self):
         return 'Metric(' + 'obj_name=' + str(self.obj_name) + ', log_mode=' + str(self.log_mode) \
                + ', checkpoint_log_path=' + str(self.checkpoint_log_path) + ', verbosity=' + str(self.verbosity) \
@@ -58,12 +71,40 @@ class Metric(AbstractUnit, ABC):
                + ', local_prng=' + str(self.local_prng) + ', requires_dataset=' + str(self.requires_dataset) \
                + ', requires_env=' + str(self.requires_env) + ', logger=' + str(self.logger) + ')'
 
+    def set_eval_threshold(self, eval_threshold, eval_threshold_eps_eval=None):
+        """
+        Parameters
+        ----------
+        eval_threshold: This is either None or the evaluation of the best block found so far (e.g: by a Tuner). The metrics 
+                        that support sequential stopping can use it to stop the evaluation as soon as a block is clearly better
+                        or clearly worse than the threshold. The other metrics ignore it.
+                        
+        eval_threshold_eps_eval: This is either None or the evaluation of each episode of the best block found so far, as 
+                                 stored in its member block_eps_eval. The metrics that pair the episodes of two blocks can use 
+                                 it to compare the block being evaluated with the threshold episode by episode.
+                                 
+                                 The default is None.
+        """
+
+        self.eval_threshold = eval_threshold
+        self.eval_threshold_eps_eval = eval_threshold_eps_eval
+
+    def get_params(self):
+        """
+        Returns
+        -------
+        params_dict: This is a dictionary containing the members of the metric that change its evaluations. Together with the
+                     Class of the metric it identifies the metric in the keys of the Class EvaluationCache.
+        """
+
+        return dict(seeder=self.seeder)
+
     @abstractmethod
     def evaluate(self, block_res, block=None, train_data=None, env=None):
         raise NotImplementedError
 
     @abstractmethod
-    def which_one_is_better(self, block_1_eval, block_2_eval):
+    def which_one_is_better(self, block_1_eval, block_2_eval, block_1_eps_eval=None, block_2_eps_eval=None):
         raise NotImplementedError
 
 
@@ -78,9 +119,17 @@ class TDError(Metric):
     Here smaller is better.
     """
 
-    def __init__(self, obj_name, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1,
-                 job_type='process'):
+    def __init__(self, obj_name, prediction_batch_size=None, seeder=2, log_mode='console', checkpoint_log_path=None, 
+                 verbosity=3, n_jobs=1, job_type='process'):
         """            
+        Parameters
+        ----------
+        prediction_batch_size: This is either None or an integer greater than or equal to 1. If it is an integer the predictions
+                               of the approximator are computed on chunks of at most prediction_batch_size samples, so that the
+                               memory needed stays bounded also on huge datasets. If None all the samples are predicted at once.
+                               
+                               The default is None.
+                               
         Non-Parameters Members
         ----------------------
         eval_mean: The mean of the evaluation across the episodes.
@@ -96,6 +145,12 @@ class TDError(Metric):
         super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
                          verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
 
+        self.prediction_batch_size = prediction_batch_size
+        if ((self.prediction_batch_size is not None) and (self.prediction_batch_size < 1)):
+            exc_msg = '\'prediction_batch_size\' must be either \'None\' or an integer greater than or equal to 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+
         # these two are needed for checking the consistency of the metric with an input_loader:
         self.requires_dataset = True
         self.requires_env = False
@@ -106,13 +161,23 @@ class TDError(Metric):
         self.single_episode_evaluations = None
 
     def __repr__(self):
-        return 'TDError(' + 'obj_name=' + str(self.obj_name) + ', log_mode=' + str(self.log_mode) \
+        return 'TDError(' + 'obj_name=' + str(self.obj_name) + ', prediction_batch_size=' + str(self.prediction_batch_size) \
+               + ', log_mode=' + str(self.log_mode) \
                + ', checkpoint_log_path=' + str(self.checkpoint_log_path) + ', verbosity=' + str(self.verbosity) \
                + ', n_jobs=' + str(self.n_jobs) + ', job_type=' + str(self.job_type) + ', seeder=' + str(self.seeder) \
                + ', local_prng=' + str(self.local_prng) + ', requires_dataset=' + str(self.requires_dataset) \
                + ', requires_env=' + str(self.requires_env) + ', logger=' + str(self.logger) \
                + ', eval_mean=' + str(self.eval_mean) + ', eval_var=' + str(self.eval_var) + ')'
 
+    def get_params(self):
+        """
+        Returns
+        -------
+        params_dict: This is a dictionary containing the members of the metric that change its evaluations.
+        """
+
+        return dict(prediction_batch_size=self.prediction_batch_size, seeder=self.seeder)
+
     def evaluate(self, block_res, block=None, train_data=None, env=None):
         """
         Parameters
@@ -158,13 +223,22 @@ class TDError(Metric):
             # last_flags is made of ones and zeros
             last_masks = last_flags
 
-            predicted_values_of_next_states = block_res.policy.approximator.predict(next_states)
+            n_samples = len(rewards)
+            batch_size = self.prediction_batch_size
+            if (batch_size is None):
+                batch_size = max(n_samples, 1)
+
+            maxQ = np.empty(n_samples)
+            agent_rewards = np.empty(n_samples)
+            for start in range(0, n_samples, batch_size):
+                end = min(start + batch_size, n_samples)
 
-            maxQ = []
-            for i in range(len(train_data.dataset)):
-                maxQ.append(np.max(predicted_values_of_next_states[i]))
+                # max over the action axis:
+                predicted_values_of_next_states = block_res.policy.approximator.predict(next_states[start:end])
+                maxQ[start:end] = np.max(np.reshape(predicted_values_of_next_states, (end - start, -1)), axis=1)
 
-            agent_rewards = block_res.policy.approximator.predict(states, actions)
+                agent_rewards[start:end] = np.ravel(block_res.policy.approximator.predict(states[start:end],
+                                                                                         actions[start:end]))
 
             td_target = rewards + last_masks * train_data.gamma * maxQ
 
@@ -173,18 +247,21 @@ class TDError(Metric):
             # computes squared error:
             total_err = total_err ** 2
 
-            by_eps = []
-            tmp_err = 0
-            for i in range(len(total_err)):
-                if (last_flags[i] == 0):
-                    tmp_err += total_err[i]
-                else:
-                    by_eps.append(tmp_err)
-                    tmp_err = 0
-
-            # if in the last iteration of the for-loop above I did not reset tmp_err then it means that absorbing_flag[i] was
-            # False meaning that the episode did not complete. If I did not reset tmp_err i also did not append it to by_eps hence
-            # i need to do it here:
+            # the error of each episode is the sum of the errors of its samples, except for the last sample of the episode:
+            is_last = (last_flags != 0)
+            cumulative_err = np.concatenate(([0], np.cumsum(np.where(is_last, 0, total_err))))
+
+            episodes_ends = np.flatnonzero(is_last)
+            episodes_starts = np.concatenate(([0], episodes_ends[:-1] + 1))
+            by_eps = list(cumulative_err[episodes_ends + 1] - cumulative_err[episodes_starts])
+
+            # if the last sample is not the end of an episode then it means that the episode did not complete: its error is 
+            # added only if it is not zero:
+            if (len(episodes_ends) > 0):
+                tmp_err = cumulative_err[-1] - cumulative_err[episodes_ends[-1] + 1]
+            else:
+                tmp_err = cumulative_err[-1]
+
             if (tmp_err != 0):
                 by_eps.append(tmp_err)
 
@@ -209,7 +286,7 @@ class TDError(Metric):
         else:
             return ag_eval
 
-    def which_one_is_better(self, block_1_eval, block_2_eval):
+    def which_one_is_better(self, block_1_eval, block_2_eval, block_1_eps_eval=None, block_2_eps_eval=None):
         """
         This method is needed to decide which of the two blocks is best. Since this metric (TDError) is better if minimised
         then the best block is the one with the lowest evaluation.
@@ -217,7 +294,8 @@ class TDError(Metric):
         This method is needed to decide among different blocks keeping in mind that a metric may have to be minimised 
         (TDError) or it may have to be maximised (DiscountedReward). 
         
-        This method returns 0 if the first block is the best one, else it returns 1.
+        This method returns 0 if the first block is the best one, else it returns 1. The evaluations of the single episodes of
+        the blocks are not used.
         """
 
         if (block_1_eval < block_2_eval):
@@ -234,8 +312,10 @@ class DiscountedReward(Metric):
     Here bigger is better.
     """
 
-    def __init__(self, obj_name, n_episodes, env_dict_of_params=None, batch=False, seeder=2, log_mode='console',
-                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+    def __init__(self, obj_name, n_episodes, env_dict_of_params=None, batch=False, closed_form=False, adaptive=False, 
+                 adaptive_batch_size=10, confidence_level=0.95, ci_relative_width=0.05, common_random_numbers=False, 
+                 crn_seeder=None, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, 
+                 job_type='process'):
         """
         Parameters
         ----------
@@ -254,6 +334,56 @@ class DiscountedReward(Metric):
                single episode at the time, if parallel we divide the episodes over the selected number of processes.
                
                The default is False.
+               
+        closed_form: This is a boolean. If True and the environment exposes the method evaluate_linear_policy (like the LQG 
+                     environment) and the policy is affine in the state (i.e: a deterministic policy with a generic_regressor 
+                     approximator such that a = K s + k) then the expected discounted reward is computed exactly with the method
+                     evaluate_linear_policy of the environment, without rolling out any episode. 
+                     
+                     If the policy is not affine, or if the environment does not expose such method, or if the states or the 
+                     actions may be clipped by the environment, the discounted reward is computed by rolling out n_episodes 
+                     episodes as usual.
+                     
+                     The default is False.
+                     
+        adaptive: This is a boolean. If True the episodes are run in batches of adaptive_batch_size episodes and after each 
+                  batch a confidence interval for the mean discounted reward is computed. The evaluation stops as soon as:
+                  -the confidence interval is tight enough: its half-width is smaller than ci_relative_width times the absolute
+                  value of the mean,
+                  -or the confidence interval does not contain the eval_threshold: the block is clearly better or clearly 
+                  worse than the best block found so far.
+                  
+                  In any case no more than n_episodes episodes are run.
+                  
+                  The default is False.
+                  
+        adaptive_batch_size: This is the number of episodes run in each batch when adaptive is True. It must be greater than or
+                             equal to 2.
+                             
+                             The default is 10.
+                             
+        confidence_level: This is the confidence level of the (Student t) confidence interval used when adaptive is True.
+        
+                          The default is 0.95.
+                          
+        ci_relative_width: This is the relative half-width of the confidence interval below which the evaluation stops when 
+                           adaptive is True.
+                           
+                           The default is 0.05.
+                           
+        common_random_numbers: This is a boolean. If True the i-th episode is always run with the seeder crn_seeder+i, whatever
+                               the seeder of the env is: this way every block is evaluated on the same episodes (same initial
+                               states and same noise of the env) and the evaluations of two blocks can be compared episode by 
+                               episode. The evaluation of each episode is stored in the member block_eps_eval of the block
+                               passed to the method evaluate, and the method which_one_is_better compares two blocks on their 
+                               paired episodes when these are passed to it.
+                               
+                               The default is False.
+                               
+        crn_seeder: This is the seeder of the first episode when common_random_numbers is True. If None the seeder of this 
+                    object is used.
+                    
+                    The default is None.
                      
         Non-Parameters Members
         ----------------------
@@ -263,6 +393,9 @@ class DiscountedReward(Metric):
         
         single_episode_evaluations: This is the evaluation across the episodes: this may be useful to check if an algorithm is 
                                     overfitting: it reaches the optimum but then the performance degrades.
+                                    
+        n_episodes_used: This is the number of episodes actually run in the last evaluation. It is smaller than n_episodes if
+                         the adaptive evaluation stopped early, and it is zero if the evaluation was computed in closed form.
         
         The other parameters and non-parameters members are described in the Class Metric.
         """
@@ -276,6 +409,31 @@ class DiscountedReward(Metric):
 
         self.batch = batch
 
+        self.closed_form = closed_form
+
+        self.adaptive = adaptive
+        self.adaptive_batch_size = adaptive_batch_size
+        if (self.adaptive_batch_size < 2):
+            exc_msg = '\'adaptive_batch_size\' must be greater than or equal to 2!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+
+        self.confidence_level = confidence_level
+        if ((self.confidence_level <= 0) or (self.confidence_level >= 1)):
+            exc_msg = '\'confidence_level\' must be in the open interval (0, 1)!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+
+        self.ci_relative_width = ci_relative_width
+
+        self.common_random_numbers = common_random_numbers
+        self.crn_seeder = crn_seeder
+        if (self.crn_seeder is None):
+            self.crn_seeder = self.seeder
+
+        # these are the VectorEnv used in batch mode: they are reused across the evaluations, one for each thread:
+        self._vector_envs = {}
+
         # these two are needed for checking the consistency of the metric with an input_loader:
         self.requires_dataset = False
         self.requires_env = True
@@ -285,16 +443,49 @@ class DiscountedReward(Metric):
 
         self.single_episode_evaluations = None
 
+        self.n_episodes_used = None
+
     def __repr__(self):
         return 'DiscountedReward(' + 'obj_name=' + str(self.obj_name) + ', n_episodes=' + str(self.n_episodes) \
-               + ', env_dict_of_params=' + str(self.env_dict_of_params) + ', log_mode=' + str(self.log_mode) \
+               + ', env_dict_of_params=' + str(self.env_dict_of_params) + ', batch=' + str(self.batch) \
+               + ', closed_form=' + str(self.closed_form) + ', adaptive=' + str(self.adaptive) \
+               + ', adaptive_batch_size=' + str(self.adaptive_batch_size) + ', confidence_level=' + str(self.confidence_level) \
+               + ', ci_relative_width=' + str(self.ci_relative_width) + ', eval_threshold=' + str(self.eval_threshold) \
+               + ', common_random_numbers=' + str(self.common_random_numbers) + ', crn_seeder=' + str(self.crn_seeder) \
+               + ', log_mode=' + str(self.log_mode) \
                + ', checkpoint_log_path=' + str(self.checkpoint_log_path) + ', verbosity=' + str(self.verbosity) \
                + ', n_jobs=' + str(self.n_jobs) + ', job_type=' + str(self.job_type) + ', seeder=' + str(self.seeder) \
                + ', local_prng=' + str(self.local_prng) + ', requires_dataset=' + str(self.requires_dataset) \
                + ', requires_env=' + str(self.requires_env) + ', logger=' + str(self.logger) \
-               + ', eval_mean=' + str(self.eval_mean) + ', eval_var=' + str(self.eval_var) + ')'
+               + ', eval_mean=' + str(self.eval_mean) + ', eval_var=' + str(self.eval_var) \
+               + ', n_episodes_used=' + str(self.n_episodes_used) + ')'
+
+    def __getstate__(self):
+        # the VectorEnv are not copied together with the metric: each copy starts its own.
+        state = self.__dict__.copy()
+        state['_vector_envs'] = {}
+
+        return state
 
-    def _evaluate_some_episodes(self, block_res, local_n_episodes, env=None):
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if ('_vector_envs' not in self.__dict__):
+            self._vector_envs = {}
+
+    def get_params(self):
+        """
+        Returns
+        -------
+        params_dict: This is a dictionary containing the members of the metric that change its evaluations: the number of 
+                     episodes, the parameters of the environment used for the evaluation and the evaluation mode.
+        """
+
+        return dict(n_episodes=self.n_episodes, env_dict_of_params=self.env_dict_of_params, batch=self.batch,
+                    closed_form=self.closed_form, adaptive=self.adaptive, adaptive_batch_size=self.adaptive_batch_size,
+                    confidence_level=self.confidence_level, ci_relative_width=self.ci_relative_width,
+                    common_random_numbers=self.common_random_numbers, crn_seeder=self.crn_seeder, seeder=self.seeder)
+
+    def _evaluate_some_episodes(self, block_res, local_n_episodes, env=None, episodes_seeders=None):
         """
         Parameters
         ----------
@@ -303,6 +494,12 @@ class DiscountedReward(Metric):
         local_n_episodes: This is an integer representing the number of episodes for which we need to evaluate the block_res.                        
                     
         env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        episodes_seeders: This is either None or a list of local_n_episodes seeders: if it is a list then the env is re-seeded
+                          with the i-th seeder before the i-th episode, so that each episode does not depend on the previous 
+                          ones.
+                          
+                          The default is None.
 
         Returns
         -------
@@ -322,6 +519,8 @@ class DiscountedReward(Metric):
         tmp_scores = []
 
         # reset env:
+        if (episodes_seeders is not None):
+            env.set_local_prng(new_seeder=episodes_seeders[0])
         obs = env.reset()
         while eps_counter < local_n_episodes:
             tmp_act = block_res.policy.policy.draw_action(state=obs)
@@ -352,6 +551,8 @@ class DiscountedReward(Metric):
                 tmp_states = []
                 tmp_scores = []
 
+                if ((episodes_seeders is not None) and (eps_counter < local_n_episodes)):
+                    env.set_local_prng(new_seeder=episodes_seeders[eps_counter])
                 obs = env.reset()
 
         if (tmp_rew != 0):
@@ -365,7 +566,35 @@ class DiscountedReward(Metric):
 
         return total_rew, total_actions, total_states, total_scores
 
-    def _non_batch_eval(self, block_res, train_data=None, env=None):
+    def _evaluate_some_episodes_on_a_new_env(self, block_res, local_n_episodes, env_factory, env_seeder, 
+                                             episodes_seeders=None):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+    
+        local_n_episodes: This is an integer representing the number of episodes for which we need to evaluate the block_res.
+        
+        env_factory: This must be an object of Class EnvironmentFactory.
+        
+        env_seeder: This is the seeder used for the environment built with the env_factory.
+        
+        episodes_seeders: This is either None or a list of local_n_episodes seeders, one for each episode.
+        
+                          The default is None.
+        
+        Returns
+        -------
+        The output of the method _evaluate_some_episodes called on the environment built with the env_factory.
+        """
+        
+        #this is called in the worker processes: the environment is cached so that it is built only once per process:
+        new_env = env_factory.make(seeder=env_seeder, use_cache=True)
+        
+        return self._evaluate_some_episodes(block_res=block_res, local_n_episodes=local_n_episodes, env=new_env, 
+                                            episodes_seeders=episodes_seeders)
+    
+    def _non_batch_eval(self, block_res, train_data=None, env=None, n_episodes=None, n_jobs=None, episodes_offset=0):
         """
         Parameters
         ----------
@@ -374,33 +603,67 @@ class DiscountedReward(Metric):
         train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
             
         env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        n_episodes: This is the number of episodes to run. If None then n_episodes of this object is used.
+        
+                    The default is None.
+                    
+        n_jobs: This is the number of processes over which the episodes are split. If None then n_jobs of this object is used.
+        
+                The default is None.
+                
+        episodes_offset: This is the number of episodes already run in the current evaluation: with common random numbers the 
+                         seeders of the episodes start from crn_seeder plus episodes_offset.
+                         
+                         The default is 0.
 
         Returns
         -------
         tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode.
         """
-
-        if (self.n_jobs == 1):
+        
+        if (n_episodes is None):
+            n_episodes = self.n_episodes
+        if (n_jobs is None):
+            n_jobs = self.n_jobs
+
+        # with common random numbers each episode has its own seeder, which does not depend on the env:
+        episodes_seeders = None
+        if (self.common_random_numbers):
+            episodes_seeders = [self._get_episodes_base_seeder(env=env, episodes_offset=episodes_offset) + i 
+                                for i in range(n_episodes)]
+
+        if (n_jobs == 1):
             # in the call of the parallel function i am setting: samples[agent_index], thus even if i use a single process
             # i need to have a list otherwise i cannot index an integer:
-            episodes = [self.n_episodes]
-            envs = [env]
-            envs[0].set_local_prng(new_seeder=env.seeder)
+            episodes = [n_episodes]
+            env.set_local_prng(new_seeder=env.seeder)
+            
+            parallel_generated_evals = [self._evaluate_some_episodes(block_res, episodes[0], env, episodes_seeders)]
         else:
             episodes = []
-            envs = []
-            for i in range(self.n_jobs):
-                episodes.append(int(self.n_episodes / self.n_jobs))
-                envs.append(copy.deepcopy(env))
-                envs[i].set_local_prng(new_seeder=env.seeder + i)
-
-            episodes[-1] = self.n_episodes - sum(episodes[:-1])
-
-        delayed_func = delayed(self._evaluate_some_episodes)
-        parallel_generated_evals = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
-        parallel_generated_evals = parallel_generated_evals(
-            delayed_func(block_res, episodes[agent_index], envs[agent_index]) for agent_index in range(self.n_jobs)
-        )
+            for i in range(n_jobs):
+                episodes.append(int(n_episodes / n_jobs))
+
+            episodes[-1] = n_episodes - sum(episodes[:-1])
+            
+            #only the factory is sent to the workers: each worker builds (or takes from its cache) its own environment:
+            env_factory = env.get_factory()
+
+            # the episodes of each process are contiguous:
+            first_episodes = np.concatenate(([0], np.cumsum(episodes)))
+            processes_episodes_seeders = [None] * n_jobs
+            if (episodes_seeders is not None):
+                processes_episodes_seeders = [episodes_seeders[first_episodes[agent_index]:first_episodes[agent_index + 1]]
+                                              for agent_index in range(n_jobs)]
+
+            delayed_func = delayed(self._evaluate_some_episodes_on_a_new_env)
+            parallel_generated_evals = Parallel(n_jobs=n_jobs, backend=self.backend, prefer=self.prefer)
+            parallel_generated_evals = parallel_generated_evals(
+                delayed_func(block_res, episodes[agent_index], env_factory, env.seeder + agent_index, 
+                             processes_episodes_seeders[agent_index]) 
+                for agent_index in range(n_jobs)
+            )
         evals = []
         actions = []
         states = []
@@ -429,129 +692,475 @@ class DiscountedReward(Metric):
 
         return unlisted_evals, unlisted_actions, unlisted_states, unlisted_scores
 
-    def _batch_eval_parallel_step(self, block_res, train_data=None, env=None):
+    def _get_affine_policy_gains(self, block_res, env):
         """
         Parameters
         ----------
         block_res: This must be an object of Class BlockOutput.
-                        
-        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
             
         env: This must be an object of a Class inheriting from the Class BaseEnvironment.
 
         Returns
         -------
-        tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode.
+        K, k: These are the gain matrix, of shape (da, ds), and the offset, of shape (da,), of the policy of block_res such 
+              that a = K s + k. If the policy is not affine in the state then None, None is returned.
+              
+        The gains are obtained by querying the policy approximator in the origin and along the axes, and then the policy is 
+        checked to be affine on some random states.
         """
+        
+        if ((block_res.policy.approximator is None) or (block_res.policy.regressor_type != 'generic_regressor')):
+            return None, None
+        
+        obs_low = np.array(env.info.observation_space.low, dtype=float)
+        obs_high = np.array(env.info.observation_space.high, dtype=float)
+        ds = len(obs_low)
+        
+        probe_states = np.vstack([np.zeros(ds), np.diag(obs_high), 
+                                  self.local_prng.uniform(low=obs_low, high=obs_high, size=(2 * ds + 1, ds))])
+        
+        preds = np.asarray(block_res.policy.approximator.predict(probe_states), dtype=float).reshape(len(probe_states), -1)
+        
+        k = preds[0]
+        K = ((preds[1:ds + 1] - k) / obs_high[:, np.newaxis]).T
+        
+        # the policy must be affine also on the random states:
+        if (not np.allclose(preds[ds + 1:], np.dot(probe_states[ds + 1:], K.T) + k, rtol=1e-6, atol=1e-6)):
+            return None, None
+        
+        return K, k
+    
+    def _closed_form_eval(self, block_res, env):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
 
-        envs = []
-        for i in range(self.n_episodes):
-            envs.append(copy.deepcopy(env))
-            envs[i].set_local_prng(new_seeder=env.seeder + i)
-
-        tmp_rew = np.zeros(self.n_episodes)
-        n_steps_in_eps = np.zeros(self.n_episodes)
-
-        last = np.zeros(len(envs))
-
-        # reset envs:
-        obs = []
-        for j in range(len(envs)):
-            obs.append(envs[j].reset())
-
-        obs = np.array(obs)
+        Returns
+        -------
+        The exact expected discounted reward of the policy of block_res, or None if it cannot be computed in closed form: this
+        is also the case if the environment may clip the states or the actions of the policy.
+        """
+        
+        if (not hasattr(env, 'evaluate_linear_policy')):
+            self.logger.warning(msg='The \'env\' does not expose the method \'evaluate_linear_policy\': the discounted reward'
+                                    + ' cannot be computed in closed form!')
+            return None
+        
+        K, k = self._get_affine_policy_gains(block_res=block_res, env=env)
+        
+        if (K is None):
+            self.logger.warning(msg='The policy is not affine in the state: the discounted reward cannot be computed in closed'
+                                    + ' form!')
+            return None
+        
+        return env.evaluate_linear_policy(K=K, k=k)
+    
+    def _batch_eval_batched_env(self, block_res, batched_env):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+        
+        batched_env: This must be either an environment returned by the method get_batched_env of an object of a Class 
+                     inheriting from the Class BaseEnvironment, or an object of Class VectorEnv with auto_reset equal to False: 
+                     every row of its states is a different episode.
 
+        Returns
+        -------
+        tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode.
+        """
+        
+        obs = batched_env.reset()
+        
+        tmp_rew = np.zeros(len(obs))
+        last = np.zeros(len(obs), dtype=bool)
+        n_steps_in_eps = 0
+        
         while not last.all():
-            preds = block_res.policy.approximator.predict(obs)
-            actions = []
-
-            for j in range(len(envs)):
-                if (block_res.policy.regressor_type == 'generic_regressor'):
-                    # a generic_regressor directly models the policy:
-                    tmp_act = preds[j]
-                else:
-                    # if regressor_type is not a generic_regressor then we have a q-function approximator:
-                    # here i can use ravel since the output of np.argmax is a numpy.int64 object. On an basic integer i would not
-                    # be able to call it:
-                    tmp_act = np.argmax(preds[j]).ravel()
-                    if (len(tmp_act) > 1):
-                        tmp_act = np.array([self.local_prng.choice(tmp_act)])
-
-                actions.append(tmp_act)
-
-            parallel_generated_actions = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
-            parallel_res = parallel_generated_actions(delayed(envs[j].step)(actions[j]) for j in range(len(envs)))
-
-            j = 0
-            for obs_j, tmp_rew_j, tmp_done, _ in parallel_res:
-                if (not last[j]):
-                    last[j] = not (n_steps_in_eps[j] < envs[j].info.horizon and not tmp_done)
-                    obs[j] = obs_j
-                    tmp_rew[j] += (envs[j].gamma ** n_steps_in_eps[j]) * tmp_rew_j
-                    n_steps_in_eps[j] += 1
-
-                j += 1
-
+            preds = np.asarray(block_res.policy.approximator.predict(obs))
+            
+            if (block_res.policy.regressor_type == 'generic_regressor'):
+                # a generic_regressor directly models the policy:
+                actions = preds
+            else:
+                # if regressor_type is not a generic_regressor then we have a q-function approximator:
+                actions = np.argmax(preds, axis=1).reshape(-1, 1)
+            
+            obs, step_rew, step_done, _ = batched_env.step(actions)
+            
+            # the episodes that are already over are not updated:
+            tmp_rew[~last] += (batched_env.gamma ** n_steps_in_eps) * step_rew[~last]
+            
+            last = last | (not (n_steps_in_eps < batched_env.info.horizon)) | step_done
+            n_steps_in_eps += 1
+            
         return tmp_rew
-
-    def _batch_eval_no_parallel(self, block_res, train_data=None, env=None):
+    
+    def _batch_eval_on_vector_env(self, block_res, env, vector_env_mode, n_episodes=None, n_jobs=None, episodes_offset=0):
         """
         Parameters
         ----------
         block_res: This must be an object of Class BlockOutput.
-                        
-        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
             
         env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        vector_env_mode: This is the mode of the VectorEnv on which the episodes are run: either 'sync' or 'subprocess'.
+        
+        The other parameters are described in the method _non_batch_eval.
 
         Returns
         -------
         tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode.
         """
+        
+        # if the env can be batched the episodes are run at once, else the episodes are run on a VectorEnv where the i-th
+        # copy of the env is seeded with base_seeder+i:
+        if (n_episodes is None):
+            n_episodes = self.n_episodes
+        if (n_jobs is None):
+            n_jobs = self.n_jobs
+        
+        base_seeder = self._get_episodes_base_seeder(env=env, episodes_offset=episodes_offset)
+        
+        if (vector_env_mode == 'sync'):
+            batched_env = env.get_batched_env(n_envs=n_episodes, seeder=base_seeder)
+            
+            if (batched_env is not None):
+                return self._batch_eval_batched_env(block_res=block_res, batched_env=batched_env)
+        else:
+            # each of the n_jobs processes runs its contiguous episodes on its own batched env, seeded with the base seeder
+            # plus the index of its first episode:
+            episodes = [int(n_episodes / n_jobs)] * n_jobs
+            episodes[-1] = n_episodes - sum(episodes[:-1])
+            first_episodes = np.concatenate(([0], np.cumsum(episodes)))
+            
+            batched_envs = [env.get_batched_env(n_envs=episodes[agent_index], 
+                                                seeder=base_seeder + int(first_episodes[agent_index]))
+                            for agent_index in range(n_jobs) if (episodes[agent_index] > 0)]
+            
+            if (batched_envs[0] is not None):
+                parallel_generated_evals = Parallel(n_jobs=n_jobs, backend=self.backend, prefer=self.prefer)
+                parallel_generated_evals = parallel_generated_evals(
+                    delayed(self._batch_eval_batched_env)(block_res, tmp_batched_env) for tmp_batched_env in batched_envs
+                )
+                
+                return np.concatenate(parallel_generated_evals)
+        
+        vector_env = self._get_vector_env(env=env, vector_env_mode=vector_env_mode, seeder=base_seeder, n_episodes=n_episodes,
+                                          n_jobs=n_jobs)
 
-        envs = []
-        for i in range(self.n_episodes):
-            envs.append(copy.deepcopy(env))
-            envs[i].set_local_prng(new_seeder=env.seeder + i)
+        return self._batch_eval_batched_env(block_res=block_res, batched_env=vector_env)
 
-        tmp_rew = np.zeros(self.n_episodes)
-        n_steps_in_eps = np.zeros(self.n_episodes)
+    def _get_vector_env(self, env, vector_env_mode, seeder, n_episodes, n_jobs):
+        """
+        Parameters
+        ----------
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
 
-        last = np.zeros(len(envs))
+        vector_env_mode: This is the mode of the VectorEnv: either 'sync' or 'subprocess'.
 
-        # reset envs:
-        obs = []
-        for j in range(len(envs)):
-            obs.append(envs[j].reset())
+        seeder: This is the seeder of the VectorEnv: the i-th copy of the env is seeded with seeder+i.
+        
+        n_episodes: This is the number of copies of env.
+        
+        n_jobs: This is the number of worker processes of the VectorEnv.
 
-        obs = np.array(obs)
+        Returns
+        -------
+        vector_env: This is an object of Class VectorEnv with n_episodes copies of env. The VectorEnv of the last evaluation is
+                    seeded again and reused if it was built from the same env, otherwise it is closed and a new one is built:
+                    this way the worker processes are only started once.
+        """
 
-        while not last.all():
-            preds = block_res.policy.approximator.predict(obs)
+        env_factory_id = env.get_factory().factory_id
+        vector_env_key = (env_factory_id, n_episodes, n_jobs, vector_env_mode)
 
-            for j in range(len(envs)):
-                if (not last[j]):
-                    if (block_res.policy.regressor_type == 'generic_regressor'):
-                        # a generic_regressor directly models the policy:
-                        tmp_act = preds[j]
-                    else:
-                        # if regressor_type is not a generic_regressor then we have a q-function approximator:
-                        # here i can use ravel since the output of np.argmax is a numpy.int64 object. On an basic integer i would
-                        # not be able to call it:
-                        tmp_act = np.argmax(preds[j]).ravel()
-                        if (len(tmp_act) > 1):
-                            tmp_act = np.array([self.local_prng.choice(tmp_act)])
+        thread_id = threading.get_ident()
+        old_key, vector_env = self._vector_envs.get(thread_id, (None, None))
 
-                    obs_j, tmp_rew_j, tmp_done, _ = envs[j].step(tmp_act)
+        if ((vector_env is not None) and (env_factory_id is not None) and (old_key == vector_env_key)
+            and (not vector_env.closed)):
+            vector_env.seed(seeder=seeder)
+            return vector_env
 
-                    last[j] = not (n_steps_in_eps[j] < envs[j].info.horizon and not tmp_done)
+        if (vector_env is not None):
+            vector_env.close()
 
-                    obs[j] = obs_j
-                    tmp_rew[j] += (envs[j].gamma ** n_steps_in_eps[j]) * tmp_rew_j
-                    n_steps_in_eps[j] += 1
+        vector_env = VectorEnv(obj_name=str(self.obj_name) + '_vector_env', env=env, n_envs=n_episodes,
+                               mode=vector_env_mode, n_workers=n_jobs, auto_reset=False, seeder=seeder,
+                               log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
 
-        return tmp_rew
+        self._vector_envs[thread_id] = (vector_env_key, vector_env)
+
+        return vector_env
+
+    def _batch_eval_parallel_step(self, block_res, train_data=None, env=None, n_episodes=None, n_jobs=None, episodes_offset=0):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+                        
+        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        The other parameters are described in the method _non_batch_eval.
+
+        Returns
+        -------
+        tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode. The copies of the
+                 env are stepped by n_jobs persistent worker processes.
+        """
+        
+        return self._batch_eval_on_vector_env(block_res=block_res, env=env, vector_env_mode='subprocess', n_episodes=n_episodes,
+                                              n_jobs=n_jobs, episodes_offset=episodes_offset)
+    
+    def _batch_eval_no_parallel(self, block_res, train_data=None, env=None, n_episodes=None, n_jobs=None, episodes_offset=0):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+                        
+        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        The other parameters are described in the method _non_batch_eval.
+
+        Returns
+        -------
+        tmp_rew: This is a numpy.array of floats containing the evaluation of block_res for every episode. The copies of the
+                 env are stepped in the current process.
+        """
+        
+        return self._batch_eval_on_vector_env(block_res=block_res, env=env, vector_env_mode='sync', n_episodes=n_episodes,
+                                              n_jobs=n_jobs, episodes_offset=episodes_offset)
+
+    def _run_episodes(self, block_res, train_data=None, env=None, n_episodes=None, n_jobs=None, episodes_offset=0):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+                        
+        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        The other parameters are described in the method _non_batch_eval: they are not stored in this object so that the same
+        metric can be used by several threads at the same time.
+
+        Returns
+        -------
+        eps_eval, eps_actions, eps_states, eps_scores: These are the evaluations, the actions, the states and the scores of 
+                                                       n_episodes episodes. In batch mode the actions, the states and the scores
+                                                       are None.
+        """
+        
+        if (self.batch):
+            if (block_res.policy.approximator is None):
+                wrn_msg = 'The policy approximator is \'None\': it probably means that the policy is not deterministic' \
+                          + ' and thus you cannot use the \'batch\' option! If you want to use the \'batch\' option call the' \
+                          + ' method \'make_policy_deterministic\' of the object of Class \'BlockOutput\' or set' \
+                          + ' \'deterministic_output_policy\' equal to \'True\' in the \'ModelGeneration\' block!'
+                self.logger.warning(msg=wrn_msg)
+                return self._non_batch_eval(block_res=block_res, train_data=train_data, env=env, n_episodes=n_episodes, 
+                                            n_jobs=n_jobs, episodes_offset=episodes_offset)
+            
+            if (n_jobs is None):
+                n_jobs = self.n_jobs
+            
+            # in batch evaluation the actions, the states and the scores of the episodes are not stored:
+            if (n_jobs > 1):
+                eps_eval = self._batch_eval_parallel_step(block_res=block_res, train_data=train_data, env=env, 
+                                                          n_episodes=n_episodes, n_jobs=n_jobs, episodes_offset=episodes_offset)
+            else:
+                eps_eval = self._batch_eval_no_parallel(block_res=block_res, train_data=train_data, env=env, 
+                                                        n_episodes=n_episodes, n_jobs=n_jobs, episodes_offset=episodes_offset)
+                
+            return eps_eval, None, None, None
+        
+        return self._non_batch_eval(block_res=block_res, train_data=train_data, env=env, n_episodes=n_episodes, n_jobs=n_jobs,
+                                    episodes_offset=episodes_offset)
+    
+    def _get_episodes_base_seeder(self, env, episodes_offset=0):
+        """
+        Parameters
+        ----------
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        episodes_offset: This is the number of episodes already run in the current evaluation.
+        
+                         The default is 0.
+        
+        Returns
+        -------
+        The seeder of the first episode: the i-th episode is seeded with this plus i. With common random numbers this does not
+        depend on the env, so that all the blocks are evaluated on the same episodes.
+        """
+        
+        if (self.common_random_numbers):
+            return self.crn_seeder + episodes_offset
+        
+        return env.seeder
+    
+    def _get_confidence_interval(self, samples):
+        """
+        Parameters
+        ----------
+        samples: This is a list or a numpy.array with at least two floats.
+        
+        Returns
+        -------
+        mean, half_width: These are the mean of the samples and the half-width of its Student t confidence interval at the 
+                          confidence_level.
+        """
+        
+        n = len(samples)
+        
+        mean = np.mean(samples)
+        half_width = stats.t.ppf((1 + self.confidence_level) / 2, n - 1) * np.std(samples, ddof=1) / np.sqrt(n)
+        
+        return mean, half_width
+    
+    def paired_comparison(self, block_1_eps_eval, block_2_eps_eval):
+        """
+        Parameters
+        ----------
+        block_1_eps_eval: This is the evaluation of each episode of the first block, as stored in its member block_eps_eval.
+        
+        block_2_eps_eval: This is the evaluation of each episode of the second block, as stored in its member block_eps_eval.
+        
+        Returns
+        -------
+        mean_diff, half_width, n_pairs: These are the mean of the differences between the episodes of the first and of the 
+                                        second block, the half-width of its confidence interval and the number of paired 
+                                        episodes. Since with common random numbers the i-th episode of every block is run with
+                                        the same seeder, the episodes can be paired. 
+                                        
+        If common random numbers are not used or if the episodes of one of the two blocks are not known, or if there are less 
+        than two paired episodes, then None, None, 0 is returned.
+        """
+        
+        if ((not self.common_random_numbers) or (block_1_eps_eval is None) or (block_2_eps_eval is None)):
+            return None, None, 0
+        
+        block_1_eps_eval = np.asarray(block_1_eps_eval, dtype=float)
+        block_2_eps_eval = np.asarray(block_2_eps_eval, dtype=float)
+        
+        n_pairs = min(len(block_1_eps_eval), len(block_2_eps_eval))
+        if (n_pairs < 2):
+            return None, None, 0
+        
+        mean_diff, half_width = self._get_confidence_interval(samples=block_1_eps_eval[:n_pairs] - block_2_eps_eval[:n_pairs])
+        
+        return mean_diff, half_width, n_pairs
+    
+    def _is_adaptive_eval_over(self, eps_eval, eval_threshold=None, eval_threshold_eps_eval=None):
+        """
+        Parameters
+        ----------
+        eps_eval: This is the list of the evaluations of the episodes run so far.
+        
+        eval_threshold: This is the eval_threshold of the current evaluation.
+        
+                        The default is None.
+        
+        eval_threshold_eps_eval: This is the eval_threshold_eps_eval of the current evaluation.
+        
+                                 The default is None.
+
+        Returns
+        -------
+        This is True if the confidence interval of the mean of eps_eval is tight enough or if it does not contain the 
+        eval_threshold. It is False otherwise.
+        """
+        
+        n = len(eps_eval)
+        if (n < 2):
+            return False
+        
+        mean, half_width = self._get_confidence_interval(samples=eps_eval)
+        
+        if (half_width <= self.ci_relative_width * np.abs(mean)):
+            return True
+        
+        if ((eval_threshold is not None) and np.isfinite(eval_threshold)):
+            # with common random numbers the episodes are paired with the ones of the block that got the eval_threshold:
+            mean_diff, half_width_diff, n_pairs = self.paired_comparison(block_1_eps_eval=eps_eval,
+                                                                         block_2_eps_eval=eval_threshold_eps_eval)
+            if (n_pairs > 0):
+                if (np.abs(mean_diff) > half_width_diff):
+                    return True
+            elif ((mean + half_width < eval_threshold) or (mean - half_width > eval_threshold)):
+                return True
+            
+        return False
+    
+    def _adaptive_eval(self, block_res, train_data=None, env=None, eval_threshold=None, eval_threshold_eps_eval=None):
+        """
+        Parameters
+        ----------
+        block_res: This must be an object of Class BlockOutput.
+                        
+        train_data: This must be an object of a Class inheriting from the Class BaseDataSet.
+            
+        env: This must be an object of a Class inheriting from the Class BaseEnvironment.
+        
+        eval_threshold: This is the eval_threshold of the current evaluation.
+        
+                        The default is None.
+        
+        eval_threshold_eps_eval: This is the eval_threshold_eps_eval of the current evaluation.
+        
+                                 The default is None.
 
+        Returns
+        -------
+        eps_eval, eps_actions, eps_states, eps_scores: These are the evaluations, the actions, the states and the scores of the
+                                                       episodes run before the sequential stopping rule was met. In batch mode 
+                                                       the actions, the states and the scores are None.
+                                                       
+        The episodes are run in batches on a single copy of the env: before each batch the copy is re-seeded with env.seeder plus
+        the number of episodes already run, so that the batches are made of different episodes.
+        
+        The size of the batches and the thresholds are local to this call: the members of this object are not modified, so 
+        that the same metric can be used by several threads at the same time.
+        """
+        
+        eps_eval = []
+        eps_actions, eps_states, eps_scores = [], [], []
+        batch_env = env.make_copy()
+        while len(eps_eval) < self.n_episodes:
+            batch_n_episodes = min(self.adaptive_batch_size, self.n_episodes - len(eps_eval))
+            batch_n_jobs = min(self.n_jobs, batch_n_episodes)
+            
+            batch_env.set_local_prng(new_seeder=env.seeder + len(eps_eval))
+            
+            # with common random numbers the seeders of the episodes of this batch start from the number of episodes already
+            # run:
+            batch_eval, batch_actions, batch_states, batch_scores = self._run_episodes(block_res=block_res, 
+                                                                                       train_data=train_data, env=batch_env,
+                                                                                       n_episodes=batch_n_episodes, 
+                                                                                       n_jobs=batch_n_jobs, 
+                                                                                       episodes_offset=len(eps_eval))
+            
+            eps_eval += list(batch_eval)
+            if (batch_actions is None):
+                eps_actions, eps_states, eps_scores = None, None, None
+            elif (eps_actions is not None):
+                eps_actions += list(batch_actions)
+                eps_states += list(batch_states)
+                eps_scores += list(batch_scores)
+                
+            if (self._is_adaptive_eval_over(eps_eval=eps_eval, eval_threshold=eval_threshold, 
+                                            eval_threshold_eps_eval=eval_threshold_eps_eval)):
+                break
+            
+        return eps_eval, eps_actions, eps_states, eps_scores
+    
     def evaluate(self, block_res, block=None, train_data=None, env=None):
         """
         Parameters
@@ -579,6 +1188,10 @@ class DiscountedReward(Metric):
             self.logger.exception(msg=exc_msg)
             raise TypeError(exc_msg)
 
+        # the thresholds are read once: the adaptive evaluation only uses these local values
+        eval_threshold = self.eval_threshold
+        eval_threshold_eps_eval = self.eval_threshold_eps_eval
+
         env_dict_of_old_values = None
         if (self.env_dict_of_params is not None):
             # i need to get the original value of the parameters as at the end of this method i need to revert back the values:
@@ -595,23 +1208,27 @@ class DiscountedReward(Metric):
         if (env is not None):
             self.logger.info(msg='Evaluating: ' + str(block_res.obj_name))
 
-            if (self.batch):
-                if (block_res.policy.approximator is None):
-                    wrn_msg = 'The policy approximator is \'None\': it probably means that the policy is not deterministic' \
-                              + ' and thus you cannot use the \'batch\' option! If you want to use the \'batch\' option call the' \
-                              + ' method \'make_policy_deterministic\' of the object of Class \'BlockOutput\' or set' \
-                              + ' \'deterministic_output_policy\' equal to \'True\' in the \'ModelGeneration\' block!'
-                    self.logger.warning(msg=wrn_msg)
-                    eps_eval, eps_actions, eps_states, eps_scores = self._non_batch_eval(block_res=block_res, train_data=train_data,
-                                                                             env=env)
-                else:
-                    if (self.n_jobs > 1):
-                        eps_eval = self._batch_eval_parallel_step(block_res=block_res, train_data=train_data, env=env)
-                    else:
-                        eps_eval = self._batch_eval_no_parallel(block_res=block_res, train_data=train_data, env=env)
+            closed_form_eval = None
+            if (self.closed_form):
+                closed_form_eval = self._closed_form_eval(block_res=block_res, env=env)
+
+            if (closed_form_eval is not None):
+                # the expected discounted reward is exact: there are no episodes:
+                eps_eval = np.array([closed_form_eval])
+                eps_actions, eps_states, eps_scores = None, None, None
+                self.n_episodes_used = 0
+            elif (self.adaptive):
+                eps_eval, eps_actions, eps_states, eps_scores = self._adaptive_eval(
+                    block_res=block_res, train_data=train_data, env=env, eval_threshold=eval_threshold, 
+                    eval_threshold_eps_eval=eval_threshold_eps_eval)
+                self.n_episodes_used = len(eps_eval)
             else:
-                eps_eval, eps_actions, eps_states, eps_scores = self._non_batch_eval(block_res=block_res, train_data=train_data,
-                                                                         env=env)
+                eps_eval, eps_actions, eps_states, eps_scores = self._run_episodes(block_res=block_res, train_data=train_data,
+                                                                                   env=env)
+                self.n_episodes_used = len(eps_eval)
+
+            if (self.adaptive or self.closed_form):
+                self.logger.info(msg='Episodes used to evaluate ' + str(block_res.obj_name) + ': ' + str(self.n_episodes_used))
 
             # store single episodes evaluations: this way I can see the performance over any episode
             self.single_episode_evaluations = eps_eval
@@ -621,6 +1238,13 @@ class DiscountedReward(Metric):
             self.eval_mean = ag_eval
             self.eval_var = ag_var
 
+            # with common random numbers the episodes of any two blocks can be paired: the episodes are stored in the block so
+            # that they are copied together with it (e.g: from a worker process of a tuner).
+            if (block is not None):
+                block.block_eps_eval = None
+                if (self.common_random_numbers and (self.n_episodes_used > 0)):
+                    block.block_eps_eval = np.array(eps_eval, dtype=float)
+
             self.logger.info(msg='Done evaluating: ' + str(block_res.obj_name))
         else:
             self.logger.error(msg='In \'DiscountedReward\' the \'env\' is \'None\'!')
@@ -637,7 +1261,7 @@ class DiscountedReward(Metric):
 
             return ag_eval, eps_eval, eps_actions, eps_states, eps_scores
 
-    def which_one_is_better(self, block_1_eval, block_2_eval):
+    def which_one_is_better(self, block_1_eval, block_2_eval, block_1_eps_eval=None, block_2_eps_eval=None):
         """
         This method is needed to decide which of the two blocks is best. Since this metric (DiscountedReward) is better if 
         maximised then the best block is the one with the highest evaluation.
@@ -646,8 +1270,23 @@ class DiscountedReward(Metric):
         (TDError) or it may have to be maximised (DiscountedReward). 
         
         This method returns 0 if the first block is the best one, else it returns 1.
+        
+        With common random numbers, if the evaluations of the episodes of both blocks (i.e: their members block_eps_eval) are
+        passed in block_1_eps_eval and block_2_eps_eval, the blocks are compared on the confidence interval of the mean of the 
+        differences of their paired episodes: the first block is the best one only if the whole confidence interval is above
+        zero. Since this test is one-sided it depends on the order of the blocks: the episodes must only be passed when the 
+        second block is the best block found so far, so that a new block must be clearly better to replace it. In any other 
+        comparison (e.g: for sorting a population) only the evaluations must be passed, and the means are compared.
         """
 
+        mean_diff, half_width, n_pairs = self.paired_comparison(block_1_eps_eval=block_1_eps_eval,
+                                                                block_2_eps_eval=block_2_eps_eval)
+        if (n_pairs > 0):
+            if (mean_diff - half_width > 0):
+                return 0
+            else:
+                return 1
+
         if (block_1_eval > block_2_eval):
             return 0
         else:
@@ -748,6 +1387,26 @@ class TimeSeriesRollingAverageDiscountedReward(Metric):
             self.eval_mean) \
                + ', eval_var=' + str(self.eval_var) + ')'
 
+    def get_params(self):
+        """
+        Returns
+        -------
+        params_dict: This is a dictionary containing the members of the metric that change its evaluations. The data_gen_block
+                     is represented by its Class and by the current values of its hyper-parameters.
+        """
+
+        data_gen_block_params = None
+        if (self.data_gen_block is not None):
+            data_gen_block_params = {'class': type(self.data_gen_block)}
+            tmp_block_params = self.data_gen_block.get_params()
+            if (tmp_block_params is not None):
+                for tmp_key in list(tmp_block_params.keys()):
+                    data_gen_block_params[tmp_key] = tmp_block_params[tmp_key].current_actual_value
+
+        return dict(n_episodes_train=self.n_episodes_train, n_evaluations=self.n_evaluations,
+                    n_episodes_eval=self.n_episodes_eval, n_episodes_per_fit=self.n_episodes_per_fit,
+                    data_gen_block=data_gen_block_params, env_dict_of_params=self.env_dict_of_params, seeder=self.seeder)
+
     def _online_blocks_time_series_rolling_eval(self, block, rolling_window_idx, original_lower_bound, train_data=None,
                                                 env=None):
         """
@@ -998,9 +1657,10 @@ class TimeSeriesRollingAverageDiscountedReward(Metric):
 
                 method_to_call = self._online_blocks_time_series_rolling_eval
 
+            env_factory = env.get_factory()
             envs = []
             for i in range(self.n_evaluations):
-                envs.append(copy.deepcopy(env))
+                envs.append(env_factory.make(seeder=env.seeder, obj_name=env.obj_name))
                 envs[-1].reset()
 
             parallel_generated_evals = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
@@ -1040,7 +1700,7 @@ class TimeSeriesRollingAverageDiscountedReward(Metric):
 
             return ag_eval
 
-    def which_one_is_better(self, block_1_eval, block_2_eval):
+    def which_one_is_better(self, block_1_eval, block_2_eval, block_1_eps_eval=None, block_2_eps_eval=None):
         """
         This method is needed to decide which of the two blocks is best. Since this metric (that is still a DiscountedReward) is 
         better if maximised then the best block is the one with the highest evaluation.
@@ -1048,7 +1708,8 @@ class TimeSeriesRollingAverageDiscountedReward(Metric):
         This method is needed to decide among different blocks keeping in mind that a metric may have to be minimised 
         (TDError) or it may have to be maximised (DiscountedReward). 
         
-        This method returns 0 if the first block is the best one, else it returns 1.
+        This method returns 0 if the first block is the best one, else it returns 1. The evaluations of the single episodes of
+        the blocks are not used.
         """
 
         if (block_1_eval > block_2_eval):
@@ -1096,5 +1757,5 @@ class SomeSpecificMetric(Metric):
     def evaluate(self, block_res, block=None, train_data=None, env=None):
         raise NotImplementedError
 
-    def which_one_is_better(self, block_1_eval, block_2_eval):
+    def which_one_is_better(self, block_1_eval, block_2_eval, block_1_eps_eval=None, block_2_eps_eval=None):
         raise NotImplementedError
@@ -1,4 +1,5 @@
 from ARLO.rl_pipeline.rl_pipeline import *
 from ARLO.rl_pipeline.offline_rl_pipeline import *
 from ARLO.rl_pipeline.online_rl_pipeline import *
-from ARLO.rl_pipeline.rl_pipeline_automatic import *
\ No newline at end of file
+from ARLO.rl_pipeline.rl_pipeline_automatic import *
+from ARLO.rl_pipeline.pipeline_stage_cache import *
\ No newline at end of file
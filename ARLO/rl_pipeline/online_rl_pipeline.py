@@ -22,14 +22,14 @@ class OnlineRLPipeline(RLPipeline):
     """
     
     def __init__(self, list_of_block_objects, eval_metric, obj_name, seeder=2, log_mode='console', checkpoint_log_path=None, 
-                 verbosity=3, n_jobs=1, job_type='process'):
+                 verbosity=3, n_jobs=1, job_type='process', stage_cache=None):
         """  
         The other parameters and non-parameters members are described in the Class RLPipeline.
         """
         
         super().__init__(list_of_block_objects=list_of_block_objects, eval_metric=eval_metric, obj_name=obj_name, 
                          seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path, verbosity=verbosity, 
-                         n_jobs=n_jobs, job_type=job_type)
+                         n_jobs=n_jobs, job_type=job_type, stage_cache=stage_cache)
                                          
     def learn(self, train_data=None, env=None):
         """
@@ -73,7 +73,12 @@ class OnlineRLPipeline(RLPipeline):
             policy = None
             policy_eval = None
 
-            for tmp_block in self.list_of_block_objects:
+            #the key of the input of the next block in the stage_cache:
+            input_key = None
+            if(self.stage_cache is not None):
+                input_key = self.stage_cache.get_input_key(train_data=None, env=env)
+            
+            for n_block, tmp_block in enumerate(self.list_of_block_objects):
                 tmp_res = None
                 
                 self.logger.info(msg='Now learning the following block: '+tmp_block.obj_name)   
@@ -96,7 +101,9 @@ class OnlineRLPipeline(RLPipeline):
                     block_fully_instantiated = tmp_block.full_block_instantiation(info_MDP = self.get_info_MDP(latest_env=env))
                         
                 #there is never train_data in onlineRL
-                tmp_res = tmp_block.learn(train_data=None, env=env)      
+                tmp_res, input_key = self._learn_block(n_block=n_block, input_key=input_key, train_data=None, env=env)
+                #if the stage was in the stage_cache the block was replaced by the cached one:
+                tmp_block = self.list_of_block_objects[n_block]
                     
                 #If the block was not learned successfully the pipeline learning process needs to finish here
                 if(not tmp_block.is_learn_successful):
@@ -0,0 +1,327 @@
+"""
+This module contains the implementation of the Class PipelineStageCache.
+
+The Class PipelineStageCache inherits from the Class BaseCache.
+
+The Class PipelineStageCache is a cache of the outputs of the blocks of a pipeline: pipelines starting with the same blocks, with
+the same hyper-parameters and the same input, only learn the blocks that differ.
+"""
+
+import os
+import copy
+import shutil
+import hashlib
+import weakref
+import tempfile
+from collections import OrderedDict
+
+import cloudpickle
+
+from ARLO.tuner.evaluation_cache import BaseCache
+
+
+class PipelineStageCache(BaseCache):
+    """
+    This Class implements a content-addressed cache of the stages of a pipeline. A stage is a learnt block together with the
+    object of Class BlockOutput returned by its method learn(). The key of a stage is a hash of the Class of the block, of the
+    current values of its hyper-parameters, of its seeder and of the key of its input: the input of the first block of a
+    pipeline is identified by a fingerprint of the train_data and of the env, while the input of any other block is identified
+    by the key of the previous stage. Therefore the key of a stage identifies the whole prefix of the pipeline up to that block.
+    
+    The stages are kept in memory, or if cache_path is not None in the folder cache_path, and the least recently used ones are
+    evicted when there are more than max_entries stages.
+    
+    The same object is shared by all the copies of the pipelines using it: the agents created by a tuner are deep copies of the
+    pipeline to tune. With jobs of type 'process' the stages kept in the folder cache_path are shared, and if cache_path is 
+    None then the stages kept in memory are written, each time the cache is pickled, in the folder spill_path: this is the 
+    cache_path of all the pickled copies, and the cache also looks up there the stages stored by its pickled copies.
+    
+    This Class inherits from the Class BaseCache.
+    """
+    
+    def __init__(self, obj_name, cache_path=None, max_entries=32, seeder=2, log_mode='console', checkpoint_log_path=None,
+                 verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        cache_path: This is the path of the folder containing the stages. If None the stages are kept in memory. If it does not
+                    exist it is created.
+                    
+                    The default is None.
+        
+        max_entries: This is the maximum number of stages in the cache.
+                     
+                     The default is 32.
+        
+        Non-Parameters Members
+        ----------------------
+        spill_path: This is None if cache_path is not None. Otherwise it is a temporary folder, created together with the cache 
+                    and removed when the cache is garbage collected, in which the stages kept in memory are written when the 
+                    cache is pickled.
+        
+        n_hits: This is the number of cache hits.
+        
+        n_misses: This is the number of cache misses.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.cache_path = cache_path
+        self.spill_path = None
+        if(self.cache_path is not None):
+            os.makedirs(self.cache_path, exist_ok=True)
+        else:
+            self.spill_path = tempfile.mkdtemp(prefix='arlo_stage_cache_')
+            #only this object removes the folder: its pickled copies do not own it.
+            self._spill_path_finalizer = weakref.finalize(self, shutil.rmtree, self.spill_path, ignore_errors=True)
+        
+        self.max_entries = max_entries
+        if(self.max_entries < 1):
+            exc_msg = '\'max_entries\' must be greater than, or equal to, 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.n_hits = 0
+        self.n_misses = 0
+        
+        self._memory_entries = OrderedDict()
+    
+    def __repr__(self):
+        return 'PipelineStageCache('+'obj_name='+str(self.obj_name)+', cache_path='+str(self.cache_path)\
+               +', max_entries='+str(self.max_entries)+', spill_path='+str(self.spill_path)+', seeder='+str(self.seeder)+', local_prng='+str(self.local_prng)\
+               +', log_mode='+str(self.log_mode)+', checkpoint_log_path='+str(self.checkpoint_log_path)\
+               +', verbosity='+str(self.verbosity)+', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+               +', n_hits='+str(self.n_hits)+', n_misses='+str(self.n_misses)+', logger='+str(self.logger)+')'
+    
+    def __deepcopy__(self, memo):
+        #the copies of a pipeline must share the same cache:
+        return self
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_spill_path_finalizer', None)
+        
+        #the stages kept in memory would be lost in the copies sent to other processes: they are written in the folder 
+        #spill_path, which is the cache_path of the copies:
+        if(self.cache_path is None):
+            for tmp_key in list(self._memory_entries.keys()):
+                self._store_on_disk(key=tmp_key, entry=self._memory_entries[tmp_key], folder_path=self.spill_path)
+            
+            state['cache_path'] = self.spill_path
+            state['spill_path'] = None
+            
+        state['_memory_entries'] = OrderedDict()
+        
+        return state
+    
+    def get_input_key(self, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        train_data: This is the train_data given in input to the pipeline.
+                    
+                    The default is None.
+        
+        env: This is the env given in input to the pipeline.
+             
+             The default is None.
+        
+        Returns
+        -------
+        This method returns the key of the input of the first block of the pipeline.
+        """
+        
+        key_string = self._get_input_fingerprint(obj=train_data)+'|'+self._get_input_fingerprint(obj=env)
+        
+        return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+    
+    def get_stage_key(self, block, input_key):
+        """
+        Parameters
+        ----------
+        block: This is the block that needs to be learnt. It must be an object of a Class inheriting from the Class Block.
+        
+        input_key: This is the key of the input of the block: either the key returned by the method get_input_key or the key of
+                   the stage of the previous block of the pipeline.
+        
+        Returns
+        -------
+        This method returns the key of the stage of block.
+        """
+        
+        canonical_params = None
+        block_params = block.get_params()
+        if(block_params is not None):
+            canonical_params = {}
+            for tmp_key in list(block_params.keys()):
+                canonical_params[tmp_key] = self._get_canonical_value(value=block_params[tmp_key].current_actual_value)
+        
+        key_string = type(block).__module__+'.'+type(block).__qualname__+'|'+self._get_canonical_value(value=canonical_params)\
+                     +'|'+str(block.seeder)+'|'+str(input_key)
+        
+        return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+    
+    def _evict_disk_entries(self, folder_path):
+        """
+        Parameters
+        ----------
+        folder_path: This is the folder containing the stages.
+        
+        This method removes the least recently used stages from the folder folder_path until there are max_entries stages.
+        """
+        
+        entries_paths = [os.path.join(folder_path, x) for x in os.listdir(folder_path) if x.endswith('.pkl')]
+        if(len(entries_paths) <= self.max_entries):
+            return
+        
+        #the modification time of a stage is updated on each cache hit:
+        entries_paths = sorted(entries_paths, key=lambda x: os.path.getmtime(x) if os.path.isfile(x) else 0)
+        for tmp_path in entries_paths[:len(entries_paths)-self.max_entries]:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                #another process may have already removed it:
+                pass
+    
+    def lookup(self, key):
+        """
+        Parameters
+        ----------
+        key: This is the key of the stage, as returned by the method get_stage_key.
+        
+        Returns
+        -------
+        entry: This is a dictionary containing the learnt block ('block') and the output of its method learn() ('block_res').
+               It is a copy of the stored one, and it is None if there is no such stage.
+        """
+        
+        entry = None
+        
+        if(self.cache_path is None):
+            if(key in self._memory_entries):
+                self._memory_entries.move_to_end(key)
+                entry = copy.deepcopy(self._memory_entries[key])
+            else:
+                #the stage may have been stored by a pickled copy of the cache:
+                entry = self._load_from_disk(key=key, folder_path=self.spill_path)
+        else:
+            entry = self._load_from_disk(key=key, folder_path=self.cache_path)
+        
+        if(entry is None):
+            self.n_misses += 1
+        else:
+            self.n_hits += 1
+        
+        return entry
+    
+    def store(self, key, block, block_res):
+        """
+        Parameters
+        ----------
+        key: This is the key of the stage, as returned by the method get_stage_key.
+        
+        block: This is the learnt block.
+        
+        block_res: This is the output of the method learn() of the block.
+        """
+        
+        entry = dict(block=block, block_res=block_res)
+        
+        if(self.cache_path is None):
+            #the pipeline keeps using block, so the cache keeps its own copy:
+            self._memory_entries[key] = copy.deepcopy(entry)
+            self._memory_entries.move_to_end(key)
+            
+            while(len(self._memory_entries) > self.max_entries):
+                self._memory_entries.popitem(last=False)
+        else:
+            self._store_on_disk(key=key, entry=entry, folder_path=self.cache_path)
+    
+    def _load_from_disk(self, key, folder_path):
+        """
+        Parameters
+        ----------
+        key: This is the key of the stage, as returned by the method get_stage_key.
+        
+        folder_path: This is the folder containing the stages.
+        
+        Returns
+        -------
+        entry: This is the dictionary containing the learnt block ('block') and the output of its method learn() ('block_res').
+               It is None if there is no such stage in the folder folder_path.
+        """
+        
+        entry_path = os.path.join(folder_path, str(key)+'.pkl')
+        if(not os.path.isfile(entry_path)):
+            return None
+        
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                entry = cloudpickle.load(entry_file)
+            
+            os.utime(entry_path)
+        except Exception as exc:
+            self.logger.warning(msg='The stage \''+str(key)+'\' of the cache could not be loaded: '+str(exc))
+            return None
+        
+        return entry
+            
+    def _store_on_disk(self, key, entry, folder_path):
+        """
+        Parameters
+        ----------
+        key: This is the key of the stage, as returned by the method get_stage_key.
+        
+        entry: This is the dictionary containing the learnt block ('block') and the output of its method learn() ('block_res').
+        
+        folder_path: This is the folder containing the stages.
+        
+        This method writes the stage in the folder folder_path.
+        """
+        
+        #the folder of a pickled copy may have been removed together with the cache that created it:
+        os.makedirs(folder_path, exist_ok=True)
+        
+        entry_path = os.path.join(folder_path, str(key)+'.pkl')
+        
+        #each process writes its own temporary file and then renames it, so that a reader never sees a partial stage:
+        tmp_entry_path = entry_path+'.'+str(os.getpid())+'.tmp'
+        with open(tmp_entry_path, 'wb') as entry_file:
+            cloudpickle.dump(entry, entry_file, protocol=4)
+            entry_file.flush()
+            os.fsync(entry_file.fileno())
+        
+        os.replace(tmp_entry_path, entry_path)
+        
+        self._evict_disk_entries(folder_path=folder_path)
+    
+    def get_cached_stage(self, key, block):
+        """
+        Parameters
+        ----------
+        key: This is the key of the stage of block, as returned by the method get_stage_key.
+        
+        block: This is the block that needs to be learnt.
+        
+        Returns
+        -------
+        cached_block: This is a copy of the learnt block, with the obj_name of block. It is None if the block needs to be learnt.
+        
+        cached_res: This is the output of the method learn() of the block. It is None if the block needs to be learnt.
+        """
+        
+        entry = self.lookup(key=key)
+        if(entry is None):
+            return None, None
+        
+        cached_block = entry['block']
+        cached_block.obj_name = block.obj_name
+        cached_block.logger.name_obj_logging = block.logger.name_obj_logging
+        cached_block.pipeline_type = block.pipeline_type
+        
+        self.logger.info(msg='Cache hit for block: '+str(block.obj_name))
+        
+        return cached_block, entry['block_res']
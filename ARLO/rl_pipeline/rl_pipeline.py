@@ -11,6 +11,7 @@ from abc import abstractmethod
 import copy
 
 from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
 from ARLO.block.data_generation import DataGeneration
 from ARLO.block.data_preparation import DataPreparation
 from ARLO.block.feature_engineering import FeatureEngineering
@@ -27,12 +28,18 @@ class RLPipeline(Block):
     """
     
     def __init__(self, list_of_block_objects, eval_metric, obj_name, seeder=2, log_mode='console', checkpoint_log_path=None, 
-                 verbosity=3, n_jobs=1, job_type='process'):
+                 verbosity=3, n_jobs=1, job_type='process', stage_cache=None):
         """
         Parameters
         ----------
         list_of_block_objects: This is the list of the block objects that make up the pipeline. It must be specified by the
                                user.       
+        
+        stage_cache: This is either None or an object of Class PipelineStageCache. If it is not None then the outputs of the
+                     blocks of the pipeline, except the ModelGeneration blocks, are looked up in the stage_cache before learning
+                     the blocks: pipelines sharing the same first blocks only learn the blocks that differ.
+                     
+                     The default is None.
                             
         Non-Parameters Members
         ----------------------     
@@ -59,6 +66,8 @@ class RLPipeline(Block):
         self.list_of_block_objects = list_of_block_objects
         self.list_of_block_objects_upon_instantiation = copy.deepcopy(self.list_of_block_objects)
         
+        self.stage_cache = stage_cache
+        
         if(self.works_on_online_rl):
             self.pipeline_type = 'online'
         else:
@@ -80,7 +89,7 @@ class RLPipeline(Block):
                 +', eval_metric='+str(self.eval_metric)+', obj_name='+str(self.obj_name)+', seeder='+ str(self.seeder)\
                 +', local_prng='+ str(self.local_prng)+', log_mode='+str(self.log_mode)\
                 +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
-                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', stage_cache='+str(self.stage_cache)\
                 +', works_on_online_rl='+str(self.works_on_online_rl)+', works_on_offline_rl='+str(self.works_on_offline_rl)\
                 +', works_on_box_action_space='+str(self.works_on_box_action_space)\
                 +', works_on_discrete_action_space='+str(self.works_on_discrete_action_space)\
@@ -266,6 +275,52 @@ class RLPipeline(Block):
         self.logger.info(msg='The \'list_of_block_objects\' is consistent!')
         return True, lst
     
+    def _learn_block(self, n_block, input_key, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        n_block: This is the index of the block to learn in the list_of_block_objects.
+        
+        input_key: This is the key of the input of the block in the stage_cache. It is ignored if the stage_cache is None.
+        
+        train_data: This is the train_data passed to the method learn of the block.
+                    
+                    The default is None.
+        
+        env: This is the env passed to the method learn of the block.
+             
+             The default is None.
+        
+        Returns
+        -------
+        tmp_res: This is the output of the method learn of the block.
+        
+        stage_key: This is the key of the stage of the block in the stage_cache: this is the input_key of the next block. It is 
+                   None if the stage_cache is None.
+        
+        If the stage of the block is in the stage_cache then the block in the list_of_block_objects is replaced by the cached 
+        one, else the block is learnt and its stage is stored in the stage_cache. The ModelGeneration blocks are always learnt.
+        """
+        
+        tmp_block = self.list_of_block_objects[n_block]
+        
+        if((self.stage_cache is None) or isinstance(tmp_block, ModelGeneration)):
+            return tmp_block.learn(train_data=train_data, env=env), None
+        
+        stage_key = self.stage_cache.get_stage_key(block=tmp_block, input_key=input_key)
+        
+        cached_block, cached_res = self.stage_cache.get_cached_stage(key=stage_key, block=tmp_block)
+        if(cached_block is not None):
+            self.list_of_block_objects[n_block] = cached_block
+            return cached_res, stage_key
+        
+        tmp_res = tmp_block.learn(train_data=train_data, env=env)
+        
+        if(tmp_block.is_learn_successful and isinstance(tmp_res, BlockOutput)):
+            self.stage_cache.store(key=stage_key, block=tmp_block, block_res=tmp_res)
+        
+        return tmp_res, stage_key
+    
     @abstractmethod
     def analyse(self):
         raise NotImplementedError
@@ -15,6 +15,7 @@ from ARLO.block.data_generation import DataGeneration
 from ARLO.block.data_preparation import DataPreparation
 from ARLO.block.feature_engineering import FeatureEngineering
 from ARLO.block.model_generation import ModelGeneration
+from ARLO.tuner.tuner_scheduler import TunerScheduler
 
                 
 class AutoRLPipeline(Block):
@@ -24,7 +25,7 @@ class AutoRLPipeline(Block):
     """
     
     def __init__(self, eval_metric, obj_name, tuner_blocks_dict, online_task, seeder=2, log_mode='console',
-                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process', stage_cache=None):
         """
         Parameters
         ----------
@@ -32,6 +33,17 @@ class AutoRLPipeline(Block):
                            Class Tuner.
                            
         online_task: This is True if the task is an online RL problem, and it is False otherwise.
+        
+        n_jobs: This is the number of workers shared by the tuners in tuner_blocks_dict: if it is greater than 1 then the tuners
+                are run concurrently by a TunerScheduler, and each of them uses at most its share of the n_jobs workers.
+                
+                The default is 1.
+        
+        stage_cache: This is either None or an object of Class PipelineStageCache. If it is not None then it is used by all the
+                     pipelines in tuner_blocks_dict that do not have their own stage_cache: the pipelines sharing the same first
+                     blocks only learn the blocks that differ.
+                     
+                     The default is None.
                            
         Non-Parameters Members
         ----------------------
@@ -64,6 +76,8 @@ class AutoRLPipeline(Block):
 
         self.tuner_blocks_dict = tuner_blocks_dict
             
+        self.stage_cache = stage_cache
+        
         self.tuner_blocks_dict_upon_instantiation = copy.deepcopy(self.tuner_blocks_dict)
             
     def __repr__(self):
@@ -71,7 +85,7 @@ class AutoRLPipeline(Block):
                +', seeder='+ str(self.seeder)+', local_prng='+ str(self.local_prng)\
                +', tuner_blocks_dict='+str(self.tuner_blocks_dict)+', log_mode='+str(self.log_mode)\
                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
-               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', stage_cache='+str(self.stage_cache)\
                +', works_on_online_rl='+str(self.works_on_online_rl)+', works_on_offline_rl='+str(self.works_on_offline_rl)\
                +', works_on_box_action_space='+str(self.works_on_box_action_space)\
                +', works_on_discrete_action_space='+str(self.works_on_discrete_action_space)\
@@ -170,8 +184,10 @@ class AutoRLPipeline(Block):
         #count how many pipelines i actually tuned:
         count_tuned_pipelines = 0
         
-        best_pipeline = None
-        best_pipeline_eval = None
+        #the pipelines that can be tuned are first selected, and then they are all tuned concurrently. Note that all the tuners 
+        #are run before their results are checked: if a tuner fails the other ones are still tuned, and only then this block 
+        #fails:
+        keys_to_tune = []
         for tmp_key in list(self.tuner_blocks_dict.keys()):
             #pick a Tuner
             tmp_tuner = self.tuner_blocks_dict[tmp_key]
@@ -185,6 +201,10 @@ class AutoRLPipeline(Block):
             else:
                 tmp_tuner.block_to_opt.pipeline_type = 'online'
                 
+            #the pipelines share the stage_cache of this block:
+            if((self.stage_cache is not None) and (tmp_tuner.block_to_opt.stage_cache is None)):
+                tmp_tuner.block_to_opt.stage_cache = self.stage_cache
+            
             #check that the pipeline satisfies pre_learn_check: if it does not i skip over it
             if(not tmp_tuner.block_to_opt.pre_learn_check(train_data=train_data, env=env)):
                 log_msg = 'A pipeline of \'AutoRLPipeline\' will not be considered in the tuning procedure since it is not'\
@@ -192,9 +212,25 @@ class AutoRLPipeline(Block):
                 self.logger.info(msg=log_msg)
                 continue                
                 
-            #call tune method of the Tuner. Returns the tuned pipeline and its evaluation: its evaluation, according to the 
-            #provided evaluation metric
-            tmp_tuned_pipeline, tmp_tuned_pipeline_eval = tmp_tuner.tune(train_data=train_data, env=env)
+            keys_to_tune.append(tmp_key)
+        
+        #call tune method of each Tuner. Returns the tuned pipeline and its evaluation: its evaluation, according to the provided 
+        #evaluation metric. The tuners share the n_jobs of this block:
+        tuner_scheduler = TunerScheduler(obj_name=str(self.obj_name)+'_tuner_scheduler', seeder=self.seeder, 
+                                         log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                         verbosity=self.verbosity, n_jobs=self.n_jobs, job_type=self.job_type)
+        
+        tuners_results = tuner_scheduler.run(tuners=[self.tuner_blocks_dict[tmp_key] for tmp_key in keys_to_tune], 
+                                             tuners_names=keys_to_tune, train_datas=[train_data]*len(keys_to_tune),
+                                             envs=[env]*len(keys_to_tune))
+        
+        best_pipeline = None
+        best_pipeline_eval = None
+        for tmp_key, tmp_tuner_results in zip(keys_to_tune, tuners_results):
+            tmp_tuned_pipeline, tmp_tuned_pipeline_eval, tmp_tuner = tmp_tuner_results
+            
+            #with process jobs the tuner was tuned in another process:
+            self.tuner_blocks_dict[tmp_key] = tmp_tuner
             
             #skip over the tuners that have input loader and metric not consistent:
             if(not tmp_tuner.is_metric_consistent_with_input_loader()):
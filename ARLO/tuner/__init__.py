@@ -1,3 +1,9 @@
 from ARLO.tuner.tuner import *
 from ARLO.tuner.tuner_genetic import *
-from ARLO.tuner.tuner_optuna import *
\ No newline at end of file
+from ARLO.tuner.tuner_optuna import *
+from ARLO.tuner.tuner_hyperband import *
+from ARLO.tuner.tuner_worker_pool import *
+from ARLO.tuner.evaluation_cache import *
+from ARLO.tuner.tuner_results_index import *
+from ARLO.tuner.tuner_scheduler import *
+from ARLO.tuner.tuner_budget_allocator import *
\ No newline at end of file
@@ -0,0 +1,453 @@
+"""
+This module contains the implementation of the Classes: BaseCache and EvaluationCache.
+
+The Class BaseCache inherits from the Class AbstractUnit, while the Class EvaluationCache inherits from the Class BaseCache.
+
+The Class BaseCache is used as base class for the caches of the blocks: it computes the fingerprints used in the keys of the 
+entries of the caches.
+
+The Class EvaluationCache is a persistent cache of the evaluations of the agents learnt by a tuner: an agent whose
+hyper-parameters, input and seed are the same of an agent already learnt does not need to be learnt again.
+"""
+
+import os
+import hashlib
+import inspect
+
+import numpy as np
+import cloudpickle
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import BaseEnvironment
+
+
+class BaseCache(AbstractUnit):
+    """
+    This is the base Class of the caches of the blocks: it builds the representations of the hyper-parameters, of the 
+    environments and of the datasets from which the keys of the entries of the caches are computed. These do not depend on the
+    process nor on the memory address of the objects.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    #these members of an environment are not part of the fingerprint of its parameters: either they are already part of the
+    #fingerprint, or they do not change the dynamics, or they change while the environment is stepped:
+    _ENV_RUNTIME_MEMBERS = BaseEnvironment._RUNTIME_MEMBERS
+    
+    def _get_canonical_value(self, value, depth=0):
+        """
+        Parameters
+        ----------
+        value: This is the value of an hyper-parameter.
+        
+        depth: This is the depth of the recursion on the members of value.
+               
+               The default is 0.
+        
+        Returns
+        -------
+        This method returns a string representing value that does not depend on the process nor on the memory address of value.
+        """
+        
+        if(isinstance(value, np.generic)):
+            value = value.item()
+        
+        if((value is None) or isinstance(value, (bool, int, float, str))):
+            return repr(value)
+        
+        if(isinstance(value, np.ndarray)):
+            return 'array('+repr(value.tolist())+')'
+        
+        if(isinstance(value, (list, tuple))):
+            return '['+', '.join([self._get_canonical_value(value=x, depth=depth+1) for x in value])+']'
+        
+        if(isinstance(value, dict)):
+            sorted_items = sorted([(str(k), self._get_canonical_value(value=v, depth=depth+1)) for k, v in value.items()])
+            return '{'+', '.join([k+': '+v for k, v in sorted_items])+'}'
+        
+        #classes and functions (i.e: the class of a network or of an optimizer) are represented by their name:
+        if(isinstance(value, type) or inspect.isroutine(value)):
+            return str(getattr(value, '__module__', ''))+'.'+str(getattr(value, '__qualname__', type(value).__qualname__))
+        
+        value_type = type(value).__module__+'.'+type(value).__qualname__
+        
+        #the default representation of an object contains its memory address: i use its members instead.
+        if((type(value).__repr__ is object.__repr__) and hasattr(value, '__dict__')):
+            if(depth > 4):
+                return value_type
+            
+            return value_type+self._get_canonical_value(value=vars(value), depth=depth+1)
+        
+        return value_type+'('+repr(value)+')'
+    
+    def _get_env_params(self, env, depth=0):
+        """
+        Parameters
+        ----------
+        env: This is an environment.
+        
+        depth: This is the depth of the recursion on the environments wrapped by env.
+               
+               The default is 0.
+        
+        Returns
+        -------
+        This method returns a string representing the parameters of env: its public members that are numbers, strings, arrays
+        or containers of these, and the parameters of the environments it wraps. The members that change while the environment
+        is stepped (e.g: its current state) are not part of it.
+        """
+        
+        env_params = {}
+        for tmp_key, tmp_value in vars(env).items():
+            if(tmp_key.startswith('_') or (tmp_key in self._ENV_RUNTIME_MEMBERS)):
+                continue
+            
+            if(isinstance(tmp_value, BaseEnvironment)):
+                if(depth < 4):
+                    env_params[tmp_key] = type(tmp_value).__module__+'.'+type(tmp_value).__qualname__\
+                                          +self._get_env_params(env=tmp_value, depth=depth+1)
+            elif(self._is_plain_value(value=tmp_value)):
+                env_params[tmp_key] = tmp_value
+        
+        return self._get_canonical_value(value=env_params)
+    
+    def _is_plain_value(self, value):
+        """
+        Parameters
+        ----------
+        value: This is a member of an environment.
+        
+        Returns
+        -------
+        This method returns True if value is a number, a string, an array or a list, tuple or dictionary of these, and False
+        otherwise.
+        """
+        
+        if((value is None) or isinstance(value, (bool, int, float, str, np.generic, np.ndarray))):
+            return True
+        
+        if(isinstance(value, (list, tuple))):
+            return all([self._is_plain_value(value=x) for x in value])
+        
+        if(isinstance(value, dict)):
+            return all([self._is_plain_value(value=x) for x in value.values()])
+        
+        return False
+    
+    def _get_input_fingerprint(self, obj):
+        """
+        Parameters
+        ----------
+        obj: This is either the train_data or the env used by an agent.
+        
+        Returns
+        -------
+        This method returns a string identifying obj. For a dataset this is a hash of its columns, while for an environment
+        this is its Class, its obj_name, its seeder and its parameters.
+        """
+        
+        if(obj is None):
+            return 'None'
+        
+        fingerprint = type(obj).__module__+'.'+type(obj).__qualname__+'_'+str(getattr(obj, 'obj_name', None))\
+                      +'_'+str(getattr(obj, 'seeder', None))
+        
+        #two environments of the same Class built with different parameters must not share their entries:
+        if(isinstance(obj, BaseEnvironment)):
+            fingerprint += '_'+hashlib.sha256(self._get_env_params(env=obj).encode('utf-8')).hexdigest()
+        
+        #the datasets returned by the input loaders may be sub-samples of the original dataset: i need to hash their content.
+        if(hasattr(obj, 'get_states')):
+            columns_hash = hashlib.sha256()
+            for tmp_column in [obj.get_states(), obj.get_actions(), obj.get_rewards(), obj.get_next_states(),
+                               obj.get_absorbing(), obj.get_episode_terminals()]:
+                if(tmp_column is not None):
+                    columns_hash.update(np.ascontiguousarray(tmp_column).tobytes())
+            
+            fingerprint += '_'+columns_hash.hexdigest()
+        
+        return fingerprint
+
+
+class EvaluationCache(BaseCache):
+    """
+    This Class implements a persistent cache of the evaluations of the agents learnt by a tuner. Each entry is a file in the
+    folder cache_path: the name of the file is a hash of the current values of the hyper-parameters of the agent, of a
+    fingerprint of the train_data and of the env used by the agent, and of the seeder of the agent.
+    
+    Since each entry is written in its own file, with an atomic rename, the same cache can be used at the same time by several
+    worker processes and by several tuners.
+    
+    This Class inherits from the Class BaseCache.
+    """
+    
+    def __init__(self, obj_name, cache_path, save_agents=False, ignore_seed=False, seeder=2, log_mode='console',
+                 checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        cache_path: This is the path of the folder containing the entries of the cache. If it does not exist it is created.
+        
+        save_agents: This is True if the learnt agents and the outputs of their method learn() are saved together with their
+                     evaluations, and False otherwise.
+                     
+                     If False then on a cache hit only the evaluation is reused, and this is done only if the cached evaluation
+                     is not better than the best evaluation found so far: a new best agent must be learnt so that it can be
+                     saved and returned by the tuner.
+                     
+                     The default is False.
+        
+        ignore_seed: This is True if the seeder of the agents is not part of the key of the entries, and False otherwise.
+                     
+                     Note that in the Class TunerGenetic each agent has a different seeder, and so if ignore_seed is False
+                     there can only be a cache hit across different calls of the method tune.
+                     
+                     The default is False.
+        
+        Non-Parameters Members
+        ----------------------
+        n_hits: This is the number of cache hits.
+        
+        n_misses: This is the number of cache misses.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.cache_path = cache_path
+        if(self.cache_path is None):
+            exc_msg = '\'cache_path\' cannot be \'None\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        os.makedirs(self.cache_path, exist_ok=True)
+        
+        self.save_agents = save_agents
+        self.ignore_seed = ignore_seed
+        
+        self.n_hits = 0
+        self.n_misses = 0
+    
+    def __repr__(self):
+        return 'EvaluationCache('+'obj_name='+str(self.obj_name)+', cache_path='+str(self.cache_path)\
+               +', save_agents='+str(self.save_agents)+', ignore_seed='+str(self.ignore_seed)+', seeder='+str(self.seeder)\
+               +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+               +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', n_hits='+str(self.n_hits)\
+               +', n_misses='+str(self.n_misses)+', logger='+str(self.logger)+')'
+    
+    def _get_metric_fingerprint(self, eval_metric):
+        """
+        Parameters
+        ----------
+        eval_metric: This is the metric used for evaluating the agents.
+        
+        Returns
+        -------
+        This method returns a string identifying eval_metric: its Class and the members returned by its method get_params.
+        """
+        
+        if(eval_metric is None):
+            return 'None'
+        
+        return type(eval_metric).__module__+'.'+type(eval_metric).__qualname__\
+               +self._get_canonical_value(value=eval_metric.get_params())
+    
+    def get_key(self, block, train_data=None, env=None, eval_metric=None):
+        """
+        Parameters
+        ----------
+        block: This is the agent that needs to be learnt. It must be an object of a Class inheriting from the Class Block.
+        
+        train_data: This is the train_data used by the agent.
+                    
+                    The default is None.
+        
+        env: This is the env used by the agent.
+             
+             The default is None.
+        
+        eval_metric: This is the metric used for evaluating the agent: the same agent evaluated with two different metrics has
+                     two different entries.
+                     
+                     The default is None.
+        
+        Returns
+        -------
+        key: This is the key of the entry of the agent. It is None if the hyper-parameters of the agent cannot be obtained.
+        """
+        
+        block_params = block.get_params()
+        if(block_params is None):
+            return None
+        
+        canonical_params = {}
+        for tmp_key in list(block_params.keys()):
+            canonical_params[tmp_key] = self._get_canonical_value(value=block_params[tmp_key].current_actual_value)
+        
+        key_string = type(block).__module__+'.'+type(block).__qualname__+'|'+self._get_canonical_value(value=canonical_params)\
+                     +'|'+self._get_input_fingerprint(obj=train_data)+'|'+self._get_input_fingerprint(obj=env)\
+                     +'|'+self._get_metric_fingerprint(eval_metric=eval_metric)
+        
+        if(not self.ignore_seed):
+            key_string += '|'+str(block.seeder)
+        
+        return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+    
+    def is_evaluation_complete(self, eval_metric):
+        """
+        Parameters
+        ----------
+        eval_metric: This is the metric that has just evaluated an agent.
+        
+        Returns
+        -------
+        This method returns False if the last evaluation of eval_metric was stopped early (e.g: by the adaptive evaluation of
+        the metric DiscountedReward), and True otherwise. An evaluation stopped early depends on the best evaluation found so
+        far by the tuner and so it must not be stored in the cache.
+        """
+        
+        if(not getattr(eval_metric, 'adaptive', False)):
+            return True
+        
+        n_episodes_used = getattr(eval_metric, 'n_episodes_used', None)
+        if(n_episodes_used is None):
+            return False
+        
+        #the closed form evaluation runs no episode and it is exact:
+        return (n_episodes_used == 0) or (n_episodes_used >= eval_metric.n_episodes)
+    
+    def lookup(self, key):
+        """
+        Parameters
+        ----------
+        key: This is the key of the entry, as returned by the method get_key.
+        
+        Returns
+        -------
+        entry: This is a dictionary containing the evaluation ('block_eval'), the evaluation of each episode ('block_eps_eval'),
+               and, if save_agents was True when the entry was stored, the learnt agent ('block') and the output of its method
+               learn() ('block_res'). It is None if there is no such entry.
+        """
+        
+        entry_path = os.path.join(self.cache_path, str(key)+'.pkl')
+        
+        if(not os.path.isfile(entry_path)):
+            self.n_misses += 1
+            return None
+        
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                entry = cloudpickle.load(entry_file)
+        except Exception as exc:
+            self.logger.warning(msg='The entry \''+str(key)+'\' of the cache could not be loaded: '+str(exc))
+            self.n_misses += 1
+            return None
+        
+        self.n_hits += 1
+        
+        return entry
+    
+    def store(self, key, block_eval, block=None, block_res=None):
+        """
+        Parameters
+        ----------
+        key: This is the key of the entry, as returned by the method get_key.
+        
+        block_eval: This is the evaluation of the agent.
+        
+        block: This is the learnt agent: it is stored only if save_agents is True.
+               
+               The default is None.
+        
+        block_res: This is the output of the method learn() of the agent: it is stored only if save_agents is True.
+                   
+                   The default is None.
+        """
+        
+        #the evaluation of each episode is needed for comparing paired evaluations:
+        entry = dict(block_eval=block_eval, block_eps_eval=getattr(block, 'block_eps_eval', None), block=None, block_res=None)
+        if(self.save_agents):
+            entry['block'] = block
+            entry['block_res'] = block_res
+        
+        entry_path = os.path.join(self.cache_path, str(key)+'.pkl')
+        
+        #each process writes its own temporary file and then renames it, so that a reader never sees a partial entry:
+        tmp_entry_path = entry_path+'.'+str(os.getpid())+'.tmp'
+        with open(tmp_entry_path, 'wb') as entry_file:
+            cloudpickle.dump(entry, entry_file, protocol=4)
+            entry_file.flush()
+            os.fsync(entry_file.fileno())
+        
+        os.replace(tmp_entry_path, entry_path)
+    
+    def get_cached_block(self, key, block, eval_metric, best_eval=None, best_eps_eval=None):
+        """
+        Parameters
+        ----------
+        key: This is the key of the entry of the agent, as returned by the method get_key.
+        
+        block: This is the agent that needs to be learnt.
+        
+        eval_metric: This is the metric used by the tuner: it is used for comparing the cached evaluation with best_eval.
+        
+        best_eval: This is the best evaluation found so far by the tuner. If None then the evaluation alone is never reused.
+                   
+                   The default is None.
+        
+        best_eps_eval: This is the evaluation of each episode of the best agent found so far by the tuner.
+                       
+                       The default is None.
+        
+        Returns
+        -------
+        cached_block: This is the agent with its cached evaluation in the member block_eval. If the entry contains the learnt
+                      agent, this is a copy of it with the obj_name of block, else this is block itself. It is None if the
+                      agent needs to be learnt.
+        
+        cached_res: This is the output of the method learn() of the agent. If the entry does not contain the learnt agent then
+                    this is an empty object of Class BlockOutput.
+        """
+        
+        if(key is None):
+            return None, None
+        
+        entry = self.lookup(key=key)
+        if(entry is None):
+            return None, None
+        
+        if(entry['block'] is not None):
+            cached_block = entry['block']
+            
+            #the cached agent takes the place of block: if ignore_seed is True it may have a different seeder.
+            cached_block.set_local_prng(new_seeder=block.seeder)
+            cached_block.obj_name = block.obj_name
+            cached_block.logger.name_obj_logging = block.logger.name_obj_logging
+            cached_block.block_eval = entry['block_eval']
+            cached_block.block_eps_eval = entry.get('block_eps_eval')
+            
+            cached_res = entry['block_res']
+            cached_res.obj_name = str(block.obj_name)+'_result'
+            
+            self.logger.info(msg='Cache hit for agent: '+str(block.obj_name)+' Evaluation: '+str(entry['block_eval']))
+            
+            return cached_block, cached_res
+        
+        #without the learnt agent i can only reuse the evaluation if the agent is not a new best agent:
+        if((best_eval is None) or (eval_metric.which_one_is_better(block_1_eval=entry['block_eval'],
+                                                                   block_2_eval=best_eval,
+                                                                   block_1_eps_eval=entry.get('block_eps_eval'),
+                                                                   block_2_eps_eval=best_eps_eval) == 0)):
+            return None, None
+        
+        block.block_eval = entry['block_eval']
+        block.block_eps_eval = entry.get('block_eps_eval')
+        block.is_learn_successful = True
+        
+        self.logger.info(msg='Cache hit for agent: '+str(block.obj_name)+' Evaluation: '+str(entry['block_eval']))
+        
+        return block, BlockOutput(obj_name=str(block.obj_name)+'_result')
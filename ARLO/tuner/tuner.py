@@ -11,18 +11,19 @@ Any block that wants to be tuned needs to use a tuner.
 from abc import ABC, abstractmethod
 import os
 import datetime
+import time
 import itertools
-import copy
 import numpy as np
 
 import plotly.graph_objects as go
 from catboost import CatBoostRegressor
 
-from ARLO.abstract_unit.abstract_unit import AbstractUnit, load
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
 from ARLO.block.block import Block
 from ARLO.metric.metric import Metric
 from ARLO.input_loader.input_loader import InputLoader
 from ARLO.hyperparameter.hyperparameter import Real, Categorical
+from ARLO.tuner.tuner_results_index import TunerResultsIndex
 
 
 class Tuner(AbstractUnit, ABC):
@@ -65,6 +66,9 @@ class Tuner(AbstractUnit, ABC):
         ----------------------                               
         is_tune_successful: This is used to know whether or not the tuner finished with no errors. 
  
+        results_index: This is an object of Class TunerResultsIndex: it is the table, in the folder created by the method 
+                       tune(), where a record is appended for each trial. It is None until the method tune() is called.
+        
         The other parameters and non-parameters members are described in the Class AbstractUnit.
         """
         
@@ -88,6 +92,8 @@ class Tuner(AbstractUnit, ABC):
         self.create_explanatory_heatmap = create_explanatory_heatmap
         
         self.is_tune_successful = False
+        
+        self.results_index = None
     
     def __repr__(self):
         return 'Tuner('+'block_to_opt='+str(self.block_to_opt)+', eval_metric='+str(self.eval_metric)\
@@ -159,6 +165,11 @@ class Tuner(AbstractUnit, ABC):
                 return best_agent, best_agent_eval
         
         #if i reach this point then it means this method will be successfully called by a sub-class of Tuner:
+        if(self.checkpoint_log_path is None):
+            self.logger.warning(msg='Since \'checkpoint_log_path\' is not specified the results of the tuning procedure will'\
+                                    +' not be saved!')
+            return None
+        
         name_new_folder = str(self.obj_name)+datetime.datetime.now().strftime('_%H_%M_%S__%d_%m_%Y')
 
         tuner_results_path = os.path.join(self.checkpoint_log_path, 'tuner_'+str(name_new_folder))     
@@ -167,6 +178,12 @@ class Tuner(AbstractUnit, ABC):
             os.makedirs(tuner_results_path)
             self.checkpoint_log_path = tuner_results_path
             self.block_to_opt.checkpoint_log_path = self.checkpoint_log_path
+            
+            self.results_index = TunerResultsIndex(obj_name=str(self.obj_name)+'_results_index', 
+                                                   index_path=os.path.join(tuner_results_path, 'results_index.jsonl'),
+                                                   seeder=self.seeder, log_mode=self.log_mode, 
+                                                   checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
+            self.results_index.write_header(block=self.block_to_opt)
         else:
             exc_msg = 'Cannot create a new directory named: \''+str(tuner_results_path)+'\' as this directory already'\
                       +' exists! Therefore the tuning procedure will stop here.'
@@ -176,6 +193,33 @@ class Tuner(AbstractUnit, ABC):
     @abstractmethod
     def _evaluate_a_generation(self, gen):
         raise NotImplementedError
+    
+    def _record_trial(self, tmp_agent, tmp_agent_eval, start_time, pickle_path=None, status='complete'):
+        """
+        Parameters
+        ----------
+        tmp_agent: This is the agent of the trial. It is an object of a Class inheriting from the Class Block.
+        
+        tmp_agent_eval: This is the evaluation of tmp_agent.
+        
+        start_time: This is the time, as returned by time.time(), at which the trial started.
+        
+        pickle_path: This is the path of the pickle file of tmp_agent, or None if tmp_agent was not saved.
+                     
+                     The default is None.
+        
+        status: This is the status of the trial: either 'complete' or 'pruned'.
+                
+                The default is 'complete'.
+        
+        This method appends the record of the trial to the results_index. Nothing is done if the method tune() was not called.
+        """
+        
+        if(self.results_index is None):
+            return
+        
+        self.results_index.append_trial(trial_id=tmp_agent.obj_name, block=tmp_agent, block_eval=tmp_agent_eval, 
+                                        wall_time=time.time()-start_time, pickle_path=pickle_path, status=status)
         
     def update_verbosity(self, new_verbosity):
         """
@@ -196,81 +240,63 @@ class Tuner(AbstractUnit, ABC):
         """
         This method is only called if create_explanatory_heatmap is set to True.
         
-        This method loads the agents that were constructed throughout the tuning procedure, it creates from these a dataset
-        where the features are the hyper-parameters values and the target is the obtained block_eval, it fits a CatBoostRegressor
+        This method reads the records of the trials done throughout the tuning procedure from the results_index, it creates from
+        these a dataset where the features are the hyper-parameters values and the target is the obtained block_eval, it fits a CatBoostRegressor
         on such dataset and then via Plotly it create and save an html file containing a heatmap showcasing the effect of 
         changing an hyper-parameter value on the block_eval.
         """
         
         self.logger.info(msg='Now creating the explanatory heatmap of the hyper-parameters...')
         
-        #read filenames in folder results:
-        filenames = next(os.walk(self.checkpoint_log_path), (None, None, []))[2]  # [] if no file
-        
         #create a new folder to contain the heatmap only:
         heatmap_folder_destination = os.path.join(self.checkpoint_log_path, 'heatmap')
         
         os.makedirs(heatmap_folder_destination)
             
-        #population of tuned agents:
-        agents_pop = []
-        for tmp_file in filenames:
-            if((self.block_to_opt.obj_name in tmp_file) and ('.pkl' in tmp_file)):
-                if(('_result_' not in tmp_file) and ('_new_best_' not in tmp_file)):
-                    new_agent = load(os.path.join(self.checkpoint_log_path, str(tmp_file))) 
-                    agents_pop.append(new_agent)
-        
-        best_agent = None
-        for tmp_file in filenames:
-            if('best_agent_' in tmp_file):
-                best_agent = load(os.path.join(self.checkpoint_log_path, tmp_file))
-        
-        if(best_agent is None):
-            exc_msg = 'The \'best_agent\' failed to be loaded!'
+        #the hyper-parameters and the evaluations of the trials are read from the results_index: no agent is loaded.
+        header = None
+        trials = []
+        best_trial = None
+        if(self.results_index is not None):
+            header, trials = self.results_index.read()
+            best_trial = self.results_index.get_best_trial(eval_metric=self.eval_metric, trials=trials)
+        
+        if((header is None) or (best_trial is None)):
+            exc_msg = 'The \'results_index\' does not contain the best trial!'
             self.logger.exception(msg = exc_msg)
             raise RuntimeError(exc_msg)
         
-        tmp_params = best_agent.get_params()
-        
         params = {}
         #remove categorical hyperparameters and only keep mutated hyperparameters:
-        for tmp_key in list(tmp_params.keys()):
-            if((not isinstance(tmp_params[tmp_key], Categorical)) and (tmp_params[tmp_key].to_mutate)):
-                params.update({tmp_key: tmp_params[tmp_key]})
+        for tmp_key in list(header['hyperparameters'].keys()):
+            hp_info = header['hyperparameters'][tmp_key]
+            best_value = best_trial['params'][tmp_key]
                 
-            if(isinstance(tmp_params[tmp_key], Categorical) and (tmp_params[tmp_key].to_mutate)):
-                if(isinstance(tmp_params[tmp_key].current_actual_value, int) or 
-                   isinstance(tmp_params[tmp_key].current_actual_value, float)):
-                    new_parameter = Real(hp_name=tmp_key, current_actual_value=tmp_params[tmp_key].current_actual_value, 
+            if(not hp_info['to_mutate']):
+                continue
+            
+            if(hp_info['range_of_values'] is not None):
+                new_parameter = Real(hp_name=tmp_key, current_actual_value=best_value, obj_name=tmp_key+'_artificial_param', 
+                                     range_of_values=hp_info['range_of_values'], to_mutate=True)
+                params.update({tmp_key: new_parameter})
+            
+            if(hp_info['possible_values'] is not None):
+                if((isinstance(best_value, int) or isinstance(best_value, float)) and (not isinstance(best_value, bool))):
+                    new_parameter = Real(hp_name=tmp_key, current_actual_value=best_value, 
                                          obj_name=tmp_key+'_artificial_param', 
-                                         range_of_values=[tmp_params[tmp_key].possible_values[0], 
-                                                          tmp_params[tmp_key].possible_values[-1]], 
+                                         range_of_values=[hp_info['possible_values'][0], hp_info['possible_values'][-1]], 
                                          to_mutate=True)
                     params.update({tmp_key: new_parameter})
         
         #create dataset containing the values of the hyperparameters of the tuned agents:
         agents_dataset_params = []
-        for agent in agents_pop:
-            tmp_params_agent = agent.get_params()
-            tmp_params_values_agent = {}
-            
-            tmp_effective_params = []
-        
-            for tmp_key in list(tmp_params_agent.keys()):
-                if((not isinstance(tmp_params_agent[tmp_key], Categorical)) and (tmp_params_agent[tmp_key].to_mutate)):
-                    tmp_params_values_agent.update({tmp_key: tmp_params_agent[tmp_key].current_actual_value})
-                    tmp_effective_params.append(tmp_params_agent[tmp_key].current_actual_value)
-                if(isinstance(tmp_params[tmp_key], Categorical) and (tmp_params[tmp_key].to_mutate)):
-                    if(isinstance(tmp_params[tmp_key].current_actual_value,int) or 
-                       isinstance(tmp_params[tmp_key].current_actual_value,float)):
-                        tmp_params_values_agent.update({tmp_key: tmp_params_agent[tmp_key].current_actual_value})
-                        tmp_effective_params.append(tmp_params_agent[tmp_key].current_actual_value)
-                    
-            agents_dataset_params.append(tmp_effective_params)    
-        
         agents_eval = []
-        for agent in agents_pop:
-            agents_eval.append(agent.block_eval)
+        for tmp_trial in trials:
+            if((tmp_trial['block_eval'] is None) or (not np.isfinite(tmp_trial['block_eval']))):
+                continue
+            
+            agents_dataset_params.append([tmp_trial['params'][tmp_key] for tmp_key in list(params.keys())])
+            agents_eval.append(tmp_trial['block_eval'])
             
         #catboost regressor: fit on the hyperparameter dataset where the target is the obtained performance
         cat_reg = CatBoostRegressor(iterations=1500, learning_rate=0.004, loss_function='MAPE', thread_count=-1, silent=True, 
@@ -279,114 +305,67 @@ class Tuner(AbstractUnit, ABC):
         
         cat_reg.fit(agents_dataset_params, agents_eval)
     
-        class cat_reg_estimator():
-            def predict(self, samples_to_predict, x_range, y_range, x_index, y_index):
-                cat_reg_prediction = cat_reg.predict(samples_to_predict)
+        params_keys = list(params.keys())
                                         
-                final_prediction = []
-                tmp_prediction = []
-                for elem in cat_reg_prediction:
-                    tmp_prediction.append(elem)
+        #number of values of each hyperparameter in the heatmap grid:
+        n_grid_points = 100
                     
-                    if(len(tmp_prediction) == 100):
-                        final_prediction.append(tmp_prediction)
-                        tmp_prediction = []
+        #a generic sample to predict is a sample where the hyperparameters have the value of the optimal agent:
+        generic_sample_to_predict = np.array([params[tmp_key].current_actual_value for tmp_key in params_keys], dtype=float)
                         
-                return final_prediction
+        def get_hp_range(hp_name):
+            dtype_hp = float
+            if(isinstance(params[hp_name].current_actual_value, int)):             
+                dtype_hp = int
             
-        estimator = cat_reg_estimator()
+            return np.linspace(params[hp_name].range_of_values[0], params[hp_name].range_of_values[1], n_grid_points, 
+                               dtype=dtype_hp)
                 
-        def my_approximator(hp_x_name, hp_x_range, hp_y_name, hp_y_range):
-            all_hp = copy.deepcopy(params)
-            
-            generic_sample_to_predict = []
-            #a generic sample to predict is a sample where the X and Y hyperparameters are missing, while the others 
-            #hyperparameters have the value of the optimal agent:
-            for tmp_key in list(all_hp.keys()):
-                if(tmp_key not in [hp_x_name, hp_y_name]):    
-                    generic_sample_to_predict.append(all_hp[tmp_key].current_actual_value)
-                elif(tmp_key == hp_x_name):
-                    generic_sample_to_predict.append(np.inf)
-                else:
-                    generic_sample_to_predict.append(-np.inf)
-
-            samples_to_predict = []
-            for i in range(len(hp_y_range)):
-                new_sample = copy.deepcopy(generic_sample_to_predict)
-                        
-                idx_y = np.argwhere(np.array(generic_sample_to_predict) == -np.inf).ravel()[0]
-                new_sample[idx_y] = hp_y_range[i]
-             
-                for k in range(len(hp_x_range)):   
-                    new_sample_x = copy.deepcopy(new_sample)
-                   
-                    idx_x = np.argwhere(np.array(generic_sample_to_predict) == np.inf).ravel()[0]
-                    new_sample_x[idx_x] = hp_x_range[k]
-                    
-                    if(len(samples_to_predict) == 0):
-                        samples_to_predict = new_sample_x
-                    else:
-                        samples_to_predict = np.vstack((samples_to_predict, new_sample_x))
+        combinations_hp = [] 
+        #computes all combinations of 2 hyperparmeters:
+        for subset in itertools.combinations(params_keys, 2):
+            combinations_hp.append(list(subset))
            
-            hp_x_idx = list(all_hp.keys()).index(hp_x_name)
-            hp_y_idx = list(all_hp.keys()).index(hp_y_name)
+        hp_ranges = {}
+        for tmp_key in params_keys:
+            hp_ranges[tmp_key] = get_hp_range(hp_name=tmp_key)
+        
+        #the grids of all the combinations of hyperparameters are built with broadcasting and predicted with a single call: 
+        #the row i*len(hp_x_range)+k of the grid of a combination has the i-th value of Y and the k-th value of X.
+        samples_to_predict = np.tile(generic_sample_to_predict, (len(combinations_hp), n_grid_points*n_grid_points, 1))
+        for n_combination, tmp_combination_hp in enumerate(combinations_hp):
+            hp_x_range = hp_ranges[tmp_combination_hp[0]]
+            hp_y_range = hp_ranges[tmp_combination_hp[1]]
             
-            eval_prediction = estimator.predict(samples_to_predict=samples_to_predict, x_range=hp_x_range, y_range=hp_y_range, 
-                                                x_index=hp_x_idx, y_index=hp_y_idx)
+            samples_to_predict[n_combination, :, params_keys.index(tmp_combination_hp[0])] = np.tile(hp_x_range, len(hp_y_range))
+            samples_to_predict[n_combination, :, params_keys.index(tmp_combination_hp[1])] = np.repeat(hp_y_range, 
+                                                                                                    len(hp_x_range))
         
-            return eval_prediction
+        eval_predictions = cat_reg.predict(samples_to_predict.reshape(-1, len(params_keys)))
+        eval_predictions = eval_predictions.reshape(len(combinations_hp), n_grid_points, n_grid_points)
         
-        default_hp_x = list(params.keys())[0]
-        default_hp_y = list(params.keys())[1]
+        default_hp_x = params_keys[0]
+        default_hp_y = params_keys[1]
         
-        dtype_x = float
-        if(isinstance(params[default_hp_x].current_actual_value, int)):             
-            dtype_x = int
-                        
-        dtype_y = float
-        if(isinstance(params[default_hp_y].current_actual_value, int)):             
-            dtype_y = int
-            
         #create heatmap grid:
-        hpx = np.linspace(params[default_hp_x].range_of_values[0], params[default_hp_x].range_of_values[1], 100, dtype=dtype_x)
-        hpy = np.linspace(params[default_hp_y].range_of_values[0], params[default_hp_y].range_of_values[1], 100, dtype=dtype_y)
+        hpx = hp_ranges[default_hp_x]
+        hpy = hp_ranges[default_hp_y]
+        
+        data = eval_predictions[0].tolist()
         
-        data = list(my_approximator(hp_x_name=default_hp_x, hp_x_range=hpx, hp_y_name=default_hp_y, hp_y_range=hpy))   
-                
-        params_keys = list(params.keys())
-        combinations_hp = [] 
-        #computes all combinations of 2 hyperparmeters:
-        for subset in itertools.combinations(params_keys, 2):
-            combinations_hp.append(list(subset))
-           
         #updates data for all buttons in the figure:
         def compute_new_data(menu, fig):
             buttons = []
             
-            for tmp_combination_hp in combinations_hp:    
+            for n_combination, tmp_combination_hp in enumerate(combinations_hp):    
                 hp_x = tmp_combination_hp[0]
                 hp_y = tmp_combination_hp[1]
                 
                 base_dict = dict(args=None, label=hp_x+'-'+hp_y, method='update')
                 
-                dtype_x = float
-                
-                if(isinstance(params[hp_x].current_actual_value, int)):             
-                    dtype_x = int           
-                       
-                dtype_y = float
-                if(isinstance(params[hp_y].current_actual_value, int)):             
-                    dtype_y = int
-            
-                #new heatmap grid:
-                x = np.linspace(params[hp_x].range_of_values[0], params[hp_x].range_of_values[1], 100,  dtype=dtype_x)
-                y = np.linspace(params[hp_y].range_of_values[0], params[hp_y].range_of_values[1], 100,  dtype=dtype_y)
-                        
-                new_data = []
+                new_data = eval_predictions[n_combination].tolist()
                 
-                new_data = list(my_approximator(hp_x_name=hp_x, hp_x_range=x, hp_y_name=hp_y, hp_y_range=y))
-                    
-                base_dict['args'] = [{"z": [new_data], 'x':[x], 'y':[y]}]
+                base_dict['args'] = [{"z": [new_data], 'x':[hp_ranges[hp_x]], 'y':[hp_ranges[hp_y]]}]
                 
                 buttons.append(base_dict)
                 
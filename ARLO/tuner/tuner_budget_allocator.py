@@ -0,0 +1,409 @@
+"""
+This module contains the implementation of the Class TunerBudgetAllocator.
+
+The Class TunerBudgetAllocator inherits from the Class AbstractUnit.
+
+The Class TunerBudgetAllocator interleaves the tuning of several candidate tuners, treating each of them as an arm of a
+multi-armed bandit: the trials are moved towards the tuners that found the best agents so far, and the total number of trials
+is capped by a single budget.
+"""
+
+import os
+import datetime
+import numpy as np
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+from ARLO.tuner.tuner_genetic import TunerGenetic
+from ARLO.tuner.tuner_optuna import TunerOptuna
+
+
+class TunerBudgetAllocator(AbstractUnit):
+    """
+    This Class implements a budget allocator for candidate tuners. The tuning of each tuner is split in rounds: a round of a
+    TunerGenetic is a generation, while a round of a TunerOptuna is made of n_trials_per_round trials. Each round is a call of
+    the method tune of the tuner that resumes the tuning procedure from where the previous round stopped: a TunerGenetic is
+    resumed from its tuner state file, while a TunerOptuna is resumed from its storage.
+    
+    The rounds are given to the tuners either with successive rejects or with UCB, using as reward the best evaluation found so
+    far by each tuner. A tuner never gets more rounds than its own budget (n_generations or n_trials).
+    
+    cf. Audibert, Bubeck, "Best Arm Identification in Multi-Armed Bandits", COLT 2010.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, total_budget, allocation_mode='successive_rejects', n_trials_per_round=10,
+                 exploration_coefficient=1.0, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1,
+                 job_type='process'):
+        """
+        Parameters
+        ----------
+        total_budget: This is the maximum number of trials (i.e: calls of the methods learn and evaluate of the agents) done by
+                      all the tuners together. A round is only given to a tuner if its trials fit in the remaining budget.
+        
+        allocation_mode: This is a string and it can be 'successive_rejects' or 'ucb'.
+                         
+                         If 'successive_rejects' the tuners are tuned in phases: in each phase all the remaining tuners get the
+                         same number of rounds, and then the tuner with the worst evaluation is rejected. The last remaining
+                         tuner gets the rest of the budget.
+                         
+                         If 'ucb' each tuner gets a round and then each round is given to the tuner with the highest upper
+                         confidence bound on its best evaluation (normalised among the tuners).
+                         
+                         The default is 'successive_rejects'.
+        
+        n_trials_per_round: This is the number of trials of a round of a TunerOptuna.
+                            
+                            The default is 10.
+        
+        exploration_coefficient: This is the coefficient of the exploration term of UCB.
+                                 
+                                 The default is 1.0.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.total_budget = total_budget
+        if(self.total_budget < 1):
+            exc_msg = '\'total_budget\' must be greater than, or equal to, 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.allocation_mode = allocation_mode
+        if(self.allocation_mode not in ['successive_rejects', 'ucb']):
+            exc_msg = '\'allocation_mode\' can only be: \'successive_rejects\' or \'ucb\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.n_trials_per_round = n_trials_per_round
+        self.exploration_coefficient = exploration_coefficient
+    
+    def __repr__(self):
+        return 'TunerBudgetAllocator('+'obj_name='+str(self.obj_name)+', total_budget='+str(self.total_budget)\
+               +', allocation_mode='+str(self.allocation_mode)+', n_trials_per_round='+str(self.n_trials_per_round)\
+               +', exploration_coefficient='+str(self.exploration_coefficient)+', seeder='+str(self.seeder)\
+               +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+               +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+    
+    def _get_max_rounds(self, tuner):
+        """
+        Parameters
+        ----------
+        tuner: This is either an object of Class TunerGenetic or of Class TunerOptuna.
+        
+        Returns
+        -------
+        This method returns the number of rounds needed for using the whole budget of the tuner.
+        """
+        
+        if(isinstance(tuner, TunerGenetic)):
+            return tuner.n_generations
+        
+        return int(np.ceil(tuner.n_trials/self.n_trials_per_round))
+    
+    def _get_round_cost(self, arm):
+        """
+        Parameters
+        ----------
+        arm: This is the dictionary with the state of a tuner, as created by the method run.
+        
+        Returns
+        -------
+        This method returns the number of trials of the next round of the tuner. The first round of a TunerGenetic that is not
+        resumed from a tuner state also learns and evaluates the block_to_opt, before the first generation: this is one more
+        trial.
+        """
+        
+        if(isinstance(arm['tuner'], TunerGenetic)):
+            if((arm['n_rounds'] == 0) and (arm['tuner_state_path'] is None)):
+                return arm['tuner'].n_agents+1
+            
+            return arm['tuner'].n_agents
+        
+        return min(self.n_trials_per_round, arm['original_params']['n_trials']-arm['n_rounds']*self.n_trials_per_round)
+    
+    def _is_arm_exhausted(self, arm):
+        """
+        Parameters
+        ----------
+        arm: This is the dictionary with the state of a tuner, as created by the method run.
+        
+        Returns
+        -------
+        This method returns True if the tuner cannot get more rounds, either because it used its own budget or because its
+        last round failed, and False otherwise.
+        """
+        
+        return arm['is_failed'] or (arm['n_rounds'] >= arm['max_rounds'])
+    
+    def _run_round(self, arm, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        arm: This is the dictionary with the state of a tuner, as created by the method run.
+        
+        train_data: This is the train_data passed to the method tune of the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env passed to the method tune of the tuner.
+             
+             The default is None.
+        
+        This method calls the method tune of the tuner for one more round, resuming from the previous round.
+        """
+        
+        tuner = arm['tuner']
+        
+        #each round creates its tuner folder inside its own folder, so that two rounds never create the same folder:
+        tuner.checkpoint_log_path = os.path.join(arm['allocation_folder'], 'round_'+str(arm['n_rounds']))
+        os.makedirs(tuner.checkpoint_log_path, exist_ok=True)
+        
+        if(isinstance(tuner, TunerGenetic)):
+            tuner.n_generations = arm['n_rounds']+1
+            tuner.resume_from = arm['tuner_state_path']
+        else:
+            tuner.n_trials = min((arm['n_rounds']+1)*self.n_trials_per_round, arm['original_params']['n_trials'])
+        
+        tuned_block, tuned_block_eval = tuner.tune(train_data=train_data, env=env)
+        
+        arm['n_rounds'] += 1
+        arm['result'] = (tuned_block, tuned_block_eval, tuner)
+        
+        if((not tuner.is_tune_successful) or (tuned_block is None)):
+            arm['is_failed'] = True
+            return
+        
+        arm['best_eval'] = tuned_block_eval
+        
+        if(isinstance(tuner, TunerGenetic)):
+            arm['tuner_state_path'] = os.path.join(tuner.checkpoint_log_path, str(tuner.obj_name)+'_tuner_state.ckpt')
+        
+        self.logger.info(msg='Round '+str(arm['n_rounds'])+' of the tuner \''+str(arm['name'])+'\': best evaluation: '
+                             +str(arm['best_eval']))
+    
+    def _get_normalised_rewards(self, arms, eval_metric):
+        """
+        Parameters
+        ----------
+        arms: This is a list of dictionaries with the state of the tuners, as created by the method run.
+        
+        eval_metric: This is the metric used for comparing the evaluations of the tuners.
+        
+        Returns
+        -------
+        rewards: This is a numpy array with the best evaluations of the tuners, normalised in [0, 1] so that higher is better.
+        """
+        
+        sign_of_eval = 1
+        #if the metric should be minimised then the reward is minus the evaluation:
+        if(eval_metric.which_one_is_better(block_1_eval=0, block_2_eval=1) == 0):
+            sign_of_eval = -1
+        
+        rewards = np.array([sign_of_eval*arm['best_eval'] for arm in arms], dtype=float)
+        
+        finite_rewards = rewards[np.isfinite(rewards)]
+        if(len(finite_rewards) == 0):
+            return np.zeros(len(arms))
+        
+        rewards = np.clip(rewards, np.min(finite_rewards), np.max(finite_rewards))
+        if(np.max(finite_rewards) == np.min(finite_rewards)):
+            return np.ones(len(arms))*0.5
+        
+        return (rewards-np.min(finite_rewards))/(np.max(finite_rewards)-np.min(finite_rewards))
+    
+    def _get_worst_arm(self, arms, eval_metric):
+        """
+        Parameters
+        ----------
+        arms: This is a list of dictionaries with the state of the tuners, as created by the method run.
+        
+        eval_metric: This is the metric used for comparing the evaluations of the tuners.
+        
+        Returns
+        -------
+        worst_arm: This is the tuner with the worst best evaluation: a tuner whose last round failed is always the worst.
+        """
+        
+        worst_arm = None
+        for arm in arms:
+            if(arm['is_failed'] or (arm['best_eval'] is None)):
+                return arm
+            
+            if((worst_arm is None) or (eval_metric.which_one_is_better(block_1_eval=worst_arm['best_eval'],
+                                                                      block_2_eval=arm['best_eval']) == 0)):
+                worst_arm = arm
+        
+        return worst_arm
+    
+    def _successive_rejects(self, arms, eval_metric):
+        """
+        Parameters
+        ----------
+        arms: This is a list of dictionaries with the state of the tuners, as created by the method run.
+        
+        eval_metric: This is the metric used for comparing the evaluations of the tuners.
+        
+        Each tuner is tuned with its own train_data and env.
+        """
+        
+        n_arms = len(arms)
+        
+        #the budget in rounds is obtained with the average cost of a round:
+        mean_round_cost = np.mean([self._get_round_cost(arm=arm) for arm in arms])
+        total_rounds = max(int(self.total_budget//mean_round_cost), n_arms)
+        
+        log_bar = 0.5+np.sum([1/i for i in range(2, n_arms+1)])
+        
+        remaining_arms = list(arms)
+        for phase in range(1, n_arms+1):
+            if(len(remaining_arms) > 1):
+                n_rounds_phase = int(np.ceil((total_rounds-n_arms)/(log_bar*(n_arms+1-phase))))
+                n_rounds_phase = max(n_rounds_phase, 1)
+            else:
+                #the last remaining tuner gets all the rest of the budget:
+                n_rounds_phase = np.inf
+            
+            is_any_round_run = True
+            while(is_any_round_run):
+                is_any_round_run = False
+                for arm in remaining_arms:
+                    if((arm['n_rounds'] >= n_rounds_phase) or self._is_arm_exhausted(arm=arm)):
+                        continue
+                    
+                    if(self._get_round_cost(arm=arm) > self.remaining_budget):
+                        continue
+                    
+                    self.remaining_budget -= self._get_round_cost(arm=arm)
+                    self._run_round(arm=arm, train_data=arm['train_data'], env=arm['env'])
+                    is_any_round_run = True
+            
+            if(len(remaining_arms) == 1):
+                break
+            
+            #only the tuners that got at least a round can be compared:
+            tuned_arms = [arm for arm in remaining_arms if arm['n_rounds'] > 0]
+            if(len(tuned_arms) == 0):
+                break
+            
+            rejected_arm = self._get_worst_arm(arms=tuned_arms, eval_metric=eval_metric)
+            remaining_arms.remove(rejected_arm)
+            
+            self.logger.info(msg='The tuner \''+str(rejected_arm['name'])+'\' was rejected after '
+                                 +str(rejected_arm['n_rounds'])+' rounds!')
+    
+    def _ucb(self, arms, eval_metric):
+        """
+        Parameters
+        ----------
+        arms: This is a list of dictionaries with the state of the tuners, as created by the method run.
+        
+        eval_metric: This is the metric used for comparing the evaluations of the tuners.
+        
+        Each tuner is tuned with its own train_data and env.
+        """
+        
+        while(True):
+            affordable_arms = [arm for arm in arms if (not self._is_arm_exhausted(arm=arm))
+                                                      and (self._get_round_cost(arm=arm) <= self.remaining_budget)]
+            if(len(affordable_arms) == 0):
+                break
+            
+            #each tuner first gets a round:
+            untuned_arms = [arm for arm in affordable_arms if arm['n_rounds'] == 0]
+            if(len(untuned_arms) > 0):
+                selected_arm = untuned_arms[0]
+            else:
+                total_rounds = np.sum([arm['n_rounds'] for arm in arms])
+                
+                rewards = self._get_normalised_rewards(arms=affordable_arms, eval_metric=eval_metric)
+                n_rounds = np.array([arm['n_rounds'] for arm in affordable_arms], dtype=float)
+                
+                upper_bounds = rewards+self.exploration_coefficient*np.sqrt(2*np.log(total_rounds)/n_rounds)
+                
+                selected_arm = affordable_arms[int(np.argmax(upper_bounds))]
+            
+            self.remaining_budget -= self._get_round_cost(arm=selected_arm)
+            self._run_round(arm=selected_arm, train_data=selected_arm['train_data'], env=selected_arm['env'])
+    
+    def run(self, tuners, tuners_names, eval_metric, train_datas, envs):
+        """
+        Parameters
+        ----------
+        tuners: This is a list of objects of Class TunerGenetic or TunerOptuna. The asynchronous TunerGenetic is not supported.
+        
+        tuners_names: This is a list with a name for each tuner: for example its key in the member tuner_blocks_dict of an
+                      automatic block.
+        
+        eval_metric: This is the metric used for comparing the evaluations of the tuners.
+        
+        train_datas: This is a list with the train_data of each tuner.
+        
+        envs: This is a list with the env of each tuner.
+        
+        Returns
+        -------
+        tuners_results: This is a list with an element for each tuner, in the same order of tuners. Each element is a tuple
+                        containing the tuned block, its evaluation and the tuner after its last round, or None if the tuner
+                        did not get any round.
+        """
+        
+        for tmp_tuner in tuners:
+            if((not isinstance(tmp_tuner, (TunerGenetic, TunerOptuna))) or
+               (isinstance(tmp_tuner, TunerGenetic) and tmp_tuner.asynchronous)):
+                exc_msg = 'The \'TunerBudgetAllocator\' only supports objects of Class \'TunerGenetic\' (not asynchronous) and'\
+                          +' \'TunerOptuna\'!'
+                self.logger.exception(msg=exc_msg)
+                raise TypeError(exc_msg)
+            
+            if(tmp_tuner.checkpoint_log_path is None):
+                exc_msg = 'The \'checkpoint_log_path\' of the tuners cannot be \'None\': it is needed for resuming them!'
+                self.logger.exception(msg=exc_msg)
+                raise ValueError(exc_msg)
+        
+        self.remaining_budget = self.total_budget
+        
+        allocation_time = datetime.datetime.now().strftime('_%H_%M_%S__%d_%m_%Y')
+        
+        arms = []
+        for n_tuner, tmp_tuner in enumerate(tuners):
+            original_params = dict(checkpoint_log_path=tmp_tuner.checkpoint_log_path)
+            if(isinstance(tmp_tuner, TunerGenetic)):
+                original_params.update(dict(n_generations=tmp_tuner.n_generations, resume_from=tmp_tuner.resume_from))
+            else:
+                original_params.update(dict(n_trials=tmp_tuner.n_trials, storage=tmp_tuner.storage))
+            
+            allocation_folder = os.path.join(tmp_tuner.checkpoint_log_path, 'budget_allocation_'+str(tuners_names[n_tuner])
+                                             +allocation_time)
+            
+            #the rounds of a TunerOptuna resume the same study:
+            if(isinstance(tmp_tuner, TunerOptuna) and (tmp_tuner.storage is None)):
+                tmp_tuner.storage = os.path.join(allocation_folder, str(tmp_tuner.obj_name)+'_optuna_study.db')
+            
+            arms.append(dict(name=tuners_names[n_tuner], tuner=tmp_tuner, original_params=original_params,
+                             max_rounds=self._get_max_rounds(tuner=tmp_tuner), allocation_folder=allocation_folder,
+                             n_rounds=0, is_failed=False, best_eval=None, result=None,
+                             tuner_state_path=original_params.get('resume_from', None),
+                             train_data=train_datas[n_tuner], env=envs[n_tuner]))
+        
+        try:
+            if(self.allocation_mode == 'successive_rejects'):
+                self._successive_rejects(arms=arms, eval_metric=eval_metric)
+            else:
+                self._ucb(arms=arms, eval_metric=eval_metric)
+        finally:
+            #the tuners get back their own budget: only their checkpoint_log_path is left to the folder of the last round, as
+            #done by the method tune.
+            for arm in arms:
+                for tmp_key in list(arm['original_params'].keys()):
+                    if(tmp_key != 'checkpoint_log_path'):
+                        setattr(arm['tuner'], tmp_key, arm['original_params'][tmp_key])
+        
+        self.logger.info(msg='Rounds given to each tuner: '+str({arm['name']: arm['n_rounds'] for arm in arms})
+                             +'. Trials left in the budget: '+str(self.remaining_budget))
+        
+        return [arm['result'] for arm in arms]
@@ -4,15 +4,21 @@ This module contains the implementation of the Class: TunerGenetic.
 The Class TunerGenetic inherits from the Class Tuner.
 """
 
+import os
+import time
 import numpy as np
 import copy
+import cloudpickle
 from joblib import Parallel, delayed
+from catboost import CatBoostRegressor, CatBoostError
 
 from ARLO.tuner.tuner import Tuner
+from ARLO.tuner.tuner_worker_pool import TunerWorkerPool
 from ARLO.rl_pipeline.rl_pipeline import RLPipeline
 from ARLO.block.model_generation import ModelGeneration
+from ARLO.hyperparameter.hyperparameter import Categorical
+
 
-        
 class TunerGenetic(Tuner):
     """
     This Class implements a population based tuner, namely it implements a Genetic Algorithm.
@@ -23,7 +29,8 @@ class TunerGenetic(Tuner):
     def __init__(self, block_to_opt, eval_metric, input_loader, obj_name, create_explanatory_heatmap=False, seeder=2, 
                  log_mode='console', checkpoint_log_path=None, verbosity=3, n_agents=10, n_generations=100, 
                  prob_point_mutation=0.5, tuning_mode='best_performant_elitism', pool_size=None, n_jobs=1, job_type='process', 
-                 output_save_periodicity=25):
+                 output_save_periodicity=25, persistent_workers=False, asynchronous=False, resume_from=None, 
+                 evaluation_cache=None, n_screening_candidates=None):
         """
         Parameters
         ----------
@@ -34,11 +41,11 @@ class TunerGenetic(Tuner):
         n_generations: This is the number of generations of the genetic algorithm.
                        
                        The default is 100.
-                     
+        
         prob_point_mutation: This is the probability of mutating a certain hyper-parameter of block_to_opt.
                              
                              The default is 0.5.
-                             
+        
         tuning_mode: This is a string and it represents the tuning mode: it can be 'no_elitism', 'best_performant_elitism', or
                      'pool_elitism'. 
                      
@@ -53,18 +60,79 @@ class TunerGenetic(Tuner):
                      
                      In the first two cases we perform tournament selection (note that we always reserve a spot for the best 
                      agent of the previous generation (which will be mutated)).
-        
+                     
                      The default is 'best_performant_elitism'.
-                             
+        
         pool_size: This is an integer and it represents the number of best agents to use in each generation as starting point for
                    obtaining the next generation.
-                     
+                   
                    The default is None.
+        
+        persistent_workers: This is a boolean. If True and n_jobs is greater than 1, then the agents are learnt and evaluated by
+                            n_jobs persistent worker processes that are started once per call of the method tune: these receive
+                            the train_data and the env only once, and then, for each agent, only its hyper-parameters. The 
+                            learnt agents are kept in the worker processes and only the evaluations are sent back: only the 
+                            best agent of each generation is sent back, and only if it is a new best agent.
+                            
+                            Note that in this case the input_loader is re-seeded for each agent, rather than once per 
+                            generation.
+                            
+                            The default is False.
+        
+        asynchronous: This is a boolean. If True the genetic algorithm is run in an asynchronous steady-state fashion, without 
+                      waiting for all the agents of a generation: as soon as an agent is evaluated it is inserted in the 
+                      population and a new agent is created, by selecting and mutating an agent of the population, and sent to 
+                      the idle worker process. In total n_agents*n_generations agents are learnt, and the first n_agents are
+                      created from block_to_opt.
+                      
+                      The tuning_mode is used as follows:
+                          -'no_elitism': the agents are selected with tournament selection and each new agent replaces the 
+                           oldest agent of the population.
+                          -'best_performant_elitism': the agents are selected with tournament selection among the population 
+                           and the best agent so far, and each new agent replaces the worst agent of the population, if it is 
+                           better.
+                          -'pool_elitism': the agents are selected uniformly among the pool_size best agents of the population,
+                           and each new agent replaces the worst agent of the population, if it is better.
+                      
+                      The agents are learnt by a pool of n_jobs persistent worker processes (even if persistent_workers is 
+                      False): n_jobs must be greater than 1.
+                      
+                      The default is False.
+        
+        resume_from: This is either None or the path of a tuner state file written by a previous call of the method tune. 
                      
+                     After each generation (or, if asynchronous is True, each time n_agents agents were learnt) the method tune
+                     writes in its checkpoint_log_path the file '<obj_name>_tuner_state.ckpt' containing the hyper-parameters
+                     and the evaluations of the population, the best agent so far, the trial_number and the state of the 
+                     local_prng. If asynchronous is True it also contains the agents that were being learnt by the worker 
+                     processes: these are learnt again when the tuning procedure is resumed. 
+                     
+                     If resume_from is not None the method tune restarts the tuning procedure from such state rather than from 
+                     the first generation.
+                     
+                     The default is None.
+        
+        evaluation_cache: This is either None or an object of Class EvaluationCache. If it is not None then before learning an
+                          agent the cache is looked up: on a cache hit the agent is not learnt and its cached evaluation is 
+                          used. All the agents learnt and evaluated are stored in the cache.
+                          
+                          The default is None.
+        
+        n_screening_candidates: This is either None or an integer greater than n_agents. If it is not None then in each 
+                                generation n_screening_candidates mutated agents are created, a surrogate model (a 
+                                CatBoostRegressor) is fitted on the hyper-parameters and on the evaluations of all the agents 
+                                learnt so far, and only the n_agents candidates with the best predicted evaluations are learnt.
+                                
+                                The surrogate model is fitted from scratch only in the first generation in which it is used: 
+                                afterwards it is warm-started from the previous model on the agents learnt since the previous 
+                                fit. It is not used when asynchronous is True.
+                                
+                                The default is None.
+        
         Non-Parameters Members
         ----------------------
         trial_number: This is an integer used for keeping track of how many trials (agents) are being done. 
-
+        
         The other parameters and non-parameters members are described in the Class Tuner.
         """
         
@@ -72,7 +140,7 @@ class TunerGenetic(Tuner):
                          create_explanatory_heatmap=create_explanatory_heatmap, seeder=seeder, log_mode=log_mode, 
                          checkpoint_log_path=checkpoint_log_path, verbosity=verbosity, n_jobs=n_jobs, job_type=job_type, 
                          output_save_periodicity=output_save_periodicity)
-            
+        
         self.n_agents = n_agents
         self.n_generations = n_generations
         self.prob_point_mutation = prob_point_mutation
@@ -85,8 +153,37 @@ class TunerGenetic(Tuner):
                 self.logger.exception(msg=exc_msg)
                 raise ValueError(exc_msg)
         
+        self.persistent_workers = persistent_workers
+        self.asynchronous = asynchronous
+        if(self.asynchronous and (self.n_jobs < 2)):
+            exc_msg = 'If \'asynchronous\' is \'True\' then \'n_jobs\' must be greater than 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.resume_from = resume_from
+        self.evaluation_cache = evaluation_cache
+        
+        self.n_screening_candidates = n_screening_candidates
+        if(self.n_screening_candidates is not None):
+            if(self.n_screening_candidates <= self.n_agents):
+                exc_msg = '\'n_screening_candidates\' must be greater than \'n_agents\'!'
+                self.logger.exception(msg=exc_msg)
+                raise ValueError(exc_msg)
+        
+        #these are the hyper-parameters and the evaluations of the agents learnt so far: they are used for fitting the 
+        #surrogate model.
+        self._surrogate_features = []
+        self._surrogate_targets = []
+        
+        #the surrogate model is warm-started: each new fit only adds trees for the agents learnt since the previous fit.
+        self._surrogate_model = None
+        self._n_surrogate_samples_fitted = 0
+        
+        #this is the pool of persistent worker processes: it only exists within a call of the method tune.
+        self._worker_pool = None
+        
         self.trial_number = 0
-                
+    
     def __repr__(self):
          return 'TunerGenetic('+'block_to_opt='+str(self.block_to_opt)+', eval_metric='+str(self.eval_metric)\
                 +', input_loader='+str(self.input_loader)+', obj_name='+str(self.obj_name)\
@@ -96,30 +193,34 @@ class TunerGenetic(Tuner):
                 +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', n_agents='+str(self.n_agents)\
                 +', n_generations='+str(self.n_generations)+', prob_point_mutation='+str(self.prob_point_mutation)\
                 +', tuning_mode='+str(self.tuning_mode)+', pool_size='+str(self.pool_size)\
-                +', output_save_periodicity='+str(self.output_save_periodicity)+', trial_number='+str(self.trial_number)\
+                +', output_save_periodicity='+str(self.output_save_periodicity)\
+                +', persistent_workers='+str(self.persistent_workers)+', asynchronous='+str(self.asynchronous)\
+                +', resume_from='+str(self.resume_from)+', evaluation_cache='+str(self.evaluation_cache)\
+                +', n_screening_candidates='+str(self.n_screening_candidates)\
+                +', trial_number='+str(self.trial_number)\
                 +', logger='+str(self.logger)+')'
-        
+    
     def _get_agent_data(self, current_agent, train_data=None, env=None): 
         """
         Parameters
         ----------            
         current_agent: This is an object of a Class inheriting from the Class Block. It represents the current agent for which
                        we want to extract the train_data and env.
-            
+        
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                                        
+                    
                     The default is None.
-            
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
-                                
+             
              The default is None.
-
+        
         Returns
         -------
         tmp_agent_train_data: This is the selected train_data for the current_agent. It is an object of a Class inheriting from 
                               the Class BaseDataSet.
-    
+        
         tmp_agent_env: This is the selected env for the current_agent. It is an object of a Class inheriting from the Class 
                        BaseEnvironment.
         """
@@ -128,45 +229,49 @@ class TunerGenetic(Tuner):
             exc_msg = 'In \'_get_agent_data\' of \'TunerGenetic\' \'train_data\' and \'env\' are both \'None\'!'
             self.logger.exception(msg=exc_msg)
             raise ValueError(exc_msg)
-                
+        
         current_agent_train_data, current_agent_env = self.input_loader.get_input(blocks=[current_agent], n_inputs_to_load=1, 
                                                                                   train_data=train_data, env=env)
-            
+        
         #input loaders methods get_input return two lists: one for the train_data and one for the env.        
         tmp_agent_train_data = None
         if(current_agent_train_data is not None):
             tmp_agent_train_data = current_agent_train_data[0]
-       
+        
         tmp_agent_env = None
         if(current_agent_env is not None):
             tmp_agent_env = current_agent_env[0]
-            
+        
         return tmp_agent_train_data, tmp_agent_env
     
     def _mutate_gather_data_and_env(self, current_gen_n, current_gen_length, tmp_agent_to_tune, train_data=None, env=None, 
-                                    first_mutation=False):
+                                    first_mutation=False, gather_data=True):
         """
         Parameters
         ----------
         current_gen_n: This is an integer representing the number of the current generation.
-            
+        
         current_gen_length: This is an integer representing the length of the current generation.
-            
+        
         tmp_agent_to_tune: This is an object of a Class inheriting from the Class Block. It represents the current agent.
         
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                         
+                    
                     The default is None.
-
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
              
              The default is None.
         
         first_mutation: This is True if this is the first time generation else it is False.
-                    
+                        
                         The default is False.
-
+        
+        gather_data: This is True if the train_data and the env of the mutated agent are needed, and False otherwise.
+                     
+                     The default is True.
+        
         Returns
         -------
         tmp_agent: This is the mutated agent. It is an object of a Class inheriting from the Class Block.
@@ -187,12 +292,12 @@ class TunerGenetic(Tuner):
         if(self.verbosity < 4):
             agent_to_tune.update_verbosity(new_verbosity=0)
             self.eval_metric.update_verbosity(new_verbosity=0)
-
+        
         #i need to change the seed of the agents:
         agent_to_tune.set_local_prng(new_seeder=agent_to_tune.seeder+current_gen_length)
         
         tmp_agent = self._mutate(agent=agent_to_tune, first_mutation=first_mutation)
-                       
+        
         tmp_agent.obj_name = self.block_to_opt.obj_name+'_Gen_'+str(current_gen_n)+'_Agent_'+str(current_gen_length)
         tmp_agent.logger.name_obj_logging = self.block_to_opt.logger.name_obj_logging+'_Gen_'+str(current_gen_n)\
                                             +'_Agent_'+str(current_gen_length)
@@ -202,14 +307,18 @@ class TunerGenetic(Tuner):
             self.is_tune_successful = False
             self.logger.error(msg='There was an error mutating an agent!')
             return None, None, None
-            
+        
+        #the worker processes get the input of the agent from their own copy of the train_data and of the env:
+        if((self._worker_pool is not None) or (not gather_data)):
+            return tmp_agent, None, None
+        
         tmp_agent_train_data, tmp_agent_env = self._get_agent_data(current_agent=tmp_agent,
                                                                    train_data=train_data, 
                                                                    env=env)
         
         return tmp_agent, tmp_agent_train_data, tmp_agent_env
     
-    def _learn_and_evaluate(self, tmp_agent, tmp_agent_train_data, tmp_agent_env):
+    def _learn_and_evaluate_agent(self, tmp_agent, tmp_agent_train_data, tmp_agent_env):
         """
         Parameters
         ----------
@@ -220,12 +329,39 @@ class TunerGenetic(Tuner):
         
         tmp_agent_env: This is the selected env for the mutated agent. It is an object of a Class inheriting from the Class 
                        BaseEnvironment.
-
+        
         Returns
         -------
         tmp_agent: This is the agent on which we called the method learn(). It has its evaluation inside the member block_eval.
+        
+        tmp_res: This is the output of the method learn() of tmp_agent. It is None if the method learn() raised an exception: in
+                 this case tmp_agent was mutated to move away from its hyper-parameters.
         """
-                
+        
+        start_time = time.time()
+        
+        cache_key = None
+        if(self.evaluation_cache is not None):
+            cache_key = self.evaluation_cache.get_key(block=tmp_agent, train_data=tmp_agent_train_data, env=tmp_agent_env,
+                                                      eval_metric=self.eval_metric)
+            
+            #in the worker processes the best agent is not known, but its evaluation is the threshold of the metric:
+            best_eval = None
+            best_eps_eval = None
+            if(self.best_agent is not None):
+                best_eval = self.best_agent.block_eval
+                best_eps_eval = self.best_agent.block_eps_eval
+            elif(self.trial_number != 0):
+                best_eval = self.eval_metric.eval_threshold
+                best_eps_eval = self.eval_metric.eval_threshold_eps_eval
+            
+            cached_agent, cached_res = self.evaluation_cache.get_cached_block(key=cache_key, block=tmp_agent, 
+                                                                              eval_metric=self.eval_metric, best_eval=best_eval,
+                                                                              best_eps_eval=best_eps_eval)
+            if(cached_agent is not None):
+                self._record_trial(tmp_agent=cached_agent, tmp_agent_eval=cached_agent.block_eval, start_time=start_time)
+                return cached_agent, cached_res
+        
         #it may happen that the hyper-parameters selected are ill so that the block returns NaN. This may happen for RL model 
         #generation blocks: this breaks the interaction with the environment. This is not an issue of implementation, it is just
         #that by searching for hyper-parameters configurations it may happen to find a configuration that either through PyTorch
@@ -243,7 +379,7 @@ class TunerGenetic(Tuner):
             #revert effect of the call of pre_learn_check:
             self.fully_instantiated = True
             is_set_params_successful = tmp_agent.set_params(prev_params)
-                
+            
             if(self.trial_number == 0 or (not is_pre_learn_check_successful) or (not is_set_params_successful)):
                 exc_msg = 'Exception Type: '+str(type(exc).__name__)+'. Exception Message: '+str(exc)+'. Information about'\
                           +' failed trial: trial_number='+str(self.trial_number)+', is_pre_learn_check_successful='\
@@ -256,7 +392,7 @@ class TunerGenetic(Tuner):
                 sign_of_eval = -1
                 if(self.eval_metric.which_one_is_better(block_1_eval=0, block_2_eval=1) == 0):
                     sign_of_eval = 1
-                    
+                
                 tmp_agent.block_eval = sign_of_eval*np.inf
                 
                 tmp_agent.is_learn_successful = True
@@ -268,69 +404,857 @@ class TunerGenetic(Tuner):
                     self.logger.exception(msg='The \'tmp_agent\' is \'None\'!')
             
             #return the agent now: all the other steps do not take place 
-            return tmp_agent
-            
+            return tmp_agent, None
+        
         if(not tmp_agent.is_learn_successful):
             self.is_tune_successful = False
             self.logger.error(msg='There was an error in the \'learn\' method of an agent!')
             tmp_agent.block_eval = None
+            return tmp_agent, tmp_res
+        else:
+            #the metrics supporting sequential stopping compare the agent against the best agent found so far:
+            if((self.trial_number != 0) and (self.best_agent is not None)):
+                self.eval_metric.set_eval_threshold(eval_threshold=self.best_agent.block_eval, 
+                                                    eval_threshold_eps_eval=self.best_agent.block_eps_eval)
+            
+            tmp_agent_eval = self._evaluate(agent_res=tmp_res, agent=tmp_agent, train_data=tmp_agent_train_data, 
+                                            env=tmp_agent_env)    
+            tmp_agent.block_eval = tmp_agent_eval
+            
+            #an evaluation stopped early depends on the best agent found so far and so it is not stored:
+            if((cache_key is not None) and (tmp_agent_eval is not None)
+               and self.evaluation_cache.is_evaluation_complete(eval_metric=self.eval_metric)):
+                self.evaluation_cache.store(key=cache_key, block_eval=tmp_agent_eval, block=tmp_agent, block_res=tmp_res)
+            
+            pickle_path = None
+            if(((self.trial_number % self.output_save_periodicity) == 0) and (self.trial_number != 0)):
+                self.logger.debug(msg='Agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
+                pickle_path = tmp_agent.save()
+                tmp_res.save()
+            
+            self._record_trial(tmp_agent=tmp_agent, tmp_agent_eval=tmp_agent_eval, start_time=start_time, 
+                               pickle_path=pickle_path)
+            
+            return tmp_agent, tmp_res
+    
+    def _save_new_best_agent(self, tmp_agent, tmp_res):
+        """
+        Parameters
+        ----------
+        tmp_agent: This is the new best agent. It is an object of a Class inheriting from the Class Block.
+        
+        tmp_res: This is the output of the method learn() of tmp_agent.
+        
+        This method sets tmp_agent as the best agent so far and saves it together with tmp_res.
+        """
+        
+        self.best_agent = tmp_agent
+        
+        self.logger.info(msg='New best agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent.block_eval))
+        
+        tmp_agent.obj_name += '_new_best'
+        tmp_res.obj_name += '_new_best'
+        
+        tmp_agent.save()
+        tmp_res.save()
+    
+    def _learn_and_evaluate(self, tmp_agent, tmp_agent_train_data, tmp_agent_env):
+        """
+        Parameters
+        ----------
+        tmp_agent: This is the mutated agent. It is an object of a Class inheriting from the Class Block.
+        
+        tmp_agent_train_data: This is the selected train_data for the mutated agent. It is an object of a Class inheriting from 
+                              the Class BaseDataSet.
+        
+        tmp_agent_env: This is the selected env for the mutated agent. It is an object of a Class inheriting from the Class 
+                       BaseEnvironment.
+        
+        Returns
+        -------
+        tmp_agent: This is the agent on which we called the method learn(). It has its evaluation inside the member block_eval.
+        """
+        
+        tmp_agent, tmp_res = self._learn_and_evaluate_agent(tmp_agent=tmp_agent, tmp_agent_train_data=tmp_agent_train_data,
+                                                            tmp_agent_env=tmp_agent_env)
+        
+        if((tmp_agent is None) or (tmp_res is None) or (tmp_agent.block_eval is None)):
             return tmp_agent
+        
+        #save all new best agents:
+        if((self.trial_number == 0) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent.block_eval, 
+                                                                             block_2_eval=self.best_agent.block_eval,
+                                                                             block_1_eps_eval=tmp_agent.block_eps_eval,
+                                                                             block_2_eps_eval=self.best_agent.block_eps_eval) 
+                                            == 0)):
+            self._save_new_best_agent(tmp_agent=tmp_agent, tmp_res=tmp_res)
+        
+        self.trial_number += 1
+        
+        return tmp_agent
+    
+    def _run_task_on_worker(self, task, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        task: This is a dictionary with the hyper-parameters and the other information needed to build an agent, as created by
+              the method _learn_and_evaluate_on_worker_pool.
+        
+        train_data: This is the train_data kept in the worker process.
+                    
+                    The default is None.
+        
+        env: This is the env kept in the worker process.
+             
+             The default is None.
+        
+        Returns
+        -------
+        stored_obj: This is a tuple with the learnt agent and the output of its method learn(). It is kept in the worker process.
+        
+        payload: This is a dictionary with the evaluation of the agent that is sent back to the main process. If the method
+                 learn() of the agent raised an exception then it also contains the new hyper-parameters of the agent. It is 
+                 None if there was an error.
+        
+        This method is called in the worker processes of the TunerWorkerPool.
+        """
+        
+        tmp_agent = copy.deepcopy(self.block_to_opt)
+        
+        if(self.verbosity < 4):
+            tmp_agent.update_verbosity(new_verbosity=0)
+            self.eval_metric.update_verbosity(new_verbosity=0)
+        
+        tmp_agent.set_local_prng(new_seeder=task['seeder'])
+        
+        if(not tmp_agent.set_params(task['params'])):
+            self.logger.error(msg='There was an error setting the parameters of an agent!')
+            return None, None
+        
+        tmp_agent.obj_name = task['obj_name']
+        tmp_agent.logger.name_obj_logging = task['name_obj_logging']
+        
+        self.input_loader.set_local_prng(new_seeder=task['input_loader_seeder'])
+        tmp_agent_train_data, tmp_agent_env = self._get_agent_data(current_agent=tmp_agent, train_data=train_data, env=env)
+        
+        #the best agent is only known by the main process: the worker only gets its evaluation.
+        self.trial_number = task['trial_number']
+        self.best_agent = None
+        self.eval_metric.set_eval_threshold(eval_threshold=task['eval_threshold'], 
+                                            eval_threshold_eps_eval=task['eval_threshold_eps_eval'])
+        
+        tmp_agent, tmp_res = self._learn_and_evaluate_agent(tmp_agent=tmp_agent, tmp_agent_train_data=tmp_agent_train_data,
+                                                            tmp_agent_env=tmp_agent_env)
+        
+        if(tmp_agent is None):
+            return None, None
+        
+        payload = dict(block_eval=tmp_agent.block_eval, block_eps_eval=tmp_agent.block_eps_eval, 
+                       is_learn_successful=tmp_agent.is_learn_successful, params=None)
+        if(tmp_res is None):
+            payload['params'] = tmp_agent.get_params()
+        
+        return (tmp_agent, tmp_res), payload
+    
+    def _get_worker_task(self, tmp_agent, input_loader_seeder, trial_number, eval_threshold, eval_threshold_eps_eval=None):
+        """
+        Parameters
+        ----------
+        tmp_agent: This is the mutated agent. It is an object of a Class inheriting from the Class Block.
+        
+        input_loader_seeder: This is the seeder used for the input_loader in the worker process.
+        
+        trial_number: This is the number of the trial of the agent.
+        
+        eval_threshold: This is the evaluation of the best agent so far, or None.
+        
+        eval_threshold_eps_eval: This is the evaluation of each episode of the best agent so far, or None.
+                                 
+                                 The default is None.
+        
+        Returns
+        -------
+        task: This is a dictionary with all the information needed to learn and evaluate tmp_agent in a worker process of the 
+              TunerWorkerPool.
+        """
+        
+        return dict(params=tmp_agent.get_params(), seeder=tmp_agent.seeder, obj_name=tmp_agent.obj_name, 
+                    name_obj_logging=tmp_agent.logger.name_obj_logging, input_loader_seeder=input_loader_seeder, 
+                    trial_number=trial_number, eval_threshold=eval_threshold, 
+                    eval_threshold_eps_eval=eval_threshold_eps_eval)
+    
+    def _apply_worker_payload(self, tmp_agent, payload):
+        """
+        Parameters
+        ----------
+        tmp_agent: This is the mutated agent that was sent to a worker process. It is an object of a Class inheriting from the 
+                   Class Block.
+        
+        payload: This is the payload sent back by the worker process.
+        
+        Returns
+        -------
+        tmp_agent: This is the agent with its evaluation inside the member block_eval. It is None if there was an error.
+        
+        is_trial_evaluated: This is True if the agent was learnt and evaluated: in this case the trial_number is increased.
+        """
+        
+        if(payload is None):
+            return None, False
+        
+        tmp_agent.block_eval = payload['block_eval']
+        tmp_agent.block_eps_eval = payload['block_eps_eval']
+        tmp_agent.is_learn_successful = payload['is_learn_successful']
+        
+        #the method learn() raised an exception and the agent was mutated in the worker process:
+        if(payload['params'] is not None):
+            tmp_agent.set_params(payload['params'])
+            return tmp_agent, False
+        
+        if(tmp_agent.block_eval is None):
+            return tmp_agent, False
+        
+        self.trial_number += 1
+        
+        return tmp_agent, True
+    
+    def _learn_and_evaluate_on_worker_pool(self, agents, current_gen_n):
+        """
+        Parameters
+        ----------
+        agents: This is a list of mutated agents, namely of objects inheriting from the Class Block.
+        
+        current_gen_n: This is an integer representing the number of the current generation.
+        
+        Returns
+        -------
+        agents: This is the list of agents with their evaluation inside the member block_eval. An agent is None if there was an
+                error.
+        
+        This method learns and evaluates the agents in the worker processes of the TunerWorkerPool: only the hyper-parameters 
+        of the agents are sent to the worker processes, and only the evaluations are sent back. The learnt agent is fetched 
+        from its worker process only if it is the best of the generation and a new best agent.
+        """
+        
+        eval_threshold = None
+        eval_threshold_eps_eval = None
+        if((self.trial_number != 0) and (self.best_agent is not None)):
+            eval_threshold = self.best_agent.block_eval
+            eval_threshold_eps_eval = self.best_agent.block_eps_eval
+        
+        tasks = []
+        for agent_index in range(len(agents)):
+            tasks.append(self._get_worker_task(tmp_agent=agents[agent_index], 
+                                               input_loader_seeder=self.seeder+current_gen_n*len(agents)+agent_index, 
+                                               trial_number=self.trial_number+agent_index, eval_threshold=eval_threshold,
+                                               eval_threshold_eps_eval=eval_threshold_eps_eval))
+        
+        results = self._worker_pool.run_tasks(tasks=tasks)
+        
+        gen_best_handle = None
+        gen_best_eval = None
+        gen_best_eps_eval = None
+        for agent_index in range(len(agents)):
+            handle, payload = results[agent_index]
+            
+            agents[agent_index], is_trial_evaluated = self._apply_worker_payload(tmp_agent=agents[agent_index], payload=payload)
+            
+            if(not is_trial_evaluated):
+                continue
+            
+            tmp_agent = agents[agent_index]
+            
+            #the agents of the generation are compared on their means: the paired test is only used against the best agent.
+            if((gen_best_eval is None) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent.block_eval, 
+                                                                                 block_2_eval=gen_best_eval) == 0)):
+                gen_best_handle = handle
+                gen_best_eval = tmp_agent.block_eval
+                gen_best_eps_eval = tmp_agent.block_eps_eval
+        
+        #only the best agent of the generation may be a new best agent:
+        if(gen_best_handle is not None):
+            if((self.best_agent is None) or (self.eval_metric.which_one_is_better(block_1_eval=gen_best_eval, 
+                                                                                  block_2_eval=self.best_agent.block_eval,
+                                                                                  block_1_eps_eval=gen_best_eps_eval,
+                                                                                  block_2_eps_eval=self.best_agent.block_eps_eval) 
+                                             == 0)):
+                new_best_agent, new_best_res = self._worker_pool.fetch(handle=gen_best_handle)
+                self._save_new_best_agent(tmp_agent=new_best_agent, tmp_res=new_best_res)
+        
+        self._worker_pool.clear()
+        
+        return agents
+    
+    def _select_steady_state_parent(self, agents_population):
+        """
+        Parameters
+        ----------
+        agents_population: This is the current population of learnt agents.
+        
+        Returns
+        -------
+        selected_agent: This is the agent to mutate to obtain the next agent, according to the tuning_mode.
+        """
+        
+        if(self.tuning_mode == 'pool_elitism'):
+            sign_for_sorting = -1
+            if(self.eval_metric.which_one_is_better(0, 1) == 0):
+                sign_for_sorting = 1
+            
+            agents_evals = np.array([tmp_agent.block_eval for tmp_agent in agents_population])
+            pool_of_best_idxs = np.argsort(sign_for_sorting*agents_evals, kind='stable')[:self.pool_size]
+            
+            return agents_population[pool_of_best_idxs[self.local_prng.integers(len(pool_of_best_idxs))]]
+        
+        candidates = list(agents_population)
+        if((self.tuning_mode == 'best_performant_elitism') and (self.best_agent is not None)):
+            candidates.append(self.best_agent)
+        
+        return self._select(agents_pop=candidates)
+    
+    def _insert_in_steady_state_population(self, agents_population, tmp_agent):
+        """
+        Parameters
+        ----------
+        agents_population: This is the current population of learnt agents. It is modified in place.
+        
+        tmp_agent: This is the agent that was just learnt and evaluated.
+        
+        If the population is not full the agent is added to it, else it replaces the oldest agent (if the tuning_mode is 
+        'no_elitism') or the worst agent, if it is better than it.
+        """
+        
+        if(len(agents_population) < self.n_agents):
+            agents_population.append(tmp_agent)
+        elif(self.tuning_mode == 'no_elitism'):
+            agents_population.pop(0)
+            agents_population.append(tmp_agent)
+        else:
+            sign_for_sorting = 1
+            #if the metric needs to be minimised then the worst agent is the one with the biggest evaluation:
+            if(self.eval_metric.which_one_is_better(0, 1) == 0):
+                sign_for_sorting = -1
+            
+            agents_evals = np.array([tmp_agent.block_eval for tmp_agent in agents_population])
+            worst_agent_idx = np.argsort(sign_for_sorting*agents_evals, kind='stable')[0]
+            
+            #the worst agent is not an incumbent: the agents are compared on their means.
+            if(self.eval_metric.which_one_is_better(block_1_eval=tmp_agent.block_eval, 
+                                                    block_2_eval=agents_population[worst_agent_idx].block_eval) == 0):
+                agents_population[worst_agent_idx] = tmp_agent
+    
+    def _wait_steady_state_agents(self, pending_agents):
+        """
+        Parameters
+        ----------
+        pending_agents: This is a dictionary with the agents that are being learnt, and their tasks, indexed by the handles of 
+                        the TunerWorkerPool. It is modified in place.
+        
+        Returns
+        -------
+        finished_agents: This is a list with the agents that were learnt and evaluated. 
+        
+        This method waits until at least one worker process is done: if its agent is a new best agent then it is fetched from
+        the worker process.
+        """
+        
+        finished_agents = []
+        for handle, payload in self._worker_pool.wait_any():
+            tmp_agent, is_trial_evaluated = self._apply_worker_payload(tmp_agent=pending_agents.pop(handle)[0], 
+                                                                       payload=payload)
+            
+            if(is_trial_evaluated):
+                if((self.best_agent is None) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent.block_eval, 
+                                                                                      block_2_eval=self.best_agent.block_eval,
+                                                                                      block_1_eps_eval=tmp_agent.block_eps_eval,
+                                                                                      block_2_eps_eval=
+                                                                                      self.best_agent.block_eps_eval) 
+                                                 == 0)):
+                    new_best_agent, new_best_res = self._worker_pool.fetch(handle=handle)
+                    self._save_new_best_agent(tmp_agent=new_best_agent, tmp_res=new_best_res)
+            
+            self._worker_pool.release(handle=handle)
+            finished_agents.append(tmp_agent)
+        
+        return finished_agents
+    
+    def _get_steady_state_eval_threshold(self):
+        """
+        Returns
+        -------
+        eval_threshold: This is a dictionary with the eval_threshold and the eval_threshold_eps_eval to pass to the method
+                        _get_worker_task: these are the evaluation of the current best agent, or None if there is no best agent.
+        """
+        
+        eval_threshold = dict(eval_threshold=None, eval_threshold_eps_eval=None)
+        if((self.trial_number != 0) and (self.best_agent is not None)):
+            eval_threshold = dict(eval_threshold=self.best_agent.block_eval, 
+                                  eval_threshold_eps_eval=self.best_agent.block_eps_eval)
+        
+        return eval_threshold
+    
+    def _asynchronous_steady_state(self, train_data=None, env=None, tuner_state=None):
+        """
+        Parameters
+        ----------
+        train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
+                    BaseDataSet.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
+             
+             The default is None.
+        
+        tuner_state: This is either None or the dictionary returned by the method _load_tuner_state: in the latter case the 
+                     population and the number of learnt agents are restored from it. The agents that were being learnt when 
+                     the tuner state was written are sent again to the worker processes.
+                     
+                     The default is None.
+        
+        Returns
+        -------
+        agents_population: This is a list containing the final population of learnt agents. It is None if there was an error.
+        
+        This method runs the asynchronous steady-state genetic algorithm: a new agent is created and sent to a worker process of
+        the TunerWorkerPool as soon as a worker process is idle.
+        """
+        
+        if(self.tuning_mode not in ['no_elitism', 'best_performant_elitism', 'pool_elitism']):
+            err_msg = 'The parameter \'tuning_mode\' can only be equal to: \'no_elitism\', \'best_performant_elitism\' or'\
+                      +' \'pool_elitism\'!'
+            self.logger.error(msg=err_msg)
+            return None
+        
+        if((self.tuning_mode == 'pool_elitism') and (self.pool_size is None)):
+            err_msg = '\'pool_size\' cannot be \'None\' when \'tuning_mode\' is only be equal to \'pool_elitism\'!'
+            self.logger.error(msg=err_msg)
+            return None
+        
+        n_trials = self.n_agents*self.n_generations
+        
+        agents_population = []
+        pending_agents = {}
+        resumed_agents = []
+        n_created_agents = 0
+        n_finished_agents = 0
+        
+        #the trial_number only counts the agents that were evaluated: the tasks sent to the worker processes are numbered with a
+        #counter that is only ever increased, so that two agents never get the same number.
+        next_trial_number = self.trial_number
+        
+        if(tuner_state is not None):
+            self.logger.info(msg='Resuming from agents learnt: '+str(tuner_state['n_completed']))
+            agents_population = self._restore_agents_population(agents_states=tuner_state['agents_states'])
+            if(agents_population is None):
+                return None
+            
+            n_created_agents = tuner_state['n_completed']
+            n_finished_agents = tuner_state['n_completed']
+            
+            #the agents that were being learnt are sent again to the worker processes before creating new agents:
+            pending_tasks = tuner_state.get('pending_tasks') or []
+            pending_tmp_agents = self._restore_agents_population(agents_states=pending_tasks)
+            if(pending_tmp_agents is None):
+                return None
+            
+            resumed_agents = list(zip(pending_tmp_agents, pending_tasks))
+            n_created_agents += len(resumed_agents)
+            for task in pending_tasks:
+                next_trial_number = max(next_trial_number, task['trial_number']+1)
+        
+        while n_finished_agents < n_trials:
+            #the resumed agents are evaluated against the current best agent:
+            while((len(resumed_agents) > 0) and (len(pending_agents) < self._worker_pool.n_workers)):
+                tmp_agent, task = resumed_agents.pop(0)
+                task = self._get_worker_task(tmp_agent=tmp_agent, input_loader_seeder=task['input_loader_seeder'],
+                                             trial_number=task['trial_number'], 
+                                             **self._get_steady_state_eval_threshold())
+                pending_agents[self._worker_pool.submit(task=task)] = (tmp_agent, task)
+            
+            #as soon as there is an idle worker i create a new agent: the first n_agents are created from the block_to_opt
+            while((n_created_agents < n_trials) and (len(pending_agents) < self._worker_pool.n_workers)):
+                is_first_mutation = n_created_agents < self.n_agents
+                
+                if(is_first_mutation):
+                    selected_agent = self.block_to_opt
+                else:
+                    selected_agent = self._select_steady_state_parent(agents_population=agents_population)
+                
+                self.input_loader.set_local_prng(new_seeder=self.seeder+n_created_agents)
+                
+                dict_mutate_gather_data = dict(current_gen_n=n_created_agents // self.n_agents, 
+                                               current_gen_length=n_created_agents % self.n_agents,
+                                               tmp_agent_to_tune=selected_agent, train_data=train_data, env=env, 
+                                               first_mutation=is_first_mutation)
+                
+                tmp_agent, _, _ = self._mutate_gather_data_and_env(**dict_mutate_gather_data)
+                if(tmp_agent is None):
+                    return None
+                
+                task = self._get_worker_task(tmp_agent=tmp_agent, input_loader_seeder=self.seeder+n_created_agents,
+                                             trial_number=next_trial_number, **self._get_steady_state_eval_threshold())
+                pending_agents[self._worker_pool.submit(task=task)] = (tmp_agent, task)
+                
+                next_trial_number += 1
+                n_created_agents += 1
+            
+            n_previously_finished_agents = n_finished_agents
+            for tmp_agent in self._wait_steady_state_agents(pending_agents=pending_agents):
+                if((tmp_agent is None) or (tmp_agent.block_eval is None)):
+                    self.is_tune_successful = False
+                    self.logger.error(msg='There was an error evaluating an agent!')
+                    return None
+                
+                self._insert_in_steady_state_population(agents_population=agents_population, tmp_agent=tmp_agent)
+                n_finished_agents += 1
+            
+            #the tuner state is written each time n_agents more agents were learnt, once all the finished agents are inserted in 
+            #the population:
+            if((n_finished_agents // self.n_agents) > (n_previously_finished_agents // self.n_agents)):
+                self._save_tuner_state(agents_population=agents_population, n_completed=n_finished_agents, 
+                                       pending_tasks=[task for _, task in list(pending_agents.values())+resumed_agents])
+                
+                if(self.best_agent is not None):
+                    self.logger.info(msg='Agents learnt: '+str(n_finished_agents)+' Best agent evaluation: '
+                                         +str(self.best_agent.block_eval))
+        
+        return agents_population
+    
+    def _save_tuner_state(self, agents_population, n_completed, pending_tasks=None):
+        """
+        Parameters
+        ----------
+        agents_population: This is the current population of learnt agents.
+        
+        n_completed: This is the number of completed generations or, if asynchronous is True, the number of learnt agents.
+        
+        pending_tasks: This is either None or the list of the tasks of the agents that are being learnt by the worker processes 
+                       when asynchronous is True.
+                       
+                       The default is None.
+        
+        This method writes the tuner state file in the checkpoint_log_path: this file can be used as resume_from. Nothing is done
+        if the checkpoint_log_path is not specified.
+        """
+        
+        if(self.checkpoint_log_path is None):
+            return
+        
+        agents_states = []
+        for tmp_agent in agents_population:
+            agents_states.append(dict(params=copy.deepcopy(tmp_agent.get_params()), seeder=tmp_agent.seeder,
+                                      block_eval=tmp_agent.block_eval, obj_name=tmp_agent.obj_name, 
+                                      name_obj_logging=tmp_agent.logger.name_obj_logging))
+        
+        tuner_state = dict(tuning_mode=self.tuning_mode, n_agents=self.n_agents, asynchronous=self.asynchronous,
+                           n_completed=n_completed, agents_states=agents_states, best_agent=self.best_agent, 
+                           trial_number=self.trial_number, local_prng_state=self.local_prng.bit_generator.state,
+                           pending_tasks=pending_tasks,
+                           surrogate_features=self._surrogate_features, surrogate_targets=self._surrogate_targets)
+        
+        tuner_state_path = os.path.join(self.checkpoint_log_path, str(self.obj_name)+'_tuner_state.ckpt')
+        
+        #i first write a temporary file and then i rename it: if the tuning procedure dies while writing, the previous tuner 
+        #state file is still valid:
+        with open(tuner_state_path+'.tmp', 'wb') as state_file:
+            cloudpickle.dump(tuner_state, state_file, protocol=4)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        
+        os.replace(tuner_state_path+'.tmp', tuner_state_path)
+    
+    def _load_tuner_state(self):
+        """
+        Returns
+        -------
+        tuner_state: This is the dictionary contained in the file resume_from. The best_agent, the trial_number and the 
+                     local_prng of the tuner are restored from it.
+        """
+        
+        with open(self.resume_from, 'rb') as state_file:
+            tuner_state = cloudpickle.load(state_file)
+        
+        for tmp_key in ['tuning_mode', 'n_agents', 'asynchronous']:
+            if(tuner_state[tmp_key] != getattr(self, tmp_key)):
+                exc_msg = 'The tuner state in \''+str(self.resume_from)+'\' has \''+str(tmp_key)+'\' equal to: '\
+                          +str(tuner_state[tmp_key])+', but the tuner has: '+str(getattr(self, tmp_key))+'!'
+                self.logger.exception(msg=exc_msg)
+                raise ValueError(exc_msg)
+        
+        self.best_agent = tuner_state['best_agent']
+        self.trial_number = tuner_state['trial_number']
+        self.local_prng.bit_generator.state = tuner_state['local_prng_state']
+        
+        #tuner states written before the surrogate model was added do not contain its samples:
+        self._surrogate_features = tuner_state.get('surrogate_features', [])
+        self._surrogate_targets = tuner_state.get('surrogate_targets', [])
+        self._surrogate_model = None
+        self._n_surrogate_samples_fitted = 0
+        
+        return tuner_state
+    
+    def _restore_agents_population(self, agents_states):
+        """
+        Parameters
+        ----------
+        agents_states: This is the list of the states of the agents contained in the dictionary returned by the method 
+                       _load_tuner_state: either the population or the tasks of the agents that were being learnt.
+        
+        Returns
+        -------
+        agents_population: This is the list of agents contained in the tuner state. The agents are copies of the block_to_opt 
+                           with the hyper-parameters, the seeder and the evaluation (if any) of the agents. It is None if there
+                           was an error.
+        """
+        
+        agents_population = []
+        for agent_state in agents_states:
+            tmp_agent = copy.deepcopy(self.block_to_opt)
+            
+            if(self.verbosity < 4):
+                tmp_agent.update_verbosity(new_verbosity=0)
+            
+            #the seeder of the agent is used for seeding its children:
+            tmp_agent.set_local_prng(new_seeder=agent_state['seeder'])
+            
+            if(not tmp_agent.set_params(agent_state['params'])):
+                self.is_tune_successful = False
+                self.logger.error(msg='There was an error setting the parameters of an agent!')
+                return None
+            
+            tmp_agent.block_eval = agent_state.get('block_eval')
+            tmp_agent.obj_name = agent_state['obj_name']
+            tmp_agent.logger.name_obj_logging = agent_state['name_obj_logging']
+            
+            agents_population.append(tmp_agent)
+        
+        return agents_population
+    
+    def _get_surrogate_features(self, agent):
+        """
+        Parameters
+        ----------
+        agent: This is an object of a Class inheriting from the Class Block.
+        
+        Returns
+        -------
+        features: This is a list with the current values of the hyper-parameters to mutate of the agent: the values of the 
+                  Categorical hyper-parameters are converted to strings.
+        """
+        
+        agent_params = agent.get_params()
+        
+        features = []
+        for tmp_key in sorted(list(agent_params.keys())):
+            if(agent_params[tmp_key].to_mutate):
+                if(isinstance(agent_params[tmp_key], Categorical)):
+                    features.append(str(agent_params[tmp_key].current_actual_value))
+                else:
+                    features.append(float(agent_params[tmp_key].current_actual_value))
+        
+        return features
+    
+    def _update_surrogate_samples(self, agents):
+        """
+        Parameters
+        ----------
+        agents: This is a list of agents that were learnt and evaluated.
+        
+        This method adds the hyper-parameters and the evaluations of the agents to the samples used for fitting the surrogate
+        model. The agents whose evaluation is not finite (i.e: the method learn() raised an exception) are not added.
+        """
+        
+        for tmp_agent in agents:
+            if((tmp_agent is not None) and (tmp_agent.block_eval is not None) and np.isfinite(tmp_agent.block_eval)):
+                self._surrogate_features.append(self._get_surrogate_features(agent=tmp_agent))
+                self._surrogate_targets.append(float(tmp_agent.block_eval))
+    
+    def _screen_with_surrogate(self, candidates):
+        """
+        Parameters
+        ----------
+        candidates: This is a list of mutated agents that were not learnt yet.
+        
+        Returns
+        -------
+        selected_agents: This is a list with the n_agents candidates with the best evaluations predicted by the surrogate model.
+        
+        The surrogate model is a CatBoostRegressor fitted on the hyper-parameters and the evaluations of all the agents learnt 
+        so far. It is fitted from scratch only the first time: afterwards it is warm-started from the previous model and 
+        fitted, with fewer iterations, only on the agents learnt since the previous fit.
+        """
+        
+        candidates_features = [self._get_surrogate_features(agent=tmp_agent) for tmp_agent in candidates]
+        
+        cat_features = [i for i in range(len(candidates_features[0])) if isinstance(candidates_features[0][i], str)]
+        
+        surrogate_params = dict(learning_rate=0.05, depth=6, loss_function='RMSE', random_seed=self.seeder, 
+                                thread_count=self.n_jobs, silent=True, allow_writing_files=False)
+        
+        if(len(self._surrogate_targets) > self._n_surrogate_samples_fitted):
+            surrogate_model = None
+            
+            if(self._surrogate_model is not None):
+                surrogate_model = CatBoostRegressor(iterations=100, **surrogate_params)
+                try:
+                    surrogate_model.fit(self._surrogate_features[self._n_surrogate_samples_fitted:], 
+                                        self._surrogate_targets[self._n_surrogate_samples_fitted:], cat_features=cat_features, 
+                                        init_model=self._surrogate_model)
+                except CatBoostError:
+                    #for example if all the features of the new agents are constant: the model is fitted from scratch.
+                    surrogate_model = None
+                    
+            if(surrogate_model is None):
+                surrogate_model = CatBoostRegressor(iterations=300, **surrogate_params)
+                surrogate_model.fit(self._surrogate_features, self._surrogate_targets, cat_features=cat_features)
+            
+            self._surrogate_model = surrogate_model
+            self._n_surrogate_samples_fitted = len(self._surrogate_targets)
+        
+        predicted_evals = self._surrogate_model.predict(candidates_features)
+        
+        sign_for_sorting = -1
+        #if the metric needs to be minimised then i want the smallest predicted evaluations:
+        if(self.eval_metric.which_one_is_better(0, 1) == 0):
+            sign_for_sorting = 1
+        
+        best_idxs = np.argsort(sign_for_sorting*np.array(predicted_evals), kind='stable')[:self.n_agents]
+        
+        self.logger.info(msg='Surrogate model best predicted evaluation: '+str(predicted_evals[best_idxs[0]]))
+        
+        return [candidates[i] for i in best_idxs]
+    
+    def _create_next_generation(self, parents, current_gen_n, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        parents: This is a list of n_agents agents selected from the previous generation.
+        
+        current_gen_n: This is an integer representing the number of the current generation.
+        
+        train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
+                    BaseDataSet.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
+             
+             The default is None.
+        
+        Returns
+        -------
+        agents: This is a list with the n_agents mutated agents of the current generation.
+        
+        datas: This is a list with the train_data of each agent.
+        
+        envs: This is a list with the env of each agent.
+        
+        If n_screening_candidates is not None then n_screening_candidates mutated agents are created, cycling over the parents,
+        and only the n_agents with the best evaluations predicted by the surrogate model are kept.
+        """
+        
+        n_candidates = self.n_agents
+        is_screening = (self.n_screening_candidates is not None) and (len(self._surrogate_targets) > 1)
+        if(is_screening):
+            n_candidates = self.n_screening_candidates
+        
+        agents=[]
+        datas=[]
+        envs=[]
+        for n_agent_current_gen in range(n_candidates): 
+            dict_mutate_gather_data = dict(current_gen_n=current_gen_n, current_gen_length=n_agent_current_gen,
+                                           tmp_agent_to_tune=parents[n_agent_current_gen % len(parents)],
+                                           train_data=train_data, env=env, first_mutation=False, 
+                                           gather_data=not is_screening)
+            
+            tmp_agent, tmp_agent_train_data, tmp_agent_env = self._mutate_gather_data_and_env(**dict_mutate_gather_data)
+            agents.append(tmp_agent)
+            datas.append(tmp_agent_train_data)
+            envs.append(tmp_agent_env)
+        
+        if(is_screening):
+            if(any([tmp_agent is None for tmp_agent in agents])):
+                return agents, datas, envs
+            
+            agents = self._screen_with_surrogate(candidates=agents)
+            
+            #the input is only gathered for the agents that are going to be learnt:
+            datas = [None]*len(agents)
+            envs = [None]*len(agents)
+            if(self._worker_pool is None):
+                for i in range(len(agents)):
+                    datas[i], envs[i] = self._get_agent_data(current_agent=agents[i], train_data=train_data, env=env)
+        
+        return agents, datas, envs
+    
+    def _learn_and_evaluate_a_generation(self, agents, datas, envs, current_gen_n):
+        """
+        Parameters
+        ----------
+        agents: This is a list of mutated agents, namely of objects inheriting from the Class Block.
+        
+        datas: This is a list with the selected train_data of each agent.
+        
+        envs: This is a list with the selected env of each agent.
+        
+        current_gen_n: This is an integer representing the number of the current generation.
+        
+        Returns
+        -------
+        parallel_agents_res: This is the list of agents with their evaluation inside the member block_eval.
+        """
+        
+        if(self._worker_pool is not None):
+            parallel_agents_res = self._learn_and_evaluate_on_worker_pool(agents=agents, current_gen_n=current_gen_n)
         else:
-            tmp_agent_eval = self._evaluate(agent_res=tmp_res, agent=tmp_agent, train_data=tmp_agent_train_data, 
-                                            env=tmp_agent_env)    
-            tmp_agent.block_eval = tmp_agent_eval
+            parallel_agents_res = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
             
-            if(((self.trial_number % self.output_save_periodicity) == 0) and (self.trial_number != 0)):
-                self.logger.debug(msg='Agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
-                tmp_agent.save()
-                tmp_res.save()
-                
-            #save all new best agents:
-            if((self.trial_number == 0) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent.block_eval, 
-                                                                                 block_2_eval=self.best_agent.block_eval) == 0)):
-                self.best_agent = tmp_agent
-                
-                self.logger.info(msg='New best agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent.block_eval))
-                
-                tmp_agent.obj_name += '_new_best'
-                tmp_res.obj_name += '_new_best'
+            parallel_agents_res = parallel_agents_res(delayed(self._learn_and_evaluate)(agents[agent_index],
+                                                                                        datas[agent_index],
+                                                                                        envs[agent_index]) 
+                                                      for agent_index in range(len(agents)))
         
-                tmp_agent.save()
-                tmp_res.save()
-            
-            self.trial_number += 1
-            
-            return tmp_agent
+        if(self.n_screening_candidates is not None):
+            self._update_surrogate_samples(agents=parallel_agents_res)
         
-    def _no_elitism_or_best_performant_elitism_common(self, agents_population, preserve_best_agent, train_data=None, env=None):   
+        return parallel_agents_res
+    
+    def _no_elitism_or_best_performant_elitism_common(self, agents_population, preserve_best_agent, train_data=None, env=None,
+                                                      starting_gen_index=0):   
         """
         Parameters
         ----------
         agents_population: This is a list containing the first generation of learnt agents.
-            
+        
         preserve_best_agent: This is True if tuning_mode is equal to 'best_performant_elitism', else it is False.
-            
+        
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                                        
+                    
                     The default is None.
-            
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
-                                
+             
              The default is None.
-            
+        
+        starting_gen_index: This is the index of the first generation to create: it is greater than 0 when the tuning procedure 
+                            is resumed from a tuner state.
+                            
+                            The default is 0.
+        
         Returns
         -------
         agents_population: This is a list containing the last generation of learnt agents.
         """
-                        
-        for gen_index in range(self.n_generations-1):
+        
+        for gen_index in range(starting_gen_index, self.n_generations-1):
             self.logger.info(msg='Generation: '+str(gen_index+1))
             
             new_agents_population = []
             
             self.input_loader.set_local_prng(new_seeder=self.seeder+gen_index)
-                        
+            
             tmp_new_agents_population = []
             
             while len(tmp_new_agents_population) < self.n_agents:
@@ -343,33 +1267,19 @@ class TunerGenetic(Tuner):
                     #if the new generation is not emepty i already copied the best agent and so i pick a new one with 
                     #self.select(). I deepcopy the agents_population since I do not want to destroy it with self.select()
                     selected_agent = self._select(agents_pop=copy.deepcopy(agents_population))
-                 
+                
                 tmp_new_agents_population.append(selected_agent)   
             
-            agents=[]
-            datas=[]
-            envs=[]
-            for n_agent_current_gen in range(self.n_agents): 
-                dict_mutate_gather_data = dict(current_gen_n=gen_index+1, current_gen_length=n_agent_current_gen,
-                                               tmp_agent_to_tune=tmp_new_agents_population[n_agent_current_gen],
-                                               train_data=train_data, env=env, first_mutation=False)
-                
-                tmp_agent, tmp_agent_train_data, tmp_agent_env = self._mutate_gather_data_and_env(**dict_mutate_gather_data)
-                agents.append(tmp_agent)
-                datas.append(tmp_agent_train_data)
-                envs.append(tmp_agent_env)
-                 
-            parallel_agents_res = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
+            agents, datas, envs = self._create_next_generation(parents=tmp_new_agents_population, current_gen_n=gen_index+1,
+                                                               train_data=train_data, env=env)
             
-            parallel_agents_res = parallel_agents_res(delayed(self._learn_and_evaluate)(agents[agent_index],
-                                                                                        datas[agent_index],
-                                                                                        envs[agent_index]) 
-                                                      for agent_index in range(self.n_agents))          
+            parallel_agents_res = self._learn_and_evaluate_a_generation(agents=agents, datas=datas, envs=envs, 
+                                                                        current_gen_n=gen_index+1)
             
             #If preserve_best_agent is True I need to pass on the best agent overall
             if(preserve_best_agent):
                 new_agents_population.append(self.best_agent)
-                
+            
             for tmp_agent in parallel_agents_res:
                  if(tmp_agent is not None):
                      new_agents_population.append(tmp_agent)
@@ -377,26 +1287,33 @@ class TunerGenetic(Tuner):
                      self.is_tune_successful = False
                      self.logger.error(msg='There was an error in the \'_common_tuning_step\' method for an agent!')
                      return None
-             
+            
             agents_population = new_agents_population
+            
+            self._save_tuner_state(agents_population=agents_population, n_completed=gen_index+2)
         
         return agents_population
-        
-    def _no_elitism(self, agents_population, train_data=None, env=None):   
+    
+    def _no_elitism(self, agents_population, train_data=None, env=None, starting_gen_index=0):   
         """
         Parameters
         ----------
         agents_population: This is a list containing the first generation of learnt agents.
-                        
+        
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                                        
+                    
                     The default is None.
-            
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
-                                
+             
              The default is None.
-            
+        
+        starting_gen_index: This is the index of the first generation to create: it is greater than 0 when the tuning procedure 
+                            is resumed from a tuner state.
+                            
+                            The default is 0.
+        
         Returns
         -------
         agents_population: This is a list containing the last generation of learnt agents.
@@ -404,25 +1321,30 @@ class TunerGenetic(Tuner):
         
         agents_population = self._no_elitism_or_best_performant_elitism_common(agents_population=agents_population, 
                                                                                preserve_best_agent=False, train_data=train_data, 
-                                                                               env=env)
+                                                                               env=env, starting_gen_index=starting_gen_index)
         
         return agents_population
-            
-    def _best_performant_elitism(self, agents_population, train_data=None, env=None):
+    
+    def _best_performant_elitism(self, agents_population, train_data=None, env=None, starting_gen_index=0):
         """
         Parameters
         ----------
         agents_population: This is a list containing the first generation of learnt agents.
-                        
+        
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                                        
+                    
                     The default is None.
-            
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
-                                
+             
              The default is None.
-            
+        
+        starting_gen_index: This is the index of the first generation to create: it is greater than 0 when the tuning procedure 
+                            is resumed from a tuner state.
+                            
+                            The default is 0.
+        
         Returns
         -------
         agents_population: This is a list containing the last generation of learnt agents.
@@ -430,25 +1352,30 @@ class TunerGenetic(Tuner):
         
         agents_population = self._no_elitism_or_best_performant_elitism_common(agents_population=agents_population,  
                                                                                preserve_best_agent=True, train_data=train_data, 
-                                                                               env=env)
-                                            
-        return agents_population
+                                                                               env=env, starting_gen_index=starting_gen_index)
         
-    def _pool_elitism(self, agents_population, train_data=None, env=None):
+        return agents_population
+    
+    def _pool_elitism(self, agents_population, train_data=None, env=None, starting_gen_index=0):
         """
         Parameters
         ----------
         agents_population: This is a list containing the first generation of learnt agents.
-                        
+        
         train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
                     BaseDataSet.
-                                        
+                    
                     The default is None.
-            
+        
         env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
-                                
+             
              The default is None.
-            
+        
+        starting_gen_index: This is the index of the first generation to create: it is greater than 0 when the tuning procedure 
+                            is resumed from a tuner state.
+                            
+                            The default is 0.
+        
         Returns
         -------
         population_pool_of_best: This is a list containing the last generation of learnt agents.
@@ -473,40 +1400,26 @@ class TunerGenetic(Tuner):
         idxs = [int(elem_idxs) for elem_idxs in idxs]
         population_pool_of_best = list(np.array(agents_population)[idxs])
         
-        for gen_index in range(self.n_generations-1):
+        for gen_index in range(starting_gen_index, self.n_generations-1):
             self.logger.info(msg='Generation: '+str(gen_index+1))
             
             new_agents_population = []
             
             self.input_loader.set_local_prng(new_seeder=self.seeder+gen_index)
-                        
+            
             tmp_new_agents_population = []
             
             for i in range(len(population_pool_of_best)):
                 for j in range(int(self.n_agents/self.pool_size)):
                     tmp_new_agents_population.append(population_pool_of_best[i])
             
-            agents=[]
-            datas=[]
-            envs=[]
-            for n_agent_current_gen in range(self.n_agents): 
-                dict_mutate_gather_data = dict(current_gen_n=gen_index+1, current_gen_length=n_agent_current_gen,
-                                               tmp_agent_to_tune=tmp_new_agents_population[n_agent_current_gen],
-                                               train_data=train_data, env=env, first_mutation=False)
-                
-                tmp_agent, tmp_agent_train_data, tmp_agent_env = self._mutate_gather_data_and_env(**dict_mutate_gather_data)
-                agents.append(tmp_agent)
-                datas.append(tmp_agent_train_data)
-                envs.append(tmp_agent_env)
-                 
-                 
-            parallel_agents_res = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
+            agents, datas, envs = self._create_next_generation(parents=tmp_new_agents_population, current_gen_n=gen_index+1,
+                                                               train_data=train_data, env=env)
+            
+            
+            parallel_agents_res = self._learn_and_evaluate_a_generation(agents=agents, datas=datas, envs=envs, 
+                                                                        current_gen_n=gen_index+1)
             
-            parallel_agents_res = parallel_agents_res(delayed(self._learn_and_evaluate)(agents[agent_index],
-                                                                                        datas[agent_index],
-                                                                                        envs[agent_index]) 
-                                                      for agent_index in range(self.n_agents))          
-                 
             for tmp_agent in parallel_agents_res:
                  if(tmp_agent is not None):
                      new_agents_population.append(tmp_agent)
@@ -514,17 +1427,19 @@ class TunerGenetic(Tuner):
                      self.is_tune_successful = False
                      self.logger.error(msg='There was an error in the \'_common_tuning_step\' method for an agent!')
                      return None
-             
+            
             agents_population = new_agents_population
             
+            self._save_tuner_state(agents_population=agents_population, n_completed=gen_index+2)
+            
             population_pool_of_best = []
             ag_rews = []
-        
+            
             for tmp_agent in agents_population:
                 ag_rews.append([tmp_agent.block_eval, len(ag_rews)])
-        
+            
             ag_rews = np.sort(ag_rews, axis=0)
-        
+            
             idxs = []
             
             if(self.eval_metric.which_one_is_better(0, 1) == 0):
@@ -533,10 +1448,10 @@ class TunerGenetic(Tuner):
             else:
                 for i in range(len(ag_rews)-self.pool_size, len(ag_rews)):
                     idxs.append(ag_rews[i][1])
-               
+            
             #numpy array indices cannot be floats:
             idxs = [int(elem_idxs) for elem_idxs in idxs]
-
+            
             population_pool_of_best = list(np.array(agents_population)[idxs])
         
         return population_pool_of_best
@@ -546,24 +1461,24 @@ class TunerGenetic(Tuner):
         Parameters
         ----------        
         train_data: This is the dataset that can be used by the Tuner. 
-                            
+                    
                     It must be an object of a Class inheriting from BaseDataSet.
         
         env: This is the environment that can be used by the Tuner.
-        
+             
              It must be an object of a Class inheriting from BaseEnvironment.
-
+        
         Returns
         -------
         best_agent: This is the tuned agent: the original agent but with the tuned hyper-parameters.
         
         best_agent_eval: This is the evaluation of the best tuned agent, according to the eval_metric of the Tuner.
         """
- 
+        
         #checks if self.block_to_opt.is_parametrised == True and re-sets is_tune_successful to False. Also checks for the
         #consistency between the metric and the input_loader.
         tmp_out = super().tune(train_data=train_data, env=env)
-
+        
         #super().tune() may return best_agent, best_agent_eval or None: If nothing went wrong and we can continue super().tune()
         #returns None, and hence in tmp_out we will have None:
         if(tmp_out is not None):
@@ -571,21 +1486,71 @@ class TunerGenetic(Tuner):
         
         #if we are here it means tmp_out is None, and hence we need to proceed with the tuning procedure:
         
-        #learn the starting agent to understand how good the tuning is:
-        starting_res = self.block_to_opt.learn(train_data=train_data, env=env) 
-       
-        starting_eval = self._evaluate(agent_res=starting_res, agent=self.block_to_opt, train_data=train_data, env=env)
-        
-        self.logger.info(msg='The provided \'block_to_opt\' has a starting evaluation equal to: '+str(starting_eval))
+        #the starting agent is not compared with anything:
+        self.eval_metric.set_eval_threshold(eval_threshold=None)
         
         #i want to save the best agent that i have ever created across all generations:
         self.best_agent = None    
+        
+        self._surrogate_features = []
+        self._surrogate_targets = []
+        self._surrogate_model = None
+        self._n_surrogate_samples_fitted = 0
+        
+        tuner_state = None
+        if(self.resume_from is not None):
+            #the best agent, the trial_number and the local_prng are restored from the tuner state:
+            tuner_state = self._load_tuner_state()
             
+            #the records of the trials done before the tuning procedure was stopped are in the folder of the tuner state. There
+            #is no results_index if the checkpoint_log_path is not specified:
+            previous_index_path = os.path.join(os.path.dirname(os.path.abspath(self.resume_from)), 'results_index.jsonl')
+            if((self.results_index is not None) and os.path.isfile(previous_index_path)):
+                self.results_index.copy_trials_from(other_index_path=previous_index_path)
+        else:
+            #learn the starting agent to understand how good the tuning is:
+            starting_res = self.block_to_opt.learn(train_data=train_data, env=env) 
+            
+            starting_eval = self._evaluate(agent_res=starting_res, agent=self.block_to_opt, train_data=train_data, env=env)
+            
+            self.logger.info(msg='The provided \'block_to_opt\' has a starting evaluation equal to: '+str(starting_eval))
+        
+        #the persistent worker processes get a copy of this tuner, of the train_data and of the env only once:
+        if((self.persistent_workers or self.asynchronous) and (self.n_jobs > 1)):
+            self._worker_pool = TunerWorkerPool(obj_name=str(self.obj_name)+'_worker_pool', tuner=self, train_data=train_data,
+                                                env=env, n_workers=self.n_jobs, seeder=self.seeder, log_mode=self.log_mode, 
+                                                checkpoint_log_path=self.checkpoint_log_path, verbosity=self.verbosity)
+        
+        try:
+            return self._tune_generations(train_data=train_data, env=env, tuner_state=tuner_state)
+        finally:
+            if(self._worker_pool is not None):
+                self._worker_pool.close()
+                self._worker_pool = None
+    
+    def _learn_first_generation(self, train_data=None, env=None):
+        """
+        Parameters
+        ----------        
+        train_data: This is the train_data that entered the tuner. It must be an object of a Class inheriting from the Class 
+                    BaseDataSet.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner. It must be an object of a Class inheriting from the Class BaseEnvironment.
+             
+             The default is None.
+        
+        Returns
+        -------
+        agents_population: This is a list containing the first generation of learnt agents. It is None if there was an error.
+        """
+        
         self.logger.info(msg='Generation: '+str(0))
         
         #create and initialise base population of agnets: first generation   
         agents_population = [] 
-
+        
         agents=[]
         datas=[]
         envs=[]
@@ -598,33 +1563,82 @@ class TunerGenetic(Tuner):
             tmp_agent, tmp_agent_train_data, tmp_agent_env  = self._mutate_gather_data_and_env(**dict_mutate_gather_data)
             if(tmp_agent is None):
                 self.is_tune_successful = False
-                return None, None
+                return None
             else:
                 agents.append(tmp_agent)
                 datas.append(tmp_agent_train_data)
                 envs.append(tmp_agent_env)
-                
-        parallel_agents_res = Parallel(n_jobs=self.n_jobs, backend=self.backend, verbose=0, prefer=self.prefer)
         
-        parallel_agents_res = parallel_agents_res(delayed(self._learn_and_evaluate)(agents[agent_index], datas[agent_index], 
-                                                                                    envs[agent_index])
-                                                  for agent_index in range(self.n_agents))
+        parallel_agents_res = self._learn_and_evaluate_a_generation(agents=agents, datas=datas, envs=envs, current_gen_n=0)
         
         for tmp_agent in parallel_agents_res:
-            if(tmp_agent.block_eval is not None):
+            if((tmp_agent is not None) and (tmp_agent.block_eval is not None)):
                 agents_population.append(tmp_agent)
             else:
                 self.is_tune_successful = False
                 self.logger.error(msg='There was an error evaluating an agent!')
+                return None
+        
+        self._save_tuner_state(agents_population=agents_population, n_completed=1)
+        
+        return agents_population
+    
+    def _tune_generations(self, train_data=None, env=None, tuner_state=None):
+        """
+        Parameters
+        ----------        
+        train_data: This is the dataset that can be used by the Tuner. 
+                    
+                    It must be an object of a Class inheriting from BaseDataSet.
+        
+        env: This is the environment that can be used by the Tuner.
+             
+             It must be an object of a Class inheriting from BaseEnvironment.
+        
+        tuner_state: This is either None or the dictionary returned by the method _load_tuner_state: in the latter case the 
+                     tuning procedure is resumed from it.
+                     
+                     The default is None.
+        
+        Returns
+        -------
+        best_agent: This is the tuned agent: the original agent but with the tuned hyper-parameters.
+        
+        best_agent_eval: This is the evaluation of the best tuned agent, according to the eval_metric of the Tuner.
+        
+        This method runs all the generations of the genetic algorithm.
+        """
+        
+        if(self.asynchronous):
+            tuner_final_pop = self._asynchronous_steady_state(train_data=train_data, env=env, tuner_state=tuner_state)
+            if(tuner_final_pop is None):
+                self.is_tune_successful = False
                 return None, None
+            
+            return self._conclude_tuning(tuner_final_pop=tuner_final_pop)
+        
+        if(tuner_state is None):
+            agents_population = self._learn_first_generation(train_data=train_data, env=env)
+            starting_gen_index = 0
+        else:
+            self.logger.info(msg='Resuming from generation: '+str(tuner_state['n_completed']))
+            agents_population = self._restore_agents_population(agents_states=tuner_state['agents_states'])
+            starting_gen_index = tuner_state['n_completed']-1
+        
+        if(agents_population is None):
+            self.is_tune_successful = False
+            return None, None
         
         if(self.tuning_mode == 'no_elitism'):
-            tuner_final_pop = self._no_elitism(agents_population=agents_population, train_data=train_data, env=env)
+            tuner_final_pop = self._no_elitism(agents_population=agents_population, train_data=train_data, env=env,
+                                               starting_gen_index=starting_gen_index)
         elif(self.tuning_mode == 'best_performant_elitism'):
-            tuner_final_pop = self._best_performant_elitism(agents_population=agents_population, train_data=train_data, env=env)
+            tuner_final_pop = self._best_performant_elitism(agents_population=agents_population, train_data=train_data, env=env,
+                                                            starting_gen_index=starting_gen_index)
         elif(self.tuning_mode == 'pool_elitism'):
             if(self.pool_size is not None):
-                tuner_final_pop = self._pool_elitism(agents_population=agents_population, train_data=train_data, env=env)
+                tuner_final_pop = self._pool_elitism(agents_population=agents_population, train_data=train_data, env=env,
+                                                     starting_gen_index=starting_gen_index)
             else:
                 self.is_tune_successful = False
                 err_msg = '\'pool_size\' cannot be \'None\' when \'tuning_mode\' is only be equal to \'pool_elitism\'!'
@@ -636,11 +1650,26 @@ class TunerGenetic(Tuner):
                       +' \'pool_elitism\'!'
             self.logger.error(msg=err_msg)
             return None, None
-            
+        
+        return self._conclude_tuning(tuner_final_pop=tuner_final_pop)
+    
+    def _conclude_tuning(self, tuner_final_pop):
+        """
+        Parameters
+        ----------
+        tuner_final_pop: This is a list containing the last generation of learnt agents.
+        
+        Returns
+        -------
+        best_agent: This is the tuned agent: the original agent but with the tuned hyper-parameters.
+        
+        best_agent_eval: This is the evaluation of the best tuned agent, according to the eval_metric of the Tuner.
+        """
+        
         last_gen_best_agent, last_gen_best_agent_eval = self._evaluate_a_generation(gen=tuner_final_pop)
         log_msg = 'Last generation best agent evaluation: '+str(last_gen_best_agent.block_eval)
         self.logger.info(msg=log_msg)
-                     
+        
         self.logger.info(msg='Best agent evaluation: '+str(self.best_agent.block_eval))
         
         self.best_agent.obj_name = 'best_agent_' + self.best_agent.obj_name
@@ -656,17 +1685,17 @@ class TunerGenetic(Tuner):
         self.is_tune_successful = True
         
         return best_agent, best_agent_eval
-                        
+    
     def _mutate(self, agent, first_mutation=False):
         """
         Parameters
         ----------
         agent: This is the agent that we need to mutate. It is an object of a Class inheriting from the Class Block.
-
-        first_mutation: This is True if this is the first generation, else it is False.
         
+        first_mutation: This is True if this is the first generation, else it is False.
+                        
                         The default is False.
-
+        
         Returns
         -------
         agent: This is the mutated agent. It is an object of a Class inheriting from the Class Block.
@@ -679,21 +1708,21 @@ class TunerGenetic(Tuner):
             self.is_tune_successful = False
             self.logger.error(msg='The method \'get_params\' of an agent returned \'None\'!')
             return None
-            
+        
         rolling_seed = 0
         for key_hyper_params in list(agent_params.keys()):
             #update hyperparameter seeds (otherwise they are the same for all agents and we would get the same result):
             rolling_seed += 1
             agent_params[key_hyper_params].set_local_prng(new_seeder=agent.seeder+rolling_seed)
-                
+            
             if(agent_params[key_hyper_params].to_mutate):        
                 #we perform a mutation only with probability: prob_point_mutation
                 if(agent.local_prng.uniform() < self.prob_point_mutation):
                     agent_params[key_hyper_params].mutate(first_mutation=first_mutation)
-
+        
         #now call agent.set_params(). It sets new params and returns True if everything was alright, False otherwise:
         is_set_param_successful = agent.set_params(agent_params) 
-                
+        
         if(not is_set_param_successful):
             self.is_tune_successful = False
             self.logger.error(msg='There was an error setting the parameters of an agent!')
@@ -707,32 +1736,32 @@ class TunerGenetic(Tuner):
         ----------
         agent_res: This is the output of the method learn() of the agent that we need to evaluate. It is an object of Class 
                    BlockOutput.
-            
+        
         agent: This is the agent that we need to evaluate. It is an object of a Class inheriting from the Class Block.
-                
+               
                The default is None.
         
         train_data: This is the selected train_data for the agent_res. It is an object of a Class inheriting from the Class
                     BaseDataSet.
                     
                     The default is None.
-                    
-        env: This is the selected env for the agent_res. It is an object of a Class inheriting from the Class BaseEnvironment.
         
+        env: This is the selected env for the agent_res. It is an object of a Class inheriting from the Class BaseEnvironment.
+             
              The default is None.
-            
+        
         Returns
         -------
         tmp_single_agent_eval: This is a float and it represents the evaluation of the agent according to the eval_metric.
-          
+        
         This method evaluates a single agent by calling the evaluate method of the evaluation metric of the Tuner onto the agent.
         """
-
+        
         if((train_data is None) and (env is None)):
             exc_msg = 'In \'self.evaluate\' of \'TunerGenetic\' \'train_data\' and \'env\' are both  \'None\'!'
             self.logger.exception(msg=exc_msg)
             raise ValueError(exc_msg)
-            
+        
         #if we need to evaluate a RLPipeline block we need to use as input to the evaluation the train_data and the env created
         #by the various blocks making up the pipeline. For example if we have a FeaturEngineering block and then a 
         #ModelGeneration block we need to use the environment modified by the FeatureEngineering block in evaluating the 
@@ -745,19 +1774,19 @@ class TunerGenetic(Tuner):
                 env = agent_res.env
         
         tmp_single_agent_eval, _, _, _, _ = self.eval_metric.evaluate(block_res=agent_res, block=agent, train_data=train_data, env=env)
-                
+        
         return tmp_single_agent_eval
-                
+    
     def _select(self, agents_pop):
         """
         Parameters
         ----------
         agents_pop: This is a list of agents, namely of objects inheriting from the Class Block.
-            
+        
         Returns
         -------
         selected_ag: This is the selected agent. It is an object of a Class inheriting from the Class Block.
-            
+        
         This method selects an agent from the current population: this agent will be passed onto the next generation.
         """
         
@@ -773,20 +1802,20 @@ class TunerGenetic(Tuner):
         selected_ag = agent_to_pass_on[0]
         
         return selected_ag
-
+    
     def _evaluate_a_generation(self, gen):
         """
         Parameters
         ----------
         gen: This is a list of agents, namely of objects inheriting from the Class Block.
-
+        
         Returns
         -------
         best_agent: This is the best agent in the gen. It is an object of a Class inheriting from the Class Block.
-            
+        
         best_agent_eval: This is the evaluation of the best agent in the gen. It is a float.
         """
-
+        
         if(gen is None):
             self.is_tune_successful = False
             exc_msg = '\'gen\' cannot be \'None\'!'
@@ -799,15 +1828,15 @@ class TunerGenetic(Tuner):
         agents_list_of_evaluations = []
         for tmp_agent in gen:
             agents_list_of_evaluations.append(tmp_agent.block_eval)
-            
+        
         sign_for_sorting = -1
         #if the metric needs to be minimised then i want the agent with the smallest evaluation:
         if(self.eval_metric.which_one_is_better(0, 1) == 0):
             sign_for_sorting = 1
-                    
+        
         best_agent_idx = np.argsort(sign_for_sorting*np.array(agents_list_of_evaluations))[0]
         
         best_agent = gen[best_agent_idx]
         best_agent_eval = best_agent.block_eval
-                        
+        
         return best_agent, best_agent_eval
\ No newline at end of file
@@ -0,0 +1,759 @@
+"""
+This module contains the implementation of the Class: TunerHyperband.
+
+The Class TunerHyperband inherits from the Class Tuner.
+"""
+
+import copy
+import time
+import numpy as np
+
+from ARLO.tuner.tuner import Tuner
+from ARLO.tuner.tuner_worker_pool import TunerWorkerPool
+from ARLO.rl_pipeline.rl_pipeline import RLPipeline
+from ARLO.block.model_generation import ModelGeneration
+
+
+class TunerHyperband(Tuner):
+    """
+    This Class implements multi-fidelity tuners: successive halving, Hyperband and ASHA (asynchronous successive halving).
+    cf. https://arxiv.org/abs/1502.07943
+    cf. https://arxiv.org/abs/1603.06560
+    cf. https://arxiv.org/abs/1810.05934
+    
+    The configurations of the hyper-parameters are sampled uniformly at random and they are first learnt and evaluated with a
+    small budget: only the best 1/reduction_factor of them are then learnt and evaluated again with a budget reduction_factor
+    times bigger, and so on up to max_fidelity. The budget (fidelity) is either a hyper-parameter of block_to_opt (for example
+    the number of epochs or the number of training samples) or a member of eval_metric (for example the number of episodes used
+    in the evaluation).
+    
+    Note that when a configuration is promoted to a bigger budget the agent is learnt again from scratch.
+    
+    This Class inherits from the Class Tuner.
+    """
+    
+    def __init__(self, block_to_opt, eval_metric, input_loader, obj_name, fidelity_name, min_fidelity, max_fidelity,
+                 reduction_factor=3, mode='hyperband', n_configurations=None, create_explanatory_heatmap=False, seeder=2,
+                 log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process',
+                 output_save_periodicity=25):
+        """
+        Parameters
+        ----------
+        fidelity_name: This is a string: it is either the name of an hyper-parameter of block_to_opt or the name of a member of
+                       eval_metric. This is the resource that is increased for the most promising configurations.
+        
+        min_fidelity: This is the smallest budget, namely the value of the fidelity used for the first evaluation of each
+                      configuration.
+        
+        max_fidelity: This is the biggest budget. If both min_fidelity and max_fidelity are integers then all the budgets are
+                      rounded to integers.
+        
+        reduction_factor: This is an integer greater than or equal to 2: only the best 1/reduction_factor configurations evaluated
+                          with a certain budget are evaluated with a budget reduction_factor times bigger.
+                          
+                          The default is 3.
+        
+        mode: This is a string and it can be: 'successive_halving', 'hyperband' or 'asha'.
+              
+              If 'successive_halving' then n_configurations configurations are evaluated with the budgets:
+              max_fidelity*reduction_factor^(-s_max), ..., max_fidelity/reduction_factor, max_fidelity, where s_max is the
+              biggest integer such that the smallest budget is not smaller than min_fidelity.
+              
+              If 'hyperband' then successive halving is run s_max+1 times (brackets), each time with a different trade-off
+              between the number of configurations and the smallest budget.
+              
+              If 'asha' then the budgets are the ones of successive_halving, but as soon as a worker is idle it either promotes
+              a configuration that is in the best 1/reduction_factor of its budget, or it evaluates a new configuration with the
+              smallest budget: no worker waits for all the configurations of a budget to be evaluated.
+              
+              The default is 'hyperband'.
+        
+        n_configurations: This is the number of configurations that are sampled in mode 'successive_halving' and 'asha'. If None
+                          it is equal to reduction_factor^s_max. It is not used in mode 'hyperband'.
+                          
+                          The default is None.
+        
+        Non-Parameters Members
+        ----------------------
+        is_fidelity_in_metric: This is True if fidelity_name is a member of eval_metric, and it is False if it is an
+                               hyper-parameter of block_to_opt.
+        
+        s_max: This is the number of times the budget can be increased, starting from min_fidelity, without going over
+               max_fidelity.
+        
+        trial_number: This is an integer used for keeping track of how many trials are being done.
+        
+        best_agent: This is the best agent found so far: agents evaluated with a bigger budget are preferred over the agents
+                    evaluated with a smaller budget.
+        
+        best_agent_fidelity: This is the budget with which the best_agent was evaluated.
+        
+        evaluations: This is a list of tuples (configuration index, fidelity, evaluation) containing all the evaluations done.
+        
+        The other parameters and non-parameters members are described in the Class Tuner.
+        """
+        
+        super().__init__(block_to_opt=block_to_opt, eval_metric=eval_metric, input_loader=input_loader, obj_name=obj_name,
+                         create_explanatory_heatmap=create_explanatory_heatmap, seeder=seeder, log_mode=log_mode,
+                         checkpoint_log_path=checkpoint_log_path, verbosity=verbosity, n_jobs=n_jobs, job_type=job_type,
+                         output_save_periodicity=output_save_periodicity)
+        
+        self.fidelity_name = fidelity_name
+        
+        block_params = self.block_to_opt.get_params()
+        if((block_params is not None) and (self.fidelity_name in block_params)):
+            self.is_fidelity_in_metric = False
+        elif(hasattr(self.eval_metric, self.fidelity_name)):
+            self.is_fidelity_in_metric = True
+        else:
+            exc_msg = '\'fidelity_name\' must be the name of an hyper-parameter of \'block_to_opt\' or of a member of'\
+                      +' \'eval_metric\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.min_fidelity = min_fidelity
+        self.max_fidelity = max_fidelity
+        if((self.min_fidelity <= 0) or (self.max_fidelity < self.min_fidelity)):
+            exc_msg = '\'min_fidelity\' must be greater than zero and not greater than \'max_fidelity\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.reduction_factor = reduction_factor
+        if((not isinstance(self.reduction_factor, (int, np.integer))) or (self.reduction_factor < 2)):
+            exc_msg = '\'reduction_factor\' must be an integer greater than or equal to 2!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.mode = mode
+        if(self.mode not in ['successive_halving', 'hyperband', 'asha']):
+            exc_msg = '\'mode\' can only be: \'successive_halving\', \'hyperband\' or \'asha\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        #i add a small tolerance for the floating point errors of the logarithm:
+        self.s_max = int(np.floor(np.log(self.max_fidelity/self.min_fidelity)/np.log(self.reduction_factor) + 1e-9))
+        
+        self.n_configurations = n_configurations
+        if(self.n_configurations is None):
+            self.n_configurations = self.reduction_factor**self.s_max
+        if(self.n_configurations < 1):
+            exc_msg = '\'n_configurations\' must be greater than or equal to 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.trial_number = 0
+        self.best_agent = None
+        self.best_agent_fidelity = None
+        self.evaluations = []
+        
+        #this is the pool of persistent worker processes: it only exists within a call of the method tune.
+        self._worker_pool = None
+    
+    def __repr__(self):
+         return 'TunerHyperband('+'block_to_opt='+str(self.block_to_opt)+', eval_metric='+str(self.eval_metric)\
+                +', input_loader='+str(self.input_loader)+', obj_name='+str(self.obj_name)\
+                +', fidelity_name='+str(self.fidelity_name)+', min_fidelity='+str(self.min_fidelity)\
+                +', max_fidelity='+str(self.max_fidelity)+', reduction_factor='+str(self.reduction_factor)\
+                +', mode='+str(self.mode)+', n_configurations='+str(self.n_configurations)\
+                +', create_explanatory_heatmap='+str(self.create_explanatory_heatmap)+', seeder='+str(self.seeder)\
+                +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+                +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+                +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
+                +', output_save_periodicity='+str(self.output_save_periodicity)\
+                +', is_fidelity_in_metric='+str(self.is_fidelity_in_metric)+', s_max='+str(self.s_max)\
+                +', trial_number='+str(self.trial_number)+', best_agent_fidelity='+str(self.best_agent_fidelity)\
+                +', logger='+str(self.logger)+')'
+    
+    def _get_fidelities(self, n_rungs):
+        """
+        Parameters
+        ----------
+        n_rungs: This is the number of budgets.
+        
+        Returns
+        -------
+        fidelities: This is a list with the n_rungs budgets: the last one is max_fidelity and each one is reduction_factor
+                    times smaller than the next one.
+        """
+        
+        fidelities = []
+        for i in range(n_rungs):
+            tmp_fidelity = self.max_fidelity*float(self.reduction_factor)**(i-n_rungs+1)
+            
+            if(isinstance(self.min_fidelity, (int, np.integer)) and isinstance(self.max_fidelity, (int, np.integer))):
+                tmp_fidelity = max(int(round(tmp_fidelity)), 1)
+            
+            fidelities.append(tmp_fidelity)
+        
+        return fidelities
+    
+    def _sample_configuration(self, config_idx):
+        """
+        Parameters
+        ----------
+        config_idx: This is the index of the configuration: it is used for seeding the hyper-parameters.
+        
+        Returns
+        -------
+        agent_params: This is the dictionary of the hyper-parameters of block_to_opt where all the hyper-parameters to mutate,
+                      except the fidelity, are sampled uniformly at random. It is None if there was an error.
+        """
+        
+        agent_params = copy.deepcopy(self.block_to_opt.get_params())
+        
+        if(agent_params is None):
+            self.is_tune_successful = False
+            self.logger.error(msg='The method \'get_params\' of an agent returned \'None\'!')
+            return None
+        
+        rolling_seed = 0
+        for key_hyper_params in list(agent_params.keys()):
+            #each configuration and each hyper-parameter needs its own seed:
+            rolling_seed += 1
+            agent_params[key_hyper_params].set_local_prng(new_seeder=self.seeder+config_idx*len(agent_params)+rolling_seed)
+            
+            if(agent_params[key_hyper_params].to_mutate and (key_hyper_params != self.fidelity_name)):
+                agent_params[key_hyper_params].mutate(first_mutation=True)
+        
+        return agent_params
+    
+    def _get_trial_task(self, config_idx, agent_params, fidelity):
+        """
+        Parameters
+        ----------
+        config_idx: This is the index of the configuration.
+        
+        agent_params: This is the dictionary of the hyper-parameters of the configuration.
+        
+        fidelity: This is the budget with which the configuration is learnt and evaluated.
+        
+        Returns
+        -------
+        task: This is a dictionary with all the information needed to learn and evaluate the configuration.
+        """
+        
+        task = dict(config_idx=config_idx, params=agent_params, fidelity=fidelity, trial_number=self.trial_number)
+        
+        self.trial_number += 1
+        
+        return task
+    
+    def _run_task_on_worker(self, task, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        task: This is a dictionary created by the method _get_trial_task.
+        
+        train_data: This is the train_data that entered the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner.
+             
+             The default is None.
+        
+        Returns
+        -------
+        stored_obj: This is a tuple with the learnt agent and the output of its method learn().
+        
+        payload: This is a dictionary with the evaluation of the agent. The evaluation is None if there was an error.
+        
+        This method learns and evaluates a configuration with a certain budget. It is called either in the current process or
+        in the worker processes of the TunerWorkerPool.
+        """
+        
+        start_time = time.time()
+        
+        tmp_agent = copy.deepcopy(self.block_to_opt)
+        tmp_metric = self.eval_metric
+        
+        if(self.verbosity < 4):
+            tmp_agent.update_verbosity(new_verbosity=0)
+        
+        agent_params = copy.deepcopy(task['params'])
+        if(self.is_fidelity_in_metric):
+            tmp_metric = copy.deepcopy(self.eval_metric)
+            setattr(tmp_metric, self.fidelity_name, task['fidelity'])
+        else:
+            agent_params[self.fidelity_name].current_actual_value = task['fidelity']
+        
+        tmp_agent.set_local_prng(new_seeder=tmp_agent.seeder+task['config_idx'])
+        
+        if(not tmp_agent.set_params(agent_params)):
+            self.logger.error(msg='There was an error setting the parameters of an agent!')
+            return (None, None), dict(block_eval=None)
+        
+        name_suffix = '_Config_'+str(task['config_idx'])+'_Fidelity_'+str(task['fidelity'])
+        tmp_agent.obj_name = str(self.block_to_opt.obj_name)+name_suffix
+        tmp_agent.logger.name_obj_logging = str(self.block_to_opt.logger.name_obj_logging)+name_suffix
+        
+        #the same configuration gets the same input for every budget:
+        self.input_loader.set_local_prng(new_seeder=self.seeder+task['config_idx'])
+        agent_train_data, agent_env = self.input_loader.get_input(blocks=[tmp_agent], n_inputs_to_load=1, train_data=train_data,
+                                                                  env=env)
+        
+        #input loaders methods get_input return two lists: one for the train_data and one for the env.
+        if(agent_train_data is not None):
+            agent_train_data = agent_train_data[0]
+        if(agent_env is not None):
+            agent_env = agent_env[0]
+        
+        #ill hyper-parameters may make the method learn raise an exception: this configuration is then discarded.
+        try:
+            tmp_res = tmp_agent.learn(train_data=agent_train_data, env=agent_env)
+        except Exception as exc:
+            self.logger.error(msg='Exception Type: '+str(type(exc).__name__)+'. Exception Message: '+str(exc))
+            return (None, None), dict(block_eval=None)
+        
+        if(not tmp_agent.is_learn_successful):
+            self.logger.error(msg='There was an error in the \'learn\' method of an agent!')
+            return (None, None), dict(block_eval=None)
+        
+        #if we need to evaluate a RLPipeline block we need to use as input to the evaluation the train_data and the env created
+        #by the various blocks making up the pipeline.
+        if(isinstance(tmp_agent, RLPipeline)):
+            if(isinstance(tmp_agent.list_of_block_objects[-1], ModelGeneration)):
+                agent_train_data = tmp_res.train_data
+                agent_env = tmp_res.env
+        
+        tmp_agent_eval, _, _, _, _ = tmp_metric.evaluate(block_res=tmp_res, block=tmp_agent, train_data=agent_train_data,
+                                                         env=agent_env)
+        tmp_agent.block_eval = tmp_agent_eval
+        
+        pickle_path = None
+        if(((task['trial_number'] % self.output_save_periodicity) == 0) and (task['trial_number'] != 0)):
+            self.logger.debug(msg='Agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
+            pickle_path = tmp_agent.save()
+            tmp_res.save()
+        
+        self._record_trial(tmp_agent=tmp_agent, tmp_agent_eval=tmp_agent_eval, start_time=start_time, pickle_path=pickle_path)
+        
+        return (tmp_agent, tmp_res), dict(block_eval=tmp_agent_eval, block_eps_eval=tmp_agent.block_eps_eval)
+    
+    def _is_better(self, eval_1, fidelity_1, eval_2, fidelity_2):
+        """
+        Parameters
+        ----------
+        eval_1: This is the evaluation of the first agent.
+        
+        fidelity_1: This is the budget of the first agent.
+        
+        eval_2: This is the evaluation of the second agent.
+        
+        fidelity_2: This is the budget of the second agent.
+        
+        Returns
+        -------
+        This method returns True if the first agent is better than the second one: an agent evaluated with a bigger budget is
+        always better than an agent evaluated with a smaller budget, else the evaluations are compared. If the two agents are
+        equally good it returns False.
+        """
+        
+        if(fidelity_1 != fidelity_2):
+            return fidelity_1 > fidelity_2
+        
+        return self.eval_metric.which_one_is_better(block_1_eval=eval_1, block_2_eval=eval_2) == 0
+    
+    def _is_new_best_agent(self, tmp_agent_eval, fidelity, eps_eval=None):
+        """
+        Parameters
+        ----------
+        tmp_agent_eval: This is the evaluation of the agent.
+        
+        fidelity: This is the budget of the agent.
+        
+        eps_eval: This is the evaluation of each episode of the agent.
+                  
+                  The default is None.
+        
+        Returns
+        -------
+        This method returns True if the agent must replace the best_agent. If the two agents were evaluated with the same 
+        budget then the episodes of both agents are passed to the method which_one_is_better of the eval_metric, with the
+        best_agent as second block: with common random numbers the agent must be clearly better than the best_agent.
+        """
+        
+        if(self.best_agent is None):
+            return True
+        
+        if(fidelity != self.best_agent_fidelity):
+            return self._is_better(eval_1=tmp_agent_eval, fidelity_1=fidelity, eval_2=self.best_agent.block_eval,
+                                   fidelity_2=self.best_agent_fidelity)
+        
+        return self.eval_metric.which_one_is_better(block_1_eval=tmp_agent_eval, block_2_eval=self.best_agent.block_eval, 
+                                                    block_1_eps_eval=eps_eval, 
+                                                    block_2_eps_eval=self.best_agent.block_eps_eval) == 0
+    
+    def _process_trial_result(self, task, handle, payload):
+        """
+        Parameters
+        ----------
+        task: This is the task of the trial.
+        
+        handle: This is either the handle of the learnt agent in the TunerWorkerPool, or the tuple containing the learnt agent
+                and the output of its method learn().
+        
+        payload: This is the dictionary with the evaluation of the agent.
+        
+        Returns
+        -------
+        tmp_agent_eval: This is the evaluation of the agent.
+        
+        This method stores the evaluation and, if the agent is a new best agent, it saves it.
+        """
+        
+        tmp_agent_eval = payload['block_eval']
+        
+        self.evaluations.append((task['config_idx'], task['fidelity'], tmp_agent_eval))
+        
+        if(tmp_agent_eval is None):
+            return None
+        
+        if(self._is_new_best_agent(tmp_agent_eval=tmp_agent_eval, fidelity=task['fidelity'], 
+                                   eps_eval=payload.get('block_eps_eval'))):
+            if(self._worker_pool is not None):
+                tmp_agent, tmp_res = self._worker_pool.fetch(handle=handle)
+            else:
+                tmp_agent, tmp_res = handle
+            
+            self.best_agent = tmp_agent
+            self.best_agent_fidelity = task['fidelity']
+            
+            self.logger.info(msg='New best agent: '+str(tmp_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
+            
+            tmp_agent.obj_name += '_new_best'
+            tmp_res.obj_name += '_new_best'
+            
+            tmp_agent.save()
+            tmp_res.save()
+        
+        return tmp_agent_eval
+    
+    def _run_trials(self, tasks, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        tasks: This is a list of tasks created by the method _get_trial_task.
+        
+        train_data: This is the train_data that entered the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner.
+             
+             The default is None.
+        
+        Returns
+        -------
+        evals: This is a list with the evaluation of each task.
+        """
+        
+        if(self._worker_pool is not None):
+            results = self._worker_pool.run_tasks(tasks=tasks)
+        else:
+            results = [self._run_task_on_worker(task=tmp_task, train_data=train_data, env=env) for tmp_task in tasks]
+        
+        evals = []
+        for tmp_task, tmp_result in zip(tasks, results):
+            evals.append(self._process_trial_result(task=tmp_task, handle=tmp_result[0], payload=tmp_result[1]))
+        
+        if(self._worker_pool is not None):
+            self._worker_pool.clear()
+        
+        return evals
+    
+    def _get_top_indices(self, evals, n_top):
+        """
+        Parameters
+        ----------
+        evals: This is a list of evaluations: the ones equal to None are considered the worst.
+        
+        n_top: This is the number of indices to return.
+        
+        Returns
+        -------
+        The indices of the n_top best evaluations, from the best one. The evaluations equal to None are never returned.
+        """
+        
+        sign_for_sorting = -1
+        #if the metric needs to be minimised then i want the smallest evaluation:
+        if(self.eval_metric.which_one_is_better(0, 1) == 0):
+            sign_for_sorting = 1
+        
+        valid_idxs = [i for i in range(len(evals)) if evals[i] is not None]
+        sorted_idxs = sorted(valid_idxs, key=lambda i: sign_for_sorting*evals[i])
+        
+        return sorted_idxs[:n_top]
+    
+    def _successive_halving(self, configurations, fidelities, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        configurations: This is a list of tuples (configuration index, dictionary of the hyper-parameters).
+        
+        fidelities: This is the list of the increasing budgets.
+        
+        train_data: This is the train_data that entered the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner.
+             
+             The default is None.
+        
+        This method evaluates all the configurations with the first budget, then the best 1/reduction_factor of them with the
+        second budget, and so on.
+        """
+        
+        for rung_idx in range(len(fidelities)):
+            self.logger.info(msg='Evaluating '+str(len(configurations))+' configurations with '+str(self.fidelity_name)+' equal to: '
+                                 +str(fidelities[rung_idx]))
+            
+            tasks = [self._get_trial_task(config_idx=tmp_idx, agent_params=tmp_params, fidelity=fidelities[rung_idx])
+                     for tmp_idx, tmp_params in configurations]
+            
+            evals = self._run_trials(tasks=tasks, train_data=train_data, env=env)
+            
+            if(rung_idx == (len(fidelities)-1)):
+                break
+            
+            n_to_promote = max(int(np.floor(len(configurations)/self.reduction_factor)), 1)
+            configurations = [configurations[i] for i in self._get_top_indices(evals=evals, n_top=n_to_promote)]
+            
+            if(len(configurations) == 0):
+                self.logger.error(msg='All the configurations failed!')
+                break
+    
+    def _hyperband(self, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        train_data: This is the train_data that entered the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner.
+             
+             The default is None.
+        
+        This method runs s_max+1 brackets of successive halving: the bracket s starts from the budget
+        max_fidelity*reduction_factor^(-s) with ceil((s_max+1)/(s+1)*reduction_factor^s) configurations.
+        """
+        
+        n_sampled_configurations = 0
+        for s in range(self.s_max, -1, -1):
+            n_bracket_configurations = int(np.ceil((self.s_max+1)/(s+1)*self.reduction_factor**s))
+            
+            self.logger.info(msg='Bracket: '+str(self.s_max-s))
+            
+            configurations = []
+            for config_idx in range(n_sampled_configurations, n_sampled_configurations+n_bracket_configurations):
+                tmp_params = self._sample_configuration(config_idx=config_idx)
+                if(tmp_params is None):
+                    return
+                configurations.append((config_idx, tmp_params))
+            
+            n_sampled_configurations += n_bracket_configurations
+            
+            self._successive_halving(configurations=configurations, fidelities=self._get_fidelities(n_rungs=s+1),
+                                     train_data=train_data, env=env)
+    
+    def _get_asha_job(self, rungs, n_sampled_configurations):
+        """
+        Parameters
+        ----------
+        rungs: This is a list with, for each budget, a dictionary containing the evaluated configurations ('members': a list
+               of tuples (configuration index, dictionary of the hyper-parameters, evaluation)) and the indices of the
+               configurations already promoted ('promoted').
+        
+        n_sampled_configurations: This is the number of configurations sampled so far.
+        
+        Returns
+        -------
+        rung_idx: This is the index of the budget of the job, or None if there are no jobs left.
+        
+        config_idx: This is the index of the configuration of the job.
+        
+        agent_params: This is the dictionary of the hyper-parameters of the configuration of the job.
+        
+        This method promotes the best configuration not yet promoted that is in the best 1/reduction_factor of its budget,
+        starting from the biggest budgets. If no configuration can be promoted a new configuration is sampled.
+        """
+        
+        for rung_idx in range(len(rungs)-2, -1, -1):
+            members = rungs[rung_idx]['members']
+            n_top = int(np.floor(len(members)/self.reduction_factor))
+            
+            for member_idx in self._get_top_indices(evals=[tmp_member[2] for tmp_member in members], n_top=n_top):
+                config_idx, agent_params, _ = members[member_idx]
+                if(config_idx not in rungs[rung_idx]['promoted']):
+                    rungs[rung_idx]['promoted'].add(config_idx)
+                    return rung_idx+1, config_idx, agent_params
+        
+        if(n_sampled_configurations < self.n_configurations):
+            return 0, n_sampled_configurations, self._sample_configuration(config_idx=n_sampled_configurations)
+        
+        return None, None, None
+    
+    def _asha(self, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        train_data: This is the train_data that entered the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env that entered the tuner.
+             
+             The default is None.
+        
+        This method runs ASHA: as soon as a worker process is idle it gets a new job from the method _get_asha_job. If there is
+        no TunerWorkerPool the jobs are run one at a time in the current process.
+        """
+        
+        fidelities = self._get_fidelities(n_rungs=self.s_max+1)
+        rungs = [dict(members=[], promoted=set()) for i in range(len(fidelities))]
+        
+        n_max_pending_jobs = 1
+        if(self._worker_pool is not None):
+            n_max_pending_jobs = self._worker_pool.n_workers
+        
+        pending_jobs = {}
+        n_sampled_configurations = 0
+        
+        while True:
+            while len(pending_jobs) < n_max_pending_jobs:
+                rung_idx, config_idx, agent_params = self._get_asha_job(rungs=rungs,
+                                                                        n_sampled_configurations=n_sampled_configurations)
+                if(rung_idx is None):
+                    break
+                
+                if(agent_params is None):
+                    return
+                
+                if(rung_idx == 0):
+                    n_sampled_configurations += 1
+                
+                tmp_task = self._get_trial_task(config_idx=config_idx, agent_params=agent_params, fidelity=fidelities[rung_idx])
+                
+                if(self._worker_pool is not None):
+                    pending_jobs[self._worker_pool.submit(task=tmp_task)] = (rung_idx, tmp_task)
+                else:
+                    pending_jobs[tmp_task['trial_number']] = (rung_idx, tmp_task)
+            
+            if(len(pending_jobs) == 0):
+                break
+            
+            if(self._worker_pool is not None):
+                results = self._worker_pool.wait_any()
+            else:
+                tmp_key = next(iter(pending_jobs))
+                results = [(tmp_key, self._run_task_on_worker(task=pending_jobs[tmp_key][1], train_data=train_data, env=env))]
+            
+            for tmp_key, tmp_result in results:
+                rung_idx, tmp_task = pending_jobs.pop(tmp_key)
+                
+                if(self._worker_pool is not None):
+                    tmp_eval = self._process_trial_result(task=tmp_task, handle=tmp_key, payload=tmp_result)
+                    self._worker_pool.release(handle=tmp_key)
+                else:
+                    tmp_eval = self._process_trial_result(task=tmp_task, handle=tmp_result[0], payload=tmp_result[1])
+                
+                rungs[rung_idx]['members'].append((tmp_task['config_idx'], tmp_task['params'], tmp_eval))
+    
+    def tune(self, train_data=None, env=None):
+        """
+        Parameters
+        ----------
+        train_data: This is the dataset that can be used by the Tuner.
+                    
+                    It must be an object of a Class inheriting from BaseDataSet.
+        
+        env: This is the environment that can be used by the Tuner.
+             
+             It must be an object of a Class inheriting from BaseEnvironment.
+        
+        Returns
+        -------
+        best_agent: This is the tuned agent: the original agent but with the tuned hyper-parameters.
+        
+        best_agent_eval: This is the evaluation of the best tuned agent, according to the eval_metric of the Tuner.
+        """
+        
+        #checks if self.block_to_opt.is_parametrised == True and re-sets is_tune_successful to False. Also checks for the
+        #consistency between the metric and the input_loader.
+        tmp_out = super().tune(train_data=train_data, env=env)
+        
+        #super().tune() may return best_agent, best_agent_eval or None: If nothing went wrong and we can continue super().tune()
+        #returns None, and hence in tmp_out we will have None:
+        if(tmp_out is not None):
+            return tmp_out[0], tmp_out[1]
+        
+        #the evaluations obtained with different budgets are not comparable:
+        self.eval_metric.set_eval_threshold(eval_threshold=None)
+        
+        self.trial_number = 0
+        self.best_agent = None
+        self.best_agent_fidelity = None
+        self.evaluations = []
+        
+        #the metric is shared with the caller: its verbosity is lowered only while tuning, and then it is restored.
+        original_metric_verbosity = self.eval_metric.verbosity
+        if(self.verbosity < 4):
+            self.eval_metric.update_verbosity(new_verbosity=0)
+        
+        try:
+            #the persistent worker processes get a copy of this tuner, of the train_data and of the env only once:
+            if(self.n_jobs > 1):
+                self._worker_pool = TunerWorkerPool(obj_name=str(self.obj_name)+'_worker_pool', tuner=self, 
+                                                    train_data=train_data, env=env, n_workers=self.n_jobs, seeder=self.seeder, 
+                                                    log_mode=self.log_mode, checkpoint_log_path=self.checkpoint_log_path, 
+                                                    verbosity=self.verbosity)
+            
+            if(self.mode == 'successive_halving'):
+                configurations = []
+                for config_idx in range(self.n_configurations):
+                    tmp_params = self._sample_configuration(config_idx=config_idx)
+                    if(tmp_params is None):
+                        return None, None
+                    configurations.append((config_idx, tmp_params))
+                
+                self._successive_halving(configurations=configurations, fidelities=self._get_fidelities(n_rungs=self.s_max+1),
+                                         train_data=train_data, env=env)
+            elif(self.mode == 'hyperband'):
+                self._hyperband(train_data=train_data, env=env)
+            else:
+                self._asha(train_data=train_data, env=env)
+        finally:
+            if(self._worker_pool is not None):
+                self._worker_pool.close()
+                self._worker_pool = None
+                
+            self.eval_metric.update_verbosity(new_verbosity=original_metric_verbosity)
+        
+        if(self.best_agent is None):
+            self.is_tune_successful = False
+            self.logger.error(msg='No agent was learnt and evaluated successfully!')
+            return None, None
+        
+        self.logger.info(msg='Best agent evaluation: '+str(self.best_agent.block_eval)+' with '+str(self.fidelity_name)
+                             +' equal to: '+str(self.best_agent_fidelity))
+        
+        self.best_agent.obj_name = 'best_agent_' + self.best_agent.obj_name
+        self.best_agent.save()
+        
+        best_agent = self.best_agent
+        best_agent_eval = self.best_agent.block_eval
+        
+        if(self.create_explanatory_heatmap):
+            #create heatmap
+            self.create_explanatory_heatmap_hyperparameters()
+        
+        self.is_tune_successful = True
+        
+        return best_agent, best_agent_eval
+    
+    def _evaluate_a_generation(self, gen):
+        exc_msg = 'The method \'_evaluate_a_generation\' is not implemented, because it is not needed!'
+        self.logger.exception(msg=exc_msg)
+        raise AttributeError(exc_msg)
@@ -5,9 +5,14 @@ The Class TunerOptuna inherits from the Class Tuner.
 """
 
 import copy
+import functools
+import time
+import os
 import numpy as np
+from joblib import Parallel, delayed
 
 import optuna
+from optuna.trial import TrialState
 
 from ARLO.tuner.tuner import Tuner
 from ARLO.hyperparameter.hyperparameter import Real, Integer, Categorical
@@ -26,7 +31,8 @@ class TunerOptuna(Tuner):
     
     def __init__(self, block_to_opt, eval_metric, input_loader, obj_name, create_explanatory_heatmap=False, sampler='TPE',
                  n_trials=100, max_time_seconds=3600, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, 
-                 n_jobs=1, job_type='process', output_save_periodicity=25):
+                 n_jobs=1, job_type='thread', output_save_periodicity=25, pruner='HYPERBAND', storage=None, 
+                 evaluation_cache=None):
         """
         Parameters
         ----------
@@ -49,9 +55,50 @@ class TunerOptuna(Tuner):
                 
                           The default is 3600.
         
+        job_type: This is a string and it is either 'process' or 'thread'. If n_jobs > 1 and job_type is 'thread' then Optuna 
+                  runs n_jobs trials at the same time on threads. If job_type is 'process' then n_jobs worker processes run the 
+                  trials and share the same Optuna study through the storage: if neither the storage nor the 
+                  checkpoint_log_path are specified the trials are run on threads.
+                  
+                  The default is 'thread'.
+        
+        pruner: This is a string representing the pruner to use out of the ones provided by Optuna. It can be: 'HYPERBAND', 
+                'MEDIAN', 'NONE'.
+                
+                The blocks that evaluate themselves after each epoch of the learning (i.e: the online model generation blocks) 
+                report these intermediate evaluations to the Optuna trial: if the pruner decides that the trial is not 
+                promising the learning is stopped and the trial is pruned. If 'NONE' no trial is ever pruned.
+                
+                cf. https://optuna.readthedocs.io/en/stable/tutorial/10_key_features/003_efficient_optimization_algorithms.html
+                    #pruning-algorithms
+                
+                The default is 'HYPERBAND'.
+        
+        storage: This is either None, or a string representing the path of a SQLite file, or a string representing an Optuna 
+                 storage URL (for example: 'sqlite:///study.db').
+                 
+                 If n_jobs > 1 and job_type is 'process' then n_jobs worker processes run the trials and share the same Optuna 
+                 study through the storage: if storage is None a SQLite file is created in the checkpoint_log_path of the
+                 tuner. 
+                 
+                 If the storage already contains a study with the same name then the study is resumed: only the trials missing
+                 to reach n_trials are run. This allows to resume a tuning procedure that was interrupted.
+                 
+                 cf. https://optuna.readthedocs.io/en/stable/tutorial/10_key_features/004_distributed.html
+                 
+                 The default is None.
+        
+        evaluation_cache: This is either None or an object of Class EvaluationCache. If it is not None then before learning an
+                          agent the cache is looked up: on a cache hit the agent is not learnt and its cached evaluation is 
+                          used. All the agents learnt and evaluated are stored in the cache.
+                          
+                          The default is None.
+        
         Non-Parameters Members
         ----------------------    
         optuna_object_sampler: This is a sampler object from the Optuna library. It is obtained from the sampler parameter.
+        
+        optuna_object_pruner: This is a pruner object from the Optuna library. It is obtained from the pruner parameter.
             
         opt_direction: This is a string, either 'maximize' or 'minimize'. It is 'maximize' if the metric of the block needs to be
                        maximised, else it is 'minimize'.
@@ -79,6 +126,21 @@ class TunerOptuna(Tuner):
         
         self.optuna_object_sampler = dict_of_samplers[self.sampler]
         
+        #i keep the class of the sampler since each worker process needs its own sampler object:
+        self._optuna_sampler_class = self.optuna_object_sampler
+        
+        self.pruner = pruner
+        if(self.pruner not in ['HYPERBAND', 'MEDIAN', 'NONE']):
+            exc_msg = '\'pruner\' can only be: \'HYPERBAND\', \'MEDIAN\' or \'NONE\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        dict_of_pruners = {'HYPERBAND': optuna.pruners.HyperbandPruner,
+                           'MEDIAN': optuna.pruners.MedianPruner,
+                           'NONE': optuna.pruners.NopPruner}
+        
+        self.optuna_object_pruner = dict_of_pruners[self.pruner]
+        
         self.opt_direction = 'maximize'
         #test the metric to see if it should be maximised or minimised: i assume a block eval was 1 and another block eval was 2:
         #if the better one is the first one, then it means 1 is better than 2, hence the metric should be minimised
@@ -87,6 +149,9 @@ class TunerOptuna(Tuner):
 
         self.n_trials = n_trials
         self.max_time_seconds = max_time_seconds
+        
+        self.storage = storage
+        self.evaluation_cache = evaluation_cache
 
     def __repr__(self):
          return 'TunerOptuna('+'block_to_opt='+str(self.block_to_opt)+', eval_metric='+str(self.eval_metric)\
@@ -96,8 +161,83 @@ class TunerOptuna(Tuner):
                 +', seeder='+str(self.seeder)+', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
                 +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
                 +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)\
-                +', output_save_periodicity='+str(self.output_save_periodicity)+', logger='+str(self.logger)+')'
+                +', output_save_periodicity='+str(self.output_save_periodicity)+', pruner='+str(self.pruner)\
+                +', storage='+str(self.storage)+', evaluation_cache='+str(self.evaluation_cache)\
+                +', logger='+str(self.logger)+')'
 
+    def _report_epoch_eval(self, trial, current_epoch, current_eval):
+        """
+        Parameters
+        ----------
+        trial: This is an object of Class optuna.trial.Trial.
+        
+        current_epoch: This is the epoch of the learning of the agent that was just completed.
+        
+        current_eval: This is the evaluation of the agent after current_epoch epochs.
+            
+        Returns
+        -------
+        This method returns True if the trial should be pruned, and False otherwise. It is used as epoch_callback of the agents.
+        """
+        
+        trial.report(value=current_eval, step=current_epoch)
+        
+        return trial.should_prune()
+    
+    def _load_next_input(self, my_agent):
+        """
+        Parameters
+        ----------
+        my_agent: This is the agent of the current trial.
+        
+        This method calls the input_loader for getting the train_data and the env for the next trial.
+        """
+        
+        #i set these since i cannot pass them as parameters to the method '_objective'
+        new_data, new_env = self.input_loader.get_input(blocks=[my_agent], n_inputs_to_load=1, train_data=self.original_data, 
+                                                        env=self.original_env)
+        
+        #the input loader returns a list, and since i specified n_inputs_to_load=1, then it returns a list with only one element,
+        #here with [0] i am selecting that element from the list:
+        if(new_data is not None):
+            self.data = new_data[0]
+        if(new_env is not None):
+            self.env = new_env[0]
+
+    def _save_if_new_best_agent(self, my_agent, tmp_res, tmp_agent_eval, trial_number=None):
+        """
+        Parameters
+        ----------
+        my_agent: This is the agent of the current trial.
+        
+        tmp_res: This is the output of the method learn() of my_agent.
+        
+        tmp_agent_eval: This is the evaluation of my_agent.
+        
+        trial_number: This is the number of the current trial.
+                      
+                      The default is None.
+        
+        If my_agent is better than the best agent found so far then it is saved together with tmp_res.
+        """
+        
+        #save each best agent:
+        if((self.best_agent_eval is None) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent_eval, 
+                                                                                   block_2_eval=self.best_agent_eval,
+                                                                                   block_1_eps_eval=my_agent.block_eps_eval,
+                                                                                   block_2_eps_eval=self.best_agent_eps_eval) 
+                                                == 0)):
+            self.best_agent_eval = tmp_agent_eval
+            self.best_agent_eps_eval = my_agent.block_eps_eval
+            self.best_trial_number = trial_number
+            self.logger.info(msg='New best agent: '+str(my_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
+            
+            my_agent.obj_name += '_new_best'
+            tmp_res.obj_name += '_new_best'
+            
+            my_agent.save()
+            tmp_res.save()
+    
     def _objective(self, trial):
         """
         Parameters
@@ -153,12 +293,43 @@ class TunerOptuna(Tuner):
             self.logger.error(msg='There was an error setting the parameters of an agent!')
             return None
         
-        tmp_res = my_agent.learn(train_data=self.data, env=self.env)
+        start_time = time.time()
+        
+        cache_key = None
+        if(self.evaluation_cache is not None):
+            cache_key = self.evaluation_cache.get_key(block=my_agent, train_data=self.data, env=self.env,
+                                                      eval_metric=self.eval_metric)
+            cached_agent, cached_res = self.evaluation_cache.get_cached_block(key=cache_key, block=my_agent, 
+                                                                              eval_metric=self.eval_metric, 
+                                                                              best_eval=self.best_agent_eval,
+                                                                              best_eps_eval=self.best_agent_eps_eval)
+            if(cached_agent is not None):
+                self._record_trial(tmp_agent=cached_agent, tmp_agent_eval=cached_agent.block_eval, start_time=start_time)
+                self._save_if_new_best_agent(my_agent=cached_agent, tmp_res=cached_res, tmp_agent_eval=cached_agent.block_eval,
+                                             trial_number=trial.number)
+                self._load_next_input(my_agent=cached_agent)
+                
+                return cached_agent.block_eval
+        
+        #the intermediate evaluations are reported to the trial so that the pruner can stop the unpromising trials:
+        my_agent.epoch_callback = functools.partial(self._report_epoch_eval, trial)
+        
+        try:
+            tmp_res = my_agent.learn(train_data=self.data, env=self.env)
+        finally:
+            #the trial cannot be saved together with the agent:
+            my_agent.epoch_callback = None
         
         if(not my_agent.is_learn_successful):
             self.logger.info(msg='There was an error in the \'learn\' method of an agent!')
             return None
         
+        if(trial.should_prune()):
+            self.logger.info(msg='Agent: '+str(my_agent.obj_name)+' pruned!')
+            self._record_trial(tmp_agent=my_agent, tmp_agent_eval=None, start_time=start_time, status='pruned')
+            self._load_next_input(my_agent=my_agent)
+            raise optuna.TrialPruned()
+        
         #if we need to evaluate a RLPipeline block we need to use as input to the evaluation the train_data and the env created
         #by the various blocks making up the pipeline. For example if we have a FeaturEngineering block and then a 
         #ModelGeneration block we need to use the environment modified by the FeatureEngineering block in evaluating the 
@@ -170,38 +341,175 @@ class TunerOptuna(Tuner):
                 self.data = tmp_res.train_data
                 self.env = tmp_res.env
         
-        tmp_agent_eval, _, _, _, _ = self.eval_metric.evaluate(block_res=tmp_res, block=my_agent, train_data=self.data, env=self.env)
+        #with n_jobs > 1 the trials can run on threads sharing this tuner: each trial sets the threshold on its own copy of the 
+        #metric, and reads from it the number of episodes used:
+        trial_metric = self.eval_metric
+        if(self.n_jobs > 1):
+            trial_metric = copy.deepcopy(self.eval_metric)
         
+        #the metrics supporting sequential stopping compare the agent against the best agent found so far:
+        if(trial.number != 0):
+            trial_metric.set_eval_threshold(eval_threshold=self.best_agent_eval, eval_threshold_eps_eval=self.best_agent_eps_eval)
+            
+        tmp_agent_eval, _, _, _, _ = trial_metric.evaluate(block_res=tmp_res, block=my_agent, train_data=self.data, env=self.env)
+        
+        #an evaluation stopped early depends on the best agent found so far and so it is not stored:
+        if((cache_key is not None) and (tmp_agent_eval is not None)
+           and self.evaluation_cache.is_evaluation_complete(eval_metric=trial_metric)):
+            my_agent.block_eval = tmp_agent_eval
+            self.evaluation_cache.store(key=cache_key, block_eval=tmp_agent_eval, block=my_agent, block_res=tmp_res)
+        
+        pickle_path = None
         if((trial.number % self.output_save_periodicity) == 0):
             self.logger.debug(msg='Agent: '+str(my_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
             my_agent.block_eval = tmp_agent_eval
-            my_agent.save()
+            pickle_path = my_agent.save()
             tmp_res.save()
+        
+        self._record_trial(tmp_agent=my_agent, tmp_agent_eval=tmp_agent_eval, start_time=start_time, pickle_path=pickle_path)
             
-        #save each best agent:
-        if((trial.number == 0) or (self.eval_metric.which_one_is_better(block_1_eval=tmp_agent_eval, 
-                                                                        block_2_eval=self.best_agent_eval) == 0)):
-            self.best_agent_eval = tmp_agent_eval
-            self.logger.info(msg='New best agent: '+str(my_agent.obj_name)+' Evaluation: '+str(tmp_agent_eval))
-            
-            my_agent.obj_name += '_new_best'
-            tmp_res.obj_name += '_new_best'
+        self._save_if_new_best_agent(my_agent=my_agent, tmp_res=tmp_res, tmp_agent_eval=tmp_agent_eval, 
+                                     trial_number=trial.number)
             
-            my_agent.save()
-            tmp_res.save()
+        self._load_next_input(my_agent=my_agent)
+          
+        return tmp_agent_eval
+                
+    def _create_sampler(self, seed):
+        """
+        Parameters
+        ----------
+        seed: This is the seed of the sampler.
             
-        #i set these since i cannot pass them as parameters to the method '_objective'
-        new_data, new_env = self.input_loader.get_input(blocks=[my_agent], n_inputs_to_load=1, train_data=self.original_data, 
-                                                        env=self.original_env)
+        Returns
+        -------
+        optuna_object_sampler: This is a new sampler object from the Optuna library, of the Class specified by the sampler 
+                               parameter.
+        """
         
-        #the input loader returns a list, and since i specified n_inputs_to_load=1, then it returns a list with only one element,
-        #here with [0] i am selecting that element from the list:
-        if(new_data is not None):
-            self.data = new_data[0]
-        if(new_env is not None):
-            self.env = new_env[0]
+        if(self.sampler == 'GRID'):
+            algo_params = self.block_to_opt.get_params()
           
-        return tmp_agent_eval
+            for tmp_key in list(algo_params.keys()):
+                if(algo_params[tmp_key].to_mutate):
+                    if(isinstance(algo_params[tmp_key], Real)):
+                        l_low = algo_params[tmp_key].range_of_values[0]
+                        l_high = algo_params[tmp_key].range_of_values[1]
+                        self.search_space.update({tmp_key: list(np.linspace(l_low, l_high, 10))})
+                    if(isinstance(algo_params[tmp_key], Integer)):
+                        l_low = algo_params[tmp_key].range_of_values[0]
+                        l_high = algo_params[tmp_key].range_of_values[1]+1
+                        self.search_space.update({tmp_key: list(range(l_low, l_high))})
+                    if(isinstance(algo_params[tmp_key], Categorical)):
+                        self.search_space.update({tmp_key: algo_params[tmp_key].possible_values})
+
+            optuna_object_sampler = self._optuna_sampler_class(search_space=self.search_space)
+        elif(self.sampler == 'TPE'):
+            algo_params = self.block_to_opt.get_params()
+            n_hp_to_opt = 0
+            
+            for tmp_key in list(algo_params.keys()):
+                if(algo_params[tmp_key].to_mutate):         
+                    n_hp_to_opt += 1
+            
+            is_multivariate = False
+            if(n_hp_to_opt > 1):
+                is_multivariate = True
+
+            optuna_object_sampler = self._optuna_sampler_class(seed=seed, multivariate=is_multivariate)
+        elif(self.sampler == 'CMA-ES'):
+            optuna_object_sampler = self._optuna_sampler_class(seed=seed, restart_strategy='ipop')
+        else:
+            optuna_object_sampler = self._optuna_sampler_class(seed=seed)
+        
+        return optuna_object_sampler
+    
+    def _get_storage_url(self, is_process_parallel):
+        """
+        Parameters
+        ----------
+        is_process_parallel: This is True if the trials are run by worker processes, and False otherwise.
+            
+        Returns
+        -------
+        This method returns the Optuna storage URL of the study. It returns None if the study is kept in memory.
+        """
+        
+        if(self.storage is None):
+            if(not is_process_parallel):
+                return None
+            
+            storage_path = os.path.join(self.checkpoint_log_path, str(self.obj_name)+'_optuna_study.db')
+        elif('://' in self.storage):
+            return self.storage
+        else:
+            storage_path = self.storage
+            
+        return 'sqlite:///'+os.path.abspath(storage_path)
+    
+    def _get_n_finished_trials(self, study):
+        """
+        Parameters
+        ----------
+        study: This is an object of Class optuna.study.Study.
+            
+        Returns
+        -------
+        This method returns the number of trials of the study that are either complete, pruned or failed.
+        """
+        
+        return len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE, TrialState.PRUNED, TrialState.FAIL)))
+    
+    def _get_study_best_value(self, study):
+        """
+        Parameters
+        ----------
+        study: This is an object of Class optuna.study.Study.
+            
+        Returns
+        -------
+        This method returns the best evaluation found so far in the study. It returns None if no trial is complete.
+        """
+        
+        try:
+            return study.best_value
+        except ValueError:
+            return None
+    
+    def _optimize_on_worker(self, worker_idx, study_name, storage_url):
+        """
+        Parameters
+        ----------
+        worker_idx: This is the index of the worker process: it is used for seeding the sampler of the worker process.
+        
+        study_name: This is the name of the study shared by the worker processes.
+        
+        storage_url: This is the Optuna storage URL of the study.
+            
+        This method runs trials in a worker process until the study reaches n_trials finished trials, or until 
+        max_time_seconds are elapsed. The agents are saved by each worker process in the checkpoint_log_path of the tuner.
+        """
+        
+        #each worker process needs a different sampler, else all the worker processes would try the same hyper-parameters:
+        study = optuna.load_study(study_name=study_name, storage=storage_url, 
+                                  sampler=self._create_sampler(seed=self.seeder+worker_idx+1),
+                                  pruner=self.optuna_object_pruner())
+        
+        #each worker process gets a copy of the input_loader: it is seeded differently else all the worker processes would load 
+        #the same inputs:
+        self.input_loader.set_local_prng(new_seeder=self.input_loader.seeder+worker_idx+1)
+        
+        #the worker process must only save the agents better than the ones already in the study:
+        self.best_agent_eval = self._get_study_best_value(study=study)
+        self.best_agent_eps_eval = None
+        self.best_trial_number = None
+        
+        max_trials_callback = optuna.study.MaxTrialsCallback(n_trials=self.n_trials, states=(TrialState.COMPLETE, 
+                                                                                             TrialState.PRUNED, 
+                                                                                             TrialState.FAIL))
+        
+        study.optimize(self._objective, n_trials=self.n_trials, timeout=self.max_time_seconds, n_jobs=1, 
+                       callbacks=[max_trials_callback], show_progress_bar=False)
                 
     def tune(self, train_data=None, env=None):
         """
@@ -260,51 +568,54 @@ class TunerOptuna(Tuner):
         
         #i need this in order to detect and save every new best agent:
         self.best_agent_eval = None
+        self.best_agent_eps_eval = None
+        self.best_trial_number = None
+        self.eval_metric.set_eval_threshold(eval_threshold=None)
         
         optuna.logging.set_verbosity(optuna.logging.WARNING)
         
-        if(self.sampler == 'GRID'):
-            algo_params = self.block_to_opt.get_params()
-          
-            for tmp_key in list(algo_params.keys()):
-                if(algo_params[tmp_key].to_mutate):
-                    if(isinstance(algo_params[tmp_key], Real)):
-                        l_low = algo_params[tmp_key].range_of_values[0]
-                        l_high = algo_params[tmp_key].range_of_values[1]
-                        self.search_space.update({tmp_key: list(np.linspace(l_low, l_high, 10))})
-                    if(isinstance(algo_params[tmp_key], Integer)):
-                        l_low = algo_params[tmp_key].range_of_values[0]
-                        l_high = algo_params[tmp_key].range_of_values[1]+1
-                        self.search_space.update({tmp_key: list(range(l_low, l_high))})
-                    if(isinstance(algo_params[tmp_key], Categorical)):
-                        self.search_space.update({tmp_key: algo_params[tmp_key].possible_values})
-
-            self.optuna_object_sampler = self.optuna_object_sampler(search_space=self.search_space)
-        elif(self.sampler == 'TPE'):
-            algo_params = self.block_to_opt.get_params()
-            n_hp_to_opt = 0
-            
-            for tmp_key in list(algo_params.keys()):
-                if(algo_params[tmp_key].to_mutate):         
-                    n_hp_to_opt += 1
-            
-            is_multivariate = False
-            if(n_hp_to_opt > 1):
-                is_multivariate = True
-
-            self.optuna_object_sampler = self.optuna_object_sampler(seed=self.seeder, multivariate=is_multivariate)
-        elif(self.sampler == 'CMA-ES'):
-            self.optuna_object_sampler = self.optuna_object_sampler(seed=self.seeder, restart_strategy='ipop')
+        self.optuna_object_sampler = self._create_sampler(seed=self.seeder)
+        
+        #optuna runs the trials on threads: with job_type equal to 'process' i use worker processes sharing the study through a 
+        #storage instead:
+        is_process_parallel = (self.n_jobs > 1) and (self.job_type == 'process')
+        
+        #the worker processes need a storage to share the study:
+        if(is_process_parallel and (self.storage is None) and (self.checkpoint_log_path is None)):
+            wrn_msg = 'With jobs of type \'process\' either the \'storage\' or the \'checkpoint_log_path\' must be specified:'\
+                      +' the trials are run on threads!'
+            self.logger.warning(msg=wrn_msg)
+            is_process_parallel = False
+        
+        storage_url = self._get_storage_url(is_process_parallel=is_process_parallel)
+        
+        study = optuna.create_study(storage=storage_url, sampler=self.optuna_object_sampler, pruner=self.optuna_object_pruner(),
+                                    study_name=self.obj_name+'_optuna_study', direction=self.opt_direction, 
+                                    load_if_exists=True)  
+        
+        #if the study is resumed from the storage then only the missing trials are run:
+        n_finished_trials = self._get_n_finished_trials(study=study)
+        if(n_finished_trials > 0):
+            self.logger.info(msg='Resuming the study \''+str(study.study_name)+'\': '+str(n_finished_trials)
+                                 +' trials were already finished!')
+            self.best_agent_eval = self._get_study_best_value(study=study)
+        
+        if(is_process_parallel):
+            parallel_workers = Parallel(n_jobs=self.n_jobs, backend=self.backend, prefer=self.prefer)
+            parallel_workers(delayed(self._optimize_on_worker)(worker_idx=worker_idx, study_name=study.study_name, 
+                                                               storage_url=storage_url) 
+                             for worker_idx in range(self.n_jobs))
         else:
-            self.optuna_object_sampler = self.optuna_object_sampler(seed=self.seeder)
-            
-        study = optuna.create_study(sampler=self.optuna_object_sampler, #pruner=optuna.pruners.HyperbandPruner(), 
-                                    study_name=self.obj_name+'_optuna_study', direction=self.opt_direction)  
-  
-        study.optimize(self._objective, n_trials=self.n_trials, timeout=self.max_time_seconds, n_jobs=self.n_jobs, 
-                       show_progress_bar=False)
+            study.optimize(self._objective, n_trials=max(self.n_trials-n_finished_trials, 0), timeout=self.max_time_seconds, 
+                           n_jobs=self.n_jobs, show_progress_bar=False)
                      
         trial = study.best_trial
+        
+        #when the agents are compared episode by episode the best agent is the one picked by the method which_one_is_better 
+        #of the metric, and not necessarily the one with the best mean:
+        if((not is_process_parallel) and (self.best_trial_number is not None) and (self.best_agent_eps_eval is not None)):
+            trial = [x for x in study.get_trials(deepcopy=False) if x.number == self.best_trial_number][0]
+            
         best_agent_eval = trial.value
         dict_of_params = {}
         
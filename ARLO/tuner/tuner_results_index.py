@@ -0,0 +1,242 @@
+"""
+This module contains the implementation of the Class TunerResultsIndex.
+
+The Class TunerResultsIndex inherits from the Class AbstractUnit.
+
+The Class TunerResultsIndex is an append-only table, in the JSON Lines format, containing one compact record for each trial
+done by a tuner: the results of the tuning procedure can be analysed without loading the pickle files of the agents.
+"""
+
+import os
+import json
+
+import numpy as np
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+from ARLO.hyperparameter.hyperparameter import Real, Integer, Categorical
+
+
+class TunerResultsIndex(AbstractUnit):
+    """
+    This Class implements an append-only table of the trials done by a tuner. The table is a JSON Lines file: the first line
+    is a header record describing the hyper-parameters of the block to tune, and each of the following lines is a trial record
+    containing the trial id, the current values of the hyper-parameters, the evaluation, the wall time of the trial, the
+    path of the pickle file of the agent (None if the agent was not saved) and the status of the trial.
+    
+    Each record is written with a single write on a file opened in append mode, and so the same table can be written at the
+    same time by several worker processes.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, index_path, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1,
+                 job_type='process'):
+        """
+        Parameters
+        ----------
+        index_path: This is the path of the JSON Lines file containing the table.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.index_path = index_path
+        if(self.index_path is None):
+            exc_msg = '\'index_path\' cannot be \'None\'!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+    
+    def __repr__(self):
+        return 'TunerResultsIndex('+'obj_name='+str(self.obj_name)+', index_path='+str(self.index_path)\
+               +', seeder='+str(self.seeder)+', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+               +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+    
+    def _get_flat_value(self, value):
+        """
+        Parameters
+        ----------
+        value: This is the value of an hyper-parameter, or an evaluation.
+        
+        Returns
+        -------
+        This method returns value if it can be written in a JSON file, else it returns its string representation.
+        """
+        
+        if(isinstance(value, np.generic)):
+            value = value.item()
+        
+        if((value is None) or isinstance(value, (bool, int, float, str))):
+            return value
+        
+        if(isinstance(value, (list, tuple))):
+            return [self._get_flat_value(value=x) for x in value]
+        
+        return str(value)
+    
+    def _append_record(self, record):
+        """
+        Parameters
+        ----------
+        record: This is a dictionary that is written as a new line of the table.
+        """
+        
+        record_line = (json.dumps(record)+'\n').encode('utf-8')
+        
+        #a single write on a file opened with O_APPEND is not interleaved with the writes of the other processes:
+        index_file = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(index_file, record_line)
+        finally:
+            os.close(index_file)
+    
+    def write_header(self, block):
+        """
+        Parameters
+        ----------
+        block: This is the block to tune. It must be an object of a Class inheriting from the Class Block.
+        
+        This method writes the header record of the table: this contains the type, the range of values (or the possible values)
+        and the flag to_mutate of each hyper-parameter of block.
+        """
+        
+        block_params = block.get_params()
+        if(block_params is None):
+            block_params = {}
+        
+        hyperparameters = {}
+        for tmp_key in list(block_params.keys()):
+            tmp_hp = block_params[tmp_key]
+            
+            hp_info = dict(hp_type=type(tmp_hp).__name__, to_mutate=bool(tmp_hp.to_mutate), range_of_values=None,
+                           possible_values=None)
+            if(isinstance(tmp_hp, (Real, Integer))):
+                hp_info['range_of_values'] = self._get_flat_value(value=list(tmp_hp.range_of_values))
+            elif(isinstance(tmp_hp, Categorical)):
+                hp_info['possible_values'] = self._get_flat_value(value=list(tmp_hp.possible_values))
+            
+            hyperparameters[tmp_key] = hp_info
+        
+        self._append_record(record=dict(record_type='header', block_obj_name=str(block.obj_name),
+                                        hyperparameters=hyperparameters))
+    
+    def append_trial(self, trial_id, block, block_eval, wall_time, pickle_path=None, status='complete'):
+        """
+        Parameters
+        ----------
+        trial_id: This is a string identifying the trial: it is the obj_name of the agent.
+        
+        block: This is the agent of the trial. It must be an object of a Class inheriting from the Class Block.
+        
+        block_eval: This is the evaluation of the agent.
+        
+        wall_time: This is the number of seconds spent for learning and evaluating the agent.
+        
+        pickle_path: This is the path of the pickle file of the agent, or None if the agent was not saved.
+                     
+                     The default is None.
+        
+        status: This is a string and it is the status of the trial: either 'complete' or 'pruned'. The evaluation of a pruned
+                trial is None.
+                
+                The default is 'complete'.
+        """
+        
+        block_params = block.get_params()
+        if(block_params is None):
+            block_params = {}
+        
+        params_values = {}
+        for tmp_key in list(block_params.keys()):
+            params_values[tmp_key] = self._get_flat_value(value=block_params[tmp_key].current_actual_value)
+        
+        self._append_record(record=dict(record_type='trial', trial_id=str(trial_id), params=params_values,
+                                        block_eval=self._get_flat_value(value=block_eval), wall_time=float(wall_time),
+                                        pickle_path=pickle_path, status=str(status)))
+    
+    def read(self):
+        """
+        Returns
+        -------
+        header: This is the dictionary with the hyper-parameters information contained in the header record. It is None if the
+                table has no header record.
+        
+        trials: This is the list of the trial records, in the order in which they were written.
+        """
+        
+        header = None
+        trials = []
+        
+        if(not os.path.isfile(self.index_path)):
+            return header, trials
+        
+        with open(self.index_path, 'r') as index_file:
+            for tmp_line in index_file:
+                tmp_line = tmp_line.strip()
+                if(len(tmp_line) == 0):
+                    continue
+                
+                try:
+                    record = json.loads(tmp_line)
+                except ValueError:
+                    #the last line may be partial if the tuning procedure died while writing it:
+                    self.logger.warning(msg='A record of the table \''+str(self.index_path)+'\' could not be read!')
+                    continue
+                
+                if(record['record_type'] == 'header'):
+                    if(header is None):
+                        header = record
+                else:
+                    trials.append(record)
+        
+        return header, trials
+    
+    def get_best_trial(self, eval_metric, trials=None):
+        """
+        Parameters
+        ----------
+        eval_metric: This is the metric used by the tuner: it is used for comparing the evaluations of the trials.
+        
+        trials: This is the list of the trial records, as returned by the method read(). If None the table is read.
+                
+                The default is None.
+        
+        Returns
+        -------
+        best_trial: This is the trial record with the best finite evaluation. It is None if there is no such trial.
+        """
+        
+        if(trials is None):
+            _, trials = self.read()
+        
+        best_trial = None
+        for tmp_trial in trials:
+            if((tmp_trial['block_eval'] is None) or (not np.isfinite(tmp_trial['block_eval']))):
+                continue
+            
+            if((best_trial is None) or (eval_metric.which_one_is_better(block_1_eval=tmp_trial['block_eval'],
+                                                                        block_2_eval=best_trial['block_eval']) == 0)):
+                best_trial = tmp_trial
+        
+        return best_trial
+    
+    def copy_trials_from(self, other_index_path):
+        """
+        Parameters
+        ----------
+        other_index_path: This is the path of the table of a previous call of the method tune.
+        
+        This method appends to this table the trial records of another table: this is used when resuming a tuning procedure.
+        """
+        
+        other_index = TunerResultsIndex(obj_name=str(self.obj_name)+'_previous', index_path=other_index_path,
+                                        verbosity=self.verbosity)
+        
+        _, trials = other_index.read()
+        
+        for tmp_trial in trials:
+            self._append_record(record=tmp_trial)
+        
+        self.logger.info(msg='Copied '+str(len(trials))+' trial records from: \''+str(other_index_path)+'\'')
@@ -0,0 +1,219 @@
+"""
+This module contains the implementation of the Class TunerScheduler.
+
+The Class TunerScheduler inherits from the Class AbstractUnit.
+
+The Class TunerScheduler runs several independent tuners concurrently, sharing among them a fixed number of workers: it is used
+by the automatic blocks for tuning all their tuners at the same time.
+"""
+
+import copy
+import os
+
+from joblib import Parallel, delayed
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+
+
+class TunerScheduler(AbstractUnit):
+    """
+    This Class implements a scheduler of independent tuners. The tuners are run concurrently over a budget of n_jobs workers:
+    the number of tuners running at the same time times the n_jobs used by each of them is never greater than n_jobs, so that
+    the machine is not oversubscribed when the tuners are themselves parallel.
+    
+    The n_jobs of each tuner is the maximum number of workers it can get: it is lowered, only for the call of its method tune,
+    to its share of the budget.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, seeder=2, log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1,
+                 job_type='process'):
+        """
+        Parameters
+        ----------
+        n_jobs: This is the total number of workers shared by all the tuners. If it is 1 then the tuners are run one after
+                another in the current process, with their own n_jobs.
+                
+                The default is 1.
+        
+        job_type: This is the type of the jobs running the tuners: with 'process' each tuner runs in its own process and the
+                  tuners returned by the method run are copies of the original ones.
+                  
+                  The default is 'process'.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+    
+    def __repr__(self):
+        return 'TunerScheduler('+'obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)\
+               +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+               +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+    
+    def _get_workers_per_tuner(self, tuners):
+        """
+        Parameters
+        ----------
+        tuners: This is a list of objects of a Class inheriting from the Class Tuner.
+        
+        Returns
+        -------
+        n_concurrent_tuners: This is the number of tuners that are run at the same time.
+        
+        workers_per_tuner: This is a list with the n_jobs that each tuner uses in its method tune: this is the minimum between
+                           the n_jobs of the tuner and its share of the budget.
+        """
+        
+        n_concurrent_tuners = max(min(len(tuners), self.n_jobs), 1)
+        
+        #each running tuner gets the same share of the budget:
+        workers_share = max(self.n_jobs//n_concurrent_tuners, 1)
+        
+        workers_per_tuner = [min(tmp_tuner.n_jobs, workers_share) for tmp_tuner in tuners]
+        
+        return n_concurrent_tuners, workers_per_tuner
+    
+    def _make_checkpoint_paths_unique(self, tuners, tuners_names):
+        """
+        Parameters
+        ----------
+        tuners: This is a list of objects of a Class inheriting from the Class Tuner.
+        
+        tuners_names: This is a list with a name for each tuner: it is used for creating a sub-folder of the checkpoint_log_path.
+        
+        The method tune of a Tuner creates a folder named after its obj_name and the current time: two tuners with the same
+        obj_name and the same checkpoint_log_path started at the same time would create the same folder. Each of these tuners
+        gets its own sub-folder of checkpoint_log_path.
+        """
+        
+        tuners_folders = [(tmp_tuner.checkpoint_log_path, tmp_tuner.obj_name) for tmp_tuner in tuners]
+        
+        for n_tuner, tmp_tuner in enumerate(tuners):
+            if((tmp_tuner.checkpoint_log_path is not None) and (tuners_folders.count(tuners_folders[n_tuner]) > 1)):
+                tmp_tuner.checkpoint_log_path = os.path.join(tmp_tuner.checkpoint_log_path, str(tuners_names[n_tuner]))
+                os.makedirs(tmp_tuner.checkpoint_log_path, exist_ok=True)
+                
+                self.logger.info(msg='The tuner \''+str(tuners_names[n_tuner])+'\' uses the folder: '
+                                     +str(tmp_tuner.checkpoint_log_path))
+    
+    def _tune(self, tuner, n_jobs, train_data=None, env=None, tuner_name=None, copy_metric=False):
+        """
+        Parameters
+        ----------
+        tuner: This is an object of a Class inheriting from the Class Tuner.
+        
+        n_jobs: This is the number of workers that the tuner can use.
+        
+        train_data: This is the train_data passed to the method tune of the tuner.
+                    
+                    The default is None.
+        
+        env: This is the env passed to the method tune of the tuner.
+             
+             The default is None.
+        
+        tuner_name: This is the name of the tuner used in the logs.
+                    
+                    The default is None.
+        
+        copy_metric: If True the tuner, and its block_to_opt, use a deep copy of their eval_metric during the call of the method
+                     tune: this is needed when the tuners run concurrently on threads, since the metric keeps the state of the
+                     current evaluation and the tuners may share the same metric.
+                     
+                     The default is False.
+        
+        Returns
+        -------
+        tuned_block: This is the tuned block returned by the method tune of the tuner. It is None if the method tune raised an 
+                     exception.
+        
+        tuned_block_eval: This is the evaluation of tuned_block. It is None if the method tune raised an exception.
+        
+        tuner: This is the tuner after the call of its method tune. If the method tune raised an exception its member 
+               is_tune_successful is False.
+        """
+        
+        original_n_jobs = tuner.n_jobs
+        tuner.n_jobs = n_jobs
+        
+        original_metric = tuner.eval_metric
+        original_block_metric = getattr(tuner.block_to_opt, 'eval_metric', None)
+        if(copy_metric):
+            tuner.eval_metric = copy.deepcopy(original_metric)
+            if(original_block_metric is original_metric):
+                tuner.block_to_opt.eval_metric = tuner.eval_metric
+        
+        tuned_block = None
+        tuned_block_eval = None
+        try:
+            tuned_block, tuned_block_eval = tuner.tune(train_data=train_data, env=env)
+        except Exception as exc:
+            #a failing tuner must not stop the other tuners:
+            tuner.is_tune_successful = False
+            self.logger.error(msg='The tuner \''+str(tuner_name)+'\' raised an exception. Exception Type: '
+                                  +str(type(exc).__name__)+'. Exception Message: '+str(exc))
+        finally:
+            tuner.n_jobs = original_n_jobs
+            
+            if(copy_metric):
+                tuner.eval_metric = original_metric
+                if(original_block_metric is original_metric):
+                    tuner.block_to_opt.eval_metric = original_block_metric
+        
+        return tuned_block, tuned_block_eval, tuner
+    
+    def run(self, tuners, tuners_names, train_datas, envs):
+        """
+        Parameters
+        ----------
+        tuners: This is a list of objects of a Class inheriting from the Class Tuner.
+        
+        tuners_names: This is a list with a name for each tuner: for example its key in the member tuner_blocks_dict of an
+                      automatic block.
+        
+        train_datas: This is a list with the train_data of each tuner.
+        
+        envs: This is a list with the env of each tuner.
+        
+        Returns
+        -------
+        tuners_results: This is a list with a tuple for each tuner, in the same order of tuners. Each tuple contains the tuned
+                        block, its evaluation and the tuner after the call of its method tune.
+        
+        All the tuners are run before this method returns, even if some of them fail or raise an exception: the caller checks
+        the member is_tune_successful of each returned tuner.
+        """
+        
+        if(len(tuners) == 0):
+            return []
+        
+        n_concurrent_tuners, workers_per_tuner = self._get_workers_per_tuner(tuners=tuners)
+        
+        #with n_jobs equal to 1 the tuners are run one after another, each with its own n_jobs, as they always were:
+        if(self.n_jobs == 1):
+            workers_per_tuner = [tmp_tuner.n_jobs for tmp_tuner in tuners]
+        
+        if(n_concurrent_tuners == 1):
+            return [self._tune(tuner=tuners[i], n_jobs=workers_per_tuner[i], train_data=train_datas[i], env=envs[i],
+                               tuner_name=tuners_names[i])
+                    for i in range(len(tuners))]
+        
+        self._make_checkpoint_paths_unique(tuners=tuners, tuners_names=tuners_names)
+        
+        self.logger.info(msg='Running '+str(len(tuners))+' tuners, '+str(n_concurrent_tuners)+' at a time, with the following'
+                             +' number of workers: '+str(dict(zip(tuners_names, workers_per_tuner))))
+        
+        parallel_tuners = Parallel(n_jobs=n_concurrent_tuners, backend=self.backend, prefer=self.prefer)
+        
+        #the tuners running on threads may share the same metric:
+        copy_metric = (self.prefer == 'threads')
+        
+        tuners_results = parallel_tuners(delayed(self._tune)(tuners[i], workers_per_tuner[i], train_datas[i], envs[i], 
+                                                             tuners_names[i], copy_metric)
+                                         for i in range(len(tuners)))
+        
+        return tuners_results
@@ -0,0 +1,423 @@
+"""
+This module contains the implementation of the Class TunerWorkerPool.
+
+The Class TunerWorkerPool inherits from the Class AbstractUnit.
+
+The Class TunerWorkerPool is a pool of persistent worker processes owned by a tuner: each worker process receives a copy of the
+tuner, of the train_data and of the env only once, when it is started, and then it keeps them resident for all the tasks it
+runs.
+"""
+
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import traceback
+
+import cloudpickle
+
+from ARLO.abstract_unit.abstract_unit import AbstractUnit
+from ARLO.logger.logger import flush_all_loggers
+
+
+def _tuner_worker(remote, parent_remote, pickled_tuner_and_input):
+    """
+    Parameters
+    ----------
+    remote: This is the end of the pipe used by the worker.
+    
+    parent_remote: This is the end of the pipe used by the main process: it is closed in the worker.
+    
+    pickled_tuner_and_input: This is a tuple containing the tuner, the train_data and the env, pickled with cloudpickle.
+    
+    This function is the loop run by each worker process of a TunerWorkerPool.
+    
+    The command 'run' calls the method _run_task_on_worker of the resident tuner: what this returns is split in an object that
+    is kept in the worker process, under a handle, and in a payload that is sent back to the main process. The command 'fetch'
+    sends back the object kept under a handle, the command 'release' removes it, while the command 'clear' removes all the 
+    objects kept in the worker process.
+    """
+    
+    parent_remote.close()
+    
+    tuner, train_data, env = cloudpickle.loads(pickled_tuner_and_input)
+    
+    stored_objects = {}
+    
+    try:
+        while True:
+            cmd, data = remote.recv()
+            
+            try:
+                if(cmd == 'run'):
+                    task_idx, task = data
+                    stored_obj, payload = tuner._run_task_on_worker(task=task, train_data=train_data, env=env)
+                    stored_objects[task_idx] = stored_obj
+                    
+                    #the worker may be terminated at any time: the log of the task is written before its result is sent.
+                    flush_all_loggers(fsync=False)
+                    
+                    remote.send(('ok', (task_idx, payload)))
+                elif(cmd == 'fetch'):
+                    remote.send(('ok', stored_objects[data]))
+                elif(cmd == 'release'):
+                    stored_objects.pop(data, None)
+                    remote.send(('ok', None))
+                elif(cmd == 'clear'):
+                    stored_objects = {}
+                    remote.send(('ok', None))
+                elif(cmd == 'close'):
+                    remote.send(('ok', None))
+                    break
+            except Exception:
+                remote.send(('error', traceback.format_exc()))
+    finally:
+        #the worker process exits with os._exit and so the functions registered with atexit are not called:
+        flush_all_loggers()
+        remote.close()
+
+
+class TunerWorkerPool(AbstractUnit):
+    """
+    This Class implements a pool of n_workers persistent worker processes owned by a tuner.
+    
+    The tuner, the train_data and the env are pickled and sent to the worker processes only once, when these are started: the
+    tasks then only contain what changes from one agent to the other (for example the hyper-parameters), and the workers only
+    send back a small payload (for example the evaluation of the agent). What each task produces (for example the learnt agent)
+    is kept in the worker process that ran it and it can be fetched with the handle returned by the method run_tasks.
+    
+    The tasks can also be sent one at a time, with the method submit, and collected as soon as they are done, with the method
+    wait_any: this way a new task can be sent as soon as a worker process is idle.
+    
+    The tuner must implement the method _run_task_on_worker(task, train_data, env) that returns the object to keep in the
+    worker process and the payload to send back.
+    
+    This Class inherits from the Class AbstractUnit.
+    """
+    
+    def __init__(self, obj_name, tuner, train_data=None, env=None, n_workers=None, start_method=None, seeder=2,
+                 log_mode='console', checkpoint_log_path=None, verbosity=3, n_jobs=1, job_type='process'):
+        """
+        Parameters
+        ----------
+        tuner: This must be an object of a Class inheriting from the Class Tuner. A copy of it is kept in each worker process.
+        
+        train_data: This is the train_data that is kept in each worker process.
+                    
+                    The default is None.
+        
+        env: This is the env that is kept in each worker process.
+             
+             The default is None.
+        
+        n_workers: This is the number of worker processes. If None it is equal to the number of cpus.
+                   
+                   The default is None.
+        
+        start_method: This is the start method of the worker processes. If None the default start method of the module
+                      multiprocessing is used.
+                      
+                      The default is None.
+        
+        Non-Parameters Members
+        ----------------------
+        closed: This is True if the method close was called, and False otherwise.
+        
+        The other parameters and non-parameters members are described in the Class AbstractUnit.
+        """
+        
+        super().__init__(obj_name=obj_name, seeder=seeder, log_mode=log_mode, checkpoint_log_path=checkpoint_log_path,
+                         verbosity=verbosity, n_jobs=n_jobs, job_type=job_type)
+        
+        self.n_workers = n_workers
+        if(self.n_workers is None):
+            self.n_workers = mp.cpu_count()
+        if(self.n_workers < 1):
+            exc_msg = '\'n_workers\' must be greater than or equal to 1!'
+            self.logger.exception(msg=exc_msg)
+            raise ValueError(exc_msg)
+        
+        self.start_method = start_method
+        
+        self._remotes = None
+        self._processes = None
+        self.closed = False
+        
+        #the tasks are numbered across all the calls of the methods run_tasks and submit so that the handles are unique:
+        self._n_tasks_run = 0
+        
+        self._idle_remotes = None
+        self._busy_remotes = None
+        
+        self._start_workers(tuner=tuner, train_data=train_data, env=env)
+    
+    def __repr__(self):
+        return 'TunerWorkerPool('+'n_workers='+str(self.n_workers)+', start_method='+str(self.start_method)\
+               +', closed='+str(self.closed)+', obj_name='+str(self.obj_name)+', seeder='+str(self.seeder)\
+               +', local_prng='+str(self.local_prng)+', log_mode='+str(self.log_mode)\
+               +', checkpoint_log_path='+str(self.checkpoint_log_path)+', verbosity='+str(self.verbosity)\
+               +', n_jobs='+str(self.n_jobs)+', job_type='+str(self.job_type)+', logger='+str(self.logger)+')'
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def __getstate__(self):
+        exc_msg = 'An object of Class \'TunerWorkerPool\' cannot be pickled!'
+        self.logger.exception(msg=exc_msg)
+        raise TypeError(exc_msg)
+    
+    def _start_workers(self, tuner, train_data, env):
+        """
+        Parameters
+        ----------
+        tuner: This is the tuner that is kept in each worker process.
+        
+        train_data: This is the train_data that is kept in each worker process.
+        
+        env: This is the env that is kept in each worker process.
+        
+        This method starts the worker processes.
+        """
+        
+        ctx = mp.get_context(self.start_method)
+        
+        pickled_tuner_and_input = cloudpickle.dumps((tuner, train_data, env), protocol=4)
+        
+        self._remotes = []
+        self._processes = []
+        for i in range(self.n_workers):
+            remote, work_remote = ctx.Pipe()
+            
+            process = ctx.Process(target=_tuner_worker, args=(work_remote, remote, pickled_tuner_and_input), daemon=True)
+            process.start()
+            work_remote.close()
+            
+            self._remotes.append(remote)
+            self._processes.append(process)
+        
+        self._idle_remotes = list(self._remotes)
+        self._busy_remotes = []
+    
+    def _receive(self, remote):
+        """
+        Parameters
+        ----------
+        remote: This is the end of the pipe of a worker process.
+        
+        Returns
+        -------
+        data: This is what the worker process sent back.
+        
+        If the worker process sent back an error then an exception is raised.
+        """
+        
+        status, data = remote.recv()
+        if(status == 'error'):
+            exc_msg = 'A worker process of the \'TunerWorkerPool\' raised an exception:\n'+str(data)
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+        
+        return data
+    
+    def _check_not_closed(self):
+        """
+        This method raises an exception if the method close was already called.
+        """
+        
+        if(self.closed):
+            exc_msg = 'The \'TunerWorkerPool\' was closed!'
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+    
+    @property
+    def n_idle_workers(self):
+        """
+        Property method that returns the number of worker processes that are not running a task.
+        """
+        
+        return len(self._idle_remotes)
+    
+    def _check_worker_is_idle(self, worker_idx):
+        """
+        Parameters
+        ----------
+        worker_idx: This is the index of a worker process.
+        
+        This method raises an exception if the worker process is running a task: in this case it cannot answer to other 
+        commands.
+        """
+        
+        if(self._remotes[worker_idx] not in self._idle_remotes):
+            exc_msg = 'The worker process '+str(worker_idx)+' of the \'TunerWorkerPool\' is running a task!'
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+    
+    def submit(self, task):
+        """
+        Parameters
+        ----------
+        task: This is the task to pass to the method _run_task_on_worker of the tuner.
+        
+        Returns
+        -------
+        handle: This is the handle of the object that the task will keep in the worker process.
+        
+        This method sends the task to an idle worker process: if there are no idle worker processes an exception is raised.
+        """
+        
+        self._check_not_closed()
+        
+        if(self.n_idle_workers == 0):
+            exc_msg = 'There are no idle worker processes in the \'TunerWorkerPool\'!'
+            self.logger.exception(msg=exc_msg)
+            raise RuntimeError(exc_msg)
+        
+        remote = self._idle_remotes.pop(0)
+        task_idx = self._n_tasks_run
+        self._n_tasks_run += 1
+        
+        remote.send(('run', (task_idx, task)))
+        self._busy_remotes.append(remote)
+        
+        return self._remotes.index(remote), task_idx
+    
+    def wait_any(self):
+        """
+        Returns
+        -------
+        results: This is a list with, for each task that is done, a tuple containing the handle of the object kept in the 
+                 worker process and the payload sent back.
+        
+        This method waits until at least one of the tasks sent with the method submit is done.
+        """
+        
+        self._check_not_closed()
+        
+        if(len(self._busy_remotes) == 0):
+            return []
+        
+        results = []
+        for remote in wait(self._busy_remotes):
+            self._busy_remotes.remove(remote)
+            self._idle_remotes.append(remote)
+            
+            task_idx, payload = self._receive(remote=remote)
+            results.append(((self._remotes.index(remote), task_idx), payload))
+        
+        return results
+    
+    def run_tasks(self, tasks):
+        """
+        Parameters
+        ----------
+        tasks: This is a list of tasks: each task is passed to the method _run_task_on_worker of the tuner.
+        
+        Returns
+        -------
+        results: This is a list with, for each task, a tuple containing the handle of the object kept in the worker process
+                 and the payload sent back. The results are in the same order of the tasks.
+        
+        The tasks are sent to the worker processes as soon as these are idle.
+        """
+        
+        self._check_not_closed()
+        
+        handles = []
+        results_by_handle = {}
+        
+        next_task_idx = 0
+        while len(results_by_handle) < len(tasks):
+            #as soon as a worker process is idle i send it the next task:
+            while((next_task_idx < len(tasks)) and (self.n_idle_workers > 0)):
+                handles.append(self.submit(task=tasks[next_task_idx]))
+                next_task_idx += 1
+            
+            for handle, payload in self.wait_any():
+                results_by_handle[handle] = payload
+        
+        return [(handle, results_by_handle[handle]) for handle in handles]
+    
+    def fetch(self, handle):
+        """
+        Parameters
+        ----------
+        handle: This is a handle returned by the method run_tasks or by the method submit.
+        
+        Returns
+        -------
+        The object kept under handle in the worker process that ran the corresponding task.
+        """
+        
+        self._check_not_closed()
+        
+        worker_idx, task_idx = handle
+        self._check_worker_is_idle(worker_idx=worker_idx)
+        
+        self._remotes[worker_idx].send(('fetch', task_idx))
+        
+        return self._receive(remote=self._remotes[worker_idx])
+    
+    def release(self, handle):
+        """
+        Parameters
+        ----------
+        handle: This is a handle returned by the method run_tasks or by the method submit.
+        
+        This method removes the object kept under handle in the worker process that ran the corresponding task.
+        """
+        
+        self._check_not_closed()
+        
+        worker_idx, task_idx = handle
+        self._check_worker_is_idle(worker_idx=worker_idx)
+        
+        self._remotes[worker_idx].send(('release', task_idx))
+        self._receive(remote=self._remotes[worker_idx])
+    
+    def clear(self):
+        """
+        This method removes all the objects kept in the worker processes: the handles returned so far are no longer valid.
+        """
+        
+        self._check_not_closed()
+        
+        for worker_idx in range(self.n_workers):
+            self._check_worker_is_idle(worker_idx=worker_idx)
+        
+        for remote in self._remotes:
+            remote.send(('clear', None))
+        
+        for remote in self._remotes:
+            self._receive(remote=remote)
+    
+    def close(self):
+        """
+        This method stops the worker processes.
+        """
+        
+        if(self.closed):
+            return
+        
+        self.closed = True
+        
+        if(self._remotes is not None):
+            for remote in self._remotes:
+                try:
+                    remote.send(('close', None))
+                    remote.recv()
+                except (EOFError, BrokenPipeError, OSError):
+                    pass
+                remote.close()
+        
+        if(self._processes is not None):
+            for process in self._processes:
+                process.join(timeout=10)
+                if(process.is_alive()):
+                    process.terminate()
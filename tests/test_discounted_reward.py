@@ -0,0 +1,74 @@
+"""
+Tests of the adaptive evaluation of the Class DiscountedReward.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+
+
+class _LinearPolicy:
+    def __init__(self, gain, delay=0):
+        self.gain = gain
+        self.delay = delay
+
+    def draw_action(self, state):
+        #the delay lets the threads interleave their batches:
+        time.sleep(self.delay)
+        return self.gain*np.array(state)
+
+
+def _make_block_res(gain, delay=0):
+    policy = BasePolicy(policy=_LinearPolicy(gain=gain, delay=delay), regressor_type='generic_regressor', obj_name='policy',
+                        verbosity=0)
+
+    return BlockOutput(obj_name='block_res_'+str(gain), policy=policy, verbosity=0)
+
+
+def _make_lqg(seeder=1):
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=seeder, verbosity=0)
+
+
+def _make_metric():
+    #ci_relative_width=0 never stops early without a threshold, the two gains stop at different batches with the threshold:
+    metric = DiscountedReward(obj_name='metric', n_episodes=40, adaptive=True, adaptive_batch_size=5, ci_relative_width=0,
+                              common_random_numbers=True, crn_seeder=3, verbosity=0)
+    metric.set_eval_threshold(eval_threshold=-3.)
+
+    return metric
+
+
+def test_concurrent_adaptive_evaluations_match_sequential_ones():
+    gains = [-0.5, -1.5]
+
+    sequential_evals = []
+    for gain in gains:
+        metric = _make_metric()
+        _, eps_eval, _, _, _ = metric.evaluate(block_res=_make_block_res(gain=gain), env=_make_lqg())
+        sequential_evals.append(list(eps_eval))
+
+    assert [len(eps_eval) for eps_eval in sequential_evals] == [20, 10]
+
+    shared_metric = _make_metric()
+    concurrent_evals = [None]*len(gains)
+
+    def _evaluate(idx):
+        _, eps_eval, _, _, _ = shared_metric.evaluate(block_res=_make_block_res(gain=gains[idx], delay=1e-4), env=_make_lqg())
+        concurrent_evals[idx] = list(eps_eval)
+
+    threads = [threading.Thread(target=_evaluate, args=(idx,)) for idx in range(len(gains))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert concurrent_evals == sequential_evals
+    #the evaluation does not leave its batch state in the shared metric:
+    assert (shared_metric.n_episodes, shared_metric.n_jobs) == (40, 1)
@@ -0,0 +1,77 @@
+"""
+Tests of the copies of the environments built with the Class EnvironmentFactory and of the Class BatchedLQG.
+"""
+
+import numpy as np
+
+from ARLO.environment.environment import LQG
+
+
+class _CountingSimulator:
+    n_pickles = 0
+
+    def __reduce_ex__(self, protocol):
+        _CountingSimulator.n_pickles += 1
+        return super().__reduce_ex__(protocol)
+
+
+class _SimulatedLQG(LQG):
+    def __init__(self, obj_name, A=np.eye(1), seeder=1):
+        super().__init__(obj_name=obj_name, A=A, B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+                         env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=seeder, verbosity=0)
+
+        #this member is built by the constructor: it is not one of its parameters.
+        self.simulator = _CountingSimulator()
+
+
+def test_copies_are_built_with_the_constructor():
+    env = _SimulatedLQG(obj_name='lqg', A=2*np.eye(1))
+    env.set_params(params_dict={'horizon': 7})
+
+    env_copy = env.make_copy(seeder=3)
+
+    assert env.get_factory().env_class is _SimulatedLQG
+    np.testing.assert_array_equal(env_copy.A, 2*np.eye(1))
+    assert env_copy.horizon == 7
+    assert env_copy.seeder == 3
+    #the members that are not parameters of the constructor are not pickled for fingerprinting the environment:
+    assert _CountingSimulator.n_pickles == 0
+
+
+def test_modified_environments_are_deep_copied():
+    env = _SimulatedLQG(obj_name='lqg')
+    env.A = 3*np.eye(1)
+
+    env_copy = env.make_copy()
+
+    assert env.get_factory().env_class is None
+    np.testing.assert_array_equal(env_copy.A, 3*np.eye(1))
+
+
+def test_batched_lqg_steps_each_system_as_the_lqg():
+    env = LQG(obj_name='lqg', A=np.array([[1., 0.5], [0., 1.]]), B=np.eye(2), Q=np.eye(2), R=0.5*np.eye(2), max_pos=2.,
+              max_action=1., env_noise=np.zeros((2, 2)), controller_noise=np.zeros((2, 2)), horizon=3, seeder=1, verbosity=0)
+    batched_env = env.get_batched_env(n_envs=3, seeder=2)
+
+    states = np.array([[0.5, -1.], [1.5, 1.5], [-2., 0.]])
+    actions = np.array([[0.2, 0.3], [-1.5, 0.], [0., 2.]])
+
+    np.testing.assert_array_equal(batched_env.reset(state=states), states)
+    next_states, rewards, done, _ = batched_env.step(actions)
+
+    assert next_states.shape == (3, 2)
+    assert rewards.shape == (3,)
+    assert not np.any(done)
+
+    #without noise each row follows the same trajectory of an object of Class LQG:
+    for i in range(3):
+        env.reset(state=states[i])
+        next_state, reward, _, _ = env.step(actions[i])
+
+        np.testing.assert_allclose(next_states[i], next_state)
+        np.testing.assert_allclose(rewards[i], reward)
+
+    for _ in range(2):
+        _, _, done, _ = batched_env.step(np.zeros((3, 2)))
+
+    assert np.all(done)
@@ -0,0 +1,82 @@
+"""
+Tests of the keys of the Class EvaluationCache.
+"""
+
+import copy
+
+import numpy as np
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.metric.metric import DiscountedReward
+from ARLO.tuner.evaluation_cache import EvaluationCache
+
+
+class _ToyBlock(Block):
+    def __init__(self, x, obj_name='block', seeder=2):
+        super().__init__(eval_metric=DiscountedReward(obj_name='metric', n_episodes=10, verbosity=0), obj_name=obj_name,
+                         seeder=seeder, verbosity=0)
+
+        self.params = {'x': Real(hp_name='x', current_actual_value=x, range_of_values=[-10, 10], to_mutate=True,
+                                 obj_name='x', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        return BlockOutput(obj_name=self.obj_name+'_result', verbosity=0)
+
+
+def _make_lqg(A=np.eye(1), seeder=1):
+    return LQG(obj_name='lqg', A=A, B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=seeder, verbosity=0)
+
+
+def test_evaluation_cache_key_depends_on_env_params_and_metric(tmp_path):
+    cache = EvaluationCache(obj_name='cache', cache_path=str(tmp_path), verbosity=0)
+    block = _ToyBlock(x=1.)
+    metric = DiscountedReward(obj_name='metric', n_episodes=10, verbosity=0)
+
+    key = cache.get_key(block=block, env=_make_lqg(), eval_metric=metric)
+
+    assert key == cache.get_key(block=block, env=_make_lqg(), eval_metric=metric)
+    assert key != cache.get_key(block=block, env=_make_lqg(A=2*np.eye(1)), eval_metric=metric)
+    assert key != cache.get_key(block=block, env=_make_lqg(),
+                                eval_metric=DiscountedReward(obj_name='metric', n_episodes=20, verbosity=0))
+    assert key != cache.get_key(block=_ToyBlock(x=2.), env=_make_lqg(), eval_metric=metric)
+
+
+def test_evaluation_cache_key_does_not_depend_on_env_runtime_state(tmp_path):
+    cache = EvaluationCache(obj_name='cache', cache_path=str(tmp_path), verbosity=0)
+    block = _ToyBlock(x=1.)
+    metric = DiscountedReward(obj_name='metric', n_episodes=10, verbosity=0)
+
+    stepped_env = _make_lqg()
+    stepped_env.reset()
+    stepped_env.step(np.zeros(1))
+
+    assert cache.get_key(block=block, env=stepped_env, eval_metric=metric) \
+           == cache.get_key(block=block, env=_make_lqg(), eval_metric=metric)
+
+
+def test_evaluation_cache_stores_and_finds_evaluations(tmp_path):
+    cache = EvaluationCache(obj_name='cache', cache_path=str(tmp_path), verbosity=0)
+    key = cache.get_key(block=_ToyBlock(x=1.), env=_make_lqg(), eval_metric=None)
+
+    assert cache.lookup(key=key) is None
+
+    cache.store(key=key, block_eval=-3.5)
+
+    #the entries are files in cache_path, so they are found by any other cache using the same folder:
+    other_cache = EvaluationCache(obj_name='other_cache', cache_path=str(tmp_path), verbosity=0)
+    assert other_cache.lookup(key=key)['block_eval'] == -3.5
@@ -0,0 +1,60 @@
+"""
+Tests of the log files written in batches by the buffered Class Logger.
+"""
+
+import copy
+import multiprocessing
+
+from ARLO.logger.logger import Logger, flush_all_loggers
+
+
+def _read_lines(log_path):
+    try:
+        with open(log_path, 'r') as log_file:
+            return log_file.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def test_buffered_lines_are_written_in_order_before_an_exception(tmp_path):
+    logger = Logger(name_obj_logging='logger', mode='file', log_path=str(tmp_path), flush_interval=60.)
+    #the loggers are copied together with the objects that own them: the copies write to the same file.
+    logger_copy = copy.deepcopy(logger)
+    logger_copy.name_obj_logging = 'logger_copy'
+
+    for i in range(50):
+        logger.info(msg='line '+str(2*i))
+        logger_copy.info(msg='line '+str(2*i+1))
+
+    #the lines wait in the queue for up to flush_interval seconds:
+    assert len(_read_lines(log_path=logger.log_path)) < 100
+
+    logger.exception(msg='failure')
+
+    lines = _read_lines(log_path=logger.log_path)
+
+    assert len(lines) == 101
+    assert [line.split(']: ')[1] for line in lines] == ['line '+str(i) for i in range(100)]+['failure']
+    assert '[EXCEPTION, logger]' in lines[-1]
+
+
+def _log_in_child_process(logger):
+    logger.info(msg='child line')
+    #the processes started by the module multiprocessing exit without running the functions registered with atexit:
+    flush_all_loggers()
+
+
+def test_forked_process_writes_its_own_lines(tmp_path):
+    logger = Logger(name_obj_logging='logger', mode='file', log_path=str(tmp_path), flush_interval=60.)
+    logger.info(msg='parent line')
+
+    #the child process does not inherit the background thread of the parent process:
+    child_process = multiprocessing.get_context('fork').Process(target=_log_in_child_process, args=(logger,))
+    child_process.start()
+    child_process.join(timeout=30)
+
+    assert child_process.exitcode == 0
+
+    logger.flush()
+
+    assert sorted(line.split(']: ')[1] for line in _read_lines(log_path=logger.log_path)) == ['child line', 'parent line']
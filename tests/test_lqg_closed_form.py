@@ -0,0 +1,56 @@
+"""
+Tests of the closed form evaluation of affine policies on the LQG environment.
+"""
+
+import numpy as np
+
+from ARLO.environment.environment import LQG
+
+
+def _make_lqg(max_pos, max_action):
+    env = LQG(obj_name='lqg', A=0.9*np.eye(2), B=np.eye(2), Q=np.eye(2), R=np.eye(2), max_pos=max_pos,
+              max_action=max_action, env_noise=0.1*np.eye(2), controller_noise=0.01*np.eye(2), horizon=20, gamma=0.95,
+              seeder=1, verbosity=0)
+    env.is_eval_phase = True
+
+    return env
+
+
+def _rollout(env, K, k, n_episodes):
+    returns = []
+    for _ in range(n_episodes):
+        state = env.reset()
+        discounted_return = 0
+        for t in range(env.horizon):
+            state, reward, _, _ = env.step(np.dot(K, state)+k)
+            discounted_return += (env.gamma**t)*reward
+        returns.append(discounted_return)
+
+    return np.mean(returns), np.std(returns)/np.sqrt(n_episodes)
+
+
+def test_closed_form_matches_rollouts():
+    env = _make_lqg(max_pos=10, max_action=10)
+    K = -0.5*np.eye(2)
+    k = np.array([0.1, -0.2])
+
+    closed_form_eval = env.evaluate_linear_policy(K=K, k=k)
+    rollout_mean, rollout_std_err = _rollout(env=env, K=K, k=k, n_episodes=2000)
+
+    assert closed_form_eval is not None
+    assert abs(closed_form_eval-rollout_mean) < 4*rollout_std_err
+
+
+def test_closed_form_is_not_computed_if_the_actions_are_clipped():
+    env = _make_lqg(max_pos=1, max_action=0.3)
+    K = -0.5*np.eye(2)
+
+    assert env.evaluate_linear_policy(K=K, k=np.zeros(2)) is None
+    assert env.evaluate_linear_policy(K=K, k=np.zeros(2), check_bounds=False) is not None
+
+
+def test_closed_form_is_not_computed_if_the_states_are_clipped():
+    env = _make_lqg(max_pos=1, max_action=10)
+
+    #a zero gain leaves the noise to accumulate up to the bounds of the states:
+    assert env.evaluate_linear_policy(K=np.zeros((2, 2)), k=np.array([0.5, 0.5])) is None
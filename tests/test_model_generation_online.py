@@ -0,0 +1,74 @@
+"""
+Tests of the status of the runs of the Class ModelGenerationMushroomOnline sent to the API.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+
+from ARLO.block.model_generation_online import ModelGenerationMushroomOnline
+from ARLO.environment.environment import LQG
+from ARLO.metric.metric import DiscountedReward
+
+
+class _LinearPolicy:
+    def draw_action(self, state):
+        return -np.array(state)
+
+
+class _ToyOnline(ModelGenerationMushroomOnline):
+    def __init__(self):
+        super().__init__(eval_metric=DiscountedReward(obj_name='metric', n_episodes=2, verbosity=0), obj_name='toy_online',
+                         verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.fully_instantiated = True
+        self.regressor_type = 'generic_regressor'
+        self.deterministic_output_policy = False
+        self.algo_params = {'n_epochs': SimpleNamespace(current_actual_value=3),
+                            'n_steps': SimpleNamespace(current_actual_value=5),
+                            'n_steps_per_fit': SimpleNamespace(current_actual_value=1),
+                            'n_episodes': SimpleNamespace(current_actual_value=None),
+                            'n_episodes_per_fit': SimpleNamespace(current_actual_value=None),
+                            'mdp_info': SimpleNamespace(obj_name='mdp_info_toy')}
+
+    def _create_core(self, env):
+        self.core = SimpleNamespace(learn=lambda **kwargs: None)
+        self.algo_object = SimpleNamespace(policy=_LinearPolicy())
+
+    def full_block_instantiation(self, info_MDP):
+        return True
+
+    def get_params(self):
+        return {}
+
+    def set_params(self, new_params):
+        return True
+
+    def analyse(self):
+        pass
+
+
+def _learn(monkeypatch, epoch_callback):
+    models_payloads = []
+
+    def _post(url, json):
+        if(url.endswith('/api/models')):
+            models_payloads.append(dict(json))
+
+    monkeypatch.setattr(requests, 'post', _post)
+
+    block = _ToyOnline()
+    block.epoch_callback = epoch_callback
+    block.learn(env=LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+                        env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0))
+
+    assert block.is_learn_successful
+
+    return [payload['status'] for payload in models_payloads]
+
+
+def test_stopped_run_is_reported_as_pruned(monkeypatch):
+    assert _learn(monkeypatch=monkeypatch, epoch_callback=None) == ['running', 'finished']
+    assert _learn(monkeypatch=monkeypatch, epoch_callback=lambda n_epoch, tmp_eval: n_epoch >= 1) == ['running', 'pruned']
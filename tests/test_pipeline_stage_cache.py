@@ -0,0 +1,112 @@
+"""
+Tests of the keys and of the sharing of the stages of the Class PipelineStageCache.
+"""
+
+import copy
+import gc
+import os
+import pickle
+
+import numpy as np
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.metric.metric import DiscountedReward
+from ARLO.rl_pipeline.pipeline_stage_cache import PipelineStageCache
+
+
+class _ToyBlock(Block):
+    def __init__(self, x, obj_name='block', seeder=2):
+        super().__init__(eval_metric=DiscountedReward(obj_name='metric', n_episodes=10, verbosity=0), obj_name=obj_name,
+                         seeder=seeder, verbosity=0)
+
+        self.params = {'x': Real(hp_name='x', current_actual_value=x, range_of_values=[-10, 10], to_mutate=True,
+                                 obj_name='x', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        return BlockOutput(obj_name=self.obj_name+'_result', verbosity=0)
+
+
+def _make_lqg(A=np.eye(1), seeder=1):
+    return LQG(obj_name='lqg', A=A, B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=seeder, verbosity=0)
+
+
+def _store_stage(cache, x):
+    block = _ToyBlock(x=x)
+    key = cache.get_stage_key(block=block, input_key=cache.get_input_key(env=_make_lqg()))
+    cache.store(key=key, block=block, block_res=block.learn())
+
+    return key
+
+
+def test_pipeline_stage_key_depends_on_block_and_input():
+    cache = PipelineStageCache(obj_name='cache', verbosity=0)
+    input_key = cache.get_input_key(env=_make_lqg())
+
+    stage_key = cache.get_stage_key(block=_ToyBlock(x=1.), input_key=input_key)
+
+    assert input_key == cache.get_input_key(env=_make_lqg())
+    assert input_key != cache.get_input_key(env=_make_lqg(A=2*np.eye(1)))
+    assert stage_key == cache.get_stage_key(block=_ToyBlock(x=1.), input_key=input_key)
+    assert stage_key != cache.get_stage_key(block=_ToyBlock(x=2.), input_key=input_key)
+    assert stage_key != cache.get_stage_key(block=_ToyBlock(x=1., seeder=3), input_key=input_key)
+    #the key of a stage identifies the whole prefix of the pipeline:
+    assert stage_key != cache.get_stage_key(block=_ToyBlock(x=1.), input_key=stage_key)
+
+
+def test_pipeline_stage_cache_is_shared_by_copies_and_pickles():
+    cache = PipelineStageCache(obj_name='cache', verbosity=0)
+    key = _store_stage(cache=cache, x=1.)
+
+    assert copy.deepcopy(cache) is cache
+
+    #the stages kept in memory are written in the spill_path, which is the cache_path of the pickled copies:
+    unpickled_cache = pickle.loads(pickle.dumps(cache))
+
+    assert cache.cache_path is None
+    assert unpickled_cache.cache_path == cache.spill_path
+
+    cached_block, cached_res = unpickled_cache.get_cached_stage(key=key, block=_ToyBlock(x=1., obj_name='new_block'))
+
+    assert cached_block.obj_name == 'new_block'
+    assert cached_block.params['x'].current_actual_value == 1.
+    assert cached_res.obj_name == 'block_result'
+
+    #the stages stored by the pickled copies are found by the cache:
+    other_key = _store_stage(cache=unpickled_cache, x=2.)
+
+    assert cache.lookup(key=other_key) is not None
+
+
+def test_pipeline_stage_cache_removes_its_spill_path():
+    cache = PipelineStageCache(obj_name='cache', verbosity=0)
+    _store_stage(cache=cache, x=1.)
+    unpickled_cache = pickle.loads(pickle.dumps(cache))
+    spill_path = cache.spill_path
+
+    assert os.listdir(spill_path) != []
+
+    #the pickled copies do not own the folder:
+    del unpickled_cache
+    gc.collect()
+
+    assert os.path.isdir(spill_path)
+
+    del cache
+    gc.collect()
+
+    assert not os.path.isdir(spill_path)
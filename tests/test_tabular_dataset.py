@@ -0,0 +1,114 @@
+"""
+Tests of the columnar storage of the Class TabularDataSet and of the Class TabularDataSetView.
+"""
+
+import os
+import pickle
+
+import numpy as np
+
+from ARLO.dataset.dataset import TabularDataSet, TabularDataSetView, load_tabular_dataset
+
+
+def _make_dataset(n_samples, obj_name='data'):
+    data = TabularDataSet(dataset=None, observation_space=None, action_space=None, discrete_actions=True,
+                          discrete_observations=False, gamma=0.9, horizon=10, obj_name=obj_name, seeder=1, verbosity=0)
+
+    prng = np.random.default_rng(1)
+    episode_terminals = np.zeros(n_samples, dtype=bool)
+    episode_terminals[9::10] = True
+    data.set_columns(states=prng.random((n_samples, 3)), actions=prng.integers(0, 2, size=(n_samples, 1)),
+                     rewards=np.arange(n_samples, dtype=float), next_states=prng.random((n_samples, 3)),
+                     absorbing=np.zeros(n_samples, dtype=bool), episode_terminals=episode_terminals)
+
+    return data
+
+
+def _assert_same_columns(data_1, data_2):
+    for column_1, column_2 in zip(data_1.parse_data(), data_2.parse_data()):
+        np.testing.assert_array_equal(column_1, column_2)
+
+
+def test_save_and_load_columns_round_trip(tmp_path):
+    data = _make_dataset(n_samples=1000)
+
+    columns_path = data.save_columns(columns_path=str(tmp_path/'columns'))
+    loaded_data = load_tabular_dataset(columns_path=columns_path, verbosity=0)
+
+    assert loaded_data.columns_path == columns_path
+    assert not loaded_data.rewards.flags.owndata
+    assert (loaded_data.gamma, loaded_data.horizon, loaded_data.obj_name) == (data.gamma, data.horizon, data.obj_name)
+    _assert_same_columns(data, loaded_data)
+
+    #a memory-mapped dataset is pickled as the path to its columns:
+    pickled_data = pickle.dumps(loaded_data)
+    unpickled_data = pickle.loads(pickled_data)
+
+    assert len(pickled_data) < data.rewards.nbytes
+    assert unpickled_data.columns_path == columns_path
+    _assert_same_columns(data, unpickled_data)
+
+
+def test_save_columns_replaces_the_previous_content(tmp_path):
+    columns_path = str(tmp_path/'columns')
+    _make_dataset(n_samples=50, obj_name='old').save_columns(columns_path=columns_path)
+    with open(os.path.join(columns_path, 'stale.npy'), 'w') as stale_file:
+        stale_file.write('stale')
+
+    new_data = _make_dataset(n_samples=30, obj_name='new')
+    new_data.save_columns(columns_path=columns_path)
+    loaded_data = load_tabular_dataset(columns_path=columns_path, verbosity=0)
+
+    assert 'stale.npy' not in os.listdir(columns_path)
+    #neither the temporary directory nor the previous one are left next to columns_path:
+    assert os.listdir(str(tmp_path)) == ['columns']
+    assert loaded_data.obj_name == 'new'
+    _assert_same_columns(new_data, loaded_data)
+
+
+def test_view_over_in_memory_dataset_pickles_only_its_rows():
+    data = _make_dataset(n_samples=100000)
+    view = TabularDataSetView(parent_data=data, rows=[5, 7, 7, 9], obj_name='view')
+
+    pickled_view = pickle.dumps(view)
+    unpickled_view = pickle.loads(pickled_view)
+
+    assert len(pickled_view) < len(pickle.dumps(data))/100
+    assert len(unpickled_view.parent_data) == 4
+    assert unpickled_view.rows is None
+    _assert_same_columns(view, unpickled_view)
+
+    #pickling does not modify the view:
+    assert view.parent_data is data
+    np.testing.assert_array_equal(view.rows, [5, 7, 7, 9])
+
+
+def test_view_over_memory_mapped_dataset_pickles_path_and_rows(tmp_path):
+    data = _make_dataset(n_samples=1000)
+    loaded_data = load_tabular_dataset(columns_path=data.save_columns(columns_path=str(tmp_path/'columns')), verbosity=0)
+    view = TabularDataSetView(parent_data=loaded_data, rows=[5, 7, 7, 9], obj_name='view')
+
+    unpickled_view = pickle.loads(pickle.dumps(view))
+
+    assert unpickled_view.parent_data.columns_path == loaded_data.columns_path
+    assert not unpickled_view.parent_data.rewards.flags.owndata
+    np.testing.assert_array_equal(unpickled_view.rows, [5, 7, 7, 9])
+    _assert_same_columns(view, unpickled_view)
+
+
+def test_view_has_its_own_prng_and_logger():
+    data = _make_dataset(n_samples=100)
+    parent_prng_state = data.local_prng.bit_generator.state
+    view = TabularDataSetView(parent_data=data, rows=[5, 7, 7, 9], obj_name='view')
+
+    view.local_prng.random()
+    view.set_local_prng(new_seeder=3)
+    view.update_verbosity(new_verbosity=4)
+
+    #the parent dataset is not modified by its views:
+    assert data.local_prng.bit_generator.state == parent_prng_state
+    assert data.seeder == 1
+    assert data.logger.verbosity == 0
+    assert view.logger.name_obj_logging == 'view'
+    assert data.logger.name_obj_logging == 'data'
+    assert view.logger.log_path == data.logger.log_path
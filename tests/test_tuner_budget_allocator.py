@@ -0,0 +1,77 @@
+"""
+Tests of the rounds given to the tuners by the Class TunerBudgetAllocator.
+"""
+
+import copy
+
+import numpy as np
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+from ARLO.tuner.tuner_budget_allocator import TunerBudgetAllocator
+from ARLO.tuner.tuner_genetic import TunerGenetic
+
+
+class _LinearPolicy:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def draw_action(self, state):
+        return -self.gain*np.array(state)
+
+
+class _CountingBlock(Block):
+    n_learns = 0
+
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {'gain': Real(hp_name='gain', current_actual_value=1., range_of_values=[0.5, 2], to_mutate=True,
+                                    obj_name='gain', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        _CountingBlock.n_learns += 1
+
+        self.is_learn_successful = True
+        policy = BasePolicy(policy=_LinearPolicy(gain=self.params['gain'].current_actual_value),
+                            regressor_type='generic_regressor', obj_name='policy', verbosity=0)
+
+        return BlockOutput(obj_name=self.obj_name+'_result', policy=policy, verbosity=0)
+
+
+def _make_lqg():
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def test_first_genetic_round_is_charged_for_the_starting_block(tmp_path):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    tuner = TunerGenetic(block_to_opt=_CountingBlock(eval_metric=metric), eval_metric=metric,
+                         input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner',
+                         checkpoint_log_path=str(tmp_path), n_agents=2, n_generations=5, verbosity=0)
+    allocator = TunerBudgetAllocator(obj_name='allocator', total_budget=6, verbosity=0)
+
+    _CountingBlock.n_learns = 0
+    tuners_results = allocator.run(tuners=[tuner], tuners_names=['genetic'], eval_metric=metric, train_datas=[None],
+                                   envs=[_make_lqg()])
+
+    #the first round learns the block_to_opt and 2 agents, the second round 2 agents: a third round does not fit.
+    assert tuners_results[0][0] is not None
+    assert _CountingBlock.n_learns == 5
+    assert allocator.remaining_budget == 1
@@ -0,0 +1,217 @@
+"""
+Tests of the asynchronous steady-state tuning, of the resumed tuning and of the surrogate model of the Class TunerGenetic.
+"""
+
+import copy
+import glob
+import os
+
+import cloudpickle
+import numpy as np
+import pytest
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+from ARLO.tuner.tuner_genetic import TunerGenetic
+
+
+class _LinearPolicy:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def draw_action(self, state):
+        return -self.gain*np.array(state)
+
+
+class _LinearBlock(Block):
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {'gain': Real(hp_name='gain', current_actual_value=1., range_of_values=[0.5, 2], to_mutate=True,
+                                    obj_name='gain', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        policy = BasePolicy(policy=_LinearPolicy(gain=self.params['gain'].current_actual_value),
+                            regressor_type='generic_regressor', obj_name='policy', verbosity=0)
+
+        return BlockOutput(obj_name=self.obj_name+'_result', policy=policy, verbosity=0)
+
+
+class _RecordingTunerGenetic(TunerGenetic):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.sent_tasks = []
+
+    def _get_worker_task(self, **kwargs):
+        task = super()._get_worker_task(**kwargs)
+        self.sent_tasks.append(task)
+        return task
+
+
+def _make_lqg():
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def _make_tuner(n_generations, n_jobs=2, checkpoint_log_path=None, resume_from=None):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+
+    return _RecordingTunerGenetic(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                                  input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner',
+                                  checkpoint_log_path=checkpoint_log_path, n_agents=4, n_generations=n_generations,
+                                  n_jobs=n_jobs, asynchronous=True, resume_from=resume_from, verbosity=0)
+
+
+class _StopTuning(Exception):
+    pass
+
+
+class _StoppedTunerGenetic(TunerGenetic):
+    def __init__(self, n_completed_to_stop, **kwargs):
+        super().__init__(**kwargs)
+
+        self.n_completed_to_stop = n_completed_to_stop
+
+    def _save_tuner_state(self, agents_population, n_completed, pending_tasks=None):
+        super()._save_tuner_state(agents_population=agents_population, n_completed=n_completed, pending_tasks=pending_tasks)
+
+        #the tuning procedure dies right after the tuner state is written:
+        if(n_completed == self.n_completed_to_stop):
+            raise _StopTuning()
+
+
+def _make_generational_tuner(checkpoint_log_path, resume_from=None, n_completed_to_stop=None):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+
+    return _StoppedTunerGenetic(n_completed_to_stop=n_completed_to_stop, block_to_opt=_LinearBlock(eval_metric=metric),
+                                eval_metric=metric, input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0),
+                                obj_name='tuner', checkpoint_log_path=checkpoint_log_path, n_agents=4, n_generations=4,
+                                resume_from=resume_from, verbosity=0)
+
+
+def test_asynchronous_tuning_needs_worker_processes():
+    with pytest.raises(ValueError):
+        _make_tuner(n_generations=2, n_jobs=1)
+
+
+def test_asynchronous_trial_numbers_are_unique():
+    tuner = _make_tuner(n_generations=3)
+    best_agent, _ = tuner.tune(env=_make_lqg())
+
+    trial_numbers = [task['trial_number'] for task in tuner.sent_tasks]
+
+    assert best_agent is not None
+    assert len(trial_numbers) == 12
+    assert len(set(trial_numbers)) == 12
+
+
+def test_asynchronous_resume_learns_the_pending_agents(tmp_path):
+    first_tuner = _make_tuner(n_generations=1, checkpoint_log_path=str(tmp_path))
+    first_tuner.tune(env=_make_lqg())
+
+    #the tuner state is written as if the tuning procedure had been stopped while an agent was being learnt:
+    tuner_state_path = glob.glob(os.path.join(str(tmp_path), '*', 'tuner_tuner_state.ckpt'))[0]
+    with open(tuner_state_path, 'rb') as state_file:
+        tuner_state = cloudpickle.load(state_file)
+
+    pending_task = copy.deepcopy(first_tuner.sent_tasks[0])
+    pending_task['params']['gain'].current_actual_value = 1.234
+    pending_task['trial_number'] = 7
+    tuner_state['pending_tasks'] = [pending_task]
+
+    with open(tuner_state_path, 'wb') as state_file:
+        cloudpickle.dump(tuner_state, state_file)
+
+    tuner = _make_tuner(n_generations=2, checkpoint_log_path=str(tmp_path/'resumed'), resume_from=tuner_state_path)
+    tuner.tune(env=_make_lqg())
+
+    #the pending agent is learnt again together with the 3 agents that were never created:
+    assert len(tuner.sent_tasks) == 4
+    assert tuner.sent_tasks[0]['params']['gain'].current_actual_value == 1.234
+    assert [task['trial_number'] for task in tuner.sent_tasks] == [7, 8, 9, 10]
+
+
+def test_resumed_tuning_ends_as_the_uninterrupted_one(tmp_path):
+    full_tuner = _make_generational_tuner(checkpoint_log_path=str(tmp_path/'full'))
+    full_best_agent, full_best_agent_eval = full_tuner.tune(env=_make_lqg())
+
+    stopped_tuner = _make_generational_tuner(checkpoint_log_path=str(tmp_path/'stopped'), n_completed_to_stop=2)
+    with pytest.raises(_StopTuning):
+        stopped_tuner.tune(env=_make_lqg())
+
+    tuner_state_path = glob.glob(os.path.join(str(tmp_path/'stopped'), '*', 'tuner_tuner_state.ckpt'))[0]
+    tuner = _make_generational_tuner(checkpoint_log_path=str(tmp_path/'resumed'), resume_from=tuner_state_path)
+    best_agent, best_agent_eval = tuner.tune(env=_make_lqg())
+
+    #the generations after the tuner state are the same generations of the uninterrupted tuning procedure:
+    assert tuner.is_tune_successful
+    assert tuner.trial_number == full_tuner.trial_number
+    assert best_agent_eval == full_best_agent_eval
+    assert best_agent.params['gain'].current_actual_value == full_best_agent.params['gain'].current_actual_value
+
+
+def test_surrogate_model_is_warm_started():
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    tuner = TunerGenetic(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                         input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner', n_agents=2,
+                         n_screening_candidates=4, verbosity=0)
+
+    def _make_agents(gains):
+        agents = []
+        for gain in gains:
+            agent = _LinearBlock(eval_metric=metric)
+            agent.params['gain'].current_actual_value = gain
+            agent.block_eval = -gain
+            agents.append(agent)
+
+        return agents
+
+    tuner._update_surrogate_samples(agents=_make_agents(gains=[0.5, 1., 1.5, 2.]))
+    tuner._screen_with_surrogate(candidates=_make_agents(gains=[0.6, 1.1, 1.6, 1.9]))
+    first_model = tuner._surrogate_model
+
+    #the second fit adds trees to the previous model, only for the new agents:
+    tuner._update_surrogate_samples(agents=_make_agents(gains=[0.7, 1.8]))
+    selected_agents = tuner._screen_with_surrogate(candidates=_make_agents(gains=[0.6, 1.1, 1.6, 1.9]))
+
+    assert tuner._n_surrogate_samples_fitted == 6
+    assert tuner._surrogate_model.tree_count_ == first_model.tree_count_+100
+    assert [agent.params['gain'].current_actual_value for agent in selected_agents] == [0.6, 1.1]
+
+
+def test_steady_state_population_compares_the_means():
+    metric = DiscountedReward(obj_name='metric', n_episodes=4, common_random_numbers=True, verbosity=0)
+    tuner = TunerGenetic(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                         input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner', n_agents=2,
+                         verbosity=0)
+
+    def _make_agent(eps_eval):
+        agent = _LinearBlock(eval_metric=metric)
+        agent.block_eps_eval = np.array(eps_eval, dtype=float)
+        agent.block_eval = float(np.mean(eps_eval))
+        return agent
+
+    agents_population = [_make_agent(eps_eval=[0., 0., 0., 0.]), _make_agent(eps_eval=[5., 5., 5., 5.])]
+    #the new agent is better on average than the worst agent, but not significantly better on the paired episodes:
+    new_agent = _make_agent(eps_eval=[3., -2., 2., -2.])
+    tuner._insert_in_steady_state_population(agents_population=agents_population, tmp_agent=new_agent)
+
+    assert agents_population[0] is new_agent
@@ -0,0 +1,99 @@
+"""
+Tests of the grids of the explanatory heatmap of the hyper-parameters created by the Class Tuner.
+"""
+
+import copy
+
+import numpy as np
+import plotly.graph_objects as go
+
+import ARLO.tuner.tuner as tuner_module
+from ARLO.block.block import Block
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.tuner.tuner_genetic import TunerGenetic
+from ARLO.tuner.tuner_results_index import TunerResultsIndex
+
+
+class _ThreeParamsBlock(Block):
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {}
+        for hp_name, range_of_values in [('a', [0., 1.]), ('b', [10., 20.]), ('c', [-5., 5.])]:
+            self.params[hp_name] = Real(hp_name=hp_name, current_actual_value=range_of_values[0],
+                                        range_of_values=range_of_values, to_mutate=True, obj_name=hp_name, verbosity=0)
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        pass
+
+
+class _LinearRegressor:
+    #each hyper-parameter has its own scale in the prediction: the position of each value in the grids can be checked.
+    def __init__(self, **kwargs):
+        pass
+
+    def fit(self, X, y):
+        pass
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ np.array([1., 100., 10000.])
+
+
+def test_heatmap_grids_follow_the_axes(tmp_path, monkeypatch):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    block = _ThreeParamsBlock(eval_metric=metric)
+    tuner = TunerGenetic(block_to_opt=block, eval_metric=metric, input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0),
+                         obj_name='tuner', n_agents=2, verbosity=0)
+
+    tuner.checkpoint_log_path = str(tmp_path)
+    tuner.results_index = TunerResultsIndex(obj_name='results_index', index_path=str(tmp_path/'results_index.jsonl'),
+                                            verbosity=0)
+    tuner.results_index.write_header(block=block)
+    for trial_id, (a, b, c, block_eval) in enumerate([(0.5, 12., 1., -2.), (0.2, 15., -3., -1.), (0.9, 18., 4., -5.)]):
+        for hp_name, hp_value in zip(['a', 'b', 'c'], [a, b, c]):
+            block.params[hp_name].current_actual_value = hp_value
+        tuner.results_index.append_trial(trial_id=trial_id, block=block, block_eval=block_eval, wall_time=0.1)
+
+    figures = []
+    monkeypatch.setattr(tuner_module, 'CatBoostRegressor', _LinearRegressor)
+    monkeypatch.setattr(go.Figure, 'write_html', lambda fig, *args, **kwargs: figures.append(fig))
+
+    tuner.create_explanatory_heatmap_hyperparameters()
+
+    #the hyper-parameters not in a grid have the values of the best trial:
+    best_values = {'a': 0.2, 'b': 15., 'c': -3.}
+    hp_buttons = figures[0].layout.updatemenus[-1].buttons
+
+    assert [button.label for button in hp_buttons] == ['a-b', 'a-c', 'b-c']
+    for button in hp_buttons:
+        hp_x, hp_y = button.label.split('-')
+        x_range = np.asarray(button.args[0]['x'][0])
+        y_range = np.asarray(button.args[0]['y'][0])
+        z = np.asarray(button.args[0]['z'][0])
+
+        assert z.shape == (100, 100)
+        np.testing.assert_allclose(x_range[[0, -1]], block.params[hp_x].range_of_values)
+        np.testing.assert_allclose(y_range[[0, -1]], block.params[hp_y].range_of_values)
+
+        #the row i and the column k of the grid are the prediction for the i-th value of Y and the k-th value of X:
+        for i, k in [(0, 0), (3, 97), (99, 42)]:
+            sample = dict(best_values)
+            sample[hp_x] = x_range[k]
+            sample[hp_y] = y_range[i]
+
+            np.testing.assert_allclose(z[i, k], _LinearRegressor().predict([[sample['a'], sample['b'], sample['c']]])[0])
+
+    np.testing.assert_allclose(np.asarray(figures[0].data[0].z), np.asarray(hp_buttons[0].args[0]['z'][0]))
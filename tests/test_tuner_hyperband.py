@@ -0,0 +1,112 @@
+"""
+Tests of the promotions of the configurations done by the Class TunerHyperband.
+"""
+
+import copy
+
+import numpy as np
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+from ARLO.tuner.tuner_hyperband import TunerHyperband
+
+
+class _LinearPolicy:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def draw_action(self, state):
+        return -self.gain*np.array(state)
+
+
+class _LinearBlock(Block):
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {'gain': Real(hp_name='gain', current_actual_value=1., range_of_values=[0.5, 2], to_mutate=True,
+                                    obj_name='gain', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        policy = BasePolicy(policy=_LinearPolicy(gain=self.params['gain'].current_actual_value),
+                            regressor_type='generic_regressor', obj_name='policy', verbosity=0)
+
+        return BlockOutput(obj_name=self.obj_name+'_result', policy=policy, verbosity=0)
+
+
+def _make_lqg():
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def _tune(mode, checkpoint_log_path):
+    #the fidelity is the number of episodes of the metric: the budgets are 1, 3 and 9 episodes.
+    metric = DiscountedReward(obj_name='metric', n_episodes=9, verbosity=0)
+    tuner = TunerHyperband(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                           input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner',
+                           fidelity_name='n_episodes', min_fidelity=1, max_fidelity=9, mode=mode,
+                           checkpoint_log_path=checkpoint_log_path, verbosity=0)
+
+    best_agent, best_agent_eval = tuner.tune(env=_make_lqg())
+
+    assert tuner.is_tune_successful
+    assert best_agent_eval == best_agent.block_eval
+
+    return tuner
+
+
+def _get_evals(tuner, fidelity):
+    return {config_idx: tmp_eval for config_idx, tmp_fidelity, tmp_eval in tuner.evaluations if tmp_fidelity == fidelity}
+
+
+def test_successive_halving_promotes_the_best_configurations(tmp_path):
+    tuner = _tune(mode='successive_halving', checkpoint_log_path=str(tmp_path))
+
+    evals_per_fidelity = [_get_evals(tuner=tuner, fidelity=tmp_fidelity) for tmp_fidelity in [1, 3, 9]]
+
+    assert [len(tmp_evals) for tmp_evals in evals_per_fidelity] == [9, 3, 1]
+    #the metric is maximised: only the best third of each budget gets the next budget.
+    for tmp_evals, next_evals in zip(evals_per_fidelity[:-1], evals_per_fidelity[1:]):
+        assert set(next_evals) == set(sorted(tmp_evals, key=tmp_evals.get, reverse=True)[:len(next_evals)])
+
+    #the best agent is the one evaluated with the biggest budget:
+    assert tuner.best_agent_fidelity == 9
+    assert tuner.best_agent.block_eval == list(evals_per_fidelity[2].values())[0]
+
+
+def test_asha_promotes_the_configurations_in_the_best_third_of_their_budget(tmp_path):
+    tuner = _tune(mode='asha', checkpoint_log_path=str(tmp_path))
+
+    evals_per_fidelity = [_get_evals(tuner=tuner, fidelity=tmp_fidelity) for tmp_fidelity in [1, 3, 9]]
+
+    assert [len(tmp_evals) for tmp_evals in evals_per_fidelity] == [9, 3, 1]
+
+    #with a single job a configuration is promoted as soon as it is in the best third of the evaluated configurations:
+    n_evaluated = 0
+    for config_idx, tmp_fidelity, _ in tuner.evaluations:
+        if(tmp_fidelity == 1):
+            n_evaluated += 1
+        elif(tmp_fidelity == 3):
+            previous_evals = [tmp_eval for tmp_config_idx, tmp_eval in evals_per_fidelity[0].items()
+                              if tmp_config_idx < n_evaluated]
+            assert evals_per_fidelity[0][config_idx] in sorted(previous_evals, reverse=True)[:n_evaluated//3]
+        else:
+            assert config_idx in evals_per_fidelity[1]
+
+    assert tuner.best_agent_fidelity == 9
@@ -0,0 +1,104 @@
+"""
+Tests of the parallel and of the resumed tuning of the Class TunerOptuna.
+"""
+
+import copy
+
+import numpy as np
+import optuna
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+from ARLO.tuner.tuner_optuna import TunerOptuna
+
+
+class _LinearPolicy:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def draw_action(self, state):
+        return self.gain*np.array(state)
+
+
+class _LinearBlock(Block):
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {'gain': Real(hp_name='gain', current_actual_value=0., range_of_values=[-2, 0], to_mutate=True,
+                                    obj_name='gain', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        policy = BasePolicy(policy=_LinearPolicy(gain=self.params['gain'].current_actual_value),
+                            regressor_type='generic_regressor', obj_name='policy', verbosity=0)
+
+        return BlockOutput(obj_name=self.obj_name+'_result', policy=policy, verbosity=0)
+
+
+def _make_lqg():
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def _make_tuner(n_trials, n_jobs=1, job_type='thread', storage=None):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+
+    return TunerOptuna(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                       input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner', sampler='RANDOM',
+                       n_trials=n_trials, n_jobs=n_jobs, job_type=job_type, pruner='NONE', storage=storage, verbosity=0)
+
+
+def _load_study(storage):
+    return optuna.load_study(study_name='tuner_optuna_study', storage='sqlite:///'+storage)
+
+
+def test_process_jobs_without_storage_run_on_threads():
+    tuner = _make_tuner(n_trials=4, n_jobs=2, job_type='process')
+
+    best_agent, best_agent_eval = tuner.tune(env=_make_lqg())
+
+    assert best_agent is not None
+    assert np.isfinite(best_agent_eval)
+
+
+def test_tuning_is_resumed_from_the_storage(tmp_path):
+    storage = str(tmp_path/'study.db')
+
+    _make_tuner(n_trials=3, storage=storage).tune(env=_make_lqg())
+    first_params = [trial.params for trial in _load_study(storage=storage).trials]
+
+    _make_tuner(n_trials=5, storage=storage).tune(env=_make_lqg())
+    trials = _load_study(storage=storage).trials
+
+    #only the missing trials are run:
+    assert len(trials) == 5
+    assert [trial.params for trial in trials[:3]] == first_params
+
+
+def test_worker_processes_load_different_inputs(tmp_path):
+    storage = str(tmp_path/'study.db')
+    tuner = _make_tuner(n_trials=1, storage=storage)
+    tuner.tune(env=_make_lqg())
+
+    #each worker process runs on its own copy of the tuner:
+    workers = [copy.deepcopy(tuner) for _ in range(2)]
+    for worker_idx, worker in enumerate(workers):
+        worker._optimize_on_worker(worker_idx=worker_idx, study_name='tuner_optuna_study', storage_url='sqlite:///'+storage)
+
+    assert workers[0].input_loader.local_prng.random() != workers[1].input_loader.local_prng.random()
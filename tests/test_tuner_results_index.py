@@ -0,0 +1,128 @@
+"""
+Tests of the table of the trials written by the Class TunerResultsIndex.
+"""
+
+import copy
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from ARLO.block.block import Block
+from ARLO.block.block_output import BlockOutput
+from ARLO.environment.environment import LQG
+from ARLO.hyperparameter.hyperparameter import Real
+from ARLO.input_loader.input_loader import LoadSameEnv
+from ARLO.metric.metric import DiscountedReward
+from ARLO.policy.policy import BasePolicy
+from ARLO.tuner.tuner_genetic import TunerGenetic
+from ARLO.tuner.tuner_results_index import TunerResultsIndex
+
+
+class _LinearPolicy:
+    def __init__(self, gain):
+        self.gain = gain
+
+    def draw_action(self, state):
+        return -self.gain*np.array(state)
+
+
+class _LinearBlock(Block):
+    def __init__(self, eval_metric, obj_name='block', seeder=2):
+        super().__init__(eval_metric=eval_metric, obj_name=obj_name, seeder=seeder, verbosity=0)
+
+        self.pipeline_type = 'online'
+        self.params = {'gain': Real(hp_name='gain', current_actual_value=1., range_of_values=[0.5, 2], to_mutate=True,
+                                    obj_name='gain', verbosity=0)}
+
+    def get_params(self):
+        return copy.deepcopy(self.params)
+
+    def set_params(self, new_params):
+        self.params = new_params
+        return True
+
+    def analyse(self):
+        pass
+
+    def learn(self, train_data=None, env=None):
+        self.is_learn_successful = True
+        policy = BasePolicy(policy=_LinearPolicy(gain=self.params['gain'].current_actual_value),
+                            regressor_type='generic_regressor', obj_name='policy', verbosity=0)
+
+        return BlockOutput(obj_name=self.obj_name+'_result', policy=policy, verbosity=0)
+
+
+class _StopTuning(Exception):
+    pass
+
+
+class _StoppedTunerGenetic(TunerGenetic):
+    def _save_tuner_state(self, agents_population, n_completed, pending_tasks=None):
+        super()._save_tuner_state(agents_population=agents_population, n_completed=n_completed, pending_tasks=pending_tasks)
+
+        #the tuning procedure dies right after the first tuner state is written:
+        raise _StopTuning()
+
+
+def _make_lqg():
+    return LQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+               env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def _make_tuner(tuner_class, checkpoint_log_path, resume_from=None):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+
+    return tuner_class(block_to_opt=_LinearBlock(eval_metric=metric), eval_metric=metric,
+                       input_loader=LoadSameEnv(obj_name='input_loader', verbosity=0), obj_name='tuner',
+                       checkpoint_log_path=checkpoint_log_path, n_agents=3, n_generations=3, resume_from=resume_from,
+                       verbosity=0)
+
+
+def test_table_contains_the_header_and_the_trials(tmp_path):
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    block = _LinearBlock(eval_metric=metric)
+    results_index = TunerResultsIndex(obj_name='results_index', index_path=str(tmp_path/'results_index.jsonl'), verbosity=0)
+
+    results_index.write_header(block=block)
+    for trial_id, block_eval in enumerate([-3., np.float64(-1.), None, np.nan]):
+        block.params['gain'].current_actual_value = np.float64(trial_id)
+        results_index.append_trial(trial_id=trial_id, block=block, block_eval=block_eval, wall_time=0.5)
+
+    #a partial line, written by a tuning procedure that died while writing, is skipped:
+    with open(results_index.index_path, 'a') as index_file:
+        index_file.write('{"record_type": "trial", "trial_id"')
+
+    header, trials = results_index.read()
+
+    assert header['hyperparameters'] == {'gain': dict(hp_type='Real', to_mutate=True, range_of_values=[0.5, 2],
+                                                      possible_values=None)}
+    assert [trial['trial_id'] for trial in trials] == ['0', '1', '2', '3']
+    assert [trial['params']['gain'] for trial in trials] == [0., 1., 2., 3.]
+    assert results_index.get_best_trial(eval_metric=metric, trials=trials)['trial_id'] == '1'
+
+
+def test_resumed_tuner_copies_the_previous_trials(tmp_path):
+    stopped_tuner = _make_tuner(tuner_class=_StoppedTunerGenetic, checkpoint_log_path=str(tmp_path/'stopped'))
+    with pytest.raises(_StopTuning):
+        stopped_tuner.tune(env=_make_lqg())
+
+    _, stopped_trials = stopped_tuner.results_index.read()
+    tuner_state_path = glob.glob(os.path.join(str(tmp_path/'stopped'), '*', 'tuner_tuner_state.ckpt'))[0]
+
+    tuner = _make_tuner(tuner_class=TunerGenetic, checkpoint_log_path=str(tmp_path/'resumed'), resume_from=tuner_state_path)
+    tuner.tune(env=_make_lqg())
+
+    _, trials = tuner.results_index.read()
+
+    assert len(stopped_trials) == 3
+    assert trials[:3] == stopped_trials
+    assert len(trials) == 3+2*3
+
+    #without a checkpoint_log_path there is no table to copy the previous trials to:
+    tuner = _make_tuner(tuner_class=TunerGenetic, checkpoint_log_path=None, resume_from=tuner_state_path)
+    best_agent, _ = tuner.tune(env=_make_lqg())
+
+    assert tuner.results_index is None
+    assert best_agent is not None
@@ -0,0 +1,64 @@
+"""
+Tests of the concurrent tuners run by the Class TunerScheduler.
+"""
+
+from ARLO.metric.metric import DiscountedReward
+from ARLO.tuner.tuner_scheduler import TunerScheduler
+
+
+class _Block:
+    def __init__(self, eval_metric):
+        self.eval_metric = eval_metric
+
+
+class _Tuner:
+    def __init__(self, eval_metric, obj_name, is_failing=False):
+        self.eval_metric = eval_metric
+        self.block_to_opt = _Block(eval_metric=eval_metric)
+        self.obj_name = obj_name
+        self.checkpoint_log_path = None
+        self.n_jobs = 1
+        self.is_failing = is_failing
+        self.is_tune_successful = False
+        self.tune_metric = None
+
+    def tune(self, train_data=None, env=None):
+        self.tune_metric = self.eval_metric
+        assert self.block_to_opt.eval_metric is self.eval_metric
+
+        if(self.is_failing):
+            raise RuntimeError('failing tuner')
+
+        self.is_tune_successful = True
+        return self.obj_name+'_block', 1.
+
+
+def _run(tuners, n_jobs):
+    scheduler = TunerScheduler(obj_name='scheduler', n_jobs=n_jobs, job_type='thread', verbosity=0)
+
+    return scheduler.run(tuners=tuners, tuners_names=[tmp_tuner.obj_name for tmp_tuner in tuners],
+                         train_datas=[None]*len(tuners), envs=[None]*len(tuners))
+
+
+def test_failing_tuner_does_not_stop_the_others():
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    tuners = [_Tuner(eval_metric=metric, obj_name='failing', is_failing=True), _Tuner(eval_metric=metric, obj_name='tuner')]
+
+    for n_jobs in [1, 2]:
+        tuners_results = _run(tuners=tuners, n_jobs=n_jobs)
+
+        assert tuners_results[0] == (None, None, tuners[0])
+        assert not tuners[0].is_tune_successful
+        assert tuners_results[1] == ('tuner_block', 1., tuners[1])
+
+
+def test_tuners_on_threads_get_their_own_metric():
+    metric = DiscountedReward(obj_name='metric', n_episodes=5, verbosity=0)
+    tuners = [_Tuner(eval_metric=metric, obj_name='tuner_'+str(i)) for i in range(2)]
+
+    _run(tuners=tuners, n_jobs=2)
+
+    assert tuners[0].tune_metric is not metric
+    assert tuners[0].tune_metric is not tuners[1].tune_metric
+    #the tuners get back their metric:
+    assert all((tmp_tuner.eval_metric is metric) and (tmp_tuner.block_to_opt.eval_metric is metric) for tmp_tuner in tuners)
@@ -0,0 +1,63 @@
+"""
+Tests of the persistent worker processes of the Class TunerWorkerPool.
+"""
+
+import os
+
+import pytest
+
+from ARLO.tuner.tuner_worker_pool import TunerWorkerPool
+
+
+class _ToyTuner:
+    def __init__(self):
+        self.n_tasks_run = 0
+
+    def _run_task_on_worker(self, task, train_data=None, env=None):
+        if(task == 'fail'):
+            raise ValueError('failing task')
+
+        #the tuner is resident in the worker process: its members are kept from one task to the next one.
+        self.n_tasks_run += 1
+
+        return dict(task=task, train_data=train_data), (os.getpid(), self.n_tasks_run)
+
+
+def test_workers_keep_the_tuner_and_the_results():
+    with TunerWorkerPool(obj_name='pool', tuner=_ToyTuner(), train_data='data', n_workers=2, verbosity=0) as pool:
+        results = pool.run_tasks(tasks=list(range(6)))
+
+        pids = set(payload[0] for _, payload in results)
+        #each worker process counts the tasks that it ran with its own copy of the tuner:
+        n_tasks_per_worker = {pid: max(payload[1] for _, payload in results if payload[0] == pid) for pid in pids}
+
+        assert len(pids) == 2
+        assert os.getpid() not in pids
+        assert sum(n_tasks_per_worker.values()) == 6
+
+        #the results are in the same order of the tasks and they are kept in the worker processes:
+        assert [pool.fetch(handle=handle) for handle, _ in results] == [dict(task=i, train_data='data') for i in range(6)]
+
+        pool.clear()
+        with pytest.raises(RuntimeError):
+            pool.fetch(handle=results[0][0])
+
+
+def test_submitted_tasks_are_collected_as_soon_as_they_are_done():
+    with TunerWorkerPool(obj_name='pool', tuner=_ToyTuner(), n_workers=2, verbosity=0) as pool:
+        handles = [pool.submit(task=i) for i in range(2)]
+
+        assert pool.n_idle_workers == 0
+
+        finished_handles = []
+        while len(finished_handles) < 2:
+            finished_handles += [handle for handle, _ in pool.wait_any()]
+
+        assert sorted(finished_handles) == sorted(handles)
+        assert pool.n_idle_workers == 2
+
+        #an exception raised in a worker process is raised in the main process and the worker process is still usable:
+        with pytest.raises(RuntimeError):
+            pool.run_tasks(tasks=['fail'])
+
+        assert pool.run_tasks(tasks=[7])[0][1][1] >= 1
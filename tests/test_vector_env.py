@@ -0,0 +1,45 @@
+"""
+Tests of the episodes generated on the Class VectorEnv.
+"""
+
+import numpy as np
+
+from ARLO.block.data_generation import DataGenerationRandomUniformPolicy
+from ARLO.environment.environment import LQG
+from ARLO.environment.vector_env import VectorEnv
+from ARLO.metric.metric import DiscountedReward
+
+
+class _NonAbsorbingLQG(LQG):
+    def step(self, action):
+        #the end of the episodes is only given by the horizon:
+        next_state, reward, _, info = super().step(action)
+        return next_state, reward, False, info
+
+
+def _make_lqg():
+    return _NonAbsorbingLQG(obj_name='lqg', A=np.eye(1), B=np.eye(1), Q=np.eye(1), R=np.eye(1), max_pos=2., max_action=2.,
+                            env_noise=0.1*np.eye(1), controller_noise=0.1*np.eye(1), horizon=5, seeder=1, verbosity=0)
+
+
+def test_vector_env_episodes_match_the_sequential_ones():
+    metric = DiscountedReward(obj_name='metric', n_episodes=1, verbosity=0)
+    data_gen = DataGenerationRandomUniformPolicy(eval_metric=metric, obj_name='data_gen', verbosity=0)
+    env = _make_lqg()
+
+    sequential_samples = data_gen._generate_a_dataset(env=_make_lqg(), n_samples=20, discrete_actions=False)
+
+    with VectorEnv(obj_name='vector_env', env=env, n_envs=1, mode='sync', auto_reset=True, seeder=env.seeder,
+                   verbosity=0) as vector_env:
+        vectorized_columns = data_gen._generate_a_dataset_vectorized(vector_env=vector_env, n_samples=20,
+                                                                     discrete_actions=False)
+
+    sequential_lasts = [sample[5] for sample in sequential_samples]
+
+    #the episodes have the same length: the horizon is checked in the same way:
+    np.testing.assert_array_equal(vectorized_columns[5][:-1], sequential_lasts[:-1])
+    assert np.flatnonzero(sequential_lasts)[0] == 5
+    #each column keeps its own data type:
+    assert vectorized_columns[0].dtype == float
+    assert vectorized_columns[4].dtype == bool
+    assert vectorized_columns[5].dtype == bool